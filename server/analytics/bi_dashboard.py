@@ -492,9 +492,11 @@ class QueryEngine:
             async with self.db_pool.acquire() as conn:
                 rows = await conn.fetch(query)
                 
-            # Convert to DataFrame
+            # Convert to DataFrame column-wise, without an intermediate dict per row
             if rows:
-                data = pd.DataFrame([dict(row) for row in rows])
+                data = pd.DataFrame.from_records(
+                    [tuple(row) for row in rows], columns=list(rows[0].keys())
+                )
                 
                 # Apply aggregation if specified
                 if widget.aggregation != MetricAggregation.COUNT:
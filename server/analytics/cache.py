@@ -6,10 +6,21 @@ Provides Redis-based caching for analytics results to improve performance.
 import json
 import hashlib
 import logging
-from typing import Any, Dict, Optional, Union, TYPE_CHECKING
-from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set, Union, TYPE_CHECKING
 import asyncio
 
+try:
+    from ..core.bounded_cache import BoundedCache
+    from ..core.cache_codecs import CacheCodec
+    from ..core.cache_index import InvertedIndex, RedisTagIndex
+    from ..core.single_flight import CachedValue, Loader, RedisLease, SingleFlight
+except ImportError:
+    # Loaded as a top-level "analytics" package (dashboard sys.path setup)
+    from server.core.bounded_cache import BoundedCache
+    from server.core.cache_codecs import CacheCodec
+    from server.core.cache_index import InvertedIndex, RedisTagIndex
+    from server.core.single_flight import CachedValue, Loader, RedisLease, SingleFlight
+
 if TYPE_CHECKING:
     import redis.asyncio as redis
 
@@ -18,41 +29,61 @@ logger = logging.getLogger(__name__)
 class AnalyticsCache:
     """
     Redis-based cache for analytics results.
-    Provides automatic expiration and cache invalidation.
+    Provides automatic expiration, tag/prefix-indexed invalidation, and
+    stampede-safe ``get_or_compute`` with stale-while-revalidate.
     """
     
-    def __init__(self, redis_url: str = "redis://localhost:6379", default_ttl: int = 3600) -> None:
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379",
+        default_ttl: int = 3600,
+        default_stale_ttl: int = 300,
+        memory_max_bytes: int = 256 * 1024 * 1024
+    ) -> None:
         self.redis_url = redis_url
         self.default_ttl = default_ttl
+        self.default_stale_ttl = default_stale_ttl
         self.redis_client: Optional[Any] = None
         self._connected = False
-        # Initialize in-memory cache attributes (used as fallback)
-        self._memory_cache: Dict[str, Dict[str, Any]] = {}
-        self._cache_timestamps: Dict[str, datetime] = {}
+        # Size-bounded in-memory cache (used as fallback) and its key index
+        self._memory_index = InvertedIndex()
+        self._memory_cache = BoundedCache(
+            max_bytes=memory_max_bytes, default_ttl=default_ttl, on_remove=self._memory_index.remove
+        )
         self._cache: Dict[str, Any] = {}
         self._timestamps: Dict[str, float] = {}
+        self._redis_index: Optional[RedisTagIndex] = None
+        # Header-tagged payloads (orjson/msgpack + lz4/zstd); plain JSON strings
+        # written by earlier versions still decode
+        self._codec = CacheCodec()
+        self._flight = SingleFlight(self._read_entry, self._write_entry)
+        self._compute_tags: Dict[str, Set[str]] = {}
     
     async def connect(self) -> None:
         """Initialize Redis connection"""
         try:
             import redis.asyncio as redis
-            self.redis_client = redis.from_url(self.redis_url, decode_responses=True)
+            self.redis_client = redis.from_url(self.redis_url)
             await self.redis_client.ping()
             self._connected = True
+            self._flight.lease = RedisLease(self.redis_client)
+            self._redis_index = RedisTagIndex(self.redis_client)
             logger.info("Connected to Redis cache")
         except ImportError:
             logger.warning("Redis not available, using in-memory cache")
-            self._memory_cache = {}
-            self._cache_timestamps = {}
+            self._clear_memory()
         except Exception as e:
             logger.warning(f"Failed to connect to Redis: {e}, using in-memory cache")
-            self._memory_cache = {}
-            self._cache_timestamps = {}
+            self._clear_memory()
+    
+    def _clear_memory(self) -> None:
+        self._memory_cache.clear()
+        self._memory_index.clear()
     
     def _generate_cache_key(self, analytics_type: str, parameters: Dict[str, Any]) -> str:
         """Generate a unique cache key for analytics request"""
         # Create a deterministic hash of the parameters
-        param_str = json.dumps(parameters, sort_keys=True)
+        param_str = json.dumps(parameters, sort_keys=True, default=str)
         param_hash = hashlib.md5(param_str.encode()).hexdigest()
         return f"analytics:{analytics_type}:{param_hash}"
     
@@ -64,50 +95,96 @@ class AnalyticsCache:
             try:
                 cached_data = await self.redis_client.get(cache_key)
                 if cached_data:
-                    return json.loads(cached_data)
+                    return self._unwrap(self._codec.decode(cached_data))
             except Exception as e:
                 logger.warning(f"Redis cache get error: {e}")
         else:
-            # Use in-memory cache
-            if cache_key in self._memory_cache:
-                # Check if expired
-                timestamp = self._cache_timestamps.get(cache_key)
-                if timestamp and datetime.now() - timestamp < timedelta(seconds=self.default_ttl):
-                    return self._memory_cache[cache_key]
-                else:
-                    # Remove expired entry
-                    del self._memory_cache[cache_key]
-                    if cache_key in self._cache_timestamps:
-                        del self._cache_timestamps[cache_key]
+            # Use in-memory cache (expired entries are dropped by the cache)
+            cached = self._memory_cache.get(cache_key)
+            if cached is not None:
+                return self._unwrap(cached)
         
         return None
     
+    @staticmethod
+    def _unwrap(cached: Any) -> Optional[Dict[str, Any]]:
+        """Return the value of a get_or_compute envelope while it is still servable"""
+        entry = CachedValue.from_envelope(cached)
+        if entry is None:
+            return cached
+        return entry.value if entry.is_servable() else None
+    
+    async def get_or_compute(
+        self,
+        analytics_type: str,
+        parameters: Dict[str, Any],
+        loader: Loader,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+        tags: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Return the cached result, running ``loader`` at most once per key.
+        
+        Concurrent callers share one computation (across processes while Redis
+        is connected), and results up to ``stale_ttl`` seconds past ``ttl`` are
+        served while a background refresh runs.
+        """
+        cache_key = self._generate_cache_key(analytics_type, parameters)
+        if tags:
+            self._compute_tags[cache_key] = set(tags)
+        return await self._flight.get_or_compute(
+            cache_key,
+            loader,
+            ttl or self.default_ttl,
+            self.default_stale_ttl if stale_ttl is None else stale_ttl
+        )
+    
+    async def _read_entry(self, cache_key: str) -> Optional[CachedValue]:
+        if self._connected and self.redis_client:
+            try:
+                cached_data = await self.redis_client.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Redis cache get error: {e}")
+                return None
+            cached = self._codec.decode(cached_data) if cached_data else None
+        else:
+            cached = self._memory_cache.get(cache_key)
+        entry = CachedValue.from_envelope(cached)
+        if entry is not None and entry.is_servable():
+            return entry
+        return None
+    
+    async def _write_entry(self, cache_key: str, entry: CachedValue, expire_seconds: int) -> None:
+        await self._store(cache_key, entry.to_envelope(), expire_seconds, self._compute_tags.get(cache_key))
+    
+    async def _store(self, cache_key: str, value: Any, ttl: int, tags: Optional[Set[str]]) -> bool:
+        """Write a value together with its tag and prefix index entries"""
+        if self._connected and self._redis_index:
+            await self._redis_index.set(cache_key, self._codec.encode(value), ttl, tags)
+            return True
+        if self._memory_cache.set(cache_key, value, ttl=ttl):
+            self._memory_index.add(cache_key, tags)
+            return True
+        return False
+    
     async def set(
         self, 
         analytics_type: str, 
         parameters: Dict[str, Any], 
         result: Dict[str, Any],
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        tags: Optional[Set[str]] = None
     ) -> bool:
-        """Store analytics result in cache"""
+        """Store analytics result in cache, indexed under ``tags``"""
         cache_key = self._generate_cache_key(analytics_type, parameters)
         ttl = ttl or self.default_ttl
         
-        if self._connected and self.redis_client:
-            try:
-                await self.redis_client.setex(
-                    cache_key, 
-                    ttl, 
-                    json.dumps(result, default=str)
-                )
-                return True
-            except Exception as e:
-                logger.warning(f"Redis cache set error: {e}")
-        else:
-            # Use in-memory cache
-            self._memory_cache[cache_key] = result
-            self._cache_timestamps[cache_key] = datetime.now()
-            return True
+        try:
+            # In memory this is False if the result is too large to admit
+            return await self._store(cache_key, result, ttl, tags)
+        except Exception as e:
+            logger.warning(f"Redis cache set error: {e}")
         
         return False
     
@@ -117,64 +194,68 @@ class AnalyticsCache:
         
         if self._connected and self.redis_client:
             try:
-                await self.redis_client.delete(cache_key)
+                await self._redis_index.delete(cache_key)
                 return True
             except Exception as e:
                 logger.warning(f"Redis cache invalidate error: {e}")
         else:
             # Use in-memory cache
-            if cache_key in self._memory_cache:
-                del self._memory_cache[cache_key]
-            if cache_key in self._cache_timestamps:
-                del self._cache_timestamps[cache_key]
+            self._memory_cache.delete(cache_key)
             return True
         
         return False
     
     async def invalidate_pattern(self, pattern: str) -> int:
-        """Invalidate cache entries matching pattern"""
-        if self._connected and self.redis_client:
+        """
+        Invalidate cache entries under ``analytics:{pattern}``.
+        
+        A plain pattern names whole key segments (e.g. ``centrality``) and is
+        served from the prefix index in O(matching keys); patterns with
+        ``*``/``?`` are matched as globs, which in Redis falls back to SCAN.
+        """
+        if "*" in pattern or "?" in pattern:
+            glob = f"analytics:{pattern.rstrip('*')}*"
+        else:
+            glob = f"analytics:{pattern.rstrip(':')}:*"
+        
+        if self._connected and self._redis_index:
             try:
-                keys = await self.redis_client.keys(f"analytics:{pattern}*")
-                if keys:
-                    await self.redis_client.delete(*keys)
-                return len(keys)
+                return await self._redis_index.invalidate_pattern(glob)
             except Exception as e:
                 logger.warning(f"Redis cache pattern invalidate error: {e}")
         else:
             # Use in-memory cache
-            keys_to_delete = [
-                key for key in self._memory_cache.keys()
-                if key.startswith(f"analytics:{pattern}")
-            ]
+            keys_to_delete = self._memory_index.match(glob)
             for key in keys_to_delete:
-                del self._memory_cache[key]
-                if key in self._cache_timestamps:
-                    del self._cache_timestamps[key]
+                self._memory_cache.delete(key)
             return len(keys_to_delete)
         
         return 0
     
+    async def invalidate_tags(self, tags: Set[str]) -> int:
+        """Invalidate every entry stored under any of ``tags``"""
+        if self._connected and self._redis_index:
+            try:
+                return await self._redis_index.invalidate_tags(tags)
+            except Exception as e:
+                logger.warning(f"Redis cache tag invalidate error: {e}")
+                return 0
+        keys_to_delete = self._memory_index.keys_for_tags(tags)
+        for key in keys_to_delete:
+            self._memory_cache.delete(key)
+        return len(keys_to_delete)
+    
     async def clear_all(self) -> bool:
         """Clear all analytics cache entries"""
-        if self._connected and self.redis_client:
+        if self._connected and self._redis_index:
             try:
-                keys = await self.redis_client.keys("analytics:*")
-                if keys:
-                    await self.redis_client.delete(*keys)
+                await self._redis_index.invalidate_prefix("analytics")
                 return True
             except Exception as e:
                 logger.warning(f"Redis cache clear error: {e}")
         else:
             # Use in-memory cache
-            analytics_keys = [
-                key for key in self._memory_cache.keys()
-                if key.startswith("analytics:")
-            ]
-            for key in analytics_keys:
-                del self._memory_cache[key]
-                if key in self._cache_timestamps:
-                    del self._cache_timestamps[key]
+            self._clear_memory()
             return True
         
         return False
@@ -184,30 +265,32 @@ class AnalyticsCache:
         if self._connected and self.redis_client:
             try:
                 info = await self.redis_client.info()
-                keys = await self.redis_client.keys("analytics:*")
+                indexed_keys = await self._redis_index.count_prefix("analytics")
                 return {
                     "type": "redis",
                     "connected": True,
-                    "total_keys": len(keys),
+                    "total_keys": indexed_keys,
                     "memory_usage": info.get("used_memory_human", "unknown"),
                     "hits": info.get("keyspace_hits", 0),
-                    "misses": info.get("keyspace_misses", 0)
+                    "misses": info.get("keyspace_misses", 0),
+                    "single_flight": self._flight.get_stats(),
+                    "codecs": self._codec.get_stats()
                 }
             except Exception as e:
                 logger.warning(f"Redis cache stats error: {e}")
         
         # In-memory cache stats
-        analytics_keys = [
-            key for key in getattr(self, '_memory_cache', {}).keys()
-            if key.startswith("analytics:")
-        ]
+        memory_stats = self._memory_cache.get_stats()
         return {
             "type": "memory",
             "connected": False,
-            "total_keys": len(analytics_keys),
-            "memory_usage": "unknown",
-            "hits": 0,
-            "misses": 0
+            "total_keys": memory_stats["entries"],
+            "memory_usage": memory_stats["bytes"],
+            "hits": memory_stats["hits"],
+            "misses": memory_stats["misses"],
+            "evictions": memory_stats["evictions"],
+            "memory": memory_stats,
+            "single_flight": self._flight.get_stats()
         }
     
     async def close(self) -> None:
@@ -26,6 +26,14 @@ import redis.asyncio as redis
 import asyncpg
 from fastapi import Request
 
+try:
+    from ..core.cache_codecs import CacheCodec
+    from ..core.cache_index import GenerationNamespaces, RedisTagIndex
+except ImportError:
+    # Loaded as a top-level "analytics" package (dashboard sys.path setup)
+    from server.core.cache_codecs import CacheCodec
+    from server.core.cache_index import GenerationNamespaces, RedisTagIndex
+
 
 class CacheType(Enum):
     """Cache type categories for different data types."""
@@ -43,8 +51,9 @@ class CacheConfig:
     """Cache configuration for different data types."""
     ttl: int  # Time to live in seconds
     compress: bool = False
-    serialize_method: str = "json"  # json, pickle
+    serialize_method: str = "auto"  # auto (orjson/msgpack/json), orjson, msgpack, json, pickle
     max_size: Optional[int] = None  # Max size in bytes
+    compress_min_bytes: int = 1024  # Smaller payloads are stored uncompressed
     
     
 class CacheManager:
@@ -65,45 +74,67 @@ class CacheManager:
             CacheType.API_RESPONSE: CacheConfig(ttl=120, compress=True),  # 2 minutes
         }
         
+        # Payload codec per cache type; payloads carry a format header, and
+        # headerless entries written before codecs were introduced still decode
+        self.codecs = {
+            cache_type: CacheCodec(
+                serializer=config.serialize_method,
+                compress=config.compress,
+                compress_min_bytes=config.compress_min_bytes,
+                legacy_loads=self._legacy_loader(config),
+            )
+            for cache_type, config in self.cache_configs.items()
+        }
+        
+        # Prefix index for pattern invalidation and per-identifier generations
+        # (a dashboard or user scope is invalidated by bumping its generation)
+        self.key_index = RedisTagIndex(redis_client) if redis_client else None
+        self.generations = GenerationNamespaces(redis_client)
+        
         # Performance tracking
         self.cache_hits = 0
         self.cache_misses = 0
         self.cache_sets = 0
         self.cache_deletes = 0
     
-    def _generate_key(self, cache_type: CacheType, identifier: str, **kwargs) -> str:
+    def _generate_key(self, cache_type: CacheType, identifier: str, generation: int = 0, **kwargs) -> str:
         """Generate a cache key with proper namespacing."""
         # Create a deterministic key from parameters
         params_str = json.dumps(sorted(kwargs.items()), sort_keys=True)
         params_hash = hashlib.md5(params_str.encode()).hexdigest()[:8]
         
-        return f"analytics:{cache_type.value}:{identifier}:{params_hash}"
-    
-    def _serialize_data(self, data: Any, config: CacheConfig) -> bytes:
-        """Serialize data according to cache configuration."""
-        if config.serialize_method == "pickle":
-            serialized = pickle.dumps(data)
-        else:  # json
-            serialized = json.dumps(data, default=str).encode()
-        
-        if config.compress:
-            serialized = gzip.compress(serialized)
+        return f"analytics:{cache_type.value}:{identifier}:g{generation}:{params_hash}"
+    
+    async def _current_key(self, cache_type: CacheType, identifier: str, **kwargs) -> str:
+        """Cache key under the identifier scope's current generation."""
+        generation = await self.generations.current(f"scope:{identifier}")
+        return self._generate_key(cache_type, identifier, generation, **kwargs)
+    
+    @staticmethod
+    def _legacy_loader(config: CacheConfig):
+        """Decoder for headerless payloads (gzip + json/pickle)."""
+        def loads(data: bytes) -> Any:
+            if config.compress:
+                data = gzip.decompress(data)
+            if config.serialize_method == "pickle":
+                return pickle.loads(data)
+            return json.loads(data)
+        return loads
+    
+    def _serialize_data(self, data: Any, cache_type: CacheType) -> bytes:
+        """Serialize data with the cache type's codec."""
+        serialized = self.codecs[cache_type].encode(data)
         
         # Check size limits
+        config = self.cache_configs[cache_type]
         if config.max_size and len(serialized) > config.max_size:
             raise ValueError(f"Data size {len(serialized)} exceeds max cache size {config.max_size}")
         
         return serialized
     
-    def _deserialize_data(self, data: bytes, config: CacheConfig) -> Any:
-        """Deserialize data according to cache configuration."""
-        if config.compress:
-            data = gzip.decompress(data)
-        
-        if config.serialize_method == "pickle":
-            return pickle.loads(data)
-        else:  # json
-            return json.loads(data.decode())
+    def _deserialize_data(self, data: bytes, cache_type: CacheType) -> Any:
+        """Deserialize data written by any registered codec."""
+        return self.codecs[cache_type].decode(data)
     
     async def get(self, cache_type: CacheType, identifier: str, **kwargs) -> Optional[Any]:
         """Get data from cache."""
@@ -111,15 +142,14 @@ class CacheManager:
             return None
         
         try:
-            key = self._generate_key(cache_type, identifier, **kwargs)
+            key = await self._current_key(cache_type, identifier, **kwargs)
             data = await self.redis_client.get(key)
             
             if data is None:
                 self.cache_misses += 1
                 return None
             
-            config = self.cache_configs[cache_type]
-            result = self._deserialize_data(data, config)
+            result = self._deserialize_data(data, cache_type)
             self.cache_hits += 1
             return result
             
@@ -134,12 +164,12 @@ class CacheManager:
             return False
         
         try:
-            key = self._generate_key(cache_type, identifier, **kwargs)
+            key = await self._current_key(cache_type, identifier, **kwargs)
             config = self.cache_configs[cache_type]
             
-            serialized_data = self._serialize_data(data, config)
+            serialized_data = self._serialize_data(data, cache_type)
             
-            await self.redis_client.setex(key, config.ttl, serialized_data)
+            await self.key_index.set(key, serialized_data, config.ttl)
             self.cache_sets += 1
             return True
             
@@ -153,8 +183,8 @@ class CacheManager:
             return False
         
         try:
-            key = self._generate_key(cache_type, identifier, **kwargs)
-            result = await self.redis_client.delete(key)
+            key = await self._current_key(cache_type, identifier, **kwargs)
+            result = await self.key_index.delete(key)
             if result:
                 self.cache_deletes += 1
             return bool(result)
@@ -164,17 +194,19 @@ class CacheManager:
             return False
     
     async def invalidate_pattern(self, pattern: str) -> int:
-        """Invalidate all keys matching a pattern."""
+        """
+        Invalidate all keys matching a pattern.
+        
+        ``type:identifier:*`` style prefixes are resolved from the prefix
+        index; other globs fall back to an incremental SCAN.
+        """
         if not self.redis_client:
             return 0
         
         try:
-            keys = await self.redis_client.keys(f"analytics:{pattern}")
-            if keys:
-                result = await self.redis_client.delete(*keys)
-                self.cache_deletes += result
-                return result
-            return 0
+            result = await self.key_index.invalidate_pattern(f"analytics:{pattern}")
+            self.cache_deletes += result
+            return result
             
         except Exception as e:
             print(f"Cache pattern invalidation error: {e}")
@@ -225,13 +257,26 @@ class CacheManager:
         return result
     
     async def invalidate_dashboard(self, dashboard_id: str) -> None:
-        """Invalidate all cache entries for a dashboard."""
-        await self.delete(CacheType.DASHBOARD_CONFIG, dashboard_id)
-        await self.invalidate_pattern(f"dashboard_data:{dashboard_id}:*")
+        """Invalidate all cache entries for a dashboard in O(1)."""
+        await self.invalidate_scope(dashboard_id)
     
     async def invalidate_user_data(self, user_id: str) -> None:
-        """Invalidate all cache entries for a user."""
-        await self.invalidate_pattern(f"*:{user_id}:*")
+        """Invalidate all cache entries for a user in O(1)."""
+        await self.invalidate_scope(user_id)
+    
+    async def invalidate_scope(self, identifier: str) -> int:
+        """
+        Orphan every entry cached under ``identifier`` by bumping its
+        generation; the old keys expire through their TTLs.
+        """
+        if not self.redis_client:
+            return 0
+        
+        try:
+            return await self.generations.bump(f"scope:{identifier}")
+        except Exception as e:
+            print(f"Cache scope invalidation error: {e}")
+            return 0
     
     async def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache performance statistics."""
@@ -258,6 +303,7 @@ class CacheManager:
             "hit_rate_percent": round(float(hit_rate), 2),
             "total_operations": total_operations,
             "redis_info": redis_info,
+            "codec_stats": {cache_type.value: codec.get_stats() for cache_type, codec in self.codecs.items()},
             "timestamp": datetime.utcnow().isoformat()
         }
 
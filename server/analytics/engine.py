@@ -7,7 +7,7 @@ Enhanced with Phase 3 capabilities: GPU acceleration, performance monitoring, an
 import asyncio
 import logging
 import time
-from typing import Dict, List, Any, Optional, Union
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 import kuzu
 import numpy as np
 
@@ -21,6 +21,13 @@ from .models import (
     CentralityType, ClusteringType
 )
 from .cache import AnalyticsCache
+from .graph_snapshot import GraphSnapshot, GraphSnapshotConfig, GraphSnapshotManager
+from .graph_metrics import CSRGraphMetrics, GraphMetricsEngine
+try:
+    from ..graph_database import AsyncGraphConnectionPool, ColumnarQueryResult, fetch_columns, run_on_connection
+except ImportError:
+    # Loaded as a top-level "analytics" package (dashboard sys.path setup)
+    from server.graph_database import AsyncGraphConnectionPool, ColumnarQueryResult, fetch_columns, run_on_connection
 from .realtime import RealtimeAnalytics
 from .algorithms import GraphAlgorithms, MLAnalytics
 
@@ -31,6 +38,13 @@ from .concurrent_processing import concurrent_manager
 
 logger = logging.getLogger(__name__)
 
+# Node key: the ``id`` property where present, otherwise "<label>:<offset>"
+NODE_KEY_EXPR = "coalesce({v}.id, label({v}) + ':' + CAST(offset(ID({v})) AS STRING))"
+INTERNAL_NODE_KEY_EXPR = "label({v}) + ':' + CAST(offset(ID({v})) AS STRING)"
+
+# Cache tag shared by every result computed from the graph topology
+GRAPH_RESULTS_TAG = "graph"
+
 class AnalyticsEngine:
     """
     Main analytics engine that coordinates all analytics operations.
@@ -38,9 +52,20 @@ class AnalyticsEngine:
     Enhanced with Phase 3 capabilities for production deployment.
     """
     
-    def __init__(self, kuzu_connection: kuzu.Connection, redis_url: str = "redis://localhost:6379") -> None:
+    def __init__(
+        self,
+        kuzu_connection: Union[kuzu.Connection, AsyncGraphConnectionPool],
+        redis_url: str = "redis://localhost:6379",
+        snapshot_config: Optional[GraphSnapshotConfig] = None
+    ) -> None:
         self.kuzu_conn = kuzu_connection
         self.cache = AnalyticsCache(redis_url)
+        
+        # Shared CSR topology snapshot used by all graph algorithms
+        self.graph_snapshots = GraphSnapshotManager(
+            self.get_graph_columns, self._graph_watermark, snapshot_config
+        )
+        self.metrics_engine = GraphMetricsEngine()
         self.realtime = RealtimeAnalytics()
         
         # Initialize advanced algorithm engines
@@ -67,7 +92,8 @@ class AnalyticsEngine:
             logger.info("Initializing analytics engine...")
             
             # Initialize database connection
-            await self.kuzu_conn.connect()
+            if isinstance(self.kuzu_conn, AsyncGraphConnectionPool):
+                await self.kuzu_conn.connect()
             
             # Initialize core components
             await self.cache.connect()
@@ -97,13 +123,69 @@ class AnalyticsEngine:
         self.initialized = False
         logger.info("Analytics engine shutdown complete")
     
+    async def _execute(self, query: str) -> Any:
+        """Run a query through the async pool when available, off the event loop"""
+        if isinstance(self.kuzu_conn, AsyncGraphConnectionPool):
+            return await self.kuzu_conn.execute(query)
+        return self.kuzu_conn.execute(query)
+    
+    async def _fetch_columns(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> ColumnarQueryResult:
+        """Run a query off the event loop and collect the result column-wise"""
+        return await run_on_connection(self.kuzu_conn, fetch_columns, query, parameters)
+    
+    async def get_graph_columns(self) -> Dict[str, np.ndarray]:
+        """
+        Retrieve graph topology as column arrays: ``node_ids`` plus parallel
+        ``sources``/``targets`` arrays of node keys, one entry per edge.
+        """
+        with self.performance_monitor.monitor_graph_operation("data_retrieval", 0):
+            try:
+                nodes = await self._fetch_columns(f"MATCH (n) RETURN {NODE_KEY_EXPR.format(v='n')} AS id")
+                edges = await self._fetch_columns(
+                    f"MATCH (a)-[r]->(b) RETURN {NODE_KEY_EXPR.format(v='a')} AS source, "
+                    f"{NODE_KEY_EXPR.format(v='b')} AS target"
+                )
+            except RuntimeError:
+                # No node table defines an ``id`` property
+                nodes = await self._fetch_columns(f"MATCH (n) RETURN {INTERNAL_NODE_KEY_EXPR.format(v='n')} AS id")
+                edges = await self._fetch_columns(
+                    f"MATCH (a)-[r]->(b) RETURN {INTERNAL_NODE_KEY_EXPR.format(v='a')} AS source, "
+                    f"{INTERNAL_NODE_KEY_EXPR.format(v='b')} AS target"
+                )
+            
+            self.performance_monitor.update_graph_size(nodes.row_count, edges.row_count)
+            return {
+                "node_ids": nodes["id"],
+                "sources": edges["source"],
+                "targets": edges["target"],
+            }
+    
+    async def _graph_watermark(self) -> tuple:
+        """Cheap write watermark: current node and edge counts"""
+        nodes = await self._fetch_columns("MATCH (n) RETURN count(n)")
+        edges = await self._fetch_columns("MATCH ()-[r]->() RETURN count(r)")
+        return (int(nodes.scalar(0)), int(edges.scalar(0)))
+    
+    async def get_graph_snapshot(self, force_refresh: bool = False) -> GraphSnapshot:
+        """Shared, versioned CSR snapshot of the graph (refreshed on change)"""
+        return await self.graph_snapshots.get_snapshot(force_refresh=force_refresh)
+    
+    def handle_graph_change(self, event: Dict[str, Any]) -> None:
+        """Feed a graph-change / memory-operation event into the snapshot"""
+        self.graph_snapshots.apply_change_event(event)
+    
+    async def get_graph_statistics(self) -> CSRGraphMetrics:
+        """Full metrics for the current snapshot, including degree distribution"""
+        snapshot = await self.get_graph_snapshot()
+        return await asyncio.to_thread(self.metrics_engine.compute, snapshot)
+    
     async def get_graph_data(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict]]:
         """Retrieve graph data from Kuzu database with performance monitoring"""
         with self.performance_monitor.monitor_graph_operation("data_retrieval", 0):
             try:
                 # Get nodes
                 node_query = "MATCH (n) RETURN n"
-                node_result = self.kuzu_conn.execute(node_query)
+                node_result = await self._execute(node_query)
                 
                 nodes = []
                 # Handle both QueryResult objects and list results
@@ -123,7 +205,7 @@ class AnalyticsEngine:
                 
                 # Get edges/relationships
                 edge_query = "MATCH (a)-[r]->(b) RETURN a, r, b"
-                edge_result = self.kuzu_conn.execute(edge_query)
+                edge_result = await self._execute(edge_query)
                 
                 edges = []
                 # Handle both QueryResult objects and list results
@@ -170,91 +252,71 @@ class AnalyticsEngine:
     async def calculate_graph_metrics(self, filters: Optional[Dict[str, Any]] = None) -> GraphMetrics:
         """Calculate basic graph metrics with performance monitoring"""
         with self.performance_monitor.monitor_graph_operation("metrics_calculation", 0):
-            graph_data = await self.get_graph_data(filters)
-            nodes = graph_data["nodes"]
-            edges = graph_data["edges"]
-            
-            node_count = len(nodes)
-            edge_count = len(edges)
-            
-            if node_count == 0:
-                return GraphMetrics(
-                    node_count=0, edge_count=0, density=0.0,
-                    average_clustering=0.0, connected_components=0,
-                    largest_component_size=0
-                )
+            try:
+                snapshot = await self.get_graph_snapshot()
+            except Exception as e:
+                logger.error(f"Failed to load graph snapshot: {e}")
+                snapshot = GraphSnapshot.from_columns([], [], [])
             
-            # Calculate density
-            max_edges = node_count * (node_count - 1) / 2
-            density = edge_count / max_edges if max_edges > 0 else 0.0
-            
-            # Basic connected components analysis
-            # Build adjacency list
-            adjacency: Dict[str, set] = {}
-            for node in nodes:
-                node_id = node.get('id', str(node))
-                adjacency[node_id] = set()
-            
-            for edge in edges:
-                source = edge.get('source')
-                target = edge.get('target')
-                if source in adjacency and target in adjacency:
-                    adjacency[source].add(target)
-                    adjacency[target].add(source)
-            
-            # Find connected components using DFS
-            visited = set()
-            components = []
-            
-            def dfs(node: str, component: List[str]) -> None:
-                if node in visited:
-                    return
-                visited.add(node)
-                component.append(node)
-                for neighbor in adjacency.get(node, []):
-                    dfs(neighbor, component)
-            
-            for node_id in adjacency:
-                if node_id not in visited:
-                    component: List[str] = []
-                    dfs(node_id, component)
-                    if component:
-                        components.append(component)
-            
-            connected_components = len(components)
-            largest_component_size = max(len(c) for c in components) if components else 0
+            # Components, clustering and density from one pass over the CSR arrays
+            metrics = await asyncio.to_thread(self.metrics_engine.compute, snapshot)
             
             return GraphMetrics(
-                node_count=node_count,
-                edge_count=edge_count,
-                density=density,
-                average_clustering=0.0,  # Would need more complex calculation
-                connected_components=connected_components,
-                largest_component_size=largest_component_size
+                node_count=metrics.node_count,
+                edge_count=metrics.edge_count,
+                density=metrics.density,
+                average_clustering=metrics.average_clustering,
+                connected_components=metrics.connected_components,
+                largest_component_size=metrics.largest_component_size
             )
     
-    async def analyze_centrality(self, request: CentralityRequest) -> CentralityResponse:
-        """Perform centrality analysis using advanced NetworkX algorithms with GPU acceleration"""
-        start_time = time.time()
-        
-        # Check cache first
-        cache_key = f"centrality_{request.centrality_type}_{hash(str(request.dict()))}"
-        cached_result = await self.cache.get("centrality", {"key": cache_key})
+    async def _cached_analysis(
+        self,
+        analytics_type: str,
+        request: Any,
+        compute: Callable[[], Awaitable[Any]],
+        ttl: int = 3600
+    ) -> Dict[str, Any]:
+        """
+        Run ``compute`` through the single-flight cache, keyed by the request.
         
-        if cached_result:
-            self.performance_monitor.record_cache_hit()
-            cached_result["cache_hit"] = True
-            return CentralityResponse(**cached_result)
+        ``cache_hit`` is set whenever this caller did not compute the result
+        itself (a cache hit, a stale serve or a wait on another caller's load).
+        """
+        computed = False
         
-        self.performance_monitor.record_cache_miss()
+        async def loader() -> Dict[str, Any]:
+            nonlocal computed
+            computed = True
+            return (await compute()).dict()
         
+        result = await self.cache.get_or_compute(
+            analytics_type, request.dict(), loader, ttl=ttl, tags={GRAPH_RESULTS_TAG}
+        )
+        if computed:
+            self.performance_monitor.record_cache_miss()
+        else:
+            self.performance_monitor.record_cache_hit()
+        return dict(result, cache_hit=not computed)
+    
+    async def invalidate_graph_results(self) -> int:
+        """Drop cached results derived from the graph (call after graph writes)"""
+        return await self.cache.invalidate_tags({GRAPH_RESULTS_TAG})
+    
+    async def analyze_centrality(self, request: CentralityRequest) -> CentralityResponse:
+        """Perform centrality analysis using advanced NetworkX algorithms with GPU acceleration"""
+        start_time = time.time()
+        result = await self._cached_analysis(
+            "centrality", request, lambda: self._run_centrality(request, start_time)
+        )
+        return CentralityResponse(**result)
+    
+    async def _run_centrality(self, request: CentralityRequest, start_time: float) -> CentralityResponse:
         try:
-            # Get graph data
-            graph_data = await self.get_graph_data(request.filters)
-            nodes = graph_data["nodes"]
-            edges = graph_data["edges"]
+            # Get shared graph snapshot
+            snapshot = await self.get_graph_snapshot()
             
-            if not nodes:
+            if snapshot.node_count == 0:
                 return CentralityResponse(
                     centrality_type=request.centrality_type,
                     top_nodes=[],
@@ -269,7 +331,7 @@ class AnalyticsEngine:
                 )
             
             # Determine backend and graph size category
-            graph_size = len(nodes)
+            graph_size = snapshot.node_count
             backend = "cugraph" if self.gpu_manager.cugraph_backend else "networkx"
             size_category = self._get_graph_size_category(graph_size)
             
@@ -279,10 +341,23 @@ class AnalyticsEngine:
                 # Use advanced algorithms with potential GPU acceleration
                 # Add default limit if not provided
                 limit = getattr(request, 'limit', 50)  # Default to 50 if limit not specified
-                centrality_result = await self.graph_algorithms.calculate_centrality(
-                    graph_data, request.centrality_type, limit
+                scores = await self.graph_algorithms.calculate_centrality(
+                    snapshot.to_networkx(), request.centrality_type,
+                    normalized=request.normalized, node_filters=request.node_filters
                 )
             
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            values = np.fromiter(scores.values(), dtype=np.float64, count=len(scores))
+            centrality_result = {
+                "top_nodes": [{"node_id": str(node), "score": float(score)} for node, score in ranked[:limit]],
+                "statistics": {
+                    "mean": float(values.mean()),
+                    "max": float(values.max()),
+                    "min": float(values.min()),
+                    "std": float(values.std()),
+                } if values.size else {},
+            }
+            
             # Calculate graph metrics
             graph_metrics = await self.calculate_graph_metrics(request.filters)
             
@@ -298,14 +373,10 @@ class AnalyticsEngine:
                 "gpu_accelerated": self.gpu_manager.is_algorithm_accelerated(algorithm_name)
             }
             
-            # Cache the result
-            await self.cache.set("centrality", {"key": cache_key}, response_data, ttl=3600)
-            
             # Send real-time update
             update = RealtimeUpdate(
-                type="centrality_analysis",
-                data={"centrality_type": request.centrality_type, "node_count": len(nodes)},
-                timestamp=time.time()
+                update_type="centrality_analysis",
+                data={"centrality_type": request.centrality_type, "node_count": snapshot.node_count}
             )
             await self.realtime.publish_update("centrality", update)
             
@@ -338,22 +409,17 @@ class AnalyticsEngine:
     async def detect_communities(self, request: CommunityRequest) -> CommunityResponse:
         """Perform community detection using advanced NetworkX algorithms"""
         start_time = time.time()
-        
-        # Check cache first
-        cache_key = f"community_{request.algorithm}_{hash(str(request.dict()))}"
-        cached_result = await self.cache.get("community", {"key": cache_key})
-        
-        if cached_result:
-            cached_result["cache_hit"] = True
-            return CommunityResponse(**cached_result)
-        
+        result = await self._cached_analysis(
+            "community", request, lambda: self._run_community_detection(request, start_time)
+        )
+        return CommunityResponse(**result)
+    
+    async def _run_community_detection(self, request: CommunityRequest, start_time: float) -> CommunityResponse:
         try:
-            # Get graph data
-            graph_data = await self.get_graph_data(request.filters)
-            nodes = graph_data["nodes"]
-            edges = graph_data["edges"]
+            # Get shared graph snapshot
+            snapshot = await self.get_graph_snapshot()
             
-            if not nodes:
+            if snapshot.node_count == 0:
                 return CommunityResponse(
                     algorithm=request.algorithm,
                     modularity=0.0,
@@ -368,8 +434,8 @@ class AnalyticsEngine:
                     cache_hit=False
                 )
             
-            # Build NetworkX graph
-            nx_graph = self.graph_algorithms.build_networkx_graph(nodes, edges)
+            # NetworkX view of the snapshot (shared, read-only)
+            nx_graph = snapshot.to_networkx()
             
             # Detect communities using advanced algorithms
             partition, modularity, community_metrics = await self.graph_algorithms.detect_communities(
@@ -388,7 +454,7 @@ class AnalyticsEngine:
             num_communities = len(community_size_list)
             
             # Calculate graph metrics
-            graph_metrics = await self.graph_algorithms.calculate_graph_metrics(nx_graph)
+            graph_metrics = await self.calculate_graph_metrics(request.filters)
             
             execution_time = time.time() - start_time
             
@@ -403,9 +469,6 @@ class AnalyticsEngine:
                 cache_hit=False
             )
             
-            # Cache the result
-            await self.cache.set("community", {"key": cache_key}, result.dict(), ttl=3600)
-            
             # Send real-time update
             update = RealtimeUpdate(
                 update_type="community_complete",
@@ -429,60 +492,47 @@ class AnalyticsEngine:
         start_time = time.time()
         
         try:
-            # Get graph data
-            graph_data = await self.get_graph_data(request.filters)
+            # Get shared graph snapshot
+            snapshot = await self.get_graph_snapshot()
             graph_metrics = await self.calculate_graph_metrics(request.filters)
             
-            # Simple shortest path analysis
-            nodes = graph_data["nodes"]
-            edges = graph_data["edges"]
-            
-            # Build adjacency list
-            adjacency: Dict[str, List[str]] = {}
-            for node in nodes:
-                node_id = node.get('id', str(node))
-                adjacency[node_id] = []
-            
-            for edge in edges:
-                source = edge.get('source')
-                target = edge.get('target')
-                if source in adjacency and target in adjacency:
-                    adjacency[source].append(target)
-                    adjacency[target].append(source)
+            # Breadth-first shortest paths over the undirected CSR adjacency
+            indptr, indices = snapshot.undirected()
+            node_ids = snapshot.node_ids
+            target_set = None
+            if request.target_nodes:
+                target_set = {snapshot.index[t] for t in request.target_nodes if t in snapshot.index}
             
-            # Simple BFS for shortest paths
             paths = []
-            target_nodes = request.target_nodes or list(adjacency.keys())
-            
             for source in request.source_nodes:
-                if source not in adjacency:
+                source_idx = snapshot.index.get(source)
+                if source_idx is None:
                     continue
                 
-                # BFS from source
-                queue = [(source, [source])]
-                visited = {source}
-                
-                while queue:
-                    current, path = queue.pop(0)
-                    
-                    if len(path) > request.max_depth + 1:
-                        continue
-                    
-                    for neighbor in adjacency.get(current, []):
-                        if neighbor not in visited:
-                            new_path = path + [neighbor]
+                parent = {source_idx: -1}
+                frontier = [source_idx]
+                depth = 0
+                while frontier and depth < request.max_depth:
+                    depth += 1
+                    next_frontier = []
+                    for current in frontier:
+                        for neighbor in indices[indptr[current]:indptr[current + 1]].tolist():
+                            if neighbor in parent:
+                                continue
+                            parent[neighbor] = current
+                            next_frontier.append(neighbor)
                             
-                            if neighbor in target_nodes and neighbor != source:
+                            if target_set is None or neighbor in target_set:
+                                hops = [neighbor]
+                                while parent[hops[-1]] != -1:
+                                    hops.append(parent[hops[-1]])
                                 paths.append({
                                     "source": source,
-                                    "target": neighbor,
-                                    "path": new_path,
-                                    "length": len(new_path) - 1
+                                    "target": node_ids[neighbor],
+                                    "path": node_ids[hops[::-1]].tolist(),
+                                    "length": depth
                                 })
-                            
-                            if len(new_path) <= request.max_depth + 1:
-                                queue.append((neighbor, new_path))
-                                visited.add(neighbor)
+                    frontier = next_frontier
             
             # Calculate statistics
             path_statistics = {}
@@ -551,28 +601,25 @@ class AnalyticsEngine:
             "initialized": self.initialized,
             "cache_stats": asyncio.create_task(self.cache.get_cache_stats()),
             "realtime_stats": self.realtime.get_realtime_stats(),
-            "graph_cache_size": len(self._graph_cache)
+            "graph_cache_size": len(self._graph_cache),
+            "graph_snapshot": self.graph_snapshots.get_stats(),
+            "graph_metrics_engine": self.metrics_engine.get_stats()
         }
 
     async def perform_clustering(self, request: ClusteringRequest) -> ClusteringResponse:
         """Perform ML clustering analysis using scikit-learn algorithms"""
         start_time = time.time()
-        
-        # Check cache first
-        cache_key = f"clustering_{request.clustering_type}_{hash(str(request.dict()))}"
-        cached_result = await self.cache.get("clustering", {"key": cache_key})
-        
-        if cached_result:
-            cached_result["cache_hit"] = True
-            return ClusteringResponse(**cached_result)
-        
+        result = await self._cached_analysis(
+            "clustering", request, lambda: self._run_clustering(request, start_time)
+        )
+        return ClusteringResponse(**result)
+    
+    async def _run_clustering(self, request: ClusteringRequest, start_time: float) -> ClusteringResponse:
         try:
-            # Get graph data
-            graph_data = await self.get_graph_data(request.filters)
-            nodes = graph_data["nodes"]
-            edges = graph_data["edges"]
+            # Get shared graph snapshot
+            snapshot = await self.get_graph_snapshot()
             
-            if not nodes:
+            if snapshot.node_count == 0:
                 return ClusteringResponse(
                     clustering_type=request.clustering_type,
                     n_clusters=0,
@@ -587,8 +634,8 @@ class AnalyticsEngine:
                     cache_hit=False
                 )
             
-            # Build NetworkX graph
-            nx_graph = self.graph_algorithms.build_networkx_graph(nodes, edges)
+            # NetworkX view of the snapshot (shared, read-only)
+            nx_graph = snapshot.to_networkx()
             
             # Extract features for ML analysis
             features, node_ids, feature_names = await self.ml_analytics.extract_node_features(
@@ -617,7 +664,7 @@ class AnalyticsEngine:
                 ))
             
             # Calculate graph metrics
-            graph_metrics = await self.graph_algorithms.calculate_graph_metrics(nx_graph)
+            graph_metrics = await self.calculate_graph_metrics(request.filters)
             
             execution_time = time.time() - start_time
             
@@ -636,9 +683,6 @@ class AnalyticsEngine:
                 }
             )
             
-            # Cache the result
-            await self.cache.set("clustering", {"key": cache_key}, result.dict(), ttl=3600)
-            
             # Send real-time update
             update = RealtimeUpdate(
                 update_type="clustering_complete",
@@ -662,20 +706,18 @@ class AnalyticsEngine:
         start_time = time.time()
         
         try:
-            # Get graph data
-            graph_data = await self.get_graph_data(filters)
-            nodes = graph_data["nodes"]
-            edges = graph_data["edges"]
+            # Get shared graph snapshot
+            snapshot = await self.get_graph_snapshot()
             
-            if not nodes:
+            if snapshot.node_count == 0:
                 return {
                     "anomalies": [],
                     "anomaly_scores": [],
                     "execution_time": time.time() - start_time
                 }
             
-            # Build NetworkX graph
-            nx_graph = self.graph_algorithms.build_networkx_graph(nodes, edges)
+            # NetworkX view of the snapshot (shared, read-only)
+            nx_graph = snapshot.to_networkx()
             
             # Extract features for anomaly detection
             features, node_ids, feature_names = await self.ml_analytics.extract_node_features(
@@ -707,7 +749,7 @@ class AnalyticsEngine:
                 update_type="anomaly_detection_complete",
                 data={
                     "anomalies_found": len(anomalous_nodes),
-                    "total_nodes": len(nodes),
+                    "total_nodes": snapshot.node_count,
                     "execution_time": execution_time
                 }
             )
@@ -0,0 +1,417 @@
+"""
+Shared in-memory graph snapshot for GraphMemory-IDE analytics.
+
+Holds the graph topology as a compact CSR structure (int32 index arrays plus
+an id <-> index map) so that centrality, community, path and metrics
+calculations share one read-only copy instead of re-scanning Kuzu per call:
+- Snapshots are immutable and versioned; readers keep a consistent view while
+  a newer version is built
+- Additions reported through graph-change events are merged into the next
+  version without touching the database
+- Deletions, or writes detected by the node/edge count watermark, trigger a
+  full reload from Kuzu
+- NetworkX and SciPy sparse views are produced on demand and cached
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import networkx as nx
+    NETWORKX_AVAILABLE = True
+except ImportError:
+    nx = None
+    NETWORKX_AVAILABLE = False
+
+try:
+    import scipy.sparse as sp
+    SCIPY_AVAILABLE = True
+except ImportError:
+    sp = None
+    SCIPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Loader returning (node_ids, edge_sources, edge_targets) as column arrays
+TopologyLoader = Callable[[], Awaitable[Dict[str, np.ndarray]]]
+# Probe returning a cheap write watermark, e.g. (node_count, edge_count)
+WatermarkProbe = Callable[[], Awaitable[Tuple[int, ...]]]
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+def _unique_int(keys: np.ndarray) -> np.ndarray:
+    """Sorted distinct values of an integer array (faster than np.unique here)"""
+    keys = np.sort(keys)
+    if len(keys) < 2:
+        return keys
+    return keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+
+
+def _build_csr(rows: np.ndarray, cols: np.ndarray, node_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Build (indptr, indices) for the given COO edge list"""
+    order = np.argsort(rows)
+    indices = cols[order].astype(np.int32, copy=False)
+    counts = np.bincount(rows, minlength=node_count)
+    indptr = np.zeros(node_count + 1, dtype=np.int32)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, indices
+
+
+class GraphSnapshot:
+    """
+    Immutable CSR view of the graph topology.
+
+    ``indptr``/``indices`` store the directed out-adjacency; the symmetric
+    (undirected) adjacency used by most algorithms is derived lazily.
+    """
+
+    def __init__(
+        self,
+        node_ids: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        version: int = 1,
+        watermark: Optional[Tuple[int, ...]] = None,
+        index: Optional[Dict[Any, int]] = None,
+    ) -> None:
+        self.node_ids = _readonly(np.asarray(node_ids, dtype=object))
+        if index is None:
+            index = {node_id: i for i, node_id in enumerate(self.node_ids.tolist())}
+        self.index: Dict[Any, int] = index
+        self.sources = _readonly(np.asarray(sources, dtype=np.int32))
+        self.targets = _readonly(np.asarray(targets, dtype=np.int32))
+        self.version = version
+        self.watermark = watermark
+        self.created_at = time.time()
+
+        indptr, indices = _build_csr(self.sources, self.targets, self.node_count)
+        self.indptr = _readonly(indptr)
+        self.indices = _readonly(indices)
+
+        # Set when this version was derived from ``parent_version`` by
+        # with_additions(): the undirected edges it introduced, as (lo, hi)
+        # index pairs in this snapshot's index space
+        self.parent_version: Optional[int] = None
+        self.added_edges: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+        self._lock = threading.Lock()
+        self._undirected: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._networkx: Dict[bool, Any] = {}
+
+    @classmethod
+    def from_columns(
+        cls,
+        node_ids: np.ndarray,
+        edge_sources: np.ndarray,
+        edge_targets: np.ndarray,
+        version: int = 1,
+        watermark: Optional[Tuple[int, ...]] = None,
+    ) -> "GraphSnapshot":
+        """
+        Build a snapshot from node keys and parallel edge endpoint keys.
+
+        Duplicate node keys collapse to one vertex; edges whose endpoints are
+        not known nodes are dropped.
+        """
+        unique_ids = np.array(sorted(set(node_ids.tolist() if isinstance(node_ids, np.ndarray) else node_ids) - {None}),
+                              dtype=object)
+        index = {node_id: i for i, node_id in enumerate(unique_ids.tolist())}
+        sources = cls._positions(index, edge_sources)
+        targets = cls._positions(index, edge_targets)
+        keep = (sources >= 0) & (targets >= 0)
+        return cls(unique_ids, sources[keep], targets[keep], version=version, watermark=watermark, index=index)
+
+    @staticmethod
+    def _positions(index: Dict[Any, int], keys: Any) -> np.ndarray:
+        """Key -> vertex index lookup (-1 when missing)"""
+        keys = keys.tolist() if isinstance(keys, np.ndarray) else list(keys)
+        get = index.get
+        return np.fromiter((get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.sources)
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def degree(self) -> np.ndarray:
+        """Total (in + out) degree per vertex"""
+        return self.out_degree() + np.bincount(self.targets, minlength=self.node_count)
+
+    def undirected(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Symmetric CSR adjacency without self-loops or parallel edges"""
+        with self._lock:
+            if self._undirected is None:
+                mask = self.sources != self.targets
+                rows = np.concatenate([self.sources[mask], self.targets[mask]]).astype(np.int64)
+                cols = np.concatenate([self.targets[mask], self.sources[mask]]).astype(np.int64)
+                if len(rows):
+                    pairs = _unique_int(rows * self.node_count + cols)
+                    rows, cols = np.divmod(pairs, self.node_count)
+                indptr, indices = _build_csr(rows, cols, self.node_count)
+                self._undirected = (_readonly(indptr), _readonly(indices))
+            return self._undirected
+
+    def neighbors(self, node_id: Any) -> List[Any]:
+        """Undirected neighbour keys of ``node_id``"""
+        i = self.index.get(node_id)
+        if i is None:
+            return []
+        indptr, indices = self.undirected()
+        return self.node_ids[indices[indptr[i]:indptr[i + 1]]].tolist()
+
+    def to_scipy(self, directed: bool = True) -> "sp.csr_matrix":
+        """Adjacency as a SciPy CSR matrix (unit weights)"""
+        if not SCIPY_AVAILABLE:
+            raise RuntimeError("scipy is not installed")
+        indptr, indices = (self.indptr, self.indices) if directed else self.undirected()
+        data = np.ones(len(indices), dtype=np.float32)
+        return sp.csr_matrix((data, indices, indptr), shape=(self.node_count, self.node_count))
+
+    def to_networkx(self, directed: bool = False) -> "nx.Graph":
+        """
+        NetworkX view labelled with node keys, cached per snapshot.
+
+        The returned graph is shared; callers must not mutate it.
+        """
+        if not NETWORKX_AVAILABLE:
+            raise RuntimeError("networkx is not installed")
+        with self._lock:
+            graph = self._networkx.get(directed)
+        if graph is not None:
+            return graph
+
+        graph = nx.DiGraph() if directed else nx.Graph()
+        graph.add_nodes_from(self.node_ids.tolist())
+        ids = self.node_ids
+        graph.add_edges_from(zip(ids[self.sources].tolist(), ids[self.targets].tolist()), weight=1.0)
+        with self._lock:
+            self._networkx.setdefault(directed, graph)
+            return self._networkx[directed]
+
+    def with_additions(
+        self,
+        node_ids: Iterable[Any],
+        edges: Iterable[Tuple[Any, Any]],
+        watermark: Optional[Tuple[int, ...]] = None,
+    ) -> "GraphSnapshot":
+        """
+        Return the next version with extra nodes/edges merged in.
+
+        Existing vertices keep their indices and new ones are appended, so
+        per-vertex arrays of this version stay valid as a prefix.
+        """
+        new_nodes = [n for n in dict.fromkeys(node_ids) if n is not None and n not in self.index]
+        edge_list = list(edges)
+        index = dict(self.index)
+        index.update((node_id, self.node_count + i) for i, node_id in enumerate(new_nodes))
+        all_ids = np.concatenate([self.node_ids, np.asarray(new_nodes, dtype=object)]) if new_nodes else self.node_ids
+
+        src = self._positions(index, [e[0] for e in edge_list])
+        dst = self._positions(index, [e[1] for e in edge_list])
+        valid = (src >= 0) & (dst >= 0)
+        updated = GraphSnapshot(
+            all_ids,
+            np.concatenate([self.sources, src[valid]]),
+            np.concatenate([self.targets, dst[valid]]),
+            version=self.version + 1,
+            watermark=watermark,
+            index=index,
+        )
+        updated.parent_version = self.version
+        updated.added_edges = self._new_undirected_edges(src[valid], dst[valid])
+        return updated
+
+    def index_map(self, other: "GraphSnapshot") -> np.ndarray:
+        """Position of each of this snapshot's vertices in ``other`` (-1 if absent)"""
+        if other.parent_version == self.version:
+            return np.arange(self.node_count, dtype=np.int64)
+        return self._positions(other.index, self.node_ids)
+
+    def _new_undirected_edges(self, src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Distinct undirected (lo, hi) pairs that were not adjacent in this snapshot"""
+        loops = src == dst
+        lo, hi = np.minimum(src[~loops], dst[~loops]), np.maximum(src[~loops], dst[~loops])
+        width = int(max(self.node_count, hi.max() + 1 if len(hi) else 0))
+        lo, hi = np.divmod(_unique_int(lo.astype(np.int64) * width + hi), width)
+
+        indptr, indices = self.undirected()
+        fresh = np.array([
+            not (u < self.node_count and v < self.node_count
+                 and v in indices[indptr[u]:indptr[u + 1]])
+            for u, v in zip(lo.tolist(), hi.tolist())
+        ], dtype=bool)
+        return lo[fresh].astype(np.int32), hi[fresh].astype(np.int32)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "node_count": self.node_count,
+            "edge_count": self.edge_count,
+            "age_seconds": round(time.time() - self.created_at, 3),
+            "memory_bytes": int(self.indptr.nbytes + self.indices.nbytes + self.sources.nbytes + self.targets.nbytes),
+        }
+
+
+@dataclass
+class GraphSnapshotConfig:
+    """Refresh policy for GraphSnapshotManager"""
+    watermark_check_interval: float = 5.0   # seconds between count probes
+    max_staleness_seconds: float = 300.0    # unconditional reload after this age
+    max_pending_changes: int = 10_000       # beyond this, reload instead of merging
+
+
+class GraphSnapshotManager:
+    """
+    Owns the current GraphSnapshot and decides when to refresh it.
+
+    ``loader`` fetches the full topology; ``probe`` returns a cheap write
+    watermark (node/edge counts) that is compared against the snapshot's.
+    """
+
+    def __init__(
+        self,
+        loader: TopologyLoader,
+        probe: Optional[WatermarkProbe] = None,
+        config: Optional[GraphSnapshotConfig] = None,
+    ) -> None:
+        self.loader = loader
+        self.probe = probe
+        self.config = config or GraphSnapshotConfig()
+
+        self._snapshot: Optional[GraphSnapshot] = None
+        self._lock = asyncio.Lock()
+        self._pending_nodes: List[Any] = []
+        self._pending_edges: List[Tuple[Any, Any]] = []
+        self._invalidated = False
+        self._last_check = 0.0
+        self._stats = {"full_loads": 0, "incremental_updates": 0, "watermark_checks": 0, "hits": 0}
+
+    @property
+    def current(self) -> Optional[GraphSnapshot]:
+        """Latest built snapshot without triggering a refresh"""
+        return self._snapshot
+
+    def record_nodes_added(self, node_ids: Iterable[Any]) -> None:
+        self._pending_nodes.extend(node_ids)
+        self._check_pending_size()
+
+    def record_edges_added(self, edges: Iterable[Tuple[Any, Any]]) -> None:
+        self._pending_edges.extend(edges)
+        self._check_pending_size()
+
+    def invalidate(self) -> None:
+        """Force a full reload on next access (deletions, bulk imports)"""
+        self._invalidated = True
+        self._pending_nodes.clear()
+        self._pending_edges.clear()
+
+    def apply_change_event(self, event: Dict[str, Any]) -> None:
+        """
+        Fold a graph-change / memory-operation event into pending changes.
+
+        Events carrying ``data.nodes`` / ``data.edges`` (``[source, target]``
+        pairs) are merged incrementally; deletions and events without a
+        payload invalidate the snapshot.
+        """
+        operation = str(event.get("operation_type") or event.get("data", {}).get("operation") or "")
+        data = event.get("data") or {}
+        if operation.startswith("delete"):
+            self.invalidate()
+            return
+        nodes = data.get("nodes")
+        edges = data.get("edges")
+        if nodes is None and edges is None:
+            self.invalidate()
+            return
+        if nodes:
+            self.record_nodes_added(nodes)
+        if edges:
+            self.record_edges_added((e[0], e[1]) for e in edges)
+
+    def _check_pending_size(self) -> None:
+        if len(self._pending_nodes) + len(self._pending_edges) > self.config.max_pending_changes:
+            self.invalidate()
+
+    async def get_snapshot(self, force_refresh: bool = False) -> GraphSnapshot:
+        """Return an up-to-date snapshot, refreshing it if needed"""
+        async with self._lock:
+            snapshot = self._snapshot
+            now = time.time()
+
+            if (
+                force_refresh
+                or self._invalidated
+                or snapshot is None
+                or now - snapshot.created_at > self.config.max_staleness_seconds
+            ):
+                return await self._full_load()
+
+            if self._pending_nodes or self._pending_edges:
+                nodes, edges = self._pending_nodes, self._pending_edges
+                self._pending_nodes, self._pending_edges = [], []
+                watermark = await self._probe() if self.probe else None
+                updated = await asyncio.to_thread(snapshot.with_additions, nodes, edges, watermark)
+                if watermark is not None and snapshot.watermark is not None:
+                    expected = (
+                        snapshot.watermark[0] + updated.node_count - snapshot.node_count,
+                        snapshot.watermark[1] + len(edges),
+                    )
+                    if watermark != expected:
+                        # Events missed some writes; fall back to the database
+                        return await self._full_load()
+                snapshot = self._snapshot = updated
+                self._last_check = now
+                self._stats["incremental_updates"] += 1
+                return snapshot
+
+            if self.probe and now - self._last_check >= self.config.watermark_check_interval:
+                self._last_check = now
+                if await self._probe() != snapshot.watermark:
+                    return await self._full_load()
+
+            self._stats["hits"] += 1
+            return snapshot
+
+    async def _probe(self) -> Tuple[int, ...]:
+        assert self.probe is not None
+        self._stats["watermark_checks"] += 1
+        return tuple(await self.probe())
+
+    async def _full_load(self) -> GraphSnapshot:
+        self._invalidated = False
+        self._pending_nodes.clear()
+        self._pending_edges.clear()
+        watermark = await self._probe() if self.probe else None
+        columns = await self.loader()
+        version = self._snapshot.version + 1 if self._snapshot else 1
+        snapshot = await asyncio.to_thread(
+            GraphSnapshot.from_columns,
+            columns["node_ids"], columns["sources"], columns["targets"], version, watermark,
+        )
+        self._snapshot = snapshot
+        self._last_check = time.time()
+        self._stats["full_loads"] += 1
+        logger.debug(f"Graph snapshot v{snapshot.version} loaded: {snapshot.node_count} nodes, {snapshot.edge_count} edges")
+        return snapshot
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["pending_changes"] = len(self._pending_nodes) + len(self._pending_edges)
+        stats["snapshot"] = self._snapshot.get_stats() if self._snapshot else None
+        return stats
@@ -13,6 +13,14 @@ from dataclasses import dataclass
 from enum import Enum
 from types import TracebackType
 
+import numpy as np
+
+try:
+    from ..graph_database import ColumnarQueryResult, fetch_columns
+except ImportError:
+    # Loaded as a top-level "analytics" package (dashboard sys.path setup)
+    from server.graph_database import ColumnarQueryResult, fetch_columns
+
 logger = logging.getLogger(__name__)
 
 
@@ -139,15 +147,15 @@ class KuzuAnalyticsEngine:
 
         try:
             # Basic counts
-            node_count_result = await self._execute_cypher(
+            node_count_result = await self._execute_cypher_columns(
                 "MATCH (n) RETURN count(n) as count"
             )
-            node_count = int(node_count_result[0]["count"])
+            node_count = int(node_count_result.scalar(0))
 
-            edge_count_result = await self._execute_cypher(
+            edge_count_result = await self._execute_cypher_columns(
                 "MATCH ()-[r]->() RETURN count(r) as count"
             )
-            edge_count = int(edge_count_result[0]["count"])
+            edge_count = int(edge_count_result.scalar(0))
 
             # Density calculation
             density = 0.0
@@ -309,13 +317,19 @@ class KuzuAnalyticsEngine:
         else:
             raise ValueError(f"Unknown centrality algorithm: {algorithm}")
 
-        results = await self._execute_cypher(query)
+        results = await self._execute_cypher_columns(query)
+        scores = results[results.column_names[1]].astype(np.float64)
 
         return {
             "entity_type": entity_type,
             "algorithm": algorithm,
-            "entities": results,
-            "entity_count": len(results),
+            "entities": results.to_records(),
+            "entity_count": results.row_count,
+            "score_statistics": {
+                "mean": float(scores.mean()) if scores.size else 0.0,
+                "max": float(scores.max()) if scores.size else 0.0,
+                "median": float(np.median(scores)) if scores.size else 0.0,
+            },
         }
 
     async def get_analytics_stats(self) -> Dict[str, Any]:
@@ -425,15 +439,29 @@ class KuzuAnalyticsEngine:
         metrics = await self.get_graph_metrics()
 
         # Additional structural analysis
-        hub_query = """
+        hub_threshold = parameters.get("hub_degree_threshold", 10)
+        degree_query = """
         MATCH (n)
         OPTIONAL MATCH (n)-[r]-()
         WITH n, count(r) as degree
-        WHERE degree > 10
-        RETURN count(n) as hub_count, max(degree) as max_degree
+        RETURN degree
         """
 
-        hub_results = await self._execute_cypher(hub_query)
+        degrees = (await self._execute_cypher_columns(degree_query))["degree"]
+        hubs = degrees[degrees > hub_threshold]
+        hub_analysis: Dict[str, Any] = {}
+        if degrees.size:
+            p50, p90, p99 = np.percentile(degrees, [50, 90, 99])
+            hub_analysis = {
+                "hub_count": int(hubs.size),
+                "max_degree": int(degrees.max()),
+                "degree_distribution": {
+                    "p50": float(p50),
+                    "p90": float(p90),
+                    "p99": float(p99),
+                    "isolated": int(np.count_nonzero(degrees == 0)),
+                },
+            }
 
         return {
             "basic_metrics": {
@@ -443,7 +471,7 @@ class KuzuAnalyticsEngine:
                 "average_degree": metrics.average_degree,
                 "clustering_coefficient": metrics.clustering_coefficient,
             },
-            "hub_analysis": hub_results[0] if hub_results else {},
+            "hub_analysis": hub_analysis,
             "connected_components": metrics.connected_components,
         }
 
@@ -518,6 +546,16 @@ class KuzuAnalyticsEngine:
             logger.error(f"Cypher query execution failed: {query[:100]}... - {e}")
             raise
 
+    async def _execute_cypher_columns(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None
+    ) -> ColumnarQueryResult:
+        """Execute Cypher query and return column arrays (no per-row dicts)"""
+        try:
+            return fetch_columns(self.connection, query, parameters)
+        except Exception as e:
+            logger.error(f"Cypher query execution failed: {query[:100]}... - {e}")
+            raise
+
     async def _compute_global_clustering_coefficient(self) -> float:
         """Compute global clustering coefficient"""
         try:
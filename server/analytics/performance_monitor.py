@@ -97,13 +97,17 @@ class PerformanceMonitor:
                 f"Duration: {duration:.3f}s, Memory Delta: {memory_delta/1024/1024:.1f}MB"
             )
     
-    def monitor_graph_operation(self, operation_type: str, graph_size: str) -> None:
-        """Monitor graph operations timing"""
-        # Record the graph operation
-        GRAPH_PROCESSING_TIME.labels(
-            operation_type=operation_type,
-            graph_size_category=self._categorize_graph_size(graph_size)
-        ).observe(0.1)  # Placeholder timing
+    @contextmanager
+    def monitor_graph_operation(self, operation_type: str, graph_size: str) -> Generator[None, None, None]:
+        """Context manager for monitoring graph operations timing"""
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            GRAPH_PROCESSING_TIME.labels(
+                operation_type=operation_type,
+                graph_size_category=self._categorize_graph_size(graph_size)
+            ).observe(time.time() - start_time)
     
     def _categorize_graph_size(self, graph_size: str) -> str:
         """Categorize graph size for metrics"""
@@ -201,8 +201,13 @@ async def get_graph_metrics(
             filter_dict = json.loads(filters)
         
         metrics = await engine.calculate_graph_metrics(filter_dict)
+        statistics = await engine.get_graph_statistics()
         return {
             "graph_metrics": metrics.dict(),
+            "degree_distribution": statistics.degree_distribution,
+            "transitivity": statistics.transitivity,
+            "triangle_count": statistics.triangle_count,
+            "snapshot_version": statistics.version,
             "timestamp": metrics.timestamp if hasattr(metrics, 'timestamp') else None
         }
     except Exception as e:
@@ -23,6 +23,7 @@ from .engine import CollaborationEngine
 from .session_manager import SessionManager
 from .operational_transform import (
     OperationalTransform,
+    OperationHistory,
     Operation,
     TransformResult,
     OperationType,
@@ -69,6 +70,7 @@ __all__ = [
     
     # Operational transformation
     "OperationalTransform",
+    "OperationHistory",
     "Operation",
     "TransformResult", 
     "OperationType",
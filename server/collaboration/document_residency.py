@@ -0,0 +1,176 @@
+"""
+Document Residency - memory-bounded residency for Memory CRDT documents
+
+Tracks, for every resident document, when it was last accessed and an
+estimate of its memory footprint, kept in LRU order. Documents idle for
+longer than ``idle_timeout`` seconds, and the least recently used ones
+whenever resident documents exceed ``memory_budget_bytes``, are chosen for
+hibernation: the manager persists them and replaces them with a
+zlib-compressed snapshot held here until the next access rehydrates them.
+
+Hibernated snapshots are themselves bounded by ``hibernated_budget_bytes``;
+the oldest are dropped first, and those documents are reloaded from Redis
+when next opened.
+"""
+
+import time
+import zlib
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Set
+
+
+@dataclass
+class ResidencyEntry:
+    """Access and footprint bookkeeping for one resident document"""
+    last_access: float
+    footprint: int
+    revision: int = -1
+
+
+class DocumentResidency:
+    """
+    LRU bookkeeping for resident documents and store for hibernated snapshots
+
+    Holds no documents itself: callers ``admit``/``touch``/``remove``
+    resident documents and act on the ids returned by ``idle`` and
+    ``over_budget``.
+    """
+
+    def __init__(self, memory_budget_bytes: int = 256 * 1024 * 1024, idle_timeout: float = 600.0,
+                 hibernated_budget_bytes: int = 64 * 1024 * 1024) -> None:
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_timeout = idle_timeout
+        self.hibernated_budget_bytes = hibernated_budget_bytes
+
+        self._resident: "OrderedDict[str, ResidencyEntry]" = OrderedDict()
+        self._hibernated: "OrderedDict[str, bytes]" = OrderedDict()
+        self.resident_bytes = 0
+        self.hibernated_bytes = 0
+        self._rehydration_ms: Deque[float] = deque(maxlen=256)
+
+        self.stats = {
+            "hibernations": 0,
+            "idle_hibernations": 0,
+            "budget_hibernations": 0,
+            "rehydrations": 0,
+            "snapshots_dropped": 0,
+        }
+
+    # Resident documents
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._resident
+
+    def admit(self, memory_id: str, footprint: int, revision: int = -1) -> None:
+        self.remove(memory_id)
+        self._resident[memory_id] = ResidencyEntry(time.monotonic(), footprint, revision)
+        self.resident_bytes += footprint
+
+    def touch(self, memory_id: str) -> None:
+        """Record an access, making the document most recently used"""
+        entry = self._resident.get(memory_id)
+        if entry is not None:
+            entry.last_access = time.monotonic()
+            self._resident.move_to_end(memory_id)
+
+    def needs_estimate(self, memory_id: str, revision: int) -> bool:
+        entry = self._resident.get(memory_id)
+        return entry is not None and entry.revision != revision
+
+    def update_footprint(self, memory_id: str, footprint: int, revision: int = -1) -> None:
+        entry = self._resident.get(memory_id)
+        if entry is not None:
+            self.resident_bytes += footprint - entry.footprint
+            entry.footprint = footprint
+            entry.revision = revision
+
+    def remove(self, memory_id: str) -> None:
+        entry = self._resident.pop(memory_id, None)
+        if entry is not None:
+            self.resident_bytes -= entry.footprint
+
+    def idle(self, now: Optional[float] = None) -> List[str]:
+        """Resident documents not accessed within ``idle_timeout``, oldest first"""
+        cutoff = (now if now is not None else time.monotonic()) - self.idle_timeout
+        idle = []
+        for memory_id, entry in self._resident.items():
+            if entry.last_access > cutoff:
+                break
+            idle.append(memory_id)
+        return idle
+
+    def over_budget(self, keep: Optional[Set[str]] = None) -> List[str]:
+        """Least recently used documents to hibernate to get back under the budget"""
+        excess = self.resident_bytes - self.memory_budget_bytes
+        victims = []
+        for memory_id, entry in self._resident.items():
+            if excess <= 0:
+                break
+            if keep and memory_id in keep:
+                continue
+            victims.append(memory_id)
+            excess -= entry.footprint
+        return victims
+
+    # Hibernated snapshots
+
+    def is_hibernated(self, memory_id: str) -> bool:
+        return memory_id in self._hibernated
+
+    def hibernate(self, memory_id: str, snapshot: bytes, reason: str = "idle") -> List[str]:
+        """
+        Replace a resident document with its compressed snapshot
+
+        Returns the ids whose snapshots were dropped to stay within budget.
+        """
+        self.remove(memory_id)
+        self.discard_snapshot(memory_id)
+        compressed = zlib.compress(snapshot, 6)
+        self._hibernated[memory_id] = compressed
+        self.hibernated_bytes += len(compressed)
+        self.stats["hibernations"] += 1
+        self.stats[f"{reason}_hibernations"] += 1
+
+        dropped = []
+        while self.hibernated_bytes > self.hibernated_budget_bytes and self._hibernated:
+            oldest, data = self._hibernated.popitem(last=False)
+            self.hibernated_bytes -= len(data)
+            self.stats["snapshots_dropped"] += 1
+            dropped.append(oldest)
+        return dropped
+
+    def take_snapshot(self, memory_id: str) -> Optional[bytes]:
+        """Remove and return a hibernated document's snapshot"""
+        compressed = self._hibernated.pop(memory_id, None)
+        if compressed is None:
+            return None
+        self.hibernated_bytes -= len(compressed)
+        return zlib.decompress(compressed)
+
+    def discard_snapshot(self, memory_id: str) -> bool:
+        compressed = self._hibernated.pop(memory_id, None)
+        if compressed is None:
+            return False
+        self.hibernated_bytes -= len(compressed)
+        return True
+
+    def record_rehydration(self, seconds: float) -> None:
+        self.stats["rehydrations"] += 1
+        self._rehydration_ms.append(seconds * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._rehydration_ms)
+        return {
+            **self.stats,
+            "resident_documents": len(self._resident),
+            "resident_bytes": self.resident_bytes,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "hibernated_documents": len(self._hibernated),
+            "hibernated_bytes": self.hibernated_bytes,
+            "rehydration_ms": {
+                "avg": sum(latencies) / len(latencies) if latencies else 0.0,
+                "p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+                "max": latencies[-1] if latencies else 0.0,
+            },
+        }
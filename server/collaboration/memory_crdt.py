@@ -24,10 +24,11 @@ import logging
 import time
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Set, Tuple, Union, Callable, Iterator
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Union, Callable, Iterator
 from dataclasses import dataclass, field
 from enum import Enum
 import hashlib
+from contextlib import asynccontextmanager
 
 import redis.asyncio as redis
 from redis.asyncio import Redis
@@ -35,6 +36,9 @@ from redis.asyncio import Redis
 from .state import UserRole
 from .auth import CollaborationPermission
 from .pubsub import CollaborationMessage, MessageType, MessagePriority
+from .memory_update_log import MemoryUpdateLog
+from .document_residency import DocumentResidency
+from ..core.bounded_cache import BoundedCache, estimate_size
 
 
 # Configure logging
@@ -413,9 +417,26 @@ class MemoryDocument:
             self._pending_changes.clear()
             return changes
     
-    def get_document_update(self) -> bytes:
-        """Get Ypy document update for synchronization"""
-        return self._doc.encode_state_as_update()
+    def observe_updates(self, callback: Callable[[bytes], None]) -> None:
+        """Receive the encoded Ypy update produced by every local change"""
+        self._doc.observe_updates(callback)
+    
+    def get_state_vector(self) -> bytes:
+        """Encoded state vector describing which updates this document has seen"""
+        return self._doc.encode_state_vector()
+    
+    @property
+    def revision(self) -> int:
+        """Counter that changes whenever the document content changes"""
+        return self._doc.revision
+    
+    def estimate_footprint(self) -> int:
+        """Approximate bytes held by the document content and its pending changes"""
+        return estimate_size(self._doc._data) + estimate_size(self._pending_changes)
+    
+    def get_document_update(self, state_vector: Optional[bytes] = None) -> bytes:
+        """Get Ypy document update for synchronization, optionally only the diff against ``state_vector``"""
+        return self._doc.encode_state_as_update(state_vector)
     
     def apply_document_update(self, update: bytes) -> None:
         """Apply Ypy document update from another client"""
@@ -431,22 +452,91 @@ class MemoryCRDTManager:
     
     This class manages multiple memory documents, handles Redis integration,
     and provides high-level operations for collaborative memory editing.
+    
+    Documents are persisted as a snapshot plus a log of encoded updates
+    (see ``MemoryUpdateLog``). A single sync loop flushes the updates of
+    documents that changed since the previous tick; unchanged documents
+    cost nothing. The same loop tails the log for updates other servers
+    appended to resident documents.
+    
+    Clients and peers catch up with ``get_sync_update(memory_id,
+    state_vector)``, which returns only the updates missing from that
+    state vector. Diffs are cached for ``SYNC_DIFF_TTL`` seconds per
+    document revision, so a burst of reconnects with the same state
+    vector is encoded once.
+    
+    Resident documents are bounded (see ``DocumentResidency``): documents
+    idle for ``IDLE_TIMEOUT`` seconds, and the least recently used ones
+    beyond ``MEMORY_BUDGET_BYTES``, are flushed and hibernated to a
+    compressed snapshot, then rehydrated on the next
+    ``get_memory_document``.
     """
     
     def __init__(self, redis_client: Redis) -> None:
         self.redis_client = redis_client
         self._documents: Dict[str, MemoryDocument] = {}
         self._document_locks: Dict[str, asyncio.Lock] = {}
-        self._sync_tasks: Dict[str, asyncio.Task] = {}
+        self._lock_users: Dict[str, int] = {}
+        self._sync_task: Optional[asyncio.Task] = None
+        self.server_id = uuid.uuid4().hex[:12]
         
         # Redis key patterns
-        self.MEMORY_STATE_KEY = "memory:state:{memory_id}"
-        self.MEMORY_CHANGES_KEY = "memory:changes:{memory_id}"
+        self.MEMORY_STATE_KEY = "memory:state:{memory_id}"  # legacy full-state JSON
         self.MEMORY_LOCK_KEY = "memory:lock:{memory_id}"
         
         # Configuration
         self.SYNC_INTERVAL = 5.0  # seconds
         self.CACHE_TTL = 3600  # 1 hour
+        self.FLUSH_BATCH_SIZE = 100  # documents per pipeline
+        self.COMPACT_THRESHOLD = 200  # log entries before folding into a snapshot
+        self.REPLICATION_ENABLED = True  # tail the log for other servers' updates
+        self.REPLICATION_WINDOW = 60.0  # seconds of log kept past compaction for tailing
+        self.SYNC_DIFF_TTL = 2.0  # seconds a state-vector diff stays cached
+        self.IDLE_TIMEOUT = 600.0  # seconds without access before hibernating
+        self.MEMORY_BUDGET_BYTES = 256 * 1024 * 1024  # resident documents
+        self.HIBERNATED_BUDGET_BYTES = 64 * 1024 * 1024  # compressed snapshots
+        
+        self._sync_diffs = BoundedCache(max_bytes=8 * 1024 * 1024, default_ttl=self.SYNC_DIFF_TTL)
+        self.sync_stats = {
+            "sync_requests": 0,
+            "full_syncs": 0,
+            "diff_cache_hits": 0,
+            "sync_bytes_sent": 0,
+            "updates_received": 0,
+            "replicated_updates": 0,
+        }
+        
+        self.update_log = MemoryUpdateLog(
+            redis_client,
+            merge=SimpleCRDTDocument.merge_updates,
+            snapshot=self._snapshot_document,
+            batch_size=self.FLUSH_BATCH_SIZE,
+            compact_threshold=self.COMPACT_THRESHOLD,
+            ttl=self.CACHE_TTL,
+            origin=self.server_id,
+            replication_window=self.REPLICATION_WINDOW
+        )
+        self.residency = DocumentResidency(
+            memory_budget_bytes=self.MEMORY_BUDGET_BYTES,
+            idle_timeout=self.IDLE_TIMEOUT,
+            hibernated_budget_bytes=self.HIBERNATED_BUDGET_BYTES
+        )
+    
+    @asynccontextmanager
+    async def _document_lock(self, memory_id: str) -> AsyncIterator[None]:
+        """Per-document lock that is discarded once nobody holds or awaits it"""
+        lock = self._document_locks.get(memory_id)
+        if lock is None:
+            lock = self._document_locks[memory_id] = asyncio.Lock()
+        self._lock_users[memory_id] = self._lock_users.get(memory_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._lock_users[memory_id] -= 1
+            if not self._lock_users[memory_id]:
+                del self._lock_users[memory_id]
+                del self._document_locks[memory_id]
     
     async def get_memory_document(self, memory_id: str, user_id: str, 
                                  role: UserRole) -> Optional[MemoryDocument]:
@@ -457,40 +547,134 @@ class MemoryCRDTManager:
             logger.warning(f"User {user_id} lacks READ_MEMORY permission for memory {memory_id}")
             return None
         
-        # Get or create document lock
-        if memory_id not in self._document_locks:
-            self._document_locks[memory_id] = asyncio.Lock()
-        
-        async with self._document_locks[memory_id]:
+        async with self._document_lock(memory_id):
             # Check if document already loaded
-            if memory_id in self._documents:
-                return self._documents[memory_id]
-            
-            # Try to load from Redis cache
-            cached_state = await self._load_from_cache(memory_id)
+            document = self._documents.get(memory_id)
+            if document is not None:
+                self.residency.touch(memory_id)
+                return document
             
-            # Create new document
-            document = MemoryDocument(
-                memory_id=memory_id,
-                redis_client=self.redis_client,
-                initial_state=cached_state
-            )
+            document = await self._rehydrate_document(memory_id)
+            if document is None:
+                if self.update_log.is_dirty(memory_id):
+                    # Persist edits made through a reference held across hibernation
+                    await self.update_log.flush([memory_id])
+                document = await self._load_document(memory_id)
             
             # Setup change observer for Redis sync
             document.add_change_observer(self._on_document_change)
+            self._observe_updates(memory_id, document)
             
             # Store document
             self._documents[memory_id] = document
+            self.residency.admit(memory_id, document.estimate_footprint(), document.revision)
             
-            # Start sync task
-            self._sync_tasks[memory_id] = asyncio.create_task(
-                self._sync_document_periodically(memory_id)
-            )
+            # Start the shared sync loop
+            if self._sync_task is None or self._sync_task.done():
+                self._sync_task = asyncio.create_task(self._sync_dirty_documents_periodically())
             
             # Add user as collaborator
             await document.add_collaborator(user_id)
-            
+        
+        await self._enforce_memory_budget(keep={memory_id})
+        return document
+    
+    def _observe_updates(self, memory_id: str, document: MemoryDocument) -> None:
+        def on_update(update: bytes) -> None:
+            self.update_log.record(memory_id, update)
+            current = self._documents.get(memory_id)
+            if current is document:
+                self.residency.touch(memory_id)
+                return
+            # Edited through a reference that outlived hibernation or close
+            if current is not None:
+                current.apply_document_update(update)
+            else:
+                self.residency.discard_snapshot(memory_id)
+        document.observe_updates(on_update)
+    
+    async def _rehydrate_document(self, memory_id: str) -> Optional[MemoryDocument]:
+        """Rebuild a hibernated document from its snapshot and any newer remote updates"""
+        started = time.perf_counter()
+        snapshot = self.residency.take_snapshot(memory_id)
+        if snapshot is None:
+            return None
+        document = MemoryDocument(memory_id=memory_id, redis_client=self.redis_client)
+        document.apply_document_update(snapshot)
+        if self.REPLICATION_ENABLED:
+            try:
+                remote = await self.update_log.tail([memory_id])
+            except Exception as e:
+                logger.error(f"Error catching up hibernated memory {memory_id}: {e}")
+                remote = {}
+            for update in remote.get(memory_id, []):
+                document.apply_document_update(update)
+        self.residency.record_rehydration(time.perf_counter() - started)
+        return document
+    
+    async def hibernate_document(self, memory_id: str, reason: str = "idle") -> bool:
+        """Persist a resident document and replace it with a compressed snapshot"""
+        async with self._document_lock(memory_id):
+            document = self._documents.get(memory_id)
+            if document is None:
+                return False
+            await self.sync_dirty_documents([memory_id])
+            # Updates that failed to flush stay buffered in the log and are retried
+            snapshot = document.get_document_update()
+            del self._documents[memory_id]
+            for dropped in self.residency.hibernate(memory_id, snapshot, reason):
+                if dropped not in self._documents and not self.update_log.is_dirty(dropped):
+                    self.update_log.forget(dropped)
+            return True
+    
+    async def manage_residency(self) -> int:
+        """Hibernate idle documents, then least recently used ones over the memory budget"""
+        hibernated = 0
+        for memory_id in self.residency.idle():
+            hibernated += await self.hibernate_document(memory_id, reason="idle")
+        return hibernated + await self._enforce_memory_budget()
+    
+    async def _enforce_memory_budget(self, keep: Optional[Set[str]] = None) -> int:
+        hibernated = 0
+        for memory_id in self.residency.over_budget(keep):
+            hibernated += await self.hibernate_document(memory_id, reason="budget")
+        return hibernated
+    
+    def _refresh_footprints(self, memory_ids: List[str]) -> None:
+        for memory_id in memory_ids:
+            document = self._documents.get(memory_id)
+            if document is not None and self.residency.needs_estimate(memory_id, document.revision):
+                self.residency.update_footprint(memory_id, document.estimate_footprint(), document.revision)
+    
+    async def _load_document(self, memory_id: str) -> MemoryDocument:
+        """Rebuild a document from its snapshot and update log"""
+        try:
+            snapshot, updates = await self.update_log.load(memory_id)
+        except Exception as e:
+            logger.error(f"Error loading update log for memory {memory_id}: {e}")
+            snapshot, updates = None, []
+        
+        if snapshot is None and not updates:
+            # Fall back to a full-state cache entry written before the update log existed
+            cached_state = await self._load_from_cache(memory_id)
+            document = MemoryDocument(
+                memory_id=memory_id,
+                redis_client=self.redis_client,
+                initial_state=cached_state
+            )
+            if cached_state is not None:
+                # Seed the log so the document survives the legacy key expiring
+                self.update_log.record(memory_id, document.get_document_update())
             return document
+        
+        document = MemoryDocument(memory_id=memory_id, redis_client=self.redis_client)
+        for update in ([snapshot] if snapshot is not None else []) + updates:
+            document.apply_document_update(update)
+        return document
+    
+    def _snapshot_document(self, memory_id: str) -> Optional[bytes]:
+        document = self._documents.get(memory_id)
+        return document.get_document_update() if document is not None else None
     
     async def _load_from_cache(self, memory_id: str) -> Optional[MemoryDocumentState]:
         """Load memory state from Redis cache"""
@@ -507,80 +691,127 @@ class MemoryCRDTManager:
         
         return None
     
-    async def _save_to_cache(self, memory_id: str, state: MemoryDocumentState) -> None:
-        """Save memory state to Redis cache"""
-        try:
-            cache_key = self.MEMORY_STATE_KEY.format(memory_id=memory_id)
-            data = json.dumps(state.to_dict())
-            await self.redis_client.setex(cache_key, self.CACHE_TTL, data)
-            
-        except Exception as e:
-            logger.error(f"Error saving memory {memory_id} to cache: {e}")
-    
     def _on_document_change(self, change: MemoryChange) -> None:
         """Handle document change events"""
         # This could trigger immediate sync for critical changes
         # or be used for real-time notifications
         logger.debug(f"Memory {change.memory_id} changed: {change.change_type}")
     
-    async def _sync_document_periodically(self, memory_id: str) -> None:
-        """Periodically sync document state to Redis"""
-        while memory_id in self._documents:
+    async def _sync_dirty_documents_periodically(self) -> None:
+        """Flush documents that changed since the last tick, while any are open"""
+        while self._documents or self.update_log.dirty_ids():
+            await asyncio.sleep(self.SYNC_INTERVAL)
             try:
-                document = self._documents[memory_id]
-                
-                # Get current state and save to cache
-                current_state = document.get_current_state()
-                await self._save_to_cache(memory_id, current_state)
-                
-                # Get and process pending changes
-                changes = await document.get_pending_changes()
-                if changes:
-                    await self._store_changes(memory_id, changes)
-                
-                await asyncio.sleep(self.SYNC_INTERVAL)
-                
+                await self.sync_dirty_documents()
+                if self.REPLICATION_ENABLED:
+                    await self.replicate_remote_updates()
+                await self.manage_residency()
             except Exception as e:
-                logger.error(f"Error syncing memory {memory_id}: {e}")
-                await asyncio.sleep(self.SYNC_INTERVAL)
+                logger.error(f"Error syncing memory documents: {e}")
     
-    async def _store_changes(self, memory_id: str, changes: List[MemoryChange]) -> None:
-        """Store changes in Redis for cross-server synchronization"""
-        try:
-            changes_key = self.MEMORY_CHANGES_KEY.format(memory_id=memory_id)
-            
-            # Store each change with timestamp-based key
-            for change in changes:
-                change_data = json.dumps(change.to_dict())
-                timestamp_key = f"{changes_key}:{change.timestamp.timestamp()}"
-                await self.redis_client.setex(timestamp_key, self.CACHE_TTL, change_data)
-                
-        except Exception as e:
-            logger.error(f"Error storing changes for memory {memory_id}: {e}")
+    async def sync_dirty_documents(self, memory_ids: Optional[List[str]] = None) -> int:
+        """Persist buffered updates of dirty documents"""
+        dirty = memory_ids if memory_ids is not None else self.update_log.dirty_ids()
+        written = await self.update_log.flush(dirty)
+        
+        for memory_id in dirty:
+            document = self._documents.get(memory_id)
+            if document is not None:
+                # Change records are superseded by the update log for
+                # cross-server sync; drain them so they do not accumulate
+                await document.get_pending_changes()
+        self._refresh_footprints(dirty)
+        return written
+    
+    async def replicate_remote_updates(self) -> int:
+        """Apply updates other servers appended to resident documents"""
+        remote = await self.update_log.tail(list(self._documents))
+        applied = 0
+        for memory_id, updates in remote.items():
+            document = self._documents.get(memory_id)
+            if document is None:
+                continue
+            for update in updates:
+                document.apply_document_update(update)
+            applied += len(updates)
+        self._refresh_footprints(list(remote))
+        self.sync_stats["replicated_updates"] += applied
+        return applied
+    
+    async def get_sync_update(self, memory_id: str,
+                              state_vector: Optional[Union[bytes, str, Dict[str, int]]] = None) -> Optional[bytes]:
+        """
+        Encoded update containing what a replica with ``state_vector`` is missing
+        
+        Without a state vector the full document state is returned. Returns
+        None if the document is not open on this server.
+        """
+        document = self._documents.get(memory_id)
+        if document is None:
+            return None
+        
+        self.residency.touch(memory_id)
+        self.sync_stats["sync_requests"] += 1
+        known = encode_state_vector(decode_state_vector(state_vector)) if state_vector else b""
+        if not known:
+            self.sync_stats["full_syncs"] += 1
+        key = (memory_id, document.revision, known)
+        update = self._sync_diffs.get(key)
+        if update is None:
+            update = document.get_document_update(known or None)
+            self._sync_diffs.set(key, update, size=len(update))
+        else:
+            self.sync_stats["diff_cache_hits"] += 1
+        self.sync_stats["sync_bytes_sent"] += len(update)
+        return update
+    
+    async def apply_sync_update(self, memory_id: str, update: bytes) -> bool:
+        """Merge an update from a client or peer into a resident document and persist it"""
+        document = self._documents.get(memory_id)
+        if document is None:
+            return False
+        document.apply_document_update(update)
+        self.update_log.record(memory_id, update)
+        self.sync_stats["updates_received"] += 1
+        return True
     
     async def close_memory_document(self, memory_id: str) -> None:
         """Close and cleanup memory document"""
-        if memory_id in self._documents:
-            # Cancel sync task
-            if memory_id in self._sync_tasks:
-                self._sync_tasks[memory_id].cancel()
-                del self._sync_tasks[memory_id]
-            
-            # Final sync
-            document = self._documents[memory_id]
-            current_state = document.get_current_state()
-            await self._save_to_cache(memory_id, current_state)
-            
-            # Cleanup
-            del self._documents[memory_id]
-            if memory_id in self._document_locks:
-                del self._document_locks[memory_id]
+        async with self._document_lock(memory_id):
+            if memory_id in self._documents or self.residency.is_hibernated(memory_id):
+                # Final sync
+                await self.sync_dirty_documents([memory_id])
+                
+                # Cleanup
+                self.update_log.forget(memory_id)
+                self._documents.pop(memory_id, None)
+                self.residency.remove(memory_id)
+                self.residency.discard_snapshot(memory_id)
     
     async def shutdown(self) -> None:
         """Shutdown manager and cleanup all documents"""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        
+        await self.sync_dirty_documents()
         memory_ids = list(self._documents.keys())
         for memory_id in memory_ids:
             await self.close_memory_document(memory_id)
+    
+    def get_persistence_stats(self) -> Dict[str, Any]:
+        """Update log and sync statistics for monitoring"""
+        return {
+            "open_documents": len(self._documents),
+            **self.update_log.get_stats(),
+            **self.sync_stats,
+            "diff_cache_entries": len(self._sync_diffs),
+            "residency": self.residency.get_stats()
+        }
 
 
 # Global manager instance
@@ -742,10 +973,20 @@ def verify_collaboration_permission(role: UserRole, permission: CollaborationPer
 
 # Temporary CRDT-like implementation - will be replaced with proper Ypy
 class SimpleCRDTDocument:
-    """Simplified CRDT-like document for memory collaboration"""
+    """
+    Simplified CRDT-like document for memory collaboration
+    
+    Fields are last-writer-wins registers. Every local write stamps its
+    field with ``(clock, client_id)``, where ``clock`` is a Lamport clock,
+    so replicas converge whatever order updates arrive in. A state vector
+    maps each writer's ``client_id`` to the highest clock seen from it;
+    ``encode_state_as_update(state_vector)`` returns only the fields a
+    replica with that vector is missing, as in Yjs.
+    """
     
     def __init__(self, doc_id: str) -> None:
         self.doc_id = doc_id
+        self.client_id = uuid.uuid4().hex[:16]
         self._data: Dict[str, Any] = {
             "title": "",
             "content": "", 
@@ -754,7 +995,11 @@ class SimpleCRDTDocument:
             "collaborators": []
         }
         self._version = 0
+        # Bumped whenever the content changes, locally or from an update
+        self.revision = 0
+        self._stamps: Dict[str, Tuple[int, str]] = {}
         self._observers: List[Callable[[Dict[str, Any]], None]] = []
+        self._update_observers: List[Callable[[bytes], None]] = []
     
     def get_text(self, field: str) -> 'SimpleCRDTText':
         """Get text field wrapper"""
@@ -770,28 +1015,111 @@ class SimpleCRDTDocument:
     
     def _notify_change(self, field: str, old_value: Any, new_value: Any) -> None:
         """Notify observers of changes"""
+        self._version += 1
+        self.revision += 1
+        self._stamps[field] = (self._version, self.client_id)
         for observer in self._observers:
             observer({"field": field, "old_value": old_value, "new_value": new_value})
+        if self._update_observers:
+            update = self._encode_update([field])
+            for update_observer in self._update_observers:
+                update_observer(update)
+    
+    def observe_updates(self, callback: Callable[[bytes], None]) -> None:
+        """Receive an encoded incremental update after every local change"""
+        self._update_observers.append(callback)
     
-    def encode_state_as_update(self) -> bytes:
-        """Encode document state as update"""
+    def _encode_update(self, fields: List[str]) -> bytes:
         return json.dumps({
             "doc_id": self.doc_id,
-            "data": self._data,
+            "data": {name: self._data[name] for name in fields},
+            "stamps": {name: list(self._stamps[name]) for name in fields if name in self._stamps},
             "version": self._version
         }).encode()
     
+    def get_state_vector(self) -> Dict[str, int]:
+        """Highest clock seen from each writer"""
+        state_vector: Dict[str, int] = {}
+        for clock, client_id in self._stamps.values():
+            if clock > state_vector.get(client_id, 0):
+                state_vector[client_id] = clock
+        return state_vector
+    
+    def encode_state_vector(self) -> bytes:
+        return encode_state_vector(self.get_state_vector())
+    
+    def encode_state_as_update(self, state_vector: Optional[bytes] = None) -> bytes:
+        """Encode document state as update, or only what ``state_vector`` lacks"""
+        if not state_vector:
+            return self._encode_update(list(self._data))
+        known = decode_state_vector(state_vector)
+        missing = [
+            name for name, (clock, client_id) in self._stamps.items()
+            if clock > known.get(client_id, 0)
+        ]
+        return self._encode_update(missing)
+    
+    @staticmethod
+    def merge_updates(updates: List[bytes]) -> bytes:
+        """Fold updates into one with the same effect when applied"""
+        if len(updates) == 1:
+            return updates[0]
+        merged: Dict[str, Any] = {"data": {}, "stamps": {}, "version": 0}
+        for update in updates:
+            update_data = json.loads(update.decode())
+            merged.setdefault("doc_id", update_data["doc_id"])
+            stamps = update_data.get("stamps", {})
+            for name, value in update_data["data"].items():
+                stamp = stamps.get(name)
+                current = merged["stamps"].get(name)
+                if stamp is not None and current is not None and tuple(stamp) < tuple(current):
+                    continue
+                merged["data"][name] = value
+                if stamp is not None:
+                    merged["stamps"][name] = stamp
+                else:
+                    merged["stamps"].pop(name, None)
+            merged["version"] = max(merged["version"], update_data["version"])
+        return json.dumps(merged).encode()
+    
     def apply_update(self, update: bytes) -> None:
-        """Apply update to document"""
+        """Apply update to document, keeping the newest write of each field"""
         try:
             update_data = json.loads(update.decode())
-            if update_data["doc_id"] == self.doc_id:
-                self._data.update(update_data["data"])
-                self._version = max(self._version, update_data["version"])
+            if update_data["doc_id"] != self.doc_id:
+                return
+            stamps = update_data.get("stamps", {})
+            for name, value in update_data["data"].items():
+                stamp = stamps.get(name)
+                if stamp is not None:
+                    stamp = (int(stamp[0]), str(stamp[1]))
+                    current = self._stamps.get(name)
+                    if current is not None and stamp <= current:
+                        continue
+                    self._stamps[name] = stamp
+                if self._data.get(name) != value:
+                    self.revision += 1
+                self._data[name] = value
+            self._version = max(self._version, update_data["version"])
         except Exception as e:
             logger.error(f"Error applying update: {e}")
 
 
+def encode_state_vector(state_vector: Dict[str, int]) -> bytes:
+    """Canonical encoding, so equal vectors have equal bytes"""
+    return json.dumps(state_vector, sort_keys=True, separators=(",", ":")).encode()
+
+
+def decode_state_vector(encoded: Union[bytes, str, Dict[str, int], None]) -> Dict[str, int]:
+    if not encoded:
+        return {}
+    if isinstance(encoded, dict):
+        return {str(client_id): int(clock) for client_id, clock in encoded.items()}
+    if isinstance(encoded, bytes):
+        encoded = encoded.decode()
+    return {str(client_id): int(clock) for client_id, clock in json.loads(encoded).items()}
+
+
 class SimpleCRDTText:
     """Simplified text CRDT wrapper"""
     
@@ -0,0 +1,324 @@
+"""
+Memory Update Log - incremental persistence for Memory CRDT documents
+
+Each memory document is persisted as a compacted snapshot plus a Redis
+stream of encoded CRDT updates appended since that snapshot:
+
+    memory:snapshot:{memory_id}  hash   {"update": <full state>, "last_id": <stream id>}
+    memory:updates:{memory_id}   stream entries {"update": <encoded update>, "origin": <writer>}
+
+Documents are marked dirty when they record an update. ``flush`` appends
+the buffered updates of dirty documents only, merged into one entry per
+document and in batches sharing one Redis pipeline, and folds a
+document's log into a new snapshot once it grows past
+``compact_threshold`` entries. Loading replays the snapshot and
+then the stream entries after ``last_id``.
+
+Servers sharing the log replicate through it: ``tail`` reads, in one
+round trip per batch, the entries other origins appended to resident
+documents since this server's last read. Compaction only trims entries
+older than ``replication_window`` seconds, so a server that tails more
+often than that never misses one; a server that fell further behind and
+finds a newer snapshot reloads the snapshot and tail instead, which is
+safe because applying updates is idempotent.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _stream_id(entry_id: str) -> Tuple[int, int]:
+    milliseconds, _, sequence = entry_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+@dataclass
+class PendingUpdates:
+    """Updates buffered for one document since its last flush"""
+    updates: List[bytes] = field(default_factory=list)
+    log_length: int = 0
+    # Last stream entry this server has read or loaded
+    position: str = "0-0"
+
+
+class MemoryUpdateLog:
+    """
+    Snapshot + append-only update log for CRDT documents in Redis
+
+    ``merge`` folds a list of encoded updates into a single update, and
+    ``snapshot`` returns the full encoded state of a resident document;
+    both come from the CRDT implementation so the log never decodes
+    updates itself.
+    """
+
+    SNAPSHOT_KEY = "memory:snapshot:{memory_id}"
+    UPDATES_KEY = "memory:updates:{memory_id}"
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        merge: Callable[[List[bytes]], bytes],
+        snapshot: Callable[[str], Optional[bytes]],
+        batch_size: int = 100,
+        compact_threshold: int = 200,
+        ttl: Optional[int] = 3600,
+        origin: str = "",
+        replication_window: float = 60.0,
+    ) -> None:
+        self.redis_client = redis_client
+        self.merge = merge
+        self.snapshot = snapshot
+        self.batch_size = batch_size
+        self.compact_threshold = compact_threshold
+        self.ttl = ttl
+        self.origin = origin
+        self.replication_window = replication_window
+
+        self._pending: Dict[str, PendingUpdates] = {}
+        self._dirty: Set[str] = set()
+        self._flush_lock = asyncio.Lock()
+
+        self.stats = {
+            "updates_buffered": 0,
+            "entries_appended": 0,
+            "flushes": 0,
+            "pipelines": 0,
+            "compactions": 0,
+            "documents_loaded": 0,
+            "entries_replayed": 0,
+            "flush_errors": 0,
+            "entries_tailed": 0,
+            "tail_reloads": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    def _keys(self, memory_id: str) -> Tuple[str, str]:
+        return (self.SNAPSHOT_KEY.format(memory_id=memory_id),
+                self.UPDATES_KEY.format(memory_id=memory_id))
+
+    # Recording
+
+    def track(self, memory_id: str, log_length: int = 0, position: str = "0-0") -> None:
+        """Track a resident document whose log holds ``log_length`` entries up to ``position``"""
+        pending = self._pending.setdefault(memory_id, PendingUpdates())
+        pending.log_length = log_length
+        pending.position = position
+
+    def record(self, memory_id: str, update: bytes) -> None:
+        """Buffer an encoded update and mark the document dirty"""
+        pending = self._pending.setdefault(memory_id, PendingUpdates())
+        pending.updates.append(update)
+        self._dirty.add(memory_id)
+        self.stats["updates_buffered"] += 1
+
+    def is_dirty(self, memory_id: str) -> bool:
+        return memory_id in self._dirty
+
+    def dirty_ids(self) -> List[str]:
+        return list(self._dirty)
+
+    # Flushing
+
+    async def flush(self, memory_ids: Optional[List[str]] = None) -> int:
+        """
+        Append buffered updates of dirty documents (or just ``memory_ids``)
+
+        Returns the number of documents written.
+        """
+        async with self._flush_lock:
+            targets = [m for m in (memory_ids if memory_ids is not None else list(self._dirty))
+                       if m in self._dirty]
+            started = time.perf_counter()
+            written = 0
+            for offset in range(0, len(targets), self.batch_size):
+                written += await self._flush_batch(targets[offset:offset + self.batch_size])
+            if targets:
+                self.stats["flushes"] += 1
+                self.stats["last_flush_ms"] = (time.perf_counter() - started) * 1000
+            return written
+
+    async def _flush_batch(self, memory_ids: List[str]) -> int:
+        batch: List[Tuple[str, List[bytes], Optional[bytes], str]] = []
+        pipe = self.redis_client.pipeline(transaction=False)
+        for memory_id in memory_ids:
+            pending = self._pending[memory_id]
+            updates, pending.updates = pending.updates, []
+            self._dirty.discard(memory_id)
+            # The snapshot is taken now, so it covers exactly the entries appended below
+            snapshot = None
+            if pending.log_length + 1 > self.compact_threshold:
+                snapshot = self.snapshot(memory_id)
+            batch.append((memory_id, updates, snapshot, pending.position))
+
+            snapshot_key, updates_key = self._keys(memory_id)
+            pipe.xadd(updates_key, {"update": self.merge(updates), "origin": self.origin})
+            if self.ttl:
+                # The log is useless without its snapshot, so both expire together
+                pipe.expire(updates_key, self.ttl)
+                pipe.expire(snapshot_key, self.ttl)
+
+        try:
+            results = await pipe.execute()
+        except Exception as e:
+            # Put the updates back in front of anything recorded meanwhile
+            for memory_id, updates, _, _ in batch:
+                pending = self._pending.setdefault(memory_id, PendingUpdates())
+                pending.updates[:0] = updates
+                self._dirty.add(memory_id)
+            self.stats["flush_errors"] += 1
+            logger.error(f"Error appending memory updates: {e}")
+            return 0
+        self.stats["pipelines"] += 1
+
+        step = 3 if self.ttl else 1
+        compactions = []
+        for (memory_id, updates, snapshot, position), entry_id in zip(batch, results[::step]):
+            self.stats["entries_appended"] += 1
+            pending = self._pending.get(memory_id)
+            if pending is not None:
+                pending.log_length += 1
+            if snapshot is not None:
+                compactions.append((memory_id, snapshot, position, _text(entry_id)))
+        if compactions:
+            await self._compact(compactions)
+        return len(batch)
+
+    async def _compact(self, compactions: List[Tuple[str, bytes, str, str]]) -> None:
+        """
+        Replace each log prefix up to ``last_id`` with a snapshot covering it
+        
+        The local snapshot only covers entries up to the last ``position``
+        this server read; entries other origins appended between that and
+        ``last_id`` are merged into it first, so nothing up to ``last_id``
+        is lost when the prefix is trimmed.
+        """
+        pipe = self.redis_client.pipeline(transaction=False)
+        for memory_id, _, position, last_id in compactions:
+            pipe.xrange(self._keys(memory_id)[1], min=f"({position}", max=last_id)
+        try:
+            unread = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error reading memory update logs for compaction: {e}")
+            return
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        horizon = (int((time.time() - self.replication_window) * 1000), 0)
+        for (memory_id, snapshot, _, last_id), entries in zip(compactions, unread):
+            remote = [self._field(fields, "update") for _, fields in entries or []
+                      if _text(self._field(fields, "origin") or "") != self.origin]
+            if remote:
+                snapshot = self.merge([snapshot] + remote)
+            snapshot_key, updates_key = self._keys(memory_id)
+            pipe.hset(snapshot_key, mapping={"update": snapshot, "last_id": last_id})
+            # MINID keeps last_id itself (loads replay strictly after it) and
+            # anything recent enough for other servers still to be tailing
+            trim_to = min(_stream_id(last_id), horizon)
+            pipe.xtrim(updates_key, minid=f"{trim_to[0]}-{trim_to[1]}")
+            if self.ttl:
+                pipe.expire(snapshot_key, self.ttl)
+        try:
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error compacting memory update logs: {e}")
+            return
+        for memory_id, _, _, _ in compactions:
+            pending = self._pending.get(memory_id)
+            if pending is not None:
+                pending.log_length = 1
+            self.stats["compactions"] += 1
+
+    # Loading
+
+    async def load(self, memory_id: str) -> Tuple[Optional[bytes], List[bytes]]:
+        """Return the snapshot (if any) and the updates appended after it"""
+        snapshot_key, updates_key = self._keys(memory_id)
+        stored = await self.redis_client.hgetall(snapshot_key)
+        snapshot = None
+        start = "-"
+        if stored:
+            stored = {_text(key): value for key, value in stored.items()}
+            snapshot = stored.get("update")
+            if stored.get("last_id"):
+                start = f"({_text(stored['last_id'])}"
+        entries = await self.redis_client.xrange(updates_key, min=start)
+        updates = [self._field(fields, "update") for _, fields in entries]
+        position = _text(entries[-1][0]) if entries else (start.lstrip("(") if start != "-" else "0-0")
+        self.track(memory_id, log_length=len(updates), position=position)
+        self.stats["documents_loaded"] += 1
+        self.stats["entries_replayed"] += len(updates)
+        return snapshot, updates
+
+    @staticmethod
+    def _field(fields: Dict[Any, Any], name: str) -> Any:
+        return fields.get(name.encode(), fields.get(name))
+
+    # Replication
+
+    async def tail(self, memory_ids: Optional[List[str]] = None) -> Dict[str, List[bytes]]:
+        """
+        Updates other origins appended to tracked documents since the last read
+
+        Documents whose last read is older than the replication window get
+        their snapshot and full tail instead, as entries may have been trimmed.
+        """
+        targets = [m for m in (memory_ids if memory_ids is not None else list(self._pending))
+                   if m in self._pending]
+        horizon = (int((time.time() - self.replication_window) * 1000), 0)
+        updates: Dict[str, List[bytes]] = {}
+        for offset in range(0, len(targets), self.batch_size):
+            batch = targets[offset:offset + self.batch_size]
+            streams = {self._keys(m)[1]: self._pending[m].position for m in batch}
+            response = await self.redis_client.xread(streams)
+            if isinstance(response, dict):
+                response = list(response.items())
+            by_key = {_text(key): entries for key, entries in response or []}
+
+            for memory_id in batch:
+                entries = by_key.get(self._keys(memory_id)[1])
+                if not entries:
+                    continue
+                pending = self._pending[memory_id]
+                if _stream_id(pending.position) < horizon and await self._compacted_past(memory_id, pending.position):
+                    snapshot, tail = await self.load(memory_id)
+                    updates[memory_id] = ([snapshot] if snapshot is not None else []) + tail
+                    self.stats["tail_reloads"] += 1
+                    continue
+                pending.position = _text(entries[-1][0])
+                pending.log_length += len(entries)
+                remote = [
+                    self._field(fields, "update") for _, fields in entries
+                    if _text(self._field(fields, "origin") or "") != self.origin
+                ]
+                if remote:
+                    updates[memory_id] = remote
+                    self.stats["entries_tailed"] += len(remote)
+        return updates
+
+    async def _compacted_past(self, memory_id: str, position: str) -> bool:
+        """Whether a compaction since ``position`` may have trimmed unread entries"""
+        last_id = await self.redis_client.hget(self._keys(memory_id)[0], "last_id")
+        return last_id is not None and _stream_id(_text(last_id)) > _stream_id(position)
+
+    def forget(self, memory_id: str) -> None:
+        """Stop tracking a document; flush it first to keep its updates"""
+        self._pending.pop(memory_id, None)
+        self._dirty.discard(memory_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "tracked_documents": len(self._pending),
+            "dirty_documents": len(self._dirty),
+            "buffered_updates": sum(len(p.updates) for p in self._pending.values()),
+        }
@@ -3,13 +3,21 @@ Operational Transformation Engine
 
 Provides Google Docs-style operational transformation for real-time
 collaborative editing with conflict resolution and operation composition.
+
+Applied operations are kept in an ``OperationHistory`` numbered by server
+revision. An incoming operation names the revision its author had seen
+(``base_revision``) and is transformed only against the operations
+applied after it, so transform cost follows actual concurrency rather
+than session age. Entries are garbage-collected once every participant's
+state vector covers them.
 """
 
 import json
 import logging
+from bisect import bisect_right
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Dict, List, Optional, Any, Tuple, Union
+from typing import Callable, Dict, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass, field
 from uuid import uuid4
 import asyncio
@@ -58,6 +66,8 @@ class Operation:
     user_id: str = ""
     session_id: str = ""
     sequence_number: int = 0
+    # Server revision the author had applied when creating the operation
+    base_revision: Optional[int] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert operation to dictionary for serialization"""
@@ -72,7 +82,8 @@ class Operation:
             "timestamp": self.timestamp.isoformat(),
             "user_id": self.user_id,
             "session_id": self.session_id,
-            "sequence_number": self.sequence_number
+            "sequence_number": self.sequence_number,
+            "base_revision": self.base_revision
         }
     
     @classmethod
@@ -102,7 +113,8 @@ class Operation:
             timestamp=datetime.fromisoformat(data["timestamp"]),
             user_id=data.get("user_id", ""),
             session_id=data.get("session_id", ""),
-            sequence_number=data.get("sequence_number", 0)
+            sequence_number=data.get("sequence_number", 0),
+            base_revision=data.get("base_revision")
         )
     
     def copy(self) -> "Operation":
@@ -118,7 +130,8 @@ class Operation:
             timestamp=self.timestamp,
             user_id=self.user_id,
             session_id=self.session_id,
-            sequence_number=self.sequence_number
+            sequence_number=self.sequence_number,
+            base_revision=self.base_revision
         )
 
 
@@ -132,6 +145,176 @@ class TransformResult:
     resolution_strategy: Optional[str] = None
 
 
+@dataclass
+class OperationRun:
+    """Consecutive operations by one user pre-composed into a single operation"""
+    start_revision: int
+    end_revision: int
+    operation: Operation
+
+
+class OperationHistory:
+    """
+    Revision-indexed log of applied operations
+    
+    Operation ``n`` applied by the server has revision ``n``; entries are
+    also indexed by ``(user_id, sequence_number)``. Consecutive operations
+    by the same user that ``composable`` accepts are kept pre-composed
+    with ``compose`` as one ``OperationRun``, so ``since`` returns one
+    operation per run.
+    
+    ``collect`` drops the oldest entries once every participant's
+    acknowledged state vector covers them, in batches of at least
+    ``gc_batch`` entries; beyond ``max_operations`` the oldest entries are
+    dropped regardless and lagging clients must resynchronise.
+    """
+    
+    def __init__(
+        self,
+        compose: Callable[[List[Operation]], Operation],
+        composable: Callable[[Operation, Operation], bool],
+        max_operations: int = 10000,
+        gc_batch: int = 256
+    ) -> None:
+        self.compose = compose
+        self.composable = composable
+        self.max_operations = max_operations
+        self.gc_batch = gc_batch
+        
+        self.revision = 0
+        self._first_revision = 1
+        self._operations: List[Operation] = []
+        self._index: Dict[Tuple[str, int], int] = {}
+        self._runs: List[OperationRun] = []
+        self._run_ends: List[int] = []
+        # participant -> user_id -> latest sequence number the participant applied
+        self._acknowledged: Dict[str, Dict[str, int]] = {}
+        
+        self.stats = {
+            "operations_collected": 0,
+            "operations_evicted": 0,
+        }
+    
+    def __len__(self) -> int:
+        return len(self._operations)
+    
+    @property
+    def first_revision(self) -> int:
+        """Oldest revision still retained"""
+        return self._first_revision
+    
+    def append(self, operation: Operation) -> int:
+        """Record an applied operation and return its revision"""
+        self.revision += 1
+        self._operations.append(operation)
+        if operation.user_id:
+            self._index[(operation.user_id, operation.sequence_number)] = self.revision
+            # Authors have applied their own operations
+            self.acknowledge(operation.user_id, {operation.user_id: operation.sequence_number})
+        
+        last = self._runs[-1] if self._runs else None
+        previous = self._operations[-2] if len(self._operations) > 1 else None
+        if (last is not None and previous is not None
+                and previous.user_id == operation.user_id and self.composable(previous, operation)):
+            last.operation = self.compose([last.operation, operation])
+            last.end_revision = self.revision
+            self._run_ends[-1] = self.revision
+        else:
+            self._runs.append(OperationRun(self.revision, self.revision, operation))
+            self._run_ends.append(self.revision)
+        
+        if len(self._operations) > self.max_operations:
+            evicted = len(self._operations) - self.max_operations
+            self._truncate(evicted)
+            self.stats["operations_evicted"] += evicted
+        return self.revision
+    
+    def get(self, revision: int) -> Optional[Operation]:
+        if self._first_revision <= revision <= self.revision:
+            return self._operations[revision - self._first_revision]
+        return None
+    
+    def revision_of(self, user_id: str, sequence_number: int) -> Optional[int]:
+        """Revision at which a user's operation was applied, if still retained"""
+        return self._index.get((user_id, sequence_number))
+    
+    def operations(self, since_revision: int = 0) -> List[Operation]:
+        """Retained operations applied after ``since_revision``"""
+        start = max(since_revision + 1 - self._first_revision, 0)
+        return self._operations[start:]
+    
+    def since(self, base_revision: int) -> List[Operation]:
+        """
+        Operations applied after ``base_revision``, one per run
+        
+        Raises ValueError if entries after ``base_revision`` were collected.
+        """
+        if base_revision >= self.revision:
+            return []
+        if base_revision < self._first_revision - 1:
+            raise ValueError(
+                f"Revision {base_revision} is older than the retained history "
+                f"(starts at {self._first_revision})"
+            )
+        concurrent = []
+        for run in self._runs[bisect_right(self._run_ends, base_revision):]:
+            if run.start_revision > base_revision:
+                concurrent.append(run.operation)
+            else:
+                # Only part of this run is concurrent
+                concurrent.append(self.compose(self.operations(base_revision)[:run.end_revision - base_revision]))
+        return concurrent
+    
+    # Garbage collection
+    
+    def acknowledge(self, participant_id: str, state_vector: Dict[str, int]) -> None:
+        """Record the latest sequence number per user that a participant has applied"""
+        acknowledged = self._acknowledged.setdefault(participant_id, {})
+        for user_id, sequence_number in state_vector.items():
+            if sequence_number > acknowledged.get(user_id, 0):
+                acknowledged[user_id] = sequence_number
+    
+    def remove_participant(self, participant_id: str) -> None:
+        """Stop waiting for a participant that left before collecting entries"""
+        self._acknowledged.pop(participant_id, None)
+    
+    def collect(self, force: bool = False) -> int:
+        """Drop the oldest entries every participant has applied; returns the count"""
+        vectors = list(self._acknowledged.values())
+        collectible = 0
+        for operation in self._operations:
+            if not all(vector.get(operation.user_id, 0) >= operation.sequence_number for vector in vectors):
+                break
+            collectible += 1
+        if not collectible or (collectible < self.gc_batch and not force):
+            return 0
+        self._truncate(collectible)
+        self.stats["operations_collected"] += collectible
+        return collectible
+    
+    def _truncate(self, count: int) -> None:
+        """Drop the ``count`` oldest entries"""
+        for operation in self._operations[:count]:
+            self._index.pop((operation.user_id, operation.sequence_number), None)
+        del self._operations[:count]
+        self._first_revision += count
+        # A run straddling the new first revision stays; ``since`` recomposes
+        # it from the retained entries when a client's base falls inside it
+        drop = bisect_right(self._run_ends, self._first_revision - 1)
+        del self._runs[:drop]
+        del self._run_ends[:drop]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "revision": self.revision,
+            "first_revision": self._first_revision,
+            "retained_operations": len(self._operations),
+            "runs": len(self._runs),
+            "participants": len(self._acknowledged),
+        }
+
+
 class OperationalTransform:
     """
     Operational Transformation engine for real-time collaborative editing.
@@ -141,10 +324,60 @@ class OperationalTransform:
     and decomposition of operations for efficient processing.
     """
     
-    def __init__(self) -> None:
-        self.operation_history: List[Operation] = []
+    def __init__(self, max_history: int = 10000, gc_batch: int = 256) -> None:
+        self.history = OperationHistory(
+            self.compose_operations,
+            self._can_compose,
+            max_operations=max_history,
+            gc_batch=gc_batch
+        )
         self.state_vector: Dict[str, int] = {}  # user_id -> latest sequence number
         self.composition_cache: Dict[str, Operation] = {}
+        self.transform_stats = {
+            "operations_received": 0,
+            "transforms": 0,
+        }
+    
+    @property
+    def operation_history(self) -> List[Operation]:
+        """Retained operations in revision order"""
+        return self.history.operations()
+    
+    def receive_operation(self, operation: Operation) -> Tuple[Operation, int]:
+        """
+        Transform an incoming operation against concurrent history and record it
+        
+        The operation is transformed only against operations applied after
+        its ``base_revision`` by other users; without a base revision it is
+        taken to be based on the current revision. Returns the transformed
+        operation and the revision it was applied at. Raises ValueError if
+        the base revision has already been garbage-collected.
+        """
+        transformed = operation.copy()
+        base_revision = operation.base_revision
+        if base_revision is not None:
+            for concurrent in self.history.since(base_revision):
+                if operation.user_id and concurrent.user_id == operation.user_id:
+                    # The author had already applied its own earlier operations
+                    continue
+                transformed = self.transform(concurrent, transformed, priority="left").transformed_op2
+                self.transform_stats["transforms"] += 1
+        transformed.base_revision = self.history.revision
+        self.transform_stats["operations_received"] += 1
+        return transformed, self.add_to_history(transformed)
+    
+    def acknowledge(self, participant_id: str, state_vector: Dict[str, int]) -> int:
+        """Record a participant's state vector and collect history it allows"""
+        self.history.acknowledge(participant_id, state_vector)
+        return self.history.collect()
+    
+    def remove_participant(self, participant_id: str) -> int:
+        """Forget a departed participant so it no longer holds back collection"""
+        self.history.remove_participant(participant_id)
+        return self.history.collect()
+    
+    def get_history_stats(self) -> Dict[str, Any]:
+        return {**self.history.get_stats(), **self.transform_stats}
         
     def transform(
         self,
@@ -416,6 +649,16 @@ class OperationalTransform:
         
         return adjusted
     
+    def _can_compose(self, op1: Operation, op2: Operation) -> bool:
+        """Whether ``_compose_two_operations`` folds op2 into op1 without loss"""
+        if op1.target != op2.target or op1.operation_type != op2.operation_type:
+            return False
+        if op1.operation_type == OperationType.INSERT:
+            return op1.position + op1.length == op2.position
+        if op1.operation_type == OperationType.DELETE:
+            return op1.position == op2.position
+        return False
+    
     def _create_noop(self, op: Operation) -> Operation:
         """Create a no-operation from an existing operation"""
         noop = op.copy()
@@ -539,13 +782,13 @@ class OperationalTransform:
         
         return result
     
-    def get_operation_history(self) -> List[Operation]:
-        """Get the complete operation history"""
-        return self.operation_history.copy()
+    def get_operation_history(self, since_revision: int = 0) -> List[Operation]:
+        """Get the retained operation history, optionally after a revision"""
+        return self.history.operations(since_revision)
     
-    def add_to_history(self, operation: Operation) -> None:
-        """Add an operation to the history"""
-        self.operation_history.append(operation)
+    def add_to_history(self, operation: Operation) -> int:
+        """Add an operation to the history and return its revision"""
+        revision = self.history.append(operation)
         
         # Update state vector
         if operation.user_id:
@@ -553,6 +796,9 @@ class OperationalTransform:
                 self.state_vector.get(operation.user_id, 0),
                 operation.sequence_number
             )
+        if revision % self.history.gc_batch == 0:
+            self.history.collect()
+        return revision
     
     def can_apply_operation(self, operation: Operation) -> bool:
         """Check if an operation can be applied based on state vector"""
@@ -0,0 +1,88 @@
+"""
+Tests for memory-bounded Memory CRDT document residency
+
+Covers LRU and idle selection, snapshot budgets, and the manager
+hibernating documents and rehydrating them on the next access.
+"""
+
+import pytest
+
+from .document_residency import DocumentResidency
+from .memory_crdt import MemoryCRDTManager
+from .state import UserRole
+from .test_memory_update_log import InMemoryRedis
+
+
+class TestDocumentResidency:
+    """Test residency bookkeeping without documents"""
+
+    def test_over_budget_picks_least_recently_used(self) -> None:
+        """Test that touched documents survive and kept ids are skipped"""
+        residency = DocumentResidency(memory_budget_bytes=250)
+        for memory_id in ("a", "b", "c"):
+            residency.admit(memory_id, 100)
+        residency.touch("a")
+        assert residency.over_budget() == ["b"]
+        assert residency.over_budget(keep={"b"}) == ["c"]
+
+    def test_idle_and_snapshot_budget(self) -> None:
+        """Test idle selection and that the oldest snapshots are dropped first"""
+        residency = DocumentResidency(idle_timeout=10, hibernated_budget_bytes=400)
+        residency.admit("a", 10)
+        residency.admit("b", 10)
+        now = residency._resident["b"].last_access
+        residency._resident["a"].last_access = now - 60
+        assert residency.idle(now) == ["a"]
+
+        snapshot = bytes(range(256))
+        assert residency.hibernate("a", snapshot) == []
+        assert residency.hibernate("b", snapshot, reason="budget") == ["a"]
+        assert residency.take_snapshot("b") == snapshot and residency.hibernated_bytes == 0
+        assert residency.resident_bytes == 0
+
+
+class TestManagerHibernation:
+    """Test the manager hibernating and rehydrating documents"""
+
+    @pytest.mark.asyncio
+    async def test_budget_hibernates_and_access_rehydrates(self) -> None:
+        """Test that resident memory stays bounded and rehydrated documents keep their state"""
+        redis_client = InMemoryRedis()
+        manager = MemoryCRDTManager(redis_client)
+        manager.residency.memory_budget_bytes = 20_000
+
+        for i in range(10):
+            document = await manager.get_memory_document(f"m{i}", "alice", UserRole.OWNER)
+            await document.update_content(f"body {i} " + "x" * 4_000, "alice")
+            await manager.sync_dirty_documents([f"m{i}"])
+            await manager._enforce_memory_budget()
+
+        stats = manager.get_persistence_stats()["residency"]
+        assert stats["resident_bytes"] <= 20_000 and stats["budget_hibernations"] > 0
+        assert "m0" not in manager._documents and manager.residency.is_hibernated("m0")
+
+        rehydrated = await manager.get_memory_document("m0", "bob", UserRole.COLLABORATOR)
+        state = rehydrated.get_current_state()
+        assert state.content.startswith("body 0 ") and state.collaborators == {"alice", "bob"}
+        assert manager.residency.stats["rehydrations"] == 1
+        assert not manager._document_locks
+        await manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stale_reference_edits_are_kept(self) -> None:
+        """Test that edits through a reference held across hibernation reach the reloaded document"""
+        redis_client = InMemoryRedis()
+        manager = MemoryCRDTManager(redis_client)
+        stale = await manager.get_memory_document("m1", "alice", UserRole.OWNER)
+        assert await manager.hibernate_document("m1")
+        assert await manager.manage_residency() == 0
+
+        await stale.update_title("edited while hibernated", "alice")
+        assert not manager.residency.is_hibernated("m1")
+        reloaded = await manager.get_memory_document("m1", "alice", UserRole.OWNER)
+        assert reloaded is not stale
+        assert reloaded.get_current_state().title == "edited while hibernated"
+
+        await stale.add_tag("late", "alice")
+        assert "late" in reloaded.get_current_state().tags
+        await manager.shutdown()
@@ -0,0 +1,320 @@
+"""
+Tests for Memory CRDT incremental persistence and sync
+
+Covers the snapshot + update-log round trip, dirty-only batched flushing,
+log compaction, the fallback to legacy full-state cache entries,
+state-vector catch-up diffs and replication between servers through the
+shared log.
+"""
+
+import itertools
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from .memory_crdt import MemoryCRDTManager, MemoryDocumentState, SimpleCRDTDocument, decode_state_vector
+from .memory_update_log import MemoryUpdateLog
+from .state import UserRole
+
+
+class InMemoryPipeline:
+    """Queues commands and runs them against InMemoryRedis on execute"""
+
+    def __init__(self, redis_client: "InMemoryRedis") -> None:
+        self.redis_client = redis_client
+        self.commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str) -> Any:
+        def queue(*args: Any, **kwargs: Any) -> "InMemoryPipeline":
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        if self.redis_client.error is not None:
+            raise self.redis_client.error
+        self.redis_client.round_trips += 1
+        return [await getattr(self.redis_client, name)(*args, **kwargs)
+                for name, args, kwargs in self.commands]
+
+
+class InMemoryRedis:
+    """The subset of redis.asyncio used by the update log"""
+
+    def __init__(self) -> None:
+        self.values: Dict[str, Any] = {}
+        self.streams: Dict[str, List[Tuple[str, Dict[bytes, bytes]]]] = {}
+        self.round_trips = 0
+        self.error: Any = None
+        self._ids = itertools.count(1)
+
+    def pipeline(self, transaction: bool = True) -> InMemoryPipeline:
+        return InMemoryPipeline(self)
+
+    async def get(self, key: str) -> Any:
+        return self.values.get(key)
+
+    async def setex(self, key: str, ttl: int, value: Any) -> None:
+        self.values[key] = value
+
+    async def expire(self, key: str, ttl: int) -> bool:
+        return key in self.values or key in self.streams
+
+    async def hset(self, key: str, mapping: Dict[str, Any]) -> None:
+        self.values[key] = {field: value if isinstance(value, bytes) else str(value).encode()
+                            for field, value in mapping.items()}
+
+    async def hget(self, key: str, field: str) -> Any:
+        return self.values.get(key, {}).get(field)
+
+    async def hgetall(self, key: str) -> Dict[bytes, bytes]:
+        return {field.encode(): value for field, value in self.values.get(key, {}).items()}
+
+    async def xadd(self, key: str, fields: Dict[str, Any]) -> bytes:
+        entry_id = f"0-{next(self._ids)}"
+        encoded = {k.encode(): v if isinstance(v, bytes) else str(v).encode() for k, v in fields.items()}
+        self.streams.setdefault(key, []).append((entry_id, encoded))
+        return entry_id.encode()
+
+    async def xread(self, streams: Dict[str, str]) -> List[Tuple[bytes, list]]:
+        response = []
+        for key, last_id in streams.items():
+            entries = await self.xrange(key, min=f"({last_id}")
+            if entries:
+                response.append((key.encode(), entries))
+        return response
+
+    async def xrange(self, key: str, min: str = "-", max: str = "+") -> List[Tuple[bytes, Dict[bytes, bytes]]]:
+        entries = self.streams.get(key, [])
+        if min != "-":
+            after = int(min.lstrip("(").split("-")[1])
+            entries = [e for e in entries if int(e[0].split("-")[1]) > after]
+        if max != "+":
+            until = int(max.split("-")[1])
+            entries = [e for e in entries if int(e[0].split("-")[1]) <= until]
+        return [(entry_id.encode(), fields) for entry_id, fields in entries]
+
+    async def xtrim(self, key: str, minid: str, approximate: bool = True) -> int:
+        keep = int(minid.split("-")[1])
+        before = len(self.streams.get(key, []))
+        self.streams[key] = [e for e in self.streams.get(key, []) if int(e[0].split("-")[1]) >= keep]
+        return before - len(self.streams[key])
+
+
+class TestUpdateLogRoundTrip:
+    """Test that documents rebuild from snapshot plus tail"""
+
+    @pytest.mark.asyncio
+    async def test_reload_replays_snapshot_and_tail(self) -> None:
+        """Test that a compacted document reloads to the same state"""
+        redis_client = InMemoryRedis()
+        manager = MemoryCRDTManager(redis_client)
+        manager.update_log.compact_threshold = 4
+
+        document = await manager.get_memory_document("m1", "alice", UserRole.OWNER)
+        for i in range(10):
+            await document.update_title(f"Title {i}", "alice")
+            await document.add_tag(f"tag{i}", "alice")
+            await manager.sync_dirty_documents()
+        expected = document.get_current_state()
+        await manager.shutdown()
+
+        assert manager.update_log.stats["compactions"] >= 2
+        assert len(redis_client.streams["memory:updates:m1"]) <= 4
+
+        reloaded = await MemoryCRDTManager(redis_client).get_memory_document("m1", "alice", UserRole.OWNER)
+        state = reloaded.get_current_state()
+        assert (state.title, state.tags, state.metadata, state.collaborators) == (
+            expected.title, expected.tags, expected.metadata, expected.collaborators
+        )
+
+    def test_merged_updates_match_sequential_application(self) -> None:
+        """Test that merging updates has the same effect as applying them in order"""
+        source = SimpleCRDTDocument("doc")
+        updates: List[bytes] = []
+        source.observe_updates(updates.append)
+        source.get_text("title").insert(0, "Hello")
+        source.get_array("tags").append(["a", "b"])
+        source.get_text("title").insert(5, " world")
+
+        merged, sequential = SimpleCRDTDocument("doc"), SimpleCRDTDocument("doc")
+        merged.apply_update(SimpleCRDTDocument.merge_updates(updates))
+        for update in updates:
+            sequential.apply_update(update)
+        assert merged._data == sequential._data == source._data
+
+
+    @pytest.mark.asyncio
+    async def test_compaction_keeps_unread_entries_from_other_servers(self) -> None:
+        """Test that another origin's entry appended before our compaction survives the trim"""
+        redis_client = InMemoryRedis()
+        local = SimpleCRDTDocument("m1")
+        first = MemoryUpdateLog(redis_client, SimpleCRDTDocument.merge_updates,
+                                lambda memory_id: local.encode_state_as_update(),
+                                compact_threshold=1, origin="first")
+        second = MemoryUpdateLog(redis_client, SimpleCRDTDocument.merge_updates,
+                                 lambda memory_id: None, origin="second")
+        local.observe_updates(lambda update: first.record("m1", update))
+        await first.load("m1")
+
+        # Appended by the other server, never tailed by the first
+        remote = SimpleCRDTDocument("m1")
+        remote.observe_updates(lambda update: second.record("m1", update))
+        remote.get_text("title").insert(0, "from second")
+        assert await second.flush() == 1
+
+        local.get_text("content").insert(0, "from first")
+        assert await first.flush() == 1
+        local.get_array("tags").append(["a"])
+        assert await first.flush() == 1
+        assert first.stats["compactions"] == 1
+        assert len(redis_client.streams["memory:updates:m1"]) == 1
+
+        snapshot, tail = await MemoryUpdateLog(
+            redis_client, SimpleCRDTDocument.merge_updates, lambda memory_id: None
+        ).load("m1")
+        reloaded = SimpleCRDTDocument("m1")
+        for update in [snapshot] + tail:
+            reloaded.apply_update(update)
+        assert reloaded._data["title"] == "from second"
+        assert reloaded._data["content"] == "from first"
+
+
+class TestDirtyFlushing:
+    """Test that only changed documents are written, in shared pipelines"""
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_only_dirty_documents(self) -> None:
+        """Test batching and that idle documents cost no Redis commands"""
+        redis_client = InMemoryRedis()
+        manager = MemoryCRDTManager(redis_client)
+        manager.update_log.batch_size = 16
+
+        documents = [await manager.get_memory_document(f"m{i}", "alice", UserRole.OWNER) for i in range(40)]
+        assert await manager.sync_dirty_documents() == 40
+        assert manager.update_log.stats["pipelines"] == 3
+
+        round_trips = redis_client.round_trips
+        assert await manager.sync_dirty_documents() == 0
+        assert redis_client.round_trips == round_trips
+
+        await documents[7].update_content("changed", "alice")
+        assert manager.update_log.dirty_ids() == ["m7"]
+        assert await manager.sync_dirty_documents() == 1
+        await manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_updates(self) -> None:
+        """Test that updates survive a failed pipeline and are retried"""
+        redis_client = InMemoryRedis()
+        log = MemoryUpdateLog(redis_client, SimpleCRDTDocument.merge_updates, lambda memory_id: None)
+        log.record("m1", b'{"doc_id": "m1", "data": {"title": "a"}, "version": 1}')
+        redis_client.error = ConnectionError("redis down")
+        assert await log.flush() == 0 and log.is_dirty("m1")
+
+        redis_client.error = None
+        assert await log.flush() == 1
+        assert len(redis_client.streams["memory:updates:m1"]) == 1
+
+
+class TestLegacyState:
+    """Test migration from full-state JSON cache entries"""
+
+    @pytest.mark.asyncio
+    async def test_legacy_state_seeds_the_log(self) -> None:
+        """Test that a legacy entry is loaded once and then persisted in the log"""
+        redis_client = InMemoryRedis()
+        legacy = MemoryDocumentState(
+            memory_id="old", title="Legacy", content="body", tags={"x"}, metadata={}, version=3,
+            last_modified=datetime.now(timezone.utc), last_modified_by="bob", collaborators={"bob"}
+        )
+        await redis_client.setex("memory:state:old", 60, json.dumps(legacy.to_dict()))
+
+        manager = MemoryCRDTManager(redis_client)
+        await manager.get_memory_document("old", "bob", UserRole.OWNER)
+        await manager.shutdown()
+        del redis_client.values["memory:state:old"]
+
+        reloaded = await MemoryCRDTManager(redis_client).get_memory_document("old", "bob", UserRole.OWNER)
+        assert reloaded.get_current_state().title == "Legacy"
+
+
+class TestStateVectorSync:
+    """Test catch-up diffs against state vectors"""
+
+    def test_diff_contains_only_missed_fields(self) -> None:
+        """Test that a replica receives only fields written after its state vector"""
+        server, client = SimpleCRDTDocument("doc"), SimpleCRDTDocument("doc")
+        server.get_text("content").insert(0, "x" * 10_000)
+        server.get_text("title").insert(0, "Draft")
+        client.apply_update(server.encode_state_as_update())
+        state_vector = client.encode_state_vector()
+        assert decode_state_vector(state_vector) == server.get_state_vector()
+
+        server.get_text("title").insert(5, " 2")
+        diff = server.encode_state_as_update(state_vector)
+        assert len(diff) < 200 and set(json.loads(diff)["data"]) == {"title"}
+        client.apply_update(diff)
+        assert client._data == server._data
+        assert json.loads(server.encode_state_as_update(client.encode_state_vector()))["data"] == {}
+
+    def test_concurrent_writes_converge(self) -> None:
+        """Test that replicas exchanging diffs in either order agree"""
+        a, b = SimpleCRDTDocument("doc"), SimpleCRDTDocument("doc")
+        a.get_text("title").insert(0, "from a")
+        b.get_text("title").insert(0, "from b")
+        b.get_array("tags").append(["b"])
+
+        diff_for_b = a.encode_state_as_update(b.encode_state_vector())
+        diff_for_a = b.encode_state_as_update(a.encode_state_vector())
+        a.apply_update(diff_for_a)
+        b.apply_update(diff_for_b)
+        assert a._data == b._data and a._data["tags"] == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_manager_caches_diffs_per_revision(self) -> None:
+        """Test that identical reconnects share one encoded diff until the document changes"""
+        manager = MemoryCRDTManager(InMemoryRedis())
+        document = await manager.get_memory_document("m1", "alice", UserRole.OWNER)
+        await document.update_content("body", "alice")
+        state_vector = document.get_state_vector()
+
+        await document.update_title("new title", "alice")
+        first = await manager.get_sync_update("m1", state_vector)
+        assert await manager.get_sync_update("m1", state_vector) is first
+        assert manager.sync_stats["diff_cache_hits"] == 1
+
+        await document.add_tag("later", "alice")
+        assert await manager.get_sync_update("m1", state_vector) is not first
+        assert await manager.get_sync_update("unknown", state_vector) is None
+        await manager.shutdown()
+
+
+class TestReplication:
+    """Test servers catching up through the shared update log"""
+
+    @pytest.mark.asyncio
+    async def test_peer_applies_remote_updates(self) -> None:
+        """Test that a peer tails only entries it has not seen from other servers"""
+        redis_client = InMemoryRedis()
+        first, second = MemoryCRDTManager(redis_client), MemoryCRDTManager(redis_client)
+        doc_a = await first.get_memory_document("m1", "alice", UserRole.OWNER)
+        doc_b = await second.get_memory_document("m1", "bob", UserRole.OWNER)
+        await first.sync_dirty_documents()
+        await second.sync_dirty_documents()
+
+        await doc_a.update_title("edited on first", "alice")
+        await first.sync_dirty_documents()
+        assert await second.replicate_remote_updates() == 2
+        assert await first.replicate_remote_updates() == 1
+        assert await second.replicate_remote_updates() == 0
+
+        state_a, state_b = doc_a.get_current_state(), doc_b.get_current_state()
+        assert state_b.title == "edited on first"
+        # Fields are last-writer-wins registers, so concurrent collaborator lists converge on one
+        assert state_a.collaborators == state_b.collaborators
+        assert not any(key.startswith("memory:changes:") for key in redis_client.values)
+        await first.shutdown()
+        await second.shutdown()
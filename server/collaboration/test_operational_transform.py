@@ -0,0 +1,94 @@
+"""
+Tests for the revision-indexed operational transform history
+
+Covers transforming incoming operations only against concurrent history,
+pre-composed runs, the (user_id, sequence_number) index and garbage
+collection driven by participants' state vectors.
+"""
+
+import pytest
+
+from .operational_transform import Operation, OperationalTransform, OperationTarget, OperationType
+
+
+def _insert(user_id: str, sequence_number: int, position: int, text: str,
+            base_revision: int = None) -> Operation:
+    return Operation(
+        operation_id=f"{user_id}-{sequence_number}",
+        operation_type=OperationType.INSERT,
+        target=OperationTarget.TEXT,
+        position=position,
+        length=len(text),
+        content=text,
+        user_id=user_id,
+        sequence_number=sequence_number,
+        base_revision=base_revision
+    )
+
+
+class TestConcurrentTransform:
+    """Test that incoming operations see only concurrent history"""
+
+    def test_transform_against_operations_after_base(self) -> None:
+        """Test that only other users' operations after the base shift the incoming one"""
+        ot = OperationalTransform()
+        text = ""
+        for i in range(3):
+            operation, _ = ot.receive_operation(_insert("alice", i + 1, len(text), "ab", base_revision=ot.history.revision))
+            text = ot.apply_operation(text, operation)
+        assert ot.history.revision == 3 and len(ot.history.since(0)) == 1
+
+        concurrent, revision = ot.receive_operation(_insert("bob", 1, 0, "X", base_revision=2))
+        assert revision == 4 and concurrent.position == 0
+        assert ot.transform_stats["transforms"] == 1
+        text = ot.apply_operation(text, concurrent)
+
+        late, _ = ot.receive_operation(_insert("alice", 4, 6, "!", base_revision=3))
+        assert late.position == 7
+        assert ot.apply_operation(text, late) == "Xababab!"
+        assert ot.history.revision_of("bob", 1) == 4
+
+    def test_runs_are_precomposed(self) -> None:
+        """Test that typing is returned as one composed operation per run"""
+        ot = OperationalTransform()
+        for i, char in enumerate("hello"):
+            ot.add_to_history(_insert("alice", i + 1, i, char))
+        runs = ot.history.since(0)
+        assert len(runs) == 1 and runs[0].content == "hello"
+        assert ot.history.since(3)[0].content == "lo"
+
+        incoming, _ = ot.receive_operation(_insert("bob", 1, 2, "-", base_revision=0))
+        assert incoming.position == 7 and ot.transform_stats["transforms"] == 1
+
+
+class TestHistoryCollection:
+    """Test garbage collection of acknowledged history"""
+
+    def test_collects_once_every_participant_has_applied(self) -> None:
+        """Test that the slowest participant's state vector bounds collection"""
+        ot = OperationalTransform(gc_batch=1)
+        ot.acknowledge("bob", {})
+        for i in range(4):
+            ot.add_to_history(_insert("alice", i + 1, 0, "x"))
+        assert len(ot.history) == 4
+
+        assert ot.acknowledge("bob", {"alice": 2}) == 2
+        assert ot.history.first_revision == 3 and ot.history.revision_of("alice", 1) is None
+        with pytest.raises(ValueError):
+            ot.history.since(1)
+        assert [op.sequence_number for op in ot.get_operation_history(3)] == [4]
+
+        assert ot.remove_participant("bob") == 2
+        assert len(ot.history) == 0 and ot.history.since(4) == []
+
+    def test_history_is_bounded(self) -> None:
+        """Test that history never exceeds its cap even without acknowledgements"""
+        ot = OperationalTransform(max_history=50)
+        ot.acknowledge("offline", {})
+        for i in range(200):
+            ot.add_to_history(_insert("alice", i + 1, i, "x"))
+        stats = ot.get_history_stats()
+        assert stats["retained_operations"] == 50 and stats["operations_evicted"] == 150
+        assert stats["first_revision"] == 151
+        assert [op.content for op in ot.history.since(150)] == ["x" * 50]
+        assert ot.history.since(190)[0].content == "x" * 10
@@ -0,0 +1,94 @@
+"""
+Tests for vector CRDT documents
+
+Covers arena-backed embeddings, batched operation application against
+one-at-a-time application, compact history and its truncation once
+participants acknowledge it.
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from .vector_consistency import VectorCRDTDocument, VectorOperation, VectorOperationType
+from ..core.embedding_arena import EmbeddingArena
+
+
+def _operation(index: int, embedding: np.ndarray,
+               operation_type: VectorOperationType = VectorOperationType.EMBEDDING_UPDATE) -> VectorOperation:
+    return VectorOperation(
+        operation_id=f"op-{index}",
+        operation_type=operation_type,
+        memory_id="m1",
+        user_id=f"user-{index % 3}",
+        timestamp=datetime.now(timezone.utc),
+        version=index + 2,
+        target_embedding=embedding
+    )
+
+
+class TestBatchedApplication:
+    """Test the vectorised batch path"""
+
+    @pytest.mark.asyncio
+    async def test_batch_matches_sequential_application(self) -> None:
+        """Test that one batch leaves the same state as applying operations one at a time"""
+        rng = np.random.default_rng(0)
+        embeddings = rng.normal(size=(20, 16))
+        types = [VectorOperationType.NORMALIZATION if i % 5 == 4 else VectorOperationType.EMBEDDING_UPDATE
+                 for i in range(20)]
+        arena = EmbeddingArena(dim=16, block_rows=4)
+        batched = VectorCRDTDocument("m1", np.zeros(16), {}, arena=arena)
+        sequential = VectorCRDTDocument("m1", np.zeros(16), {}, arena=arena)
+
+        results = await batched.apply_vector_operations(
+            [_operation(i, embeddings[i], types[i]) for i in range(20)]
+        )
+        for i in range(20):
+            assert await sequential.apply_vector_operation(_operation(i, embeddings[i], types[i]))
+
+        assert all(results) and batched.vector_state.version == sequential.vector_state.version == 21
+        np.testing.assert_allclose(batched.vector_state.current_embedding, embeddings[19] / np.linalg.norm(embeddings[19]),
+                                   rtol=1e-5)
+        np.testing.assert_allclose(batched.vector_state.current_embedding, sequential.vector_state.current_embedding)
+        for key in ("mean_embedding", "std_embedding", "sample_count"):
+            assert batched.vector_state.session_statistics[key] == pytest.approx(
+                sequential.vector_state.session_statistics[key])
+        assert batched.history_stats["batches_applied"] == 1 and len(arena) == 2
+
+    @pytest.mark.asyncio
+    async def test_invalid_operations_are_rejected_individually(self) -> None:
+        """Test that an operation without a target does not fail the rest of the batch"""
+        document = VectorCRDTDocument("m1", np.zeros(8), {}, arena=EmbeddingArena(dim=8))
+        results = await document.apply_vector_operations([
+            _operation(0, np.ones(8)),
+            _operation(1, None),
+            _operation(2, np.full(8, 2.0))
+        ])
+        assert results == [True, False, True]
+        assert document.vector_state.current_embedding.tolist() == [2.0] * 8
+
+
+class TestHistory:
+    """Test compact, bounded and acknowledged history"""
+
+    @pytest.mark.asyncio
+    async def test_history_is_compact_and_truncated_on_acknowledgement(self) -> None:
+        """Test float16 history, decoded originals and truncation by the slowest participant"""
+        embeddings = np.random.default_rng(3).normal(size=(10, 384))
+        document = VectorCRDTDocument("m1", np.zeros(384), {}, arena=EmbeddingArena(), max_history=8)
+        await document.apply_vector_operations([_operation(i, embeddings[i]) for i in range(10)])
+
+        assert len(document.history) == 8 and document.history_stats["history_evicted"] == 2
+        assert document.history[0].target_embedding.dtype == np.float16
+        decoded = document.operation_history
+        np.testing.assert_allclose(decoded[1].original_embedding, embeddings[2], rtol=1e-2, atol=1e-2)
+
+        assert document.acknowledge("bob", 6) == 3
+        assert document.acknowledge("alice", 11) == 0
+        assert document.history[0].applied_version == 7
+        assert document.remove_participant("bob") == 5 and not document.history
+
+        document.release()
+        assert document.slot is None and document.vector_state.current_embedding.flags.writeable
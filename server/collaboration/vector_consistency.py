@@ -31,11 +31,11 @@ import time
 import uuid
 import numpy as np
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Set, Tuple, Union, Callable
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple, Union, Callable
 from dataclasses import dataclass, field
 from enum import Enum
 import hashlib
-from collections import defaultdict
+from collections import defaultdict, deque
 import threading
 from concurrent.futures import ThreadPoolExecutor
 
@@ -53,6 +53,7 @@ from .state import UserRole
 from .auth import CollaborationPermission
 from .pubsub import CollaborationMessage, MessageType, MessagePriority
 from .memory_crdt import MemoryCRDTManager, verify_collaboration_permission
+from ..core.embedding_arena import EmbeddingArena, decode_half, encode_half, get_shared_arena
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -156,23 +157,27 @@ class VectorOperation:
         
         return normalized_embedding
 
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, include_embeddings: bool = True) -> Dict[str, Any]:
         """Convert operation to dictionary for serialization"""
-        return {
+        data = {
             "operation_id": self.operation_id,
             "operation_type": self.operation_type.value,
             "memory_id": self.memory_id,
             "user_id": self.user_id,
             "timestamp": self.timestamp.isoformat(),
             "version": self.version,
-            "original_embedding": self.original_embedding.tolist() if self.original_embedding is not None else None,
-            "target_embedding": self.target_embedding.tolist() if self.target_embedding is not None else None,
-            "parameter_shift": self.parameter_shift.tolist() if self.parameter_shift is not None else None,
             "alignment_context": self.alignment_context,
             "session_id": self.session_id,
             "collaborator_ids": list(self.collaborator_ids),
             "consistency_requirements": self.consistency_requirements.value
         }
+        if include_embeddings:
+            data.update({
+                "original_embedding": self.original_embedding.tolist() if self.original_embedding is not None else None,
+                "target_embedding": self.target_embedding.tolist() if self.target_embedding is not None else None,
+                "parameter_shift": self.parameter_shift.tolist() if self.parameter_shift is not None else None
+            })
+        return data
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'VectorOperation':
@@ -218,22 +223,32 @@ class VectorState:
 
     def update_session_statistics(self, new_embedding: np.ndarray, user_id: str) -> None:
         """Update session statistics for lifelong normalization"""
+        self.update_session_statistics_batch(np.asarray(new_embedding)[np.newaxis], user_id)
+
+    def update_session_statistics_batch(self, embeddings: np.ndarray, user_id: str) -> None:
+        """
+        Update session statistics with one embedding per row, in order
+        
+        Equivalent to calling ``update_session_statistics`` per row: the
+        running means are prefix sums and the variance recurrence adds one
+        term per row, so the whole batch is reduced in a single pass.
+        """
         # Update running statistics for collaborative session
         current_mean: float = self.session_statistics.get('mean_embedding', 0.0)
         current_std: float = self.session_statistics.get('std_embedding', 1.0)
         sample_count: int = self.session_statistics.get('sample_count', 0)
         
         # Incremental statistics update
-        sample_count += 1
-        embedding_mean: float = float(new_embedding.mean())  # Convert to float
-        new_mean: float = current_mean + (embedding_mean - current_mean) / sample_count
-        new_var: float = current_std**2 + (embedding_mean - new_mean) * (embedding_mean - current_mean)
-        new_std: float = float(np.sqrt(new_var))  # Convert to float
+        embedding_means = np.asarray(embeddings, dtype=np.float64).mean(axis=1)
+        counts = sample_count + np.arange(1, len(embedding_means) + 1)
+        means = (current_mean * sample_count + np.cumsum(embedding_means)) / counts
+        previous_means = np.concatenate(([current_mean], means[:-1]))
+        new_var = current_std**2 + float(np.sum((embedding_means - means) * (embedding_means - previous_means)))
         
         self.session_statistics.update({
-            'mean_embedding': new_mean,
-            'std_embedding': new_std,
-            'sample_count': sample_count,
+            'mean_embedding': float(means[-1]),
+            'std_embedding': float(np.sqrt(new_var)),
+            'sample_count': int(counts[-1]),
             'last_update_user': user_id,
             'last_update_time': datetime.now(timezone.utc).isoformat()
         })
@@ -248,6 +263,62 @@ class VectorState:
         }
 
 
+@dataclass
+class HistoricalVectorOperation:
+    """
+    An applied vector operation as retained in document history
+    
+    Embeddings are kept as float16 and the original embedding is not kept
+    at all: it is the target embedding of the preceding entry.
+    """
+    operation_id: str
+    operation_type: VectorOperationType
+    user_id: str
+    timestamp: datetime
+    version: int
+    applied_version: int  # document version once this operation was applied
+    target_embedding: Optional[np.ndarray] = None
+    parameter_shift: Optional[np.ndarray] = None
+    alignment_context: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None
+    collaborator_ids: Set[str] = field(default_factory=set)
+    consistency_requirements: VectorConsistencyStrategy = VectorConsistencyStrategy.EVENTUAL_CONSISTENCY
+
+    @classmethod
+    def encode(cls, operation: VectorOperation, applied_version: int) -> 'HistoricalVectorOperation':
+        return cls(
+            operation_id=operation.operation_id,
+            operation_type=operation.operation_type,
+            user_id=operation.user_id,
+            timestamp=operation.timestamp,
+            version=operation.version,
+            applied_version=applied_version,
+            target_embedding=encode_half(operation.target_embedding),
+            parameter_shift=encode_half(operation.parameter_shift),
+            alignment_context=operation.alignment_context,
+            session_id=operation.session_id,
+            collaborator_ids=set(operation.collaborator_ids),
+            consistency_requirements=operation.consistency_requirements
+        )
+
+    def decode(self, memory_id: str, original_embedding: Optional[np.ndarray] = None) -> VectorOperation:
+        return VectorOperation(
+            operation_id=self.operation_id,
+            operation_type=self.operation_type,
+            memory_id=memory_id,
+            user_id=self.user_id,
+            timestamp=self.timestamp,
+            version=self.version,
+            original_embedding=original_embedding,
+            target_embedding=decode_half(self.target_embedding),
+            parameter_shift=decode_half(self.parameter_shift),
+            alignment_context=self.alignment_context,
+            session_id=self.session_id,
+            collaborator_ids=set(self.collaborator_ids),
+            consistency_requirements=self.consistency_requirements
+        )
+
+
 class EmbeddingAlignmentEngine:
     """
     HEAL-inspired hierarchical embedding alignment engine for collaborative memory editing
@@ -597,14 +668,25 @@ class VectorCRDTDocument:
     
     Based on 2025 collaborative RAG research from Carnegie Mellon implementing
     collaborative passage store patterns for memory embedding convergence.
+    
+    The current embedding lives in a slot of a shared float32
+    ``EmbeddingArena``; ``vector_state.current_embedding`` is a read-only
+    view of that slot. History keeps at most ``max_history`` float16
+    entries and drops those every participant has acknowledged.
     """
 
     def __init__(self, memory_id: str, initial_embedding: np.ndarray, 
-                 domain_context: Dict[str, Any]) -> None:
+                 domain_context: Dict[str, Any], arena: Optional[EmbeddingArena] = None,
+                 max_history: int = 1000) -> None:
         self.memory_id = memory_id
+        initial_embedding = np.asarray(initial_embedding, dtype=np.float32)
+        if arena is None or arena.dim != initial_embedding.shape[0]:
+            arena = get_shared_arena(initial_embedding.shape[0])
+        self.arena = arena
+        self.slot: Optional[int] = arena.allocate(initial_embedding)
         self.vector_state = VectorState(
             memory_id=memory_id,
-            current_embedding=initial_embedding,
+            current_embedding=arena.row(self.slot),
             version=1,
             last_updated=datetime.now(timezone.utc),
             collaborators=set(),
@@ -612,11 +694,30 @@ class VectorCRDTDocument:
             alignment_history=[],
             domain_context=domain_context
         )
-        self.operation_history: List[VectorOperation] = []
+        self.history: Deque[HistoricalVectorOperation] = deque(maxlen=max_history)
+        self.acknowledged_versions: Dict[str, int] = {}  # participant -> version applied
+        self.history_stats = {
+            'batches_applied': 0,
+            'operations_applied': 0,
+            'history_evicted': 0,
+            'history_acknowledged': 0
+        }
         self.collaborative_store = CollaborativeEmbeddingStore()
         self.operation_observers: List[Callable[[VectorOperation], None]] = []
         self._lock = asyncio.Lock()
 
+    @property
+    def operation_history(self) -> List[VectorOperation]:
+        """Retained history decoded back into operations"""
+        operations = []
+        previous_target: Optional[np.ndarray] = None
+        for entry in self.history:
+            operation = entry.decode(self.memory_id, previous_target)
+            if operation.target_embedding is not None:
+                previous_target = operation.target_embedding
+            operations.append(operation)
+        return operations
+
     async def apply_vector_operation(self, operation: VectorOperation, 
                                    is_local: bool = True) -> bool:
         """
@@ -625,70 +726,140 @@ class VectorCRDTDocument:
         Implements collaborative embedding store integration with conflict resolution
         using research-backed algorithms for memory embedding convergence.
         """
+        results = await self.apply_vector_operations([operation], is_local)
+        return results[0]
+
+    async def apply_vector_operations(self, operations: List[VectorOperation],
+                                    is_local: bool = True) -> List[bool]:
+        """
+        Apply a batch of vector operations in order under one lock acquisition
+        
+        Target embeddings are stacked into one matrix, so normalisation,
+        session statistics and the current embedding are updated in a
+        single vectorised pass. Returns whether each operation applied.
+        """
         async with self._lock:
             try:
-                # Transform operation against concurrent operations if remote
+                # Transform operations against concurrent operations if remote
                 if not is_local:
-                    operation = await self._transform_against_concurrent(operation)
+                    operations = [await self._transform_against_concurrent(op) for op in operations]
                 
-                # Apply the operation to vector state
-                success = self._apply_operation_internal(operation)
+                # Apply the operations to vector state
+                results = self._apply_operations_internal(operations)
+                applied = [op for op, success in zip(operations, results) if success]
                 
-                if success:
+                if applied:
                     # Update collaborative store
-                    await self.collaborative_store.update_embedding(
-                        self.memory_id, operation, self.vector_state
+                    await self.collaborative_store.update_embeddings(
+                        self.memory_id, applied, self.vector_state
                     )
                     
                     # Add to operation history
-                    self.operation_history.append(operation)
-                    
-                    # Update vector state
-                    if operation.target_embedding is not None:
-                        self.vector_state.current_embedding = operation.target_embedding
-                        self.vector_state.version += 1
-                        self.vector_state.last_updated = operation.timestamp
-                        self.vector_state.collaborators.add(operation.user_id)
+                    first_version = self.vector_state.version
+                    self._update_vector_state(applied)
+                    self._record_history(applied, first_version)
                     
                     # Notify observers
-                    for observer in self.operation_observers:
-                        observer(operation)
+                    for operation in applied:
+                        for observer in self.operation_observers:
+                            observer(operation)
                 
-                return success
+                self.history_stats['batches_applied'] += 1
+                self.history_stats['operations_applied'] += len(applied)
+                return results
                 
             except Exception as e:
-                logger.error(f"Error applying vector operation: {e}")
-                return False
+                logger.error(f"Error applying vector operations: {e}")
+                return [False] * len(operations)
 
-    def _apply_operation_internal(self, operation: VectorOperation) -> bool:
-        """Internal operation application logic"""
-        try:
+    def _apply_operations_internal(self, operations: List[VectorOperation]) -> List[bool]:
+        """Validate operations and apply their embedding changes in one pass"""
+        results = []
+        for operation in operations:
             if operation.operation_type == VectorOperationType.EMBEDDING_UPDATE:
-                return self._apply_embedding_update(operation)
+                results.append(operation.target_embedding is not None)
             elif operation.operation_type == VectorOperationType.ALIGNMENT_ADJUSTMENT:
-                return self._apply_alignment_adjustment(operation)
-            elif operation.operation_type == VectorOperationType.CONSENSUS_MERGE:
-                return self._apply_consensus_merge(operation)
-            elif operation.operation_type == VectorOperationType.NORMALIZATION:
-                return self._apply_normalization(operation)
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"Error in internal operation application: {e}")
-            return False
-
-    def _apply_embedding_update(self, operation: VectorOperation) -> bool:
-        """Apply embedding update operation"""
-        if operation.target_embedding is None:
-            return False
+                results.append(self._apply_alignment_adjustment(operation))
+            elif operation.operation_type in (VectorOperationType.CONSENSUS_MERGE,
+                                              VectorOperationType.NORMALIZATION):
+                results.append(True)
+            else:
+                results.append(False)
+        
+        carrying = [op for op, success in zip(operations, results)
+                    if success and op.target_embedding is not None]
+        if not carrying:
+            return results
+        targets = np.stack([np.asarray(op.target_embedding, dtype=np.float32) for op in carrying])
+        
+        # Normalize embeddings of normalization operations to unit vectors
+        rows = [i for i, op in enumerate(carrying) if op.operation_type == VectorOperationType.NORMALIZATION]
+        if rows:
+            selected = targets[rows]
+            norms = np.linalg.norm(selected, axis=1, keepdims=True)
+            np.divide(selected, norms, out=selected, where=norms > 0)
+            targets[rows] = selected
+            for i in rows:
+                carrying[i].target_embedding = targets[i].copy()
         
         # Update session statistics for lifelong normalization
-        self.vector_state.update_session_statistics(
-            operation.target_embedding, operation.user_id
-        )
+        rows = [i for i, op in enumerate(carrying) if op.operation_type == VectorOperationType.EMBEDDING_UPDATE]
+        if rows:
+            self.vector_state.update_session_statistics_batch(targets[rows], carrying[rows[-1]].user_id)
         
-        return True
+        return results
+
+    def _update_vector_state(self, applied: List[VectorOperation]) -> None:
+        carrying = [op for op in applied if op.target_embedding is not None]
+        if not carrying:
+            return
+        # Only the last target survives the batch
+        self.arena.write(self.slot, carrying[-1].target_embedding)
+        self.vector_state.version += len(carrying)
+        self.vector_state.last_updated = carrying[-1].timestamp
+        self.vector_state.collaborators.update(op.user_id for op in carrying)
+
+    def _record_history(self, applied: List[VectorOperation], first_version: int) -> None:
+        version = first_version
+        for operation in applied:
+            if operation.target_embedding is not None:
+                version += 1
+            if len(self.history) == self.history.maxlen:
+                self.history_stats['history_evicted'] += 1
+            self.history.append(HistoricalVectorOperation.encode(operation, version))
+
+    def acknowledge(self, participant_id: str, version: int) -> int:
+        """
+        Record that a participant has applied the document up to ``version``
+        
+        Drops history every participant has acknowledged; returns the count.
+        """
+        if version > self.acknowledged_versions.get(participant_id, 0):
+            self.acknowledged_versions[participant_id] = version
+        return self._truncate_acknowledged()
+
+    def remove_participant(self, participant_id: str) -> int:
+        """Forget a departed participant so it no longer holds back truncation"""
+        self.acknowledged_versions.pop(participant_id, None)
+        return self._truncate_acknowledged()
+
+    def _truncate_acknowledged(self) -> int:
+        if not self.acknowledged_versions:
+            return 0
+        acknowledged = min(self.acknowledged_versions.values())
+        dropped = 0
+        while self.history and self.history[0].applied_version <= acknowledged:
+            self.history.popleft()
+            dropped += 1
+        self.history_stats['history_acknowledged'] += dropped
+        return dropped
+
+    def release(self) -> None:
+        """Return the embedding slot to the arena, keeping a private copy of the state"""
+        if self.slot is not None:
+            self.vector_state.current_embedding = np.array(self.vector_state.current_embedding)
+            self.arena.free(self.slot)
+            self.slot = None
 
     def _apply_alignment_adjustment(self, operation: VectorOperation) -> bool:
         """Apply HEAL-inspired alignment adjustment"""
@@ -705,21 +876,6 @@ class VectorCRDTDocument:
         
         return True
 
-    def _apply_consensus_merge(self, operation: VectorOperation) -> bool:
-        """Apply consensus merge operation"""
-        # CoRAG-inspired consensus mechanism
-        return True
-
-    def _apply_normalization(self, operation: VectorOperation) -> bool:
-        """Apply normalization operation"""
-        if operation.target_embedding is not None:
-            # Normalize embedding to unit vector
-            norm = np.linalg.norm(operation.target_embedding)
-            if norm > 0:
-                operation.target_embedding = operation.target_embedding / norm
-        
-        return True
-
     async def _transform_against_concurrent(self, operation: VectorOperation) -> VectorOperation:
         """Transform operation against concurrent operations"""
         # Simple transformation for now - can be enhanced with more sophisticated algorithms
@@ -740,9 +896,13 @@ class CollaborativeEmbeddingStore:
     
     Implements collaborative passage store patterns for memory embedding management
     with shared model training coordination across multiple collaborators.
+    
+    Keeps the latest ``max_entries`` operations and embeddings per memory;
+    embeddings are stored as float16 arrays.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, max_entries: int = 1000) -> None:
+        self.max_entries = max_entries
         self.embedding_store: Dict[str, Dict[str, Any]] = {}
         self.shared_statistics: Dict[str, float] = {}
         self.collaboration_metrics: Dict[str, Any] = {}
@@ -750,28 +910,34 @@ class CollaborativeEmbeddingStore:
     async def update_embedding(self, memory_id: str, operation: VectorOperation, 
                              vector_state: VectorState) -> None:
         """Update collaborative embedding store with new operation"""
+        await self.update_embeddings(memory_id, [operation], vector_state)
+
+    async def update_embeddings(self, memory_id: str, operations: List[VectorOperation],
+                              vector_state: VectorState) -> None:
+        """Update collaborative embedding store with a batch of operations"""
         try:
             if memory_id not in self.embedding_store:
                 self.embedding_store[memory_id] = {
-                    'embeddings': [],
-                    'operations': [],
+                    'embeddings': deque(maxlen=self.max_entries),
+                    'operations': deque(maxlen=self.max_entries),
                     'collaborators': set(),
                     'domain_context': vector_state.domain_context
                 }
             
             store_entry = self.embedding_store[memory_id]
             
-            # Add operation and embedding
-            store_entry['operations'].append(operation.to_dict())
-            store_entry['collaborators'].add(operation.user_id)
-            
-            if operation.target_embedding is not None:
-                store_entry['embeddings'].append({
-                    'embedding': operation.target_embedding.tolist(),
-                    'user_id': operation.user_id,
-                    'timestamp': operation.timestamp.isoformat(),
-                    'operation_id': operation.operation_id
-                })
+            for operation in operations:
+                # Add operation metadata and embedding
+                store_entry['operations'].append(operation.to_dict(include_embeddings=False))
+                store_entry['collaborators'].add(operation.user_id)
+                
+                if operation.target_embedding is not None:
+                    store_entry['embeddings'].append({
+                        'embedding': encode_half(operation.target_embedding),
+                        'user_id': operation.user_id,
+                        'timestamp': operation.timestamp.isoformat(),
+                        'operation_id': operation.operation_id
+                    })
             
             # Update shared statistics
             await self._update_shared_statistics(memory_id, vector_state)
@@ -1178,7 +1344,8 @@ class VectorConsistencyManager:
     """
 
     def __init__(self, redis_client: Redis, sentence_transformer: SentenceTransformer, 
-                 kuzu_connection, memory_crdt_manager: MemoryCRDTManager) -> None:
+                 kuzu_connection, memory_crdt_manager: MemoryCRDTManager,
+                 embedding_mmap_dir: Optional[str] = None) -> None:
         self.redis_client = redis_client
         self.embedding_model = sentence_transformer
         self.kuzu_conn = kuzu_connection
@@ -1189,9 +1356,10 @@ class VectorConsistencyManager:
         self.update_coordinator = EmbeddingUpdateCoordinator()
         self.index_consistency = VectorIndexConsistency(kuzu_connection)
         
-        # Active vector documents
+        # Active vector documents, sharing one embedding arena
         self.vector_documents: Dict[str, VectorCRDTDocument] = {}
         self.document_locks: Dict[str, asyncio.Lock] = {}
+        self.embedding_arena = EmbeddingArena(dim=384, mmap_dir=embedding_mmap_dir)
         
         # Redis key patterns
         self.VECTOR_STATE_KEY = "vector:state:{memory_id}"
@@ -1244,7 +1412,8 @@ class VectorConsistencyManager:
             )
             
             # Compute embedding shift using UltraEdit approach
-            current_embedding = document.vector_state.current_embedding
+            # Copy out of the arena: the slot is overwritten when the operation applies
+            current_embedding = np.array(document.vector_state.current_embedding)
             embedding_shift = await self.update_coordinator.compute_embedding_shift(
                 content_change, current_embedding, session_context
             )
@@ -1398,7 +1567,8 @@ class VectorConsistencyManager:
                 
                 if cached_state:
                     document = VectorCRDTDocument(
-                        memory_id, cached_state['embedding'], cached_state['domain_context']
+                        memory_id, cached_state['embedding'], cached_state['domain_context'],
+                        arena=self.embedding_arena, max_history=self.MAX_OPERATION_HISTORY
                     )
                 else:
                     # Create new document with initial embedding
@@ -1406,7 +1576,8 @@ class VectorConsistencyManager:
                     initial_embedding = initial_embedding / np.linalg.norm(initial_embedding)
                     
                     document = VectorCRDTDocument(
-                        memory_id, initial_embedding, {'type': 'general'}
+                        memory_id, initial_embedding, {'type': 'general'},
+                        arena=self.embedding_arena, max_history=self.MAX_OPERATION_HISTORY
                     )
                 
                 # Store document
@@ -1498,8 +1669,7 @@ class VectorConsistencyManager:
                 # Process pending operations
                 resolved_ops = await self.handle_concurrent_embedding_updates(pending_ops)
                 
-                for op in resolved_ops:
-                    await document.apply_vector_operation(op, is_local=False)
+                await document.apply_vector_operations(resolved_ops, is_local=False)
             
         except Exception as e:
             logger.error(f"Error maintaining memory vector consistency: {e}")
@@ -1537,6 +1707,7 @@ class VectorConsistencyManager:
             # Save all vector documents to cache
             for memory_id, document in self.vector_documents.items():
                 await self._save_vector_state_to_cache(memory_id, document.vector_state)
+                document.release()
             
             # Clear in-memory state
             self.vector_documents.clear()
@@ -1545,6 +1716,18 @@ class VectorConsistencyManager:
         except Exception as e:
             logger.error(f"Error during shutdown: {e}")
 
+    def get_embedding_memory_stats(self) -> Dict[str, Any]:
+        """Embedding arena usage and retained operation history across documents"""
+        return {
+            'arena': self.embedding_arena.get_stats(),
+            'documents': len(self.vector_documents),
+            'history_entries': sum(len(document.history) for document in self.vector_documents.values()),
+            'history_evicted': sum(document.history_stats['history_evicted']
+                                   for document in self.vector_documents.values()),
+            'history_acknowledged': sum(document.history_stats['history_acknowledged']
+                                        for document in self.vector_documents.values())
+        }
+
     async def _save_vector_state_to_cache(self, memory_id: str, vector_state: VectorState) -> None:
         """Save vector state to Redis cache"""
         try:
@@ -22,6 +22,7 @@ Version: 1.0.0
 """
 
 import asyncio
+import base64
 import json
 import logging
 import time
@@ -68,6 +69,7 @@ class WebSocketMessageType(Enum):
     CONFLICT_DETECTED = "conflict_detected"
     CONFLICT_RESOLVED = "conflict_resolved"
     SYNC_STATE = "sync_state"
+    SYNC_UPDATE = "sync_update"
     ERROR = "error"
 
 
@@ -331,10 +333,11 @@ class WebSocketCRDTBridge:
                 raise ValueError(f"Failed to get memory document {memory_id}")
             
             # Get field operations manager for this document
-            if memory_id not in self.operation_managers:
-                self.operation_managers[memory_id] = await get_field_operations_manager(document)
-            
-            operations_manager = self.operation_managers[memory_id]
+            operations_manager = self.operation_managers.get(memory_id)
+            if operations_manager is None or operations_manager.document is not document:
+                # The document may have been hibernated and rehydrated since
+                operations_manager = await get_field_operations_manager(document)
+                self.operation_managers[memory_id] = operations_manager
             
             # Execute operation through field operations manager (use COLLABORATOR role)
             result = await operations_manager.execute_operation(
@@ -466,6 +469,48 @@ class WebSocketCRDTBridge:
                 "timestamp": time.time()
             }
     
+    async def sync_memory_update(self, memory_id: str, user_id: str,
+                                 state_vector: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the updates a client is missing, given its base64 state vector
+        
+        The reply carries the base64 update and the server's state vector,
+        which the client sends back on its next reconnect.
+        """
+        try:
+            if not self.crdt_manager:
+                raise ValueError("CRDT manager not initialized")
+            
+            document = await self.crdt_manager.get_memory_document(memory_id, user_id, role=UserRole.COLLABORATOR)
+            if not document:
+                raise ValueError(f"Memory document {memory_id} not found")
+            
+            known = base64.b64decode(state_vector) if state_vector else None
+            update = await self.crdt_manager.get_sync_update(memory_id, known)
+            
+            return {
+                "type": WebSocketMessageType.SYNC_UPDATE.value,
+                "data": {
+                    "memory_id": memory_id,
+                    "update": base64.b64encode(update).decode("ascii"),
+                    "state_vector": base64.b64encode(document.get_state_vector()).decode("ascii"),
+                    "full": not known,
+                    "timestamp": time.time()
+                },
+                "timestamp": time.time()
+            }
+            
+        except Exception as e:
+            logger.error(f"Error syncing memory update for {memory_id}: {e}")
+            return {
+                "type": WebSocketMessageType.ERROR.value,
+                "data": {
+                    "error": f"Failed to sync memory state: {e}",
+                    "memory_id": memory_id
+                },
+                "timestamp": time.time()
+            }
+    
     def get_performance_metrics(self) -> Dict[str, Any]:
         """Get performance metrics for the bridge"""
         avg_transform_time = (
@@ -38,6 +38,7 @@ async def websocket_collaborate(
     tenant_id: str,
     memory_id: str,
     token: str = Query(...),
+    state_vector: Optional[str] = Query(None),
     manager: CollaborationWebSocketManager = Depends(get_websocket_manager)
 ) -> None:
     """
@@ -48,6 +49,8 @@ async def websocket_collaborate(
         tenant_id: Tenant identifier for multi-tenant isolation
         memory_id: Memory document identifier
         token: Authentication token (query parameter)
+        state_vector: Base64 state vector from the client's last sync_update,
+            so a reconnect only receives the updates it missed
         manager: WebSocket collaboration manager
     
     Protocol:
@@ -59,6 +62,7 @@ async def websocket_collaborate(
         - cursor_update: Cursor position updates
         - presence_update: User presence status
         - conflict_resolution: Manual conflict resolution
+        - sync_request: {"state_vector": base64} asks for missed updates
     """
     user_id: Optional[str] = None
     room_id: Optional[str] = None
@@ -71,7 +75,7 @@ async def websocket_collaborate(
         
         # Connect user to collaboration room
         room_id = await manager.connect_user(
-            websocket, memory_id, tenant_id, user_id, user_info
+            websocket, memory_id, tenant_id, user_id, user_info, state_vector
         )
         
         logger.info(f"WebSocket connected: user={user_id}, room={room_id}")
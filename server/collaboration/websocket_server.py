@@ -42,6 +42,7 @@ class MessageType:
     CURSOR_UPDATE = "cursor_update"
     PRESENCE_UPDATE = "presence_update"
     CONFLICT_RESOLUTION = "conflict_resolution"
+    SYNC_REQUEST = "sync_request"
     
     # Server -> Client messages
     OPERATION_APPLIED = "operation_applied"
@@ -52,6 +53,7 @@ class MessageType:
     CONFLICT_RESOLVED = "conflict_resolved"
     ERROR = "error"
     SYNC_STATE = "sync_state"
+    SYNC_UPDATE = "sync_update"
 
 @dataclass
 class WebSocketMessage:
@@ -150,11 +152,15 @@ class CollaborationWebSocketManager:
         memory_id: str, 
         tenant_id: str,
         user_id: str,
-        user_info: Dict[str, Any]
+        user_info: Dict[str, Any],
+        state_vector: Optional[str] = None
     ) -> str:
         """
         Connect user to collaboration room
         
+        A reconnecting client passes the base64 state vector from its last
+        sync_update and receives only the updates it missed.
+        
         Returns:
             room_id: Unique identifier for the collaboration room
         """
@@ -193,8 +199,8 @@ class CollaborationWebSocketManager:
             # Increment connection count
             self.connection_count += 1
             
-            # Send current memory state to new user (placeholder for now)
-            await self._send_sync_state(websocket, memory_id, tenant_id)
+            # Send current memory state, or what the user missed, to new user
+            await self._send_sync_state(websocket, memory_id, tenant_id, state_vector)
             
             # Broadcast user joined to other users in room
             await self._broadcast_presence_update(room_id, user_id, "joined")
@@ -269,6 +275,13 @@ class CollaborationWebSocketManager:
             elif msg_type == MessageType.CONFLICT_RESOLUTION:
                 await self._handle_conflict_resolution(msg_data, user_id, room_id)
             
+            elif msg_type == MessageType.SYNC_REQUEST:
+                room = self.active_rooms.get(room_id)
+                if room:
+                    await self._send_sync_state(
+                        websocket, room.memory_id, room.tenant_id, msg_data.get("state_vector")
+                    )
+            
             else:
                 logger.warning(f"Unknown message type: {msg_type}")
                 await self._send_error(websocket, f"Unknown message type: {msg_type}")
@@ -426,11 +439,20 @@ class CollaborationWebSocketManager:
         self, 
         websocket: WebSocket, 
         memory_id: str, 
-        tenant_id: str
+        tenant_id: str,
+        state_vector: Optional[str] = None
     ) -> None:
         """Send current memory state to newly connected user via CRDT bridge"""
         try:
-            if self.crdt_bridge:
+            if self.crdt_bridge and state_vector:
+                # Reconnect: send only the updates missing from the client's state vector
+                sync_response = await self.crdt_bridge.sync_memory_update(
+                    memory_id,
+                    f"user_{hash(str(websocket)) % 10000}",  # Temporary user ID
+                    state_vector
+                )
+                await self._send_message(websocket, sync_response)
+            elif self.crdt_bridge:
                 # Get real memory state from CRDT bridge
                 sync_response = await self.crdt_bridge.sync_memory_state(
                     memory_id, 
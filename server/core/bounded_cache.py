@@ -0,0 +1,413 @@
+"""
+Size-bounded in-process cache with W-TinyLFU admission.
+
+Every get and set is O(1) (amortised), independent of the number of entries:
+
+- Entries live in three LRU segments backed by ``OrderedDict``: a small
+  admission window, and a main area split into probation and protected
+  (segmented LRU)
+- When the window overflows, its oldest entry only replaces the main area's
+  probation victim if a count-min sketch says it has been requested at least
+  as often, so a one-off scan cannot flush frequently used results
+- Capacity is bounded by estimated bytes (and optionally entry count), so a
+  few huge graph results cannot exhaust worker memory
+- TTLs expire lazily on access and in bulk through a hashed timer wheel that
+  is advanced on every operation
+"""
+
+import sys
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Containers larger than this are sized from a sample of their items
+_SIZE_SAMPLE = 64
+_SIZE_MAX_DEPTH = 8
+
+_MISSING = object()
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Estimate the memory footprint of ``value`` in bytes.
+
+    Buffers (bytes, NumPy arrays) report their exact length; containers are
+    walked recursively, extrapolating from a sample when they are large.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value) + 33
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return sys.getsizeof(value)
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes + 112
+
+    size = sys.getsizeof(value)
+    if _depth >= _SIZE_MAX_DEPTH:
+        return size
+    if isinstance(value, dict):
+        count = len(value)
+        sample = islice(value.items(), _SIZE_SAMPLE)
+        sampled = sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in sample)
+    elif isinstance(value, (list, tuple, set, frozenset, deque)):
+        count = len(value)
+        sampled = sum(estimate_size(item, _depth + 1) for item in islice(value, _SIZE_SAMPLE))
+    elif hasattr(value, "__dict__"):
+        return size + estimate_size(vars(value), _depth + 1)
+    else:
+        return size
+    if count > _SIZE_SAMPLE:
+        sampled = sampled * count // _SIZE_SAMPLE
+    return size + sampled
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of recent access frequency with 4-bit counters.
+
+    Counters are halved after ``10 * width`` increments so the sketch tracks
+    recent popularity rather than all-time counts.
+    """
+
+    _SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    _MAX_COUNT = 15
+
+    def __init__(self, expected_entries: int) -> None:
+        width = 16
+        while width < expected_entries and width < (1 << 20):
+            width <<= 1
+        self.width = width
+        self._mask = width - 1
+        self._rows = [bytearray(width) for _ in self._SEEDS]
+        self._sample_size = 10 * width
+        self._additions = 0
+
+    def _indexes(self, key: Any) -> List[int]:
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        indexes = []
+        for seed in self._SEEDS:
+            mixed = (h * seed) & 0xFFFFFFFFFFFFFFFF
+            indexes.append((mixed ^ (mixed >> 32)) & self._mask)
+        return indexes
+
+    def increment(self, key: Any) -> None:
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < self._MAX_COUNT:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._reset()
+
+    def frequency(self, key: Any) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def _reset(self) -> None:
+        halve = bytes(count >> 1 for count in range(256))
+        for row in self._rows:
+            row[:] = row.translate(halve)
+        self._additions //= 2
+
+
+class _Entry:
+    __slots__ = ("key", "value", "size", "expire_at", "segment")
+
+    def __init__(self, key: Any, value: Any, size: int, expire_at: Optional[float]) -> None:
+        self.key = key
+        self.value = value
+        self.size = size
+        self.expire_at = expire_at
+        self.segment: Optional["_Segment"] = None
+
+
+class _Segment:
+    """An LRU list with its own byte and entry budget"""
+
+    __slots__ = ("name", "entries", "bytes", "max_bytes", "max_entries")
+
+    def __init__(self, name: str, max_bytes: float, max_entries: float) -> None:
+        self.name = name
+        self.entries: "OrderedDict[Any, _Entry]" = OrderedDict()
+        self.bytes = 0
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    def add(self, entry: _Entry) -> None:
+        self.entries[entry.key] = entry
+        self.bytes += entry.size
+        entry.segment = self
+
+    def remove(self, entry: _Entry) -> None:
+        del self.entries[entry.key]
+        self.bytes -= entry.size
+        entry.segment = None
+
+    def oldest(self) -> Optional[_Entry]:
+        return next(iter(self.entries.values()), None)
+
+    def over_budget(self) -> bool:
+        return self.bytes > self.max_bytes or len(self.entries) > self.max_entries
+
+
+class BoundedCache:
+    """
+    In-process key/value cache bounded by estimated bytes.
+
+    ``max_entries`` optionally bounds the entry count as well. ``sizer``
+    estimates an entry's footprint unless ``set`` is given an explicit size
+    (e.g. a serialized length). ``on_remove(key)`` is called whenever an
+    entry leaves the cache other than through ``clear``, so secondary indexes
+    can stay in sync. Not thread-safe; intended for use from one event loop.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        window_ratio: float = 0.01,
+        protected_ratio: float = 0.8,
+        sizer: Callable[[Any], int] = estimate_size,
+        timer_resolution: float = 1.0,
+        on_remove: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.sizer = sizer
+        self.timer_resolution = timer_resolution
+        self.on_remove = on_remove
+
+        entry_limit = float(max_entries) if max_entries else float("inf")
+        window_entries = max(1.0, entry_limit * window_ratio) if max_entries else entry_limit
+        main_bytes = max_bytes * (1 - window_ratio)
+        main_entries = entry_limit - window_entries if max_entries else entry_limit
+        self._window = _Segment("window", max_bytes * window_ratio, window_entries)
+        self._probation = _Segment("probation", float("inf"), float("inf"))
+        self._protected = _Segment("protected", main_bytes * protected_ratio,
+                                   max(1.0, main_entries * protected_ratio) if max_entries else entry_limit)
+        self._main_max_bytes = main_bytes
+        self._main_max_entries = main_entries
+
+        self._index: Dict[Any, _Entry] = {}
+        self._sketch = FrequencySketch(max_entries or max(1024, max_bytes // 4096))
+        self._bytes = 0
+
+        # Hashed timer wheel: tick -> keys expiring before the end of that tick
+        self._timers: Dict[int, Set[Any]] = {}
+        self._next_tick = int(time.time() // timer_resolution)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejections = 0
+
+    # Lookups
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        now = time.time()
+        self._expire(now)
+        entry = self._index.get(key)
+        if entry is None or (entry.expire_at is not None and entry.expire_at <= now):
+            if entry is not None:
+                self._remove(entry)
+                self.expirations += 1
+            self.misses += 1
+            self._sketch.increment(key)
+            return default
+
+        self.hits += 1
+        self._sketch.increment(key)
+        self._on_hit(entry)
+        return entry.value
+
+    def __contains__(self, key: Any) -> bool:
+        entry = self._index.get(key)
+        return entry is not None and (entry.expire_at is None or entry.expire_at > time.time())
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def keys(self) -> List[Any]:
+        """Snapshot of live keys (may include entries not yet reaped)"""
+        return list(self._index)
+
+    # Updates
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None, size: Optional[int] = None) -> bool:
+        """
+        Store ``value``; returns False if it was not admitted (larger than the
+        whole cache). ``ttl`` of None uses ``default_ttl``; 0 expires at once.
+        """
+        now = time.time()
+        self._expire(now)
+        if size is None:
+            try:
+                size = self.sizer(value)
+            except Exception:
+                size = sys.getsizeof(value)
+        ttl = self.default_ttl if ttl is None else ttl
+        expire_at = now + ttl if ttl is not None else None
+
+        # An overwrite keeps the key's place in the main area
+        segment = self._window
+        existing = self._index.get(key)
+        if existing is not None:
+            if existing.segment is not self._window:
+                segment = existing.segment
+            self._remove(existing)
+        if size > self.max_bytes:
+            self.rejections += 1
+            return False
+
+        entry = _Entry(key, value, size, expire_at)
+        self._index[key] = entry
+        self._bytes += size
+        self._sketch.increment(key)
+        segment.add(entry)
+        if expire_at is not None:
+            tick = int(expire_at // self.timer_resolution) + 1
+            self._timers.setdefault(tick, set()).add(key)
+
+        self._rebalance()
+        return key in self._index
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.set(key, value)
+
+    def delete(self, key: Any) -> bool:
+        entry = self._index.get(key)
+        if entry is None:
+            return False
+        self._remove(entry)
+        return True
+
+    def __delitem__(self, key: Any) -> None:
+        if not self.delete(key):
+            raise KeyError(key)
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        entry = self._index.get(key)
+        if entry is None:
+            return default
+        self._remove(entry)
+        return entry.value
+
+    def clear(self) -> None:
+        for segment in (self._window, self._probation, self._protected):
+            segment.entries.clear()
+            segment.bytes = 0
+        self._index.clear()
+        self._timers.clear()
+        self._bytes = 0
+
+    # Policy
+
+    def _on_hit(self, entry: _Entry) -> None:
+        segment = entry.segment
+        if segment is self._probation:
+            # Second touch in the main area: promote to protected
+            self._probation.remove(entry)
+            self._protected.add(entry)
+            self._demote_protected()
+        else:
+            segment.entries.move_to_end(entry.key)
+
+    def _demote_protected(self) -> None:
+        while self._protected.over_budget() and len(self._protected.entries) > 1:
+            demoted = self._protected.oldest()
+            self._protected.remove(demoted)
+            self._probation.add(demoted)
+
+    def _main_over_budget(self) -> bool:
+        return (self._probation.bytes + self._protected.bytes > self._main_max_bytes
+                or len(self._probation.entries) + len(self._protected.entries) > self._main_max_entries)
+
+    def _rebalance(self) -> None:
+        self._demote_protected()
+        while self._window.over_budget() and self._window.entries:
+            candidate = self._window.oldest()
+            self._window.remove(candidate)
+            self._probation.add(candidate)
+            self._admit(candidate)
+        while self._main_over_budget() and (self._probation.entries or self._protected.entries):
+            self._evict(self._probation.oldest() or self._protected.oldest())
+
+    def _admit(self, candidate: _Entry) -> None:
+        """Make room in the main area for ``candidate`` or reject it"""
+        candidate_freq = self._sketch.frequency(candidate.key)
+        while self._main_over_budget():
+            victim = self._probation.oldest()
+            if victim is candidate:
+                victim = self._protected.oldest()
+            if victim is None:
+                self._evict(candidate)
+                return
+            # Frequency ties fall back to recency so cold caches behave like LRU
+            if candidate_freq >= self._sketch.frequency(victim.key):
+                self._evict(victim)
+            else:
+                self._evict(candidate)
+                return
+
+    def _evict(self, entry: _Entry) -> None:
+        self._remove(entry)
+        self.evictions += 1
+
+    def _remove(self, entry: _Entry) -> None:
+        if entry.segment is not None:
+            entry.segment.remove(entry)
+        if self._index.get(entry.key) is entry:
+            del self._index[entry.key]
+            self._bytes -= entry.size
+            if self.on_remove is not None:
+                self.on_remove(entry.key)
+
+    def _expire(self, now: float) -> None:
+        """Advance the timer wheel, dropping every entry that has expired"""
+        current = int(now // self.timer_resolution)
+        if current < self._next_tick:
+            return
+        if current - self._next_tick >= len(self._timers):
+            ticks = sorted(tick for tick in self._timers if tick <= current)
+        else:
+            ticks = range(self._next_tick, current + 1)
+        for tick in ticks:
+            for key in self._timers.pop(tick, ()):
+                entry = self._index.get(key)
+                if entry is not None and entry.expire_at is not None and entry.expire_at <= now:
+                    self._remove(entry)
+                    self.expirations += 1
+        self._next_tick = current + 1
+
+    # Monitoring
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rejections": self.rejections,
+            "segments": {
+                segment.name: {"entries": len(segment.entries), "bytes": segment.bytes}
+                for segment in (self._window, self._probation, self._protected)
+            },
+        }
@@ -0,0 +1,256 @@
+"""
+Pluggable cache payload codecs.
+
+A payload is a 5-byte header followed by the (optionally compressed) body:
+
+    b"\\x00GM" | serializer id (1 byte) | compressor id (1 byte) | body
+
+The header lets serializers and compressors change without flushing the
+cache: every payload says how it was written, and payloads without a
+header are decoded with the caller's legacy decoder.
+
+Serializers: orjson and msgpack (when installed) or stdlib json for
+structured results, pickle for arbitrary objects, and a raw buffer format
+for NumPy arrays. Compressors: lz4 for mid-sized payloads and zstd for
+large ones (when installed), falling back to gzip.
+"""
+
+import gzip
+import json
+import logging
+import pickle
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"\x00GM"
+HEADER_SIZE = len(MAGIC) + 2
+# Leading bytes compressed to estimate whether a large body is worth compressing
+_SAMPLE_BYTES = 16 * 1024
+
+
+class CodecError(Exception):
+    """Raised for payloads written by an unknown or unavailable codec"""
+    pass
+
+
+@dataclass(frozen=True)
+class Serializer:
+    codec_id: int
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+
+
+@dataclass(frozen=True)
+class Compressor:
+    codec_id: int
+    name: str
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+SERIALIZERS: Dict[str, Serializer] = {}
+COMPRESSORS: Dict[str, Compressor] = {}
+_SERIALIZERS_BY_ID: Dict[int, Serializer] = {}
+_COMPRESSORS_BY_ID: Dict[int, Compressor] = {}
+
+
+def register_serializer(serializer: Serializer) -> None:
+    """Register a serializer; ids are persisted in payloads and must stay stable"""
+    SERIALIZERS[serializer.name] = serializer
+    _SERIALIZERS_BY_ID[serializer.codec_id] = serializer
+
+
+def register_compressor(compressor: Compressor) -> None:
+    """Register a compressor; ids are persisted in payloads and must stay stable"""
+    COMPRESSORS[compressor.name] = compressor
+    _COMPRESSORS_BY_ID[compressor.codec_id] = compressor
+
+
+def _json_dumps(data: Any) -> bytes:
+    return json.dumps(data, default=str).encode()
+
+
+def _ndarray_dumps(array: np.ndarray) -> bytes:
+    # dtype and shape prefix, then the raw C-contiguous buffer
+    meta = json.dumps([array.dtype.str, list(array.shape)]).encode()
+    return struct.pack("!I", len(meta)) + meta + np.ascontiguousarray(array).tobytes()
+
+
+def _ndarray_loads(body: bytes) -> np.ndarray:
+    (meta_size,) = struct.unpack_from("!I", body)
+    dtype, shape = json.loads(body[4:4 + meta_size])
+    return np.frombuffer(body, dtype=np.dtype(dtype), offset=4 + meta_size).reshape(shape)
+
+
+register_serializer(Serializer(1, "json", _json_dumps, json.loads))
+register_serializer(Serializer(2, "pickle", lambda data: pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads))
+register_serializer(Serializer(3, "ndarray", _ndarray_dumps, _ndarray_loads))
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    register_serializer(Serializer(
+        4, "orjson", lambda data: orjson.dumps(data, default=str, option=_ORJSON_OPTIONS), orjson.loads
+    ))
+if MSGPACK_AVAILABLE:
+    register_serializer(Serializer(
+        5, "msgpack",
+        lambda data: msgpack.packb(data, default=str, use_bin_type=True),
+        lambda body: msgpack.unpackb(body, raw=False, strict_map_key=False),
+    ))
+
+register_compressor(Compressor(0, "none", bytes, bytes))
+register_compressor(Compressor(1, "gzip", lambda body: gzip.compress(body, compresslevel=1), gzip.decompress))
+if ZSTD_AVAILABLE:
+    register_compressor(Compressor(
+        2, "zstd",
+        lambda body: zstandard.ZstdCompressor(level=3).compress(body),
+        lambda body: zstandard.ZstdDecompressor().decompress(body),
+    ))
+if LZ4_AVAILABLE:
+    register_compressor(Compressor(3, "lz4", lz4.frame.compress, lz4.frame.decompress))
+
+
+def preferred_serializer() -> str:
+    """Fastest available serializer for JSON-like structured data"""
+    if ORJSON_AVAILABLE:
+        return "orjson"
+    if MSGPACK_AVAILABLE:
+        return "msgpack"
+    return "json"
+
+
+class CacheCodec:
+    """
+    Encodes cache values with a configured serializer and a size-adaptive
+    compressor, and decodes any registered format by its header.
+
+    ``serializer="auto"`` picks the fastest available structured format;
+    NumPy arrays always use the raw buffer format. Bodies smaller than
+    ``compress_min_bytes`` are stored uncompressed, bodies up to
+    ``large_payload_bytes`` use lz4 and larger ones use zstd (each falling
+    back to the other, then to gzip, when not installed). Large bodies whose
+    leading sample compresses by less than ``min_savings`` (dense float
+    arrays, already-compressed blobs) are stored uncompressed.
+    """
+
+    def __init__(
+        self,
+        serializer: str = "auto",
+        compress: bool = True,
+        compress_min_bytes: int = 1024,
+        large_payload_bytes: int = 64 * 1024,
+        min_savings: float = 0.1,
+        legacy_loads: Optional[Callable[[bytes], Any]] = None,
+    ) -> None:
+        name = preferred_serializer() if serializer == "auto" else serializer
+        if name not in SERIALIZERS:
+            logger.warning(f"Serializer {name} not available, using json")
+            name = "json"
+        self.serializer = SERIALIZERS[name]
+        self.compress = compress
+        self.compress_min_bytes = compress_min_bytes
+        self.large_payload_bytes = large_payload_bytes
+        self.min_savings = min_savings
+        self.legacy_loads = legacy_loads or json.loads
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def _record(self, name: str, operation: str, seconds: float, size: int) -> None:
+        stats = self.stats.setdefault(name, {
+            "encodes": 0, "decodes": 0, "encode_seconds": 0.0, "decode_seconds": 0.0, "bytes": 0
+        })
+        stats[f"{operation}s"] += 1
+        stats[f"{operation}_seconds"] += seconds
+        stats["bytes"] += size
+
+    def choose_compressor(self, body: bytes) -> Compressor:
+        size = len(body)
+        if not self.compress or size < self.compress_min_bytes:
+            return COMPRESSORS["none"]
+        order = ("zstd", "lz4") if size >= self.large_payload_bytes else ("lz4", "zstd")
+        compressor = next(COMPRESSORS[name] for name in order + ("gzip",) if name in COMPRESSORS)
+        if size >= self.large_payload_bytes:
+            sample = body[:_SAMPLE_BYTES]
+            if len(compressor.compress(sample)) > len(sample) * (1 - self.min_savings):
+                return COMPRESSORS["none"]
+        return compressor
+
+    def _serializer_for(self, data: Any) -> Serializer:
+        if isinstance(data, np.ndarray) and data.dtype != object:
+            return SERIALIZERS["ndarray"]
+        return self.serializer
+
+    def encode(self, data: Any) -> bytes:
+        start = time.perf_counter()
+        serializer = self._serializer_for(data)
+        try:
+            body = serializer.dumps(data)
+        except (TypeError, ValueError, OverflowError) as e:
+            # e.g. integers beyond 64 bits for orjson/msgpack
+            if serializer.name in ("json", "pickle", "ndarray"):
+                raise
+            logger.debug(f"{serializer.name} could not encode value ({e}), using json")
+            serializer = SERIALIZERS["json"]
+            body = serializer.dumps(data)
+        compressor = self.choose_compressor(body)
+        payload = MAGIC + bytes((serializer.codec_id, compressor.codec_id)) + compressor.compress(body)
+        self._record(f"{serializer.name}+{compressor.name}", "encode", time.perf_counter() - start, len(payload))
+        return payload
+
+    def decode(self, payload: Any) -> Any:
+        if isinstance(payload, str):
+            return self.legacy_loads(payload)
+        payload = bytes(payload)
+        start = time.perf_counter()
+        serializer, compressor = self.parse_header(payload)
+        if serializer is None:
+            value = self.legacy_loads(payload)
+            self._record("legacy", "decode", time.perf_counter() - start, len(payload))
+            return value
+        value = serializer.loads(compressor.decompress(payload[HEADER_SIZE:]))
+        self._record(f"{serializer.name}+{compressor.name}", "decode", time.perf_counter() - start, len(payload))
+        return value
+
+    @staticmethod
+    def parse_header(payload: bytes) -> Tuple[Optional[Serializer], Optional[Compressor]]:
+        """Codecs named by the payload header, or ``(None, None)`` for legacy payloads"""
+        if len(payload) < HEADER_SIZE or not payload.startswith(MAGIC):
+            return None, None
+        serializer = _SERIALIZERS_BY_ID.get(payload[3])
+        compressor = _COMPRESSORS_BY_ID.get(payload[4])
+        if serializer is None or compressor is None:
+            raise CodecError(f"Payload written with unavailable codec ids {payload[3]}/{payload[4]}")
+        return serializer, compressor
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-format counts, cumulative encode/decode seconds and bytes"""
+        return {name: dict(stats) for name, stats in self.stats.items()}
@@ -0,0 +1,279 @@
+"""
+Secondary indexes for cache invalidation.
+
+Invalidating by tag, prefix or pattern should cost O(affected keys), not a
+scan of the whole cache (or a blocking ``KEYS`` over the Redis keyspace):
+
+- ``InvertedIndex``: in-process tag and key-token postings for L1 tiers
+- ``RedisTagIndex``: Redis sets mapping each tag and key-segment prefix to
+  its member keys, written in the same MULTI/EXEC transaction as the value
+- ``GenerationNamespaces``: per-scope generation counters embedded in cache
+  keys, so bumping one counter invalidates a whole scope in O(1)
+"""
+
+import fnmatch
+import logging
+import re
+import time
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Keys are split into tokens on ":_./-"
+_TOKEN_RE = re.compile(r"[^:_./\-]+")
+_LITERAL_RE = re.compile(r"[^*?]+")
+
+
+def key_prefixes(key: str, separator: str = ":") -> List[str]:
+    """Segment-aligned prefixes of ``key``: ``a:b:c`` -> ``["a", "a:b"]``"""
+    parts = key.split(separator)
+    return [separator.join(parts[:i]) for i in range(1, len(parts))]
+
+
+def literal_prefix(pattern: str) -> Tuple[str, bool]:
+    """
+    Split a glob into its literal prefix and whether the rest is a single
+    trailing ``*`` (i.e. the pattern is a pure prefix match).
+    """
+    match = re.search(r"[*?\[]", pattern)
+    if match is None:
+        return pattern, False
+    prefix = pattern[:match.start()]
+    return prefix, pattern[match.start():] == "*"
+
+
+class InvertedIndex:
+    """
+    In-process tag and token index over cache keys.
+
+    Keys are tokenised on ``:_./-``; a glob is answered from the postings of
+    its most selective literal token and then verified with ``fnmatch``, so
+    the cost scales with the candidate set rather than the key count.
+    """
+
+    def __init__(self) -> None:
+        self._tags: Dict[str, Set[str]] = defaultdict(set)
+        self._key_tags: Dict[str, FrozenSet[str]] = {}
+        self._tokens: Dict[str, Set[str]] = defaultdict(set)
+
+    def add(self, key: str, tags: Optional[Iterable[str]] = None) -> None:
+        """Index ``key`` (replacing any previous tags)"""
+        if key in self._key_tags:
+            self.remove(key)
+        key_tags = frozenset(tags or ())
+        self._key_tags[key] = key_tags
+        for tag in key_tags:
+            self._tags[tag].add(key)
+        for token in set(_TOKEN_RE.findall(key)):
+            self._tokens[token].add(key)
+
+    def remove(self, key: str) -> None:
+        key_tags = self._key_tags.pop(key, None)
+        if key_tags is None:
+            return
+        for tag in key_tags:
+            self._discard(self._tags, tag, key)
+        for token in set(_TOKEN_RE.findall(key)):
+            self._discard(self._tokens, token, key)
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[str]], name: str, key: str) -> None:
+        members = postings.get(name)
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del postings[name]
+
+    def clear(self) -> None:
+        self._tags.clear()
+        self._key_tags.clear()
+        self._tokens.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._key_tags
+
+    def __len__(self) -> int:
+        return len(self._key_tags)
+
+    def tags_of(self, key: str) -> FrozenSet[str]:
+        return self._key_tags.get(key, frozenset())
+
+    def keys_for_tags(self, tags: Iterable[str]) -> Set[str]:
+        """Keys carrying any of ``tags``"""
+        keys: Set[str] = set()
+        for tag in tags:
+            keys |= self._tags.get(tag, set())
+        return keys
+
+    def keys_for_prefix(self, prefix: str) -> Set[str]:
+        return self.match(prefix.replace("[", "[[]") + "*")
+
+    def keys_containing(self, substring: str) -> Set[str]:
+        return self.match("*" + substring.replace("[", "[[]") + "*")
+
+    def match(self, pattern: str) -> Set[str]:
+        """Keys matching the glob ``pattern``"""
+        candidates = self._candidates(pattern)
+        return {key for key in candidates if fnmatch.fnmatchcase(key, pattern)}
+
+    def _candidates(self, pattern: str) -> Iterable[str]:
+        if "[" in pattern.replace("[[]", ""):
+            return list(self._key_tags)
+
+        exact: List[str] = []
+        partial: List[str] = []
+        for run in _LITERAL_RE.finditer(pattern):
+            literal = run.group().replace("[[]", "[")
+            anchored_left = run.start() == 0
+            anchored_right = run.end() == len(pattern)
+            for token in _TOKEN_RE.finditer(literal):
+                left = token.start() > 0 or anchored_left
+                right = token.end() < len(literal) or anchored_right
+                (exact if left and right else partial).append(token.group())
+
+        if exact:
+            # A token bounded by separators (or the key ends) must be a whole key token
+            postings = [self._tokens.get(token, set()) for token in exact]
+            return min(postings, key=len)
+        if partial:
+            # Otherwise it is a substring of one key token; scan the vocabulary
+            piece = max(partial, key=len)
+            keys: Set[str] = set()
+            for token, members in self._tokens.items():
+                if piece in token:
+                    keys |= members
+            return keys
+        return list(self._key_tags)
+
+
+class RedisTagIndex:
+    """
+    Redis sets mapping tags and key prefixes to member keys.
+
+    ``set`` writes the value and its index memberships in one MULTI/EXEC.
+    Index sets get the longest TTL of their members so they expire once
+    every member has. Invalidation pops members in batches (SPOP), so a key
+    added concurrently is either deleted or survives intact.
+    """
+
+    def __init__(self, client: Any, namespace: str = "idx", batch_size: int = 500) -> None:
+        self.client = client
+        self.namespace = namespace
+        self.batch_size = batch_size
+
+    def tag_key(self, tag: str) -> str:
+        return f"{self.namespace}:tag:{tag}"
+
+    def prefix_key(self, prefix: str) -> str:
+        return f"{self.namespace}:prefix:{prefix}"
+
+    def _index_keys(self, key: str, tags: Optional[Iterable[str]]) -> List[str]:
+        return [self.tag_key(tag) for tag in (tags or ())] + [self.prefix_key(p) for p in key_prefixes(key)]
+
+    async def set(self, key: str, value: Any, ttl: int, tags: Optional[Iterable[str]] = None) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(key, value, ex=ttl)
+            for index_key in self._index_keys(key, tags):
+                pipe.sadd(index_key, key)
+                pipe.expire(index_key, ttl, nx=True)
+                pipe.expire(index_key, ttl, gt=True)
+            await pipe.execute()
+
+    async def delete(self, key: str, tags: Optional[Iterable[str]] = None) -> int:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            for index_key in self._index_keys(key, tags):
+                pipe.srem(index_key, key)
+            results = await pipe.execute()
+        return int(results[0])
+
+    async def _drain(self, index_key: str) -> int:
+        deleted = 0
+        while True:
+            members = await self.client.spop(index_key, self.batch_size)
+            if not members:
+                return deleted
+            deleted += await self.client.delete(*members)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        total = 0
+        for tag in tags:
+            total += await self._drain(self.tag_key(tag))
+        return total
+
+    async def invalidate_prefix(self, prefix: str) -> int:
+        """Delete keys under a segment-aligned prefix (``a:b`` covers ``a:b:*``)"""
+        return await self._drain(self.prefix_key(prefix.rstrip(":")))
+
+    async def count_prefix(self, prefix: str) -> int:
+        """Indexed member count (may include members that already expired)"""
+        return await self.client.scard(self.prefix_key(prefix.rstrip(":")))
+
+    async def invalidate_pattern(self, pattern: str) -> int:
+        """
+        Delete keys matching a glob. Segment-aligned ``prefix:*`` patterns use
+        the prefix index; anything else falls back to an incremental SCAN,
+        which unlike KEYS never blocks the server for the whole keyspace.
+        """
+        prefix, pure = literal_prefix(pattern)
+        if pure and (prefix.endswith(":") or not prefix):
+            return await self.invalidate_prefix(prefix) if prefix else 0
+        deleted = 0
+        batch: List[str] = []
+        async for key in self.client.scan_iter(match=pattern, count=self.batch_size):
+            batch.append(key)
+            if len(batch) >= self.batch_size:
+                deleted += await self.client.delete(*batch)
+                batch = []
+        if batch:
+            deleted += await self.client.delete(*batch)
+        return deleted
+
+
+class GenerationNamespaces:
+    """
+    Per-scope generation counters for O(1) scope invalidation.
+
+    Cache keys embed the scope's current generation; ``bump`` increments it,
+    orphaning every key of the old generation to expire via its TTL. With a
+    Redis client the counters are shared across processes and cached locally
+    for ``cache_seconds`` (a bump is visible to other processes within that
+    interval, and immediately in the bumping process).
+    """
+
+    def __init__(self, client: Any = None, prefix: str = "gen", cache_seconds: float = 1.0) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.cache_seconds = cache_seconds
+        self._local: Dict[str, Tuple[int, float]] = {}
+
+    def _key(self, scope: str) -> str:
+        return f"{self.prefix}:{scope}"
+
+    async def current(self, scope: str) -> int:
+        cached = self._local.get(scope)
+        now = time.monotonic()
+        if cached is not None and (self.client is None or now - cached[1] < self.cache_seconds):
+            return cached[0]
+        generation = 0
+        if self.client is not None:
+            try:
+                generation = int(await self.client.get(self._key(scope)) or 0)
+            except Exception as e:
+                logger.warning(f"Generation lookup failed for {scope}: {e}")
+                generation = cached[0] if cached else 0
+        self._local[scope] = (generation, now)
+        return generation
+
+    async def bump(self, scope: str) -> int:
+        if self.client is not None:
+            generation = int(await self.client.incr(self._key(scope)))
+        else:
+            generation = (self._local.get(scope, (0, 0.0))[0]) + 1
+        self._local[scope] = (generation, time.monotonic())
+        return generation
+
+    async def scoped_key(self, scope: str, key: str) -> str:
+        """Prefix ``key`` with the scope's current generation"""
+        return f"{scope}:g{await self.current(scope)}:{key}"
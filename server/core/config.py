@@ -107,6 +107,9 @@ class DatabaseSettings(BaseModel):
     # Kuzu Graph Database
     KUZU_DB_PATH: str = "./data/kuzu"
     KUZU_READ_ONLY: bool = False
+    KUZU_POOL_SIZE: int = 4
+    KUZU_POOL_ACQUIRE_TIMEOUT: float = 5.0
+    KUZU_QUERY_TIMEOUT: float = 60.0
     
     # Redis Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -181,6 +184,43 @@ class MonitoringSettings(BaseModel):
         env_prefix = "MONITORING_"
 
 
+class TelemetrySettings(BaseModel):
+    """Telemetry ingestion configuration"""
+    # Group-commit writer for /telemetry/ingest/batch
+    BATCH_MAX_SIZE: int = 1000
+    BATCH_MAX_LINGER_MS: float = 10.0
+    BATCH_MAX_QUEUE_SIZE: int = 100000
+    BATCH_MAX_REQUEST_EVENTS: int = 10000
+    
+    class Config:
+        env_prefix = "TELEMETRY_"
+
+
+class EmbeddingSettings(BaseModel):
+    """Resident embedding service configuration"""
+    MODEL_NAME: str = "all-MiniLM-L6-v2"
+    BATCH_WINDOW_MS: float = 5.0
+    MAX_BATCH_SIZE: int = 64
+    CACHE_SIZE: int = 4096
+    
+    class Config:
+        env_prefix = "EMBEDDING_"
+
+
+class VectorIndexSettings(BaseModel):
+    """ANN index configuration for Top-K vector search"""
+    ENABLED: bool = True
+    INDEX_DIR: str = "./data/vector_indexes"
+    NPROBE: int = 8
+    MIN_TRAIN_SIZE: int = 1024
+    REFRESH_INTERVAL_SECONDS: float = 5.0
+    # Indexes built at startup, as "table:embedding_field:index_name" entries
+    PRELOAD: List[str] = []
+    
+    class Config:
+        env_prefix = "VECTOR_INDEX_"
+
+
 class Settings(BaseModel):
     """Main application settings"""
     
@@ -207,6 +247,9 @@ class Settings(BaseModel):
     database: DatabaseSettings = DatabaseSettings()
     security_headers: SecurityHeadersSettings = SecurityHeadersSettings()
     monitoring: MonitoringSettings = MonitoringSettings()
+    telemetry: TelemetrySettings = TelemetrySettings()
+    embedding: EmbeddingSettings = EmbeddingSettings()
+    vector_index: VectorIndexSettings = VectorIndexSettings()
     
     @validator("ENVIRONMENT", pre=True)
     def validate_environment(cls, v: Any) -> Environment:
@@ -0,0 +1,235 @@
+"""
+Delta encoding for streamed JSON documents.
+
+Dashboards receive the same document shape on every tick with only a few
+fields changed. A ``DeltaStream`` turns successive documents into
+keyframes (the full document) and JSON-Patch style deltas against the
+previous document, forcing a keyframe every ``keyframe_interval`` ticks:
+
+    {"type": "keyframe", "seq": 7, "data": {...}}
+    {"type": "delta", "seq": 8, "base": 7, "ops": [{"op": "replace", "path": "/cpu", "value": 41.5}]}
+
+Envelopes of a named stream also carry ``"stream": name``.
+
+A client applies a delta only if it last applied ``base``; any other client
+(new, or one that missed frames) is sent the keyframe instead. Payloads are
+serialised once per update and shared by every client, optionally as
+standalone zlib-deflated messages.
+"""
+
+import copy
+import json
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+DELTA_SUBPROTOCOL = "graphmemory.delta.v1"
+DELTA_DEFLATE_SUBPROTOCOL = "graphmemory.delta.v1+deflate"
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+def _escape(token: str) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def json_diff(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """
+    JSON-Patch (RFC 6902) operations turning ``old`` into ``new``.
+
+    Objects are diffed key by key and equal-length arrays element by
+    element; anything else that differs is replaced whole.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: List[Dict[str, Any]] = []
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key in old:
+                ops.extend(json_diff(old[key], value, child))
+            else:
+                ops.append({"op": "add", "path": child, "value": value})
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            ops.extend(json_diff(old_item, new_item, f"{path}/{index}"))
+        return ops
+    # JSON distinguishes 1, 1.0 and true even though Python compares them equal
+    if type(old) is type(new) and old == new:
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(document: Any, ops: Iterable[Mapping[str, Any]]) -> Any:
+    """Apply ``json_diff`` operations to a copy of ``document``"""
+    document = copy.deepcopy(document)
+    for op in ops:
+        tokens = [_unescape(token) for token in op["path"].split("/")[1:]]
+        if not tokens:
+            if op["op"] == "remove":
+                raise ValueError("Cannot remove the document root")
+            document = copy.deepcopy(op["value"])
+            continue
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            index = len(parent) if last == "-" else int(last)
+            if op["op"] == "add":
+                parent.insert(index, copy.deepcopy(op["value"]))
+            elif op["op"] == "replace":
+                parent[index] = copy.deepcopy(op["value"])
+            elif op["op"] == "remove":
+                del parent[index]
+            else:
+                raise ValueError(f"Unsupported patch operation: {op['op']}")
+        elif op["op"] in ("add", "replace"):
+            parent[last] = copy.deepcopy(op["value"])
+        elif op["op"] == "remove":
+            del parent[last]
+        else:
+            raise ValueError(f"Unsupported patch operation: {op['op']}")
+    return document
+
+
+def deflate(text: str, min_bytes: int = 512) -> Union[str, bytes]:
+    """zlib-deflate ``text`` if it is at least ``min_bytes`` long and shrinks"""
+    encoded = text.encode("utf-8")
+    if len(encoded) < min_bytes:
+        return text
+    compressed = zlib.compress(encoded, 6)
+    return compressed if len(compressed) < len(encoded) else text
+
+
+def payload_size(payload: Union[str, bytes]) -> int:
+    return len(payload.encode("utf-8")) if isinstance(payload, str) else len(payload)
+
+
+@dataclass(frozen=True)
+class DeltaOptions:
+    """Per-client stream encoding, negotiated at connect time"""
+    delta: bool = False
+    deflate: bool = False
+    subprotocol: Optional[str] = None
+
+    @classmethod
+    def negotiate(cls, params: Optional[Mapping[str, str]] = None,
+                  subprotocols: Iterable[str] = ()) -> "DeltaOptions":
+        """
+        Read ``?delta=1`` and ``?compress=deflate`` query parameters, or one
+        of the ``graphmemory.delta.v1[+deflate]`` WebSocket subprotocols.
+        """
+        params = params or {}
+        subprotocols = list(subprotocols)
+        if DELTA_DEFLATE_SUBPROTOCOL in subprotocols:
+            return cls(delta=True, deflate=True, subprotocol=DELTA_DEFLATE_SUBPROTOCOL)
+        if DELTA_SUBPROTOCOL in subprotocols:
+            return cls(delta=True, deflate=params.get("compress") == "deflate", subprotocol=DELTA_SUBPROTOCOL)
+        return cls(
+            delta=str(params.get("delta", "")).lower() in _TRUE_VALUES,
+            deflate=params.get("compress") == "deflate",
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.delta or self.deflate
+
+
+class DeltaUpdate:
+    """One document in a stream, with its keyframe and (maybe) delta payloads"""
+
+    def __init__(self, stream: "DeltaStream", seq: int, base: Optional[int],
+                 document: Any, ops: Optional[List[Dict[str, Any]]]) -> None:
+        self.stream = stream
+        self.seq = seq
+        self.base = base
+        self.document = document
+        self.ops = ops
+        self._payloads: Dict[Tuple[bool, bool], Union[str, bytes]] = {}
+
+    def is_delta_for(self, client_seq: Optional[int]) -> bool:
+        """Whether a client that last applied ``client_seq`` can take the delta"""
+        return self.ops is not None and client_seq is not None and client_seq == self.base
+
+    def payload(self, delta: bool, deflated: bool = False) -> Union[str, bytes]:
+        """Serialised delta or keyframe envelope, encoded once and cached"""
+        key = (delta and self.ops is not None, deflated)
+        if key not in self._payloads:
+            if key[0]:
+                envelope = {"type": "delta", "seq": self.seq, "base": self.base, "ops": self.ops}
+            else:
+                envelope = {"type": "keyframe", "seq": self.seq, "data": self.document}
+            if self.stream.name:
+                envelope["stream"] = self.stream.name
+            text = json.dumps(envelope, default=str, separators=(",", ":"))
+            self._payloads[key] = deflate(text, self.stream.compress_min_bytes) if deflated else text
+        return self._payloads[key]
+
+
+class DeltaStream:
+    """
+    Encodes successive JSON documents as keyframes and deltas.
+
+    ``push`` returns a ``DeltaUpdate``; every ``keyframe_interval``-th update
+    (and any update whose delta would not be smaller than the document)
+    carries no delta, so every client resynchronises from the keyframe.
+    A ``name`` is echoed in envelopes so clients multiplexing several
+    streams over one connection can route them.
+    """
+
+    def __init__(self, keyframe_interval: int = 30, compress_min_bytes: int = 512,
+                 name: Optional[str] = None) -> None:
+        self.name = name
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.compress_min_bytes = compress_min_bytes
+        self.current: Optional[DeltaUpdate] = None
+        self._seq = 0
+        self._since_keyframe = 0
+        self.stats = {
+            "updates": 0,
+            "keyframes_sent": 0,
+            "deltas_sent": 0,
+            "bytes_full": 0,
+            "bytes_sent": 0,
+        }
+
+    def push(self, document: Any, seq: Optional[int] = None) -> DeltaUpdate:
+        """Record the next document; ``seq`` defaults to an internal counter"""
+        self._seq = seq if seq is not None else self._seq + 1
+        previous = self.current
+        ops = None
+        if previous is not None and self._since_keyframe + 1 < self.keyframe_interval:
+            ops = json_diff(previous.document, document)
+        update = DeltaUpdate(self, self._seq, previous.seq if previous else None, document, ops)
+        if ops is not None and payload_size(update.payload(True)) >= payload_size(update.payload(False)):
+            update.ops = None
+            update._payloads.clear()
+        self._since_keyframe = 0 if update.ops is None else self._since_keyframe + 1
+        self.current = update
+        self.stats["updates"] += 1
+        return update
+
+    def reset(self) -> None:
+        """Forget the previous document so the next update is a keyframe"""
+        self.current = None
+        self._since_keyframe = 0
+
+    def record(self, full_bytes: int, sent: Union[str, bytes], delta: bool) -> None:
+        """Account one delivered payload against what the full document would cost"""
+        self.stats["deltas_sent" if delta else "keyframes_sent"] += 1
+        self.stats["bytes_full"] += full_bytes
+        self.stats["bytes_sent"] += payload_size(sent)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "bytes_saved": self.stats["bytes_full"] - self.stats["bytes_sent"],
+            "keyframe_interval": self.keyframe_interval,
+        }
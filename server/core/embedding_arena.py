@@ -0,0 +1,138 @@
+"""
+Shared float32 arena for fixed-dimension embeddings.
+
+Long-lived embeddings (one per collaborative vector document) are stored
+as rows of contiguous float32 blocks instead of one float64 array each.
+Rows are handed out as integer slots; freed slots go on a free list and
+are reused before the arena grows. Growth appends a new block rather than
+reallocating, so ``row`` views handed out earlier stay valid. With
+``mmap_dir`` set, each block is a memory-mapped file, so cold embeddings
+can be paged out by the OS.
+
+``encode_half``/``decode_half`` store historical vectors as float16, a
+quarter of the size of the float64 arrays they replace.
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def encode_half(vector: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """float16 copy of a vector, for history that only needs ~3 significant digits"""
+    if vector is None:
+        return None
+    return np.asarray(vector, dtype=np.float16)
+
+
+def decode_half(vector: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    return None if vector is None else vector.astype(np.float32)
+
+
+class EmbeddingArena:
+    """Slot allocator over contiguous float32 blocks of ``block_rows`` embeddings"""
+
+    def __init__(self, dim: int = 384, block_rows: int = 1024, mmap_dir: Optional[str] = None) -> None:
+        self.dim = dim
+        self.block_rows = block_rows
+        self.mmap_dir = mmap_dir
+        self._blocks: List[np.ndarray] = []
+        self._free: List[int] = []
+        self._next = 0  # slots below this have been handed out at least once
+
+    def __len__(self) -> int:
+        return self._next - len(self._free)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._blocks) * self.block_rows
+
+    def _add_block(self) -> None:
+        shape = (self.block_rows, self.dim)
+        if self.mmap_dir:
+            path = os.path.join(self.mmap_dir, f"embeddings-{id(self):x}-{len(self._blocks)}.f32")
+            block: np.ndarray = np.memmap(path, dtype=np.float32, mode="w+", shape=shape)
+        else:
+            block = np.zeros(shape, dtype=np.float32)
+        self._blocks.append(block)
+
+    def _locate(self, slot: int) -> Tuple[np.ndarray, int]:
+        if not 0 <= slot < self._next:
+            raise IndexError(f"Embedding slot {slot} is not allocated")
+        return self._blocks[slot // self.block_rows], slot % self.block_rows
+
+    def allocate(self, vector: Optional[Sequence[float]] = None) -> int:
+        """Reserve a slot, reusing freed ones first, optionally filled with ``vector``"""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._next == self.capacity:
+                self._add_block()
+            slot = self._next
+            self._next += 1
+        block, row = self._locate(slot)
+        if vector is None:
+            block[row] = 0.0
+        else:
+            block[row] = self._check(vector)
+        return slot
+
+    def free(self, slot: int) -> None:
+        self._locate(slot)
+        self._free.append(slot)
+
+    def row(self, slot: int) -> np.ndarray:
+        """Read-only view of a slot; reflects later writes to the slot"""
+        block, row = self._locate(slot)
+        view = block[row]
+        view.flags.writeable = False
+        return view
+
+    def write(self, slot: int, vector: Sequence[float]) -> None:
+        block, row = self._locate(slot)
+        block[row] = self._check(vector)
+
+    def write_many(self, slots: Sequence[int], vectors: np.ndarray) -> None:
+        """Write one vector per slot, with one fancy-indexed assignment per block"""
+        slots = np.asarray(slots, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(slots), self.dim)
+        for block_index in np.unique(slots // self.block_rows):
+            mask = slots // self.block_rows == block_index
+            self._blocks[int(block_index)][slots[mask] % self.block_rows] = vectors[mask]
+
+    def gather(self, slots: Iterable[int]) -> np.ndarray:
+        """Copy the given slots into one (n, dim) matrix"""
+        slots = np.fromiter(slots, dtype=np.int64)
+        out = np.empty((len(slots), self.dim), dtype=np.float32)
+        for block_index in np.unique(slots // self.block_rows):
+            mask = slots // self.block_rows == block_index
+            out[mask] = self._blocks[int(block_index)][slots[mask] % self.block_rows]
+        return out
+
+    def _check(self, vector: Sequence[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        if array.shape != (self.dim,):
+            raise ValueError(f"Expected an embedding of shape ({self.dim},), got {array.shape}")
+        return array
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "dim": self.dim,
+            "slots_used": len(self),
+            "slots_free": len(self._free) + self.capacity - self._next,
+            "capacity": self.capacity,
+            "bytes": self.capacity * self.dim * 4,
+            "memory_mapped": bool(self.mmap_dir),
+        }
+
+
+_shared_arenas: Dict[int, EmbeddingArena] = {}
+
+
+def get_shared_arena(dim: int) -> EmbeddingArena:
+    """Process-wide in-memory arena for embeddings of dimension ``dim``"""
+    arena = _shared_arenas.get(dim)
+    if arena is None:
+        arena = _shared_arenas[dim] = EmbeddingArena(dim)
+    return arena
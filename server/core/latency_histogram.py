@@ -0,0 +1,56 @@
+"""
+Fixed-bucket latency histogram.
+
+Counts observations (milliseconds) into cumulative-style upper-bound
+buckets, plus count/total/max, so percentiles can be estimated without
+keeping samples. Used for connection-pool waits, query latency and
+stream flush round trips.
+"""
+
+from typing import Any, Dict, Sequence
+
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds)"""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.total_ms = 0.0
+        self.count = 0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        index = 0
+        while index < len(self.buckets_ms) and value_ms > self.buckets_ms[index]:
+            index += 1
+        self.counts[index] += 1
+        self.total_ms += value_ms
+        self.count += 1
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, q: float) -> float:
+        """Upper bucket bound containing the q-th percentile"""
+        if not self.count:
+            return 0.0
+        target = q / 100.0 * self.count
+        seen = 0
+        for bound, n in zip(self.buckets_ms, self.counts):
+            seen += n
+            if seen >= target:
+                return float(bound)
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}ms": n for bound, n in zip(self.buckets_ms, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+            "buckets": buckets,
+        }
@@ -0,0 +1,262 @@
+"""
+Single-flight request coalescing and stale-while-revalidate caching.
+
+When a hot cache key expires, every concurrent caller would otherwise miss
+and recompute the same expensive result. ``get_or_compute`` avoids that
+stampede:
+
+- Only one loader runs per key in the process; concurrent callers await it
+- An optional short Redis lease (``SET NX PX``) extends that across processes
+- Entries carry a fresh and a stale deadline; stale values are served while a
+  single background refresh runs
+- Fresh entries are refreshed early with a probability that rises towards
+  expiry (XFetch), so keys written together do not expire together
+"""
+
+import asyncio
+import logging
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+# Marks stored entries written by get_or_compute, which carry freshness deadlines
+SWR_ENVELOPE = "__swr__"
+
+# Compare-and-delete so a holder never releases a lease it no longer owns
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class CachedValue:
+    """A cached value with its freshness deadlines (wall-clock seconds)"""
+    value: Any
+    fresh_until: float
+    stale_until: float
+    compute_time: float = 0.0
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) < self.fresh_until
+
+    def is_servable(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) < self.stale_until
+
+    def should_refresh_early(self, now: Optional[float] = None, beta: float = 1.0) -> bool:
+        """
+        XFetch early expiration: refresh when ``now - delta * beta * ln(rand)``
+        passes the fresh deadline, where ``delta`` is the last compute time.
+        """
+        if self.compute_time <= 0 or beta <= 0:
+            return False
+        now = now if now is not None else time.time()
+        return now - self.compute_time * beta * math.log(1.0 - random.random()) >= self.fresh_until
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "value": self.value,
+            "fresh_until": self.fresh_until,
+            "stale_until": self.stale_until,
+            "compute_time": self.compute_time,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CachedValue":
+        return cls(
+            value=data["value"],
+            fresh_until=float(data["fresh_until"]),
+            stale_until=float(data["stale_until"]),
+            compute_time=float(data.get("compute_time", 0.0)),
+        )
+
+    def to_envelope(self) -> Dict[str, Any]:
+        """Plain-dict form that survives both JSON and pickle cache serializers"""
+        return {SWR_ENVELOPE: self.to_dict()}
+
+    @classmethod
+    def from_envelope(cls, stored: Any) -> Optional["CachedValue"]:
+        """Parse a stored envelope; None for values written by a plain ``set``"""
+        if isinstance(stored, dict) and SWR_ENVELOPE in stored:
+            return cls.from_dict(stored[SWR_ENVELOPE])
+        return None
+
+
+class RedisLease:
+    """Short-lived cross-process lock on a cache key"""
+
+    def __init__(self, client: Any, ttl_ms: int = 30000, prefix: str = "lease:") -> None:
+        self.client = client
+        self.ttl_ms = ttl_ms
+        self.prefix = prefix
+
+    async def acquire(self, key: str) -> Optional[str]:
+        """Return a lease token, or None if another process holds the lease"""
+        token = uuid.uuid4().hex
+        try:
+            if await self.client.set(self.prefix + key, token, nx=True, px=self.ttl_ms):
+                return token
+            return None
+        except Exception as e:
+            # Without Redis we fall back to in-process coalescing only
+            logger.warning(f"Lease acquire failed for {key}: {e}")
+            return token
+
+    async def release(self, key: str, token: str) -> None:
+        try:
+            await self.client.eval(_RELEASE_SCRIPT, 1, self.prefix + key, token)
+        except Exception as e:
+            logger.warning(f"Lease release failed for {key}: {e}")
+
+
+class SingleFlight:
+    """
+    Per-key loader coalescing with stale-while-revalidate.
+
+    ``read`` and ``write`` adapt the owning cache's storage: ``read(key)``
+    returns a ``CachedValue`` or None, ``write(key, entry, expire_seconds)``
+    stores one.
+    """
+
+    def __init__(
+        self,
+        read: Callable[[str], Awaitable[Optional[CachedValue]]],
+        write: Callable[[str, CachedValue, int], Awaitable[Any]],
+        lease: Optional[RedisLease] = None,
+        lease_poll_interval: float = 0.05,
+        beta: float = 1.0,
+    ) -> None:
+        self.read = read
+        self.write = write
+        self.lease = lease
+        self.lease_poll_interval = lease_poll_interval
+        self.beta = beta
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._background: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "load_errors": 0,
+            "coalesced_waits": 0,
+            "stale_serves": 0,
+            "early_refreshes": 0,
+            "background_refreshes": 0,
+            "lease_waits": 0,
+        }
+
+    async def get_or_compute(self, key: str, loader: Loader, ttl: int, stale_ttl: int = 0) -> Any:
+        """
+        Return the cached value for ``key``, computing it with ``loader`` at
+        most once per key at a time. Stale values (up to ``stale_ttl`` seconds
+        past ``ttl``) are returned immediately while a refresh runs.
+        """
+        now = time.time()
+        entry = await self.read(key)
+        if entry is not None and entry.is_fresh(now):
+            self.stats["hits"] += 1
+            if entry.should_refresh_early(now, self.beta):
+                self.stats["early_refreshes"] += 1
+                self.refresh_in_background(key, loader, ttl, stale_ttl)
+            return entry.value
+        if entry is not None and entry.is_servable(now):
+            self.stats["stale_serves"] += 1
+            self.refresh_in_background(key, loader, ttl, stale_ttl)
+            return entry.value
+
+        self.stats["misses"] += 1
+        return await self._load(key, loader, ttl, stale_ttl)
+
+    def refresh_in_background(self, key: str, loader: Loader, ttl: int, stale_ttl: int) -> None:
+        """Start a refresh for ``key`` unless one is already running"""
+        if key in self._inflight or key in self._background:
+            return
+        self.stats["background_refreshes"] += 1
+        task = asyncio.create_task(self._load(key, loader, ttl, stale_ttl))
+        self._background[key] = task
+        task.add_done_callback(lambda t: self._finish_background(key, t))
+
+    def _finish_background(self, key: str, task: asyncio.Task) -> None:
+        self._background.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            # The stale value stays in place; the error was already counted
+            logger.warning(f"Background refresh of {key} failed: {task.exception()}")
+
+    async def _load(self, key: str, loader: Loader, ttl: int, stale_ttl: int) -> Any:
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            # A background refresh that has been scheduled but not yet started
+            background = self._background.get(key)
+            if background is not None and background is not asyncio.current_task():
+                inflight = background
+        if inflight is not None:
+            self.stats["coalesced_waits"] += 1
+            return await asyncio.shield(inflight)
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load_leased(key, loader, ttl, stale_ttl)
+        except BaseException as e:
+            self.stats["load_errors"] += 1
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                # Mark retrieved so unawaited failures are not logged twice
+                future.exception()
+            else:
+                future.cancel()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _load_leased(self, key: str, loader: Loader, ttl: int, stale_ttl: int) -> Any:
+        token = None
+        if self.lease is not None:
+            token = await self.lease.acquire(key)
+            if token is None:
+                # Another process is computing; wait for its result
+                self.stats["lease_waits"] += 1
+                deadline = time.monotonic() + self.lease.ttl_ms / 1000
+                while time.monotonic() < deadline:
+                    await asyncio.sleep(self.lease_poll_interval)
+                    entry = await self.read(key)
+                    if entry is not None and entry.is_fresh():
+                        return entry.value
+                    token = await self.lease.acquire(key)
+                    if token is not None:
+                        break
+        try:
+            return await self._compute(key, loader, ttl, stale_ttl)
+        finally:
+            if token is not None:
+                await self.lease.release(key, token)
+
+    async def _compute(self, key: str, loader: Loader, ttl: int, stale_ttl: int) -> Any:
+        self.stats["loads"] += 1
+        started = time.time()
+        value = await loader()
+        now = time.time()
+        entry = CachedValue(value, now + ttl, now + ttl + stale_ttl, now - started)
+        try:
+            await self.write(key, entry, ttl + stale_ttl)
+        except Exception as e:
+            logger.warning(f"Failed to store computed value for {key}: {e}")
+        return value
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = dict(self.stats)
+        stats["inflight"] = len(self._inflight)
+        stats["background_inflight"] = len(self._background)
+        return stats
@@ -0,0 +1,230 @@
+"""
+Array-backed time series store for collected metrics.
+
+``TimeSeriesRing`` keeps one NumPy ring buffer per numeric field plus a
+timestamp column, and maintains fixed-resolution rollups (count, sum, min,
+max per bucket) on every append. A window summary bisects the timestamp
+column for the partial edge buckets and reduces whole buckets from the
+coarsest fitting rollup, instead of scanning every raw point.
+"""
+
+import math
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Default rollups: (resolution seconds, retained buckets) -> 3h of 1m, 24h of 5m, 1 week of 1h
+DEFAULT_ROLLUPS: Tuple[Tuple[int, int], ...] = ((60, 180), (300, 288), (3600, 168))
+
+
+def _ring_slices(start: int, count: int, capacity: int) -> List[slice]:
+    """Physical slices covering ``count`` logical slots starting at ``start``"""
+    end = start + count
+    if end <= capacity:
+        return [slice(start, end)]
+    return [slice(start, capacity), slice(0, end - capacity)]
+
+
+class _Rollup:
+    """Ring of fixed-width buckets holding count/sum/min/max per field"""
+
+    def __init__(self, resolution: float, buckets: int, width: int) -> None:
+        self.resolution = float(resolution)
+        self.capacity = buckets
+        self.starts = np.zeros(buckets, dtype=np.float64)
+        self.counts = np.zeros(buckets, dtype=np.int64)
+        self.sums = np.zeros((buckets, width), dtype=np.float64)
+        self.mins = np.zeros((buckets, width), dtype=np.float64)
+        self.maxs = np.zeros((buckets, width), dtype=np.float64)
+        self.head = 0  # physical slot of the oldest bucket
+        self.size = 0
+
+    def add(self, timestamp: float, values: np.ndarray) -> None:
+        bucket_start = math.floor(timestamp / self.resolution) * self.resolution
+        last = (self.head + self.size - 1) % self.capacity
+        if self.size and self.starts[last] == bucket_start:
+            self.counts[last] += 1
+            self.sums[last] += values
+            np.minimum(self.mins[last], values, out=self.mins[last])
+            np.maximum(self.maxs[last], values, out=self.maxs[last])
+            return
+        if self.size < self.capacity:
+            slot = (self.head + self.size) % self.capacity
+            self.size += 1
+        else:
+            slot = self.head
+            self.head = (self.head + 1) % self.capacity
+        self.starts[slot] = bucket_start
+        self.counts[slot] = 1
+        self.sums[slot] = values
+        self.mins[slot] = values
+        self.maxs[slot] = values
+
+    def oldest_start(self) -> Optional[float]:
+        return float(self.starts[self.head]) if self.size else None
+
+    def slots_from(self, since: float) -> List[slice]:
+        """Physical slices of the buckets starting at or after ``since``"""
+        skip = 0
+        for part in _ring_slices(self.head, self.size, self.capacity):
+            segment = self.starts[part]
+            index = int(np.searchsorted(segment, since, side="left"))
+            if index < len(segment):
+                return _ring_slices((self.head + skip + index) % self.capacity, self.size - skip - index, self.capacity)
+            skip += len(segment)
+        return []
+
+
+class WindowStats:
+    """Count, sum, min and max per field over a time window"""
+
+    __slots__ = ("fields", "count", "sums", "mins", "maxs")
+
+    def __init__(self, fields: Sequence[str]) -> None:
+        width = len(fields)
+        self.fields = tuple(fields)
+        self.count = 0
+        self.sums = np.zeros(width, dtype=np.float64)
+        self.mins = np.full(width, np.inf)
+        self.maxs = np.full(width, -np.inf)
+
+    def _merge(self, count: int, sums: np.ndarray, mins: np.ndarray, maxs: np.ndarray) -> None:
+        if count:
+            self.count += int(count)
+            self.sums += sums
+            np.minimum(self.mins, mins, out=self.mins)
+            np.maximum(self.maxs, maxs, out=self.maxs)
+
+    def mean(self, field: str) -> float:
+        return float(self.sums[self.fields.index(field)] / self.count) if self.count else 0.0
+
+    def min(self, field: str) -> float:
+        return float(self.mins[self.fields.index(field)]) if self.count else 0.0
+
+    def max(self, field: str) -> float:
+        return float(self.maxs[self.fields.index(field)]) if self.count else 0.0
+
+
+class TimeSeriesRing:
+    """
+    Fixed-capacity columnar ring of ``(timestamp, field values)`` rows.
+
+    Timestamps are epoch seconds and must be appended in non-decreasing
+    order (earlier values are clamped to the last timestamp). Rollups outlive
+    the raw ring, so windows longer than the raw retention are still
+    summarised from whole buckets.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str],
+        capacity: int = 3600,
+        rollups: Iterable[Tuple[int, int]] = DEFAULT_ROLLUPS,
+    ) -> None:
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros((capacity, len(self.fields)), dtype=np.float64)
+        self.head = 0
+        self.size = 0
+        self.rollups = sorted(
+            (_Rollup(resolution, buckets, len(self.fields)) for resolution, buckets in rollups),
+            key=lambda rollup: rollup.resolution,
+        )
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        rollup_bytes = sum(
+            r.starts.nbytes + r.counts.nbytes + r.sums.nbytes + r.mins.nbytes + r.maxs.nbytes for r in self.rollups
+        )
+        return self.timestamps.nbytes + self.values.nbytes + rollup_bytes
+
+    def append(self, timestamp: float, values: Sequence[float]) -> None:
+        if self.size:
+            timestamp = max(timestamp, self.last_timestamp())
+        row = np.asarray(values, dtype=np.float64)
+        if self.size < self.capacity:
+            slot = (self.head + self.size) % self.capacity
+            self.size += 1
+        else:
+            slot = self.head
+            self.head = (self.head + 1) % self.capacity
+        self.timestamps[slot] = timestamp
+        self.values[slot] = row
+        for rollup in self.rollups:
+            rollup.add(timestamp, row)
+
+    def first_timestamp(self) -> Optional[float]:
+        return float(self.timestamps[self.head]) if self.size else None
+
+    def last_timestamp(self) -> Optional[float]:
+        return float(self.timestamps[(self.head + self.size - 1) % self.capacity]) if self.size else None
+
+    def _logical_index(self, timestamp: float, side: str = "left") -> int:
+        """Number of retained rows with timestamp before (or at, for ``right``) ``timestamp``"""
+        offset = 0
+        for part in _ring_slices(self.head, self.size, self.capacity):
+            segment = self.timestamps[part]
+            index = int(np.searchsorted(segment, timestamp, side=side))
+            if index < len(segment):
+                return offset + index
+            offset += len(segment)
+        return offset
+
+    def _rows(self, start: int, stop: int) -> List[slice]:
+        if stop <= start:
+            return []
+        return _ring_slices((self.head + start) % self.capacity, stop - start, self.capacity)
+
+    def window(self, since: float, until: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Raw ``(timestamps, values)`` in ``[since, until]`` (copies, oldest first)"""
+        start = self._logical_index(since, "left")
+        stop = self.size if until is None else self._logical_index(until, "right")
+        parts = self._rows(start, stop)
+        if not parts:
+            return np.empty(0), np.empty((0, len(self.fields)))
+        return (np.concatenate([self.timestamps[p] for p in parts]),
+                np.concatenate([self.values[p] for p in parts]))
+
+    def count_since(self, since: float) -> int:
+        return self.size - self._logical_index(since, "left")
+
+    def summarize(self, since: float) -> WindowStats:
+        """
+        Statistics over every row at or after ``since``.
+
+        Rows before the first whole bucket of the chosen rollup come from the
+        raw ring (one bisect plus a vectorised reduce over less than one
+        bucket); the remainder is reduced from the rollup buckets.
+        """
+        stats = WindowStats(self.fields)
+        if not self.size:
+            return stats
+
+        span = (self.last_timestamp() or since) - since
+        rollup = None
+        for candidate in self.rollups:
+            # Use a rollup only when the window spans several of its buckets
+            if candidate.resolution * 4 <= span and candidate.size:
+                rollup = candidate
+
+        boundary = math.inf
+        if rollup is not None:
+            boundary = math.ceil(since / rollup.resolution) * rollup.resolution
+            oldest = rollup.oldest_start()
+            if oldest is not None and oldest > boundary:
+                boundary = oldest
+            for part in rollup.slots_from(boundary):
+                if rollup.counts[part].any():
+                    stats._merge(rollup.counts[part].sum(), rollup.sums[part].sum(axis=0),
+                                 rollup.mins[part].min(axis=0), rollup.maxs[part].max(axis=0))
+
+        start = self._logical_index(since, "left")
+        stop = self._logical_index(boundary, "left") if boundary != math.inf else self.size
+        for part in self._rows(start, stop):
+            rows = self.values[part]
+            stats._merge(len(rows), rows.sum(axis=0), rows.min(axis=0), rows.max(axis=0))
+        return stats
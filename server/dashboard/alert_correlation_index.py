@@ -0,0 +1,377 @@
+"""
+Alert Correlation Index - Candidate generation for alert correlation.
+
+Correlating a new alert against every open alert is quadratic during an
+incident storm. This index keeps per-alert features and secondary indexes
+so each correlation strategy only scores candidate neighbours:
+
+- Temporal: alerts grouped into fixed-width time buckets
+- Spatial: inverted indexes over host, component, category and tag keys
+- Semantic: cached normalised title/description tokens, with MinHash-LSH
+  bands over the token sets
+- Metric pattern: per-metric sorted values, range-queried by the ratio the
+  correlation threshold allows
+
+Temporal, spatial and metric candidates are exact supersets of the alerts
+the strategies would correlate. LSH is approximate: pairs with low token
+overlap may be missed, which is the price of not comparing all pairs.
+"""
+
+import bisect
+import logging
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from .models.alert_models import Alert
+
+logger = logging.getLogger(__name__)
+
+_by_seq = attrgetter("seq")
+
+# Mersenne prime for the universal hash family; 31-bit operands keep
+# (a * x + b) within uint64
+_MERSENNE_PRIME = (1 << 31) - 1
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9\s]')
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, replace non-alphanumerics with spaces and collapse whitespace"""
+    return ' '.join(_NON_ALNUM_RE.sub(' ', text.lower()).split())
+
+
+@lru_cache(maxsize=65536)
+def _token_hash(token: str) -> int:
+    return zlib.crc32(token.encode()) & _MERSENNE_PRIME
+
+
+@dataclass(frozen=True)
+class TextFeatures:
+    """Normalised text and its word set, computed once per alert field"""
+    # None when the field is empty, which never correlates
+    normalized: Optional[str]
+    words: FrozenSet[str]
+
+    @classmethod
+    def from_text(cls, text: Optional[str]) -> "TextFeatures":
+        if not text:
+            return cls(None, frozenset())
+        normalized = normalize_text(text)
+        return cls(normalized, frozenset(normalized.split()))
+
+
+class IndexedFields(NamedTuple):
+    """Alert fields the index is keyed on, captured when the alert is added"""
+    triggered_at: datetime
+    source_host: Optional[str]
+    source_component: Optional[str]
+    category: Any
+    title: str
+    description: str
+    tags: Tuple[str, ...]
+    metric_values: Tuple[Tuple[str, float], ...]
+
+    @classmethod
+    def of(cls, alert: Alert) -> "IndexedFields":
+        return cls(
+            alert.triggered_at, alert.source_host, alert.source_component, alert.category,
+            alert.title, alert.description,
+            tuple(sorted(alert.tags)), tuple(sorted(alert.metric_values.items())),
+        )
+
+
+@dataclass
+class AlertFeatures:
+    """Cached correlation features of one indexed alert"""
+    alert: Alert
+    seq: int
+    timestamp: float
+    fields: IndexedFields
+    title: TextFeatures
+    description: TextFeatures
+    tag_count: int
+    signatures: Dict[str, np.ndarray]
+
+
+class MinHasher:
+    """MinHash signatures over token sets, banded for LSH"""
+
+    def __init__(self, num_perm: int = 64, band_size: int = 2, seed: int = 1) -> None:
+        if num_perm % band_size:
+            raise ValueError("num_perm must be a multiple of band_size")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.band_size = band_size
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: Iterable[str]) -> Optional[np.ndarray]:
+        hashes = np.fromiter((_token_hash(token) for token in tokens), dtype=np.uint64)
+        if not len(hashes):
+            return None
+        return ((np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME).min(axis=0)
+
+    def bands(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[start:start + self.band_size].tobytes()
+            for start in range(0, self.num_perm, self.band_size)
+        ]
+
+
+class AlertCorrelationIndex:
+    """
+    Persistent correlation indexes over a set of alerts.
+
+    Alerts are added once and scored against later arrivals through the
+    candidate queries; ``sync`` mirrors a caller-supplied alert list,
+    re-indexing only alerts that are new or changed.
+    """
+
+    def __init__(self, bucket_seconds: float = 60.0, num_perm: int = 64, band_size: int = 2) -> None:
+        self.bucket_seconds = bucket_seconds
+        self.hasher = MinHasher(num_perm=num_perm, band_size=band_size)
+        self.features: Dict[UUID, AlertFeatures] = {}
+        self._seq = 0
+
+        self._time_buckets: Dict[int, Set[UUID]] = defaultdict(set)
+        self._by_host: Dict[str, Set[UUID]] = defaultdict(set)
+        self._by_component: Dict[str, Set[UUID]] = defaultdict(set)
+        self._by_category: Dict[Any, Set[UUID]] = defaultdict(set)
+        self._by_tag: Dict[str, Set[UUID]] = defaultdict(set)
+        self._lsh: Dict[Tuple[str, int, bytes], Set[UUID]] = defaultdict(set)
+        # metric -> sorted [(value, seq)], plus seq -> alert id
+        self._metric_values: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+        self._seq_ids: Dict[int, UUID] = {}
+
+        self.stats = {"indexed": 0, "removed": 0, "candidate_queries": 0, "candidates_returned": 0}
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def __contains__(self, alert_id: UUID) -> bool:
+        return alert_id in self.features
+
+    @property
+    def alerts(self) -> List[Alert]:
+        """Indexed alerts in insertion order"""
+        return [features.alert for features in self.features.values()]
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def extract(self, alert: Alert, seq: int = -1) -> AlertFeatures:
+        """Correlation features for ``alert`` (cached ones if it is indexed)"""
+        fields = IndexedFields.of(alert)
+        cached = self.features.get(alert.id)
+        if cached is not None and cached.fields == fields:
+            return cached
+        title = TextFeatures.from_text(alert.title)
+        description = TextFeatures.from_text(alert.description)
+        signatures = {}
+        for field_name, text in (("title", title), ("description", description)):
+            signature = self.hasher.signature(text.words)
+            if signature is not None:
+                signatures[field_name] = signature
+        return AlertFeatures(
+            alert=alert,
+            seq=seq,
+            timestamp=alert.triggered_at.timestamp(),
+            fields=fields,
+            title=title,
+            description=description,
+            tag_count=len(fields.tags),
+            signatures=signatures,
+        )
+
+    def add(self, alert: Alert) -> bool:
+        """Index ``alert``; returns False if it is already indexed unchanged"""
+        cached = self.features.get(alert.id)
+        if cached is not None:
+            if cached.fields == IndexedFields.of(alert):
+                cached.alert = alert
+                return False
+            self.remove(alert.id)
+
+        self._seq += 1
+        features = self.extract(alert, self._seq)
+        fields = features.fields
+        self.features[alert.id] = features
+        self._seq_ids[features.seq] = alert.id
+
+        self._time_buckets[self._bucket(features.timestamp)].add(alert.id)
+        if fields.source_host:
+            self._by_host[fields.source_host].add(alert.id)
+        if fields.source_component:
+            self._by_component[fields.source_component].add(alert.id)
+        self._by_category[fields.category].add(alert.id)
+        for tag in fields.tags:
+            self._by_tag[tag].add(alert.id)
+        for field_name, signature in features.signatures.items():
+            for band, key in enumerate(self.hasher.bands(signature)):
+                self._lsh[(field_name, band, key)].add(alert.id)
+        for metric, value in fields.metric_values:
+            bisect.insort(self._metric_values[metric], (float(value), features.seq))
+
+        self.stats["indexed"] += 1
+        return True
+
+    def remove(self, alert_id: UUID) -> Optional[Alert]:
+        features = self.features.pop(alert_id, None)
+        if features is None:
+            return None
+        alert, fields = features.alert, features.fields
+        self._seq_ids.pop(features.seq, None)
+
+        _discard(self._time_buckets, self._bucket(features.timestamp), alert_id)
+        if fields.source_host:
+            _discard(self._by_host, fields.source_host, alert_id)
+        if fields.source_component:
+            _discard(self._by_component, fields.source_component, alert_id)
+        _discard(self._by_category, fields.category, alert_id)
+        for tag in fields.tags:
+            _discard(self._by_tag, tag, alert_id)
+        for field_name, signature in features.signatures.items():
+            for band, key in enumerate(self.hasher.bands(signature)):
+                _discard(self._lsh, (field_name, band, key), alert_id)
+        for metric, value in fields.metric_values:
+            entries = self._metric_values.get(metric)
+            if entries is None:
+                continue
+            position = bisect.bisect_left(entries, (float(value), features.seq))
+            if position < len(entries) and entries[position][1] == features.seq:
+                del entries[position]
+            if not entries:
+                del self._metric_values[metric]
+
+        self.stats["removed"] += 1
+        return alert
+
+    def sync(self, alerts: Iterable[Alert]) -> None:
+        """Make the index hold exactly ``alerts``, indexing only what changed"""
+        current: Set[UUID] = set()
+        for alert in alerts:
+            current.add(alert.id)
+            self.add(alert)
+        for alert_id in [alert_id for alert_id in self.features if alert_id not in current]:
+            self.remove(alert_id)
+
+    def prune(self, before: datetime) -> int:
+        """Drop alerts triggered before ``before``; returns how many were dropped"""
+        cutoff = self._bucket(before.timestamp())
+        stale = [
+            alert_id
+            for bucket in [bucket for bucket in self._time_buckets if bucket <= cutoff]
+            for alert_id in list(self._time_buckets.get(bucket, ()))
+            if self.features[alert_id].fields.triggered_at < before
+        ]
+        for alert_id in stale:
+            self.remove(alert_id)
+        return len(stale)
+
+    def _ordered(self, alert_ids: Iterable[UUID], exclude: Optional[UUID]) -> List[AlertFeatures]:
+        # Insertion order keeps results identical to scanning the alert list
+        features = self.features
+        candidates = sorted(
+            (features[alert_id] for alert_id in alert_ids if alert_id != exclude),
+            key=_by_seq,
+        )
+        self.stats["candidate_queries"] += 1
+        self.stats["candidates_returned"] += len(candidates)
+        return candidates
+
+    # Candidate queries
+
+    def temporal_candidates(self, start: datetime, end: datetime, exclude: Optional[UUID] = None) -> List[AlertFeatures]:
+        """Alerts triggered within ``[start, end]``"""
+        first, last = self._bucket(start.timestamp()), self._bucket(end.timestamp())
+        if last - first + 1 <= len(self._time_buckets):
+            buckets = [self._time_buckets[b] for b in range(first, last + 1) if b in self._time_buckets]
+        else:
+            buckets = [ids for b, ids in self._time_buckets.items() if first <= b <= last]
+        return self._ordered(
+            (
+                alert_id for ids in buckets for alert_id in ids
+                if start <= self.features[alert_id].fields.triggered_at <= end
+            ),
+            exclude,
+        )
+
+    def hosts(self, host: Optional[str]) -> Set[UUID]:
+        return self._by_host.get(host, set()) if host else set()
+
+    def components(self, component: Optional[str]) -> Set[UUID]:
+        return self._by_component.get(component, set()) if component else set()
+
+    def categories(self, category: Any) -> Set[UUID]:
+        return self._by_category.get(category, set())
+
+    def tagged(self, tag: str) -> Set[UUID]:
+        return self._by_tag.get(tag, set())
+
+    def spatial_candidates(self, alert: Alert) -> List[AlertFeatures]:
+        """Alerts sharing a host, component, category or tag key with ``alert``"""
+        alert_ids = self.hosts(alert.source_host) | self.components(alert.source_component) | self.categories(alert.category)
+        for tag in alert.tags:
+            alert_ids |= self.tagged(tag)
+        return self._ordered(alert_ids, alert.id)
+
+    def semantic_candidates(self, features: AlertFeatures) -> List[AlertFeatures]:
+        """Alerts whose title or description collides with ``features`` in any LSH band"""
+        alert_ids: Set[UUID] = set()
+        for field_name, signature in features.signatures.items():
+            for band, key in enumerate(self.hasher.bands(signature)):
+                alert_ids |= self._lsh.get((field_name, band, key), set())
+        return self._ordered(alert_ids, features.alert.id)
+
+    def metric_candidates(self, metric_values: Dict[str, float], threshold: float,
+                          exclude: Optional[UUID] = None) -> List[AlertFeatures]:
+        """
+        Alerts with at least one common metric whose per-metric correlation
+        ``1 - |a - b| / max(|a|, |b|)`` reaches ``threshold``. An average over
+        common metrics can only reach the threshold if one of them does, so
+        this is a superset of the alerts MetricPatternCorrelator accepts.
+        """
+        seqs: Set[int] = set()
+        for metric, value in metric_values.items():
+            entries = self._metric_values.get(metric)
+            if not entries:
+                continue
+            value = float(value)
+            if threshold <= 0:
+                low, high = -np.inf, np.inf
+            elif value == 0:
+                low = high = 0.0
+            elif value > 0:
+                low, high = value * threshold, value / threshold
+            else:
+                low, high = value / threshold, value * threshold
+            start = bisect.bisect_left(entries, (low, -1))
+            stop = bisect.bisect_right(entries, (high, self._seq + 1))
+            seqs.update(seq for _, seq in entries[start:stop])
+        return self._ordered((self._seq_ids[seq] for seq in seqs), exclude)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "alerts": len(self.features),
+            "time_buckets": len(self._time_buckets),
+            "lsh_buckets": len(self._lsh),
+            "metrics": len(self._metric_values),
+        }
+
+
+def _discard(index: Dict[Any, Set[UUID]], key: Any, alert_id: UUID) -> None:
+    ids = index.get(key)
+    if ids is None:
+        return
+    ids.discard(alert_id)
+    if not ids:
+        del index[key]
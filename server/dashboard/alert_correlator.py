@@ -27,6 +27,7 @@ import re
 from difflib import SequenceMatcher
 
 from .models.alert_models import Alert, AlertSeverity, AlertCategory, AlertStatus
+from .alert_correlation_index import AlertCorrelationIndex, AlertFeatures, TextFeatures, normalize_text
 from .cache_manager import get_cache_manager, CacheManager
 from .enhanced_circuit_breaker import get_circuit_breaker_manager, CircuitBreakerManager
 
@@ -124,25 +125,35 @@ class CorrelationResult:
                 self.confidence in [CorrelationConfidence.HIGH, CorrelationConfidence.VERY_HIGH])
 
 
+def _resolve_index(existing_alerts: List[Alert], index: Optional[AlertCorrelationIndex]) -> AlertCorrelationIndex:
+    """Use the caller's persistent index, or index ``existing_alerts`` for a one-off call"""
+    if index is None:
+        index = AlertCorrelationIndex()
+        index.sync(existing_alerts)
+    return index
+
+
 class TemporalCorrelator:
     """Correlates alerts based on temporal patterns"""
     
     def __init__(self, rule: CorrelationRule) -> None:
         self.rule = rule
     
-    async def correlate(self, new_alert: Alert, existing_alerts: List[Alert]) -> Optional[CorrelationResult]:
+    async def correlate(self, new_alert: Alert, existing_alerts: List[Alert],
+                        index: Optional[AlertCorrelationIndex] = None) -> Optional[CorrelationResult]:
         """Find temporal correlations for new alert"""
         try:
             correlated_alerts = set()
             correlation_factors: Dict[str, Any] = {}
             
-            # Find alerts within time window
+            # Find alerts within time window from the time buckets
             current_time = new_alert.triggered_at
             window_start = current_time - self.rule.time_window
             
+            index = _resolve_index(existing_alerts, index)
             candidate_alerts = [
-                alert for alert in existing_alerts
-                if window_start <= alert.triggered_at <= current_time
+                features.alert
+                for features in index.temporal_candidates(window_start, current_time, exclude=new_alert.id)
             ]
             
             if not candidate_alerts:
@@ -213,7 +224,8 @@ class SpatialCorrelator:
     def __init__(self, rule: CorrelationRule) -> None:
         self.rule = rule
     
-    async def correlate(self, new_alert: Alert, existing_alerts: List[Alert]) -> Optional[CorrelationResult]:
+    async def correlate(self, new_alert: Alert, existing_alerts: List[Alert],
+                        index: Optional[AlertCorrelationIndex] = None) -> Optional[CorrelationResult]:
         """Find spatial correlations for new alert"""
         try:
             correlated_alerts = set()
@@ -222,35 +234,40 @@ class SpatialCorrelator:
             spatial_score = 0.0
             spatial_matches = []
             
-            for alert in existing_alerts:
+            # Only alerts sharing a host, component, category or tag key can match
+            index = _resolve_index(existing_alerts, index)
+            same_host = index.hosts(new_alert.source_host)
+            same_component = index.components(new_alert.source_component)
+            same_category = index.categories(new_alert.category)
+            tagged = [(tag, index.tagged(tag)) for tag in new_alert.tags]
+            
+            for features in index.spatial_candidates(new_alert):
+                alert = features.alert
                 match_score = 0.0
                 match_factors = {}
                 
                 # Same host correlation
-                if (new_alert.source_host and alert.source_host and 
-                    new_alert.source_host == alert.source_host):
+                if alert.id in same_host:
                     match_score += self.rule.same_host_weight
                     match_factors['same_host'] = True
                 
                 # Same component correlation
-                if (new_alert.source_component and alert.source_component and 
-                    new_alert.source_component == alert.source_component):
+                if alert.id in same_component:
                     match_score += self.rule.same_component_weight
                     match_factors['same_component'] = True
                 
                 # Same category correlation
-                if new_alert.category == alert.category:
+                if alert.id in same_category:
                     match_score += self.rule.same_category_weight
                     match_factors['same_category'] = True
                 
                 # Tag overlap correlation
-                if new_alert.tags and alert.tags:
-                    common_tags = set(new_alert.tags.keys()) & set(alert.tags.keys())
-                    if common_tags:
-                        tag_score = len(common_tags) / max(len(new_alert.tags), len(alert.tags))
-                        match_score += tag_score
-                        match_factors['common_tags'] = list(common_tags)
-                        match_factors['tag_overlap_score'] = tag_score
+                common_tags = [tag for tag, tag_ids in tagged if alert.id in tag_ids]
+                if common_tags:
+                    tag_score = len(common_tags) / max(len(new_alert.tags), features.tag_count)
+                    match_score += tag_score
+                    match_factors['common_tags'] = common_tags
+                    match_factors['tag_overlap_score'] = tag_score
                 
                 if match_score > 0:
                     correlated_alerts.add(alert.id)
@@ -324,7 +341,8 @@ class SemanticCorrelator:
     def __init__(self, rule: CorrelationRule) -> None:
         self.rule = rule
     
-    async def correlate(self, new_alert: Alert, existing_alerts: List[Alert]) -> Optional[CorrelationResult]:
+    async def correlate(self, new_alert: Alert, existing_alerts: List[Alert],
+                        index: Optional[AlertCorrelationIndex] = None) -> Optional[CorrelationResult]:
         """Find semantic correlations for new alert"""
         try:
             correlated_alerts = set()
@@ -333,17 +351,26 @@ class SemanticCorrelator:
             semantic_scores = []
             total_similarity = 0.0
             
-            for alert in existing_alerts:
-                similarity_score = await self._calculate_similarity(new_alert, alert)
+            # Score only MinHash-LSH neighbours, using their cached normalised text
+            index = _resolve_index(existing_alerts, index)
+            new_features = index.extract(new_alert)
+            
+            for features in index.semantic_candidates(new_features):
+                if self._similarity_upper_bound(new_features, features) < self.rule.min_similarity_score:
+                    continue
+                
+                title_sim = self._feature_similarity(new_features.title, features.title)
+                desc_sim = self._feature_similarity(new_features.description, features.description)
+                similarity_score = title_sim * 0.6 + desc_sim * 0.4
                 
                 if similarity_score >= self.rule.min_similarity_score:
-                    correlated_alerts.add(alert.id)
+                    correlated_alerts.add(features.alert.id)
                     total_similarity += similarity_score
                     semantic_scores.append({
-                        'alert_id': str(alert.id),
+                        'alert_id': str(features.alert.id),
                         'similarity_score': similarity_score,
-                        'title_similarity': self._text_similarity(new_alert.title, alert.title),
-                        'description_similarity': self._text_similarity(new_alert.description, alert.description)
+                        'title_similarity': title_sim,
+                        'description_similarity': desc_sim
                     })
             
             if not correlated_alerts:
@@ -403,19 +430,19 @@ class SemanticCorrelator:
     
     def _text_similarity(self, text1: str, text2: str) -> float:
         """Calculate text similarity using multiple methods"""
-        if not text1 or not text2:
+        return self._feature_similarity(TextFeatures.from_text(text1), TextFeatures.from_text(text2))
+    
+    def _feature_similarity(self, text1: TextFeatures, text2: TextFeatures) -> float:
+        """Text similarity over pre-normalised features"""
+        if text1.normalized is None or text2.normalized is None:
             return 0.0
         
-        # Normalize texts
-        text1_norm = self._normalize_text(text1)
-        text2_norm = self._normalize_text(text2)
-        
         # Use sequence matcher for character-level similarity
-        seq_similarity = SequenceMatcher(None, text1_norm, text2_norm).ratio()
+        seq_similarity = SequenceMatcher(None, text1.normalized, text2.normalized).ratio()
         
         # Word-level similarity
-        words1 = set(text1_norm.split())
-        words2 = set(text2_norm.split())
+        words1 = text1.words
+        words2 = text2.words
         
         if not words1 and not words2:
             return 1.0
@@ -432,18 +459,20 @@ class SemanticCorrelator:
         
         return combined_similarity
     
+    def _similarity_upper_bound(self, features1: AlertFeatures, features2: AlertFeatures) -> float:
+        """Overall similarity assuming a perfect character-level match, from word overlap alone"""
+        def bound(text1: TextFeatures, text2: TextFeatures) -> float:
+            union = len(text1.words | text2.words)
+            if not text1.words or not text2.words:
+                return 1.0
+            return 0.4 + 0.6 * len(text1.words & text2.words) / union
+        
+        return (bound(features1.title, features2.title) * 0.6 +
+                bound(features1.description, features2.description) * 0.4)
+    
     def _normalize_text(self, text: str) -> str:
         """Normalize text for comparison"""
-        # Convert to lowercase
-        text = text.lower()
-        
-        # Remove special characters except spaces
-        text = re.sub(r'[^a-z0-9\s]', ' ', text)
-        
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        
-        return text
+        return normalize_text(text)
 
 
 class MetricPatternCorrelator:
@@ -452,7 +481,8 @@ class MetricPatternCorrelator:
     def __init__(self, rule: CorrelationRule) -> None:
         self.rule = rule
     
-    async def correlate(self, new_alert: Alert, existing_alerts: List[Alert]) -> Optional[CorrelationResult]:
+    async def correlate(self, new_alert: Alert, existing_alerts: List[Alert],
+                        index: Optional[AlertCorrelationIndex] = None) -> Optional[CorrelationResult]:
         """Find metric pattern correlations for new alert"""
         try:
             if not new_alert.metric_values:
@@ -464,9 +494,14 @@ class MetricPatternCorrelator:
             pattern_matches = []
             total_correlation = 0.0
             
-            for alert in existing_alerts:
-                if not alert.metric_values:
-                    continue
+            # Only alerts with a common metric within the threshold's value ratio can match
+            index = _resolve_index(existing_alerts, index)
+            candidates = index.metric_candidates(
+                new_alert.metric_values, self.rule.metric_correlation_threshold, exclude=new_alert.id
+            )
+            
+            for features in candidates:
+                alert = features.alert
                 
                 correlation_score = await self._calculate_metric_correlation(
                     new_alert.metric_values, alert.metric_values
@@ -558,10 +593,15 @@ class AlertCorrelator:
     Main alert correlation engine that orchestrates multiple correlation strategies
     """
     
-    def __init__(self, rules: Optional[List[CorrelationRule]] = None) -> None:
+    def __init__(self, rules: Optional[List[CorrelationRule]] = None,
+                 index_retention: timedelta = timedelta(hours=1)) -> None:
         self.rules = rules or self._create_default_rules()
         self.correlators = self._initialize_correlators()
         
+        # Persistent candidate indexes over the alerts being correlated against
+        self.index = AlertCorrelationIndex()
+        self.index_retention = index_retention
+        
         # Active correlations storage
         self.active_correlations: Dict[UUID, CorrelationResult] = {}
         self.alert_to_correlation: Dict[UUID, UUID] = {}
@@ -596,13 +636,18 @@ class AlertCorrelator:
             logger.error(f"Failed to initialize AlertCorrelator: {e}")
             raise
     
-    async def correlate_alert(self, new_alert: Alert, existing_alerts: List[Alert]) -> Optional[CorrelationResult]:
+    async def correlate_alert(self, new_alert: Alert,
+                              existing_alerts: Optional[List[Alert]] = None) -> Optional[CorrelationResult]:
         """
         Correlate a new alert with existing alerts using multiple strategies
         
         Args:
             new_alert: The new alert to correlate
-            existing_alerts: List of existing alerts to correlate against
+            existing_alerts: List of existing alerts to correlate against. The
+                index is synced to it, re-indexing only new or changed alerts.
+                If omitted, the alerts previously passed in are used and the
+                new alert is indexed afterwards, with alerts older than
+                ``index_retention`` pruned.
             
         Returns:
             CorrelationResult if correlation found, None otherwise
@@ -618,6 +663,11 @@ class AlertCorrelator:
                 if existing_correlation_id in self.active_correlations:
                     return self.active_correlations[existing_correlation_id]
             
+            if existing_alerts is not None:
+                self.index.sync(existing_alerts)
+            else:
+                self.index.prune(new_alert.triggered_at - self.index_retention)
+            
             # Try each correlation strategy
             best_correlation = None
             best_score = 0.0
@@ -631,7 +681,7 @@ class AlertCorrelator:
                     continue
                 
                 try:
-                    correlation = await correlator.correlate(new_alert, existing_alerts)
+                    correlation = await correlator.correlate(new_alert, existing_alerts or [], index=self.index)
                     
                     if correlation and correlation.confidence_score > best_score:
                         best_correlation = correlation
@@ -643,6 +693,9 @@ class AlertCorrelator:
                     logger.error(f"Error in {rule.strategy.value} correlation: {e}")
                     continue
             
+            if existing_alerts is None:
+                self.index.add(new_alert)
+            
             # Process best correlation result
             if best_correlation and best_correlation.is_significant():
                 await self._process_correlation_result(best_correlation)
@@ -701,6 +754,14 @@ class AlertCorrelator:
             logger.error(f"Error removing correlation {correlation_id}: {e}")
             return False
     
+    def index_alert(self, alert: Alert) -> None:
+        """Add or refresh an alert in the correlation index"""
+        self.index.add(alert)
+    
+    def forget_alert(self, alert_id: UUID) -> None:
+        """Drop a resolved or expired alert from the correlation index"""
+        self.index.remove(alert_id)
+    
     def add_correlation_callback(self, callback: Callable) -> None:
         """Add callback for correlation events"""
         self.correlation_callbacks.append(callback)
@@ -721,7 +782,8 @@ class AlertCorrelator:
                 sum(processing_times) / len(processing_times) if processing_times else 0
             ),
             'strategy_usage': dict(self.correlation_metrics['strategy_usage']),
-            'rules_enabled': sum(1 for rule in self.rules if rule.enabled)
+            'rules_enabled': sum(1 for rule in self.rules if rule.enabled),
+            'index': self.index.get_stats()
         }
     
     # Private methods
@@ -27,6 +27,7 @@ from server.dashboard.performance_manager import get_performance_manager, Perfor
 from server.dashboard.cache_manager import get_cache_manager, CacheManager
 from server.dashboard.enhanced_circuit_breaker import get_circuit_breaker_manager, CircuitBreakerManager
 from server.dashboard.notification_dispatcher import get_notification_dispatcher, NotificationDispatcher
+from server.dashboard.alert_rule_index import AlertRuleIndex
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -267,8 +268,10 @@ class AlertEngine:
         self.circuit_breaker_manager: Optional[CircuitBreakerManager] = None
         self.notification_dispatcher: Optional[NotificationDispatcher] = None
         
-        # Alert rules storage
-        self.alert_rules: Dict[UUID, AlertRule] = {}
+        # Alert rules storage, compiled into per-metric threshold tables;
+        # rules must be added and removed through add_rule/remove_rule
+        self.rule_index = AlertRuleIndex()
+        self.alert_rules: Dict[UUID, AlertRule] = self.rule_index.rules
         
         # Metrics and monitoring
         self.metrics = AlertMetrics()
@@ -389,31 +392,57 @@ class AlertEngine:
             logger.error(f"Error getting current metrics: {e}")
             return {}
     
-    async def _evaluate_rules(self, metrics: Dict[str, float]) -> None:
-        """Evaluate all alert rules against current metrics"""
+    async def push_metrics(self, metrics: Dict[str, float]) -> None:
+        """
+        Push-based evaluation: apply metric updates as they happen.
+        
+        Only rules on the pushed metrics are re-evaluated; metrics not in
+        ``metrics`` keep their last known values.
+        """
+        await self._evaluate_rules(metrics, complete=False)
+    
+    async def push_metric(self, metric: str, value: float) -> None:
+        """Push a single metric update"""
+        await self.push_metrics({metric: value})
+    
+    async def _evaluate_rules(self, metrics: Dict[str, float], complete: bool = True) -> None:
+        """
+        Evaluate alert rules against current metrics.
+        
+        Conditions are only re-evaluated for metrics whose value changed.
+        On a full evaluation every rule whose conditions hold is processed so
+        breach tracking sees each observation; a pushed update only counts
+        as an observation for rules on the pushed metrics.
+        """
         alerts_generated = 0
+        self.rule_index.update(metrics, complete=complete)
         
-        for rule in self.alert_rules.values():
+        candidates = self.rule_index.met_rules
+        if not complete:
+            candidates = candidates & self.rule_index.rules_for_metrics(metrics)
+        
+        for rule_id in list(candidates):
+            rule = self.alert_rules.get(rule_id)
+            if rule is None:
+                continue
             try:
                 if not rule.enabled:
                     continue
                 
-                # Check if rule applies to current metrics
-                conditions_met, relevant_metrics = self.evaluator.evaluate_rule(rule, metrics)
+                relevant_metrics = self.rule_index.relevant_metrics(rule_id)
                 
-                if conditions_met:
-                    # Check if we should generate an alert
-                    if self.generator.should_generate_alert(rule, metrics):
-                        # Check cooldowns and rate limits
-                        if (self.generator.check_alert_cooldown(rule) or 
-                            self.generator.check_rate_limit(rule)):
-                            continue
-                        
-                        # Generate alert
-                        alert = self.generator.generate_alert(rule, metrics, relevant_metrics)
-                        if alert:
-                            alerts_generated += 1
-                            await self._handle_new_alert(alert)
+                # Check if we should generate an alert
+                if self.generator.should_generate_alert(rule, relevant_metrics):
+                    # Check cooldowns and rate limits
+                    if (self.generator.check_alert_cooldown(rule) or 
+                        self.generator.check_rate_limit(rule)):
+                        continue
+                    
+                    # Generate alert
+                    alert = self.generator.generate_alert(rule, self.rule_index.values, relevant_metrics)
+                    if alert:
+                        alerts_generated += 1
+                        await self._handle_new_alert(alert)
                 
             except Exception as e:
                 logger.error(f"Error evaluating rule {rule.name}: {e}")
@@ -559,9 +588,9 @@ class AlertEngine:
             )
             
             # Store rules
-            self.alert_rules[cpu_rule.id] = cpu_rule
-            self.alert_rules[memory_rule.id] = memory_rule
-            self.alert_rules[cache_rule.id] = cache_rule
+            self.rule_index.add(cpu_rule)
+            self.rule_index.add(memory_rule)
+            self.rule_index.add(cache_rule)
             
             logger.info(f"Loaded {len(self.alert_rules)} default alert rules")
             
@@ -580,9 +609,9 @@ class AlertEngine:
             self.alert_callbacks.remove(callback)
     
     async def add_rule(self, rule: AlertRule) -> bool:
-        """Add a new alert rule"""
+        """Add a new alert rule (or replace an edited one with the same id)"""
         try:
-            self.alert_rules[rule.id] = rule
+            self.rule_index.add(rule)
             
             # Cache the rule
             if self.cache_manager:
@@ -600,8 +629,7 @@ class AlertEngine:
         """Remove an alert rule"""
         try:
             if rule_id in self.alert_rules:
-                rule = self.alert_rules[rule_id]
-                del self.alert_rules[rule_id]
+                rule = self.rule_index.remove(rule_id)
                 
                 # Remove from cache
                 if self.cache_manager:
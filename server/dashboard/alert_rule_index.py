@@ -0,0 +1,214 @@
+"""
+Alert Rule Index - Incremental, vectorised threshold evaluation.
+
+Rules are compiled into per-metric tables of thresholds grouped by
+comparison operator. When a metric value changes, every condition on that
+metric is re-evaluated with one NumPy comparison per operator, and only
+conditions whose outcome flipped update their rule's count of unmet
+conditions. Rules on unchanged metrics are never touched; the set of
+currently met rules is maintained incrementally.
+"""
+
+import logging
+import math
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from server.dashboard.models.alert_models import AlertRule, ComparisonOperator
+
+logger = logging.getLogger(__name__)
+
+# Same tolerance MetricEvaluator uses for float equality
+EQUALITY_TOLERANCE = 0.001
+
+_COMPARATORS: Dict[ComparisonOperator, Callable[[float, np.ndarray], np.ndarray]] = {
+    ComparisonOperator.GREATER_THAN: lambda value, thresholds: value > thresholds,
+    ComparisonOperator.GREATER_EQUAL: lambda value, thresholds: value >= thresholds,
+    ComparisonOperator.LESS_THAN: lambda value, thresholds: value < thresholds,
+    ComparisonOperator.LESS_EQUAL: lambda value, thresholds: value <= thresholds,
+    ComparisonOperator.EQUAL: lambda value, thresholds: np.abs(value - thresholds) < EQUALITY_TOLERANCE,
+    ComparisonOperator.NOT_EQUAL: lambda value, thresholds: np.abs(value - thresholds) >= EQUALITY_TOLERANCE,
+}
+
+
+class _MetricTable:
+    """Threshold arrays for all conditions on one metric, grouped by operator"""
+
+    def __init__(self, conditions: Mapping[int, Tuple[ComparisonOperator, float]]) -> None:
+        grouped: Dict[ComparisonOperator, List[Tuple[float, int]]] = {}
+        for condition_id, (operator, threshold) in conditions.items():
+            grouped.setdefault(operator, []).append((threshold, condition_id))
+        self.groups: List[Tuple[Callable[[float, np.ndarray], np.ndarray], np.ndarray, np.ndarray]] = []
+        for operator, entries in grouped.items():
+            comparator = _COMPARATORS.get(operator)
+            if comparator is None:
+                logger.warning(f"Unknown comparison operator: {operator}")
+                continue
+            thresholds = np.array([threshold for threshold, _ in entries], dtype=np.float64)
+            ids = np.array([condition_id for _, condition_id in entries], dtype=np.int64)
+            self.groups.append((comparator, thresholds, ids))
+        self.all_ids = np.array(sorted(conditions), dtype=np.int64)
+
+
+class AlertRuleIndex:
+    """
+    Alert rules compiled into per-metric threshold tables.
+
+    ``update`` takes new metric values, re-evaluates only the conditions on
+    metrics whose value changed, and keeps ``met_rules`` (the ids of rules
+    whose conditions all hold) current. Rule edits must go through
+    ``add``/``remove`` so the compiled tables stay in sync.
+    """
+
+    def __init__(self) -> None:
+        self.rules: Dict[UUID, AlertRule] = {}
+        self.met_rules: Set[UUID] = set()
+        self._rule_conditions: Dict[UUID, List[Tuple[str, int]]] = {}
+        self._unmet: Dict[UUID, int] = {}
+        self._condition_rule: Dict[int, UUID] = {}
+        self._metric_conditions: Dict[str, Dict[int, Tuple[ComparisonOperator, float]]] = {}
+        self._tables: Dict[str, _MetricTable] = {}
+        self._state = np.zeros(64, dtype=bool)
+        self._free_ids: List[int] = []
+        self._next_id = 0
+        self.values: Dict[str, float] = {}
+        self.stats = {"updates": 0, "metrics_changed": 0, "conditions_evaluated": 0, "rules_flipped": 0}
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def __contains__(self, rule_id: UUID) -> bool:
+        return rule_id in self.rules
+
+    def _allocate_id(self) -> int:
+        if self._free_ids:
+            return self._free_ids.pop()
+        condition_id = self._next_id
+        self._next_id += 1
+        if condition_id >= len(self._state):
+            self._state = np.concatenate([self._state, np.zeros(len(self._state), dtype=bool)])
+        return condition_id
+
+    def add(self, rule: AlertRule) -> None:
+        """Compile ``rule`` (replacing any previous version with the same id)"""
+        if rule.id in self.rules:
+            self.remove(rule.id)
+        self.rules[rule.id] = rule
+        conditions = []
+        unmet = 0
+        for condition in rule.conditions:
+            metric = condition.metric_type.value
+            condition_id = self._allocate_id()
+            self._condition_rule[condition_id] = rule.id
+            self._metric_conditions.setdefault(metric, {})[condition_id] = (condition.operator, float(condition.value))
+            self._tables.pop(metric, None)
+            met = self._check(condition.operator, float(condition.value), self.values.get(metric))
+            self._state[condition_id] = met
+            unmet += not met
+            conditions.append((metric, condition_id))
+        self._rule_conditions[rule.id] = conditions
+        self._unmet[rule.id] = unmet
+        if unmet == 0 and conditions:
+            self.met_rules.add(rule.id)
+
+    def remove(self, rule_id: UUID) -> Optional[AlertRule]:
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return None
+        for metric, condition_id in self._rule_conditions.pop(rule_id, []):
+            metric_conditions = self._metric_conditions.get(metric, {})
+            metric_conditions.pop(condition_id, None)
+            if not metric_conditions:
+                self._metric_conditions.pop(metric, None)
+            self._tables.pop(metric, None)
+            self._condition_rule.pop(condition_id, None)
+            self._state[condition_id] = False
+            self._free_ids.append(condition_id)
+        self._unmet.pop(rule_id, None)
+        self.met_rules.discard(rule_id)
+        return rule
+
+    @staticmethod
+    def _check(operator: ComparisonOperator, threshold: float, value: Optional[float]) -> bool:
+        if value is None:
+            return False
+        comparator = _COMPARATORS.get(operator)
+        return bool(comparator(value, np.float64(threshold))) if comparator else False
+
+    def _table(self, metric: str) -> Optional[_MetricTable]:
+        table = self._tables.get(metric)
+        if table is None and metric in self._metric_conditions:
+            table = self._tables[metric] = _MetricTable(self._metric_conditions[metric])
+        return table
+
+    def update(self, metrics: Mapping[str, float], complete: bool = False) -> Set[UUID]:
+        """
+        Apply new metric values; returns the ids of rules whose met state flipped.
+
+        With ``complete=True`` the mapping is a full snapshot, so previously
+        seen metrics missing from it become unavailable (their conditions fail).
+        """
+        self.stats["updates"] += 1
+        changed: Dict[str, Optional[float]] = {}
+        for metric, value in metrics.items():
+            value = None if value is None or (isinstance(value, float) and math.isnan(value)) else float(value)
+            if metric not in self.values or self.values[metric] != value:
+                changed[metric] = value
+        if complete:
+            for metric in self.values.keys() - metrics.keys():
+                changed[metric] = None
+
+        flipped_rules: Set[UUID] = set()
+        for metric, value in changed.items():
+            if value is None:
+                self.values.pop(metric, None)
+            else:
+                self.values[metric] = value
+            table = self._table(metric)
+            if table is None:
+                continue
+            self.stats["metrics_changed"] += 1
+            if value is None:
+                self._apply(table.all_ids, np.zeros(len(table.all_ids), dtype=bool), flipped_rules)
+                continue
+            for comparator, thresholds, ids in table.groups:
+                self.stats["conditions_evaluated"] += len(ids)
+                self._apply(ids, comparator(value, thresholds), flipped_rules)
+
+        self.stats["rules_flipped"] += len(flipped_rules)
+        return flipped_rules
+
+    def _apply(self, ids: np.ndarray, results: np.ndarray, flipped_rules: Set[UUID]) -> None:
+        previous = self._state[ids]
+        changed = previous != results
+        if not changed.any():
+            return
+        self._state[ids] = results
+        for condition_id, now_met in zip(ids[changed].tolist(), results[changed].tolist()):
+            rule_id = self._condition_rule[condition_id]
+            unmet = self._unmet[rule_id] + (-1 if now_met else 1)
+            self._unmet[rule_id] = unmet
+            if unmet == 0:
+                self.met_rules.add(rule_id)
+                flipped_rules.add(rule_id)
+            elif unmet == 1 and not now_met:
+                self.met_rules.discard(rule_id)
+                flipped_rules.add(rule_id)
+
+    def relevant_metrics(self, rule_id: UUID) -> Dict[str, float]:
+        """Current values of the metrics a rule's conditions reference"""
+        return {
+            metric: self.values[metric]
+            for metric, _ in self._rule_conditions.get(rule_id, [])
+            if metric in self.values
+        }
+
+    def rules_for_metrics(self, metrics: Iterable[str]) -> Set[UUID]:
+        """Ids of rules with a condition on any of ``metrics``"""
+        return {
+            self._condition_rule[condition_id]
+            for metric in metrics
+            for condition_id in self._metric_conditions.get(metric, {})
+        }
@@ -13,8 +13,9 @@ from datetime import datetime, timedelta
 from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
-import statistics
+import bisect
 import json
+from itertools import islice
 
 # Import DataAdapter for data collection
 try:
@@ -24,9 +25,29 @@ except ImportError:
     from data_adapter import get_data_adapter, DataAdapter
     from models.analytics_models import SystemMetricsData, MemoryInsightsData, GraphMetricsData
 
+try:
+    from ..core.timeseries import TimeSeriesRing, WindowStats
+except ImportError:
+    from server.core.timeseries import TimeSeriesRing, WindowStats
+
 logger = logging.getLogger(__name__)
 
 
+# Numeric fields kept in each buffer's columnar series, by payload model
+SERIES_FIELDS = {
+    SystemMetricsData: ("system_metrics", (
+        "active_nodes", "active_edges", "query_rate", "cache_hit_rate",
+        "memory_usage", "cpu_usage", "response_time"
+    )),
+    MemoryInsightsData: ("memory_insights", (
+        "total_memories", "memory_efficiency", "memory_growth_rate", "retrieval_speed"
+    )),
+    GraphMetricsData: ("graph_metrics", (
+        "node_count", "edge_count", "density", "clustering_coefficient", "avg_centrality"
+    )),
+}
+
+
 class HealthStatus(Enum):
     """System health status levels"""
     HEALTHY = "healthy"
@@ -89,12 +110,18 @@ class AggregatedData:
 class DataBuffer:
     """
     Rolling buffer for storing time-series data with automatic aggregation
+
+    Numeric fields are kept in a columnar ``TimeSeriesRing`` with 1m/5m/1h
+    rollups, so window aggregates are a bisect plus a few bucket reductions.
+    Only the most recent ``recent_size`` points keep their full payloads.
     """
     
-    def __init__(self, max_size: int = 3600, name: str = "buffer") -> None:
+    def __init__(self, max_size: int = 3600, name: str = "buffer", recent_size: int = 60) -> None:
         self.max_size = max_size
         self.name = name
-        self.data: deque[DataPoint] = deque(maxlen=max_size)
+        self.data: deque[DataPoint] = deque(maxlen=min(recent_size, max_size))
+        self.series: Optional[TimeSeriesRing] = None
+        self.series_type: Optional[str] = None
         self.failed_collections = 0
         self.total_collections = 0
         self.last_cleanup = time.time()
@@ -103,64 +130,79 @@ class DataBuffer:
     def add_data_point(self, data: Union[SystemMetricsData, MemoryInsightsData, GraphMetricsData], 
                       collection_time: float) -> None:
         """Add a new data point to the buffer"""
+        now = time.time()
         data_point = DataPoint(
-            timestamp=datetime.now(),
+            timestamp=datetime.fromtimestamp(now),
             data=data,
             collection_time=collection_time
         )
         
         self.data.append(data_point)
+        self._record_series(now, data, collection_time)
         self.total_collections += 1
         
         # Periodic cleanup
-        if time.time() - self.last_cleanup > self.cleanup_interval:
+        if now - self.last_cleanup > self.cleanup_interval:
             self._cleanup_old_data()
     
+    def _record_series(self, timestamp: float, data: Any, collection_time: float) -> None:
+        """Append the numeric fields of ``data`` to the columnar series"""
+        for model, (series_type, fields) in SERIES_FIELDS.items():
+            if isinstance(data, model):
+                break
+        else:
+            return
+        
+        if self.series is None:
+            self.series_type = series_type
+            self.series = TimeSeriesRing(("collection_time",) + fields, capacity=self.max_size)
+        elif series_type != self.series_type:
+            logger.debug(f"Buffer {self.name} ignoring {series_type} point in {self.series_type} series")
+            return
+        
+        self.series.append(timestamp, [collection_time] + [getattr(data, field) for field in fields])
+    
     def record_failed_collection(self) -> None:
         """Record a failed data collection attempt"""
         self.failed_collections += 1
         self.total_collections += 1
     
     def get_recent_data(self, count: int = 10) -> List[DataPoint]:
-        """Get the most recent data points"""
+        """Get the most recent data points (at most ``recent_size``)"""
         if count >= len(self.data):
             return list(self.data)
         return list(self.data)[-count:]
     
     def get_data_since(self, since: datetime) -> List[DataPoint]:
-        """Get all data points since a specific time"""
-        return [dp for dp in self.data if dp.timestamp >= since]
+        """Get the retained full data points since a specific time"""
+        index = bisect.bisect_left(self.data, since, key=lambda dp: dp.timestamp)
+        return list(islice(self.data, index, None))
     
     def get_aggregated_data(self, window_minutes: int = 5) -> Optional[AggregatedData]:
         """Get aggregated data over a time window"""
-        if not self.data:
+        if self.series is None or not len(self.series):
             return None
         
         end_time = datetime.now()
         start_time = end_time - timedelta(minutes=window_minutes)
         
-        window_data = self.get_data_since(start_time)
-        if not window_data:
+        stats = self.series.summarize(start_time.timestamp())
+        if not stats.count:
             return None
         
-        collection_times = [dp.collection_time for dp in window_data]
-        
         # Calculate success rate for this window
-        window_total = len(window_data) + self._count_failures_in_window(start_time, end_time)
-        success_rate = len(window_data) / window_total if window_total > 0 else 0.0
-        
-        # Create data summary based on data type
-        data_summary = self._create_data_summary(window_data)
+        window_total = stats.count + self._count_failures_in_window(start_time, end_time)
+        success_rate = stats.count / window_total if window_total > 0 else 0.0
         
         return AggregatedData(
             start_time=start_time,
             end_time=end_time,
-            count=len(window_data),
-            avg_collection_time=statistics.mean(collection_times),
-            min_collection_time=min(collection_times),
-            max_collection_time=max(collection_times),
+            count=stats.count,
+            avg_collection_time=stats.mean("collection_time"),
+            min_collection_time=stats.min("collection_time"),
+            max_collection_time=stats.max("collection_time"),
             success_rate=success_rate,
-            data_summary=data_summary
+            data_summary=self._create_data_summary(stats)
         )
     
     def get_success_rate(self) -> float:
@@ -172,149 +214,81 @@ class DataBuffer:
     
     def get_buffer_stats(self) -> Dict[str, Any]:
         """Get buffer statistics"""
+        oldest = self.series.first_timestamp() if self.series is not None else None
+        newest = self.series.last_timestamp() if self.series is not None else None
         return {
             "name": self.name,
-            "size": len(self.data),
+            "size": len(self.series) if self.series is not None else 0,
             "max_size": self.max_size,
             "total_collections": self.total_collections,
             "failed_collections": self.failed_collections,
             "success_rate": self.get_success_rate(),
-            "oldest_data": self.data[0].timestamp.isoformat() if self.data else None,
-            "newest_data": self.data[-1].timestamp.isoformat() if self.data else None
+            "series_bytes": self.series.nbytes if self.series is not None else 0,
+            "oldest_data": datetime.fromtimestamp(oldest).isoformat() if oldest is not None else None,
+            "newest_data": datetime.fromtimestamp(newest).isoformat() if newest is not None else None
         }
     
     def _cleanup_old_data(self) -> None:
         """Clean up old data beyond retention period"""
-        # The deque automatically handles max_size, but we can do additional cleanup here
+        # The ring and deque are fixed-size, so there is nothing to reclaim here
         self.last_cleanup = time.time()
-        logger.debug(f"Buffer {self.name} cleanup completed. Size: {len(self.data)}")
+        logger.debug(f"Buffer {self.name} cleanup completed. Size: {len(self.series or ())}")
     
     def _count_failures_in_window(self, start_time: datetime, end_time: datetime) -> int:
         """Estimate failures in a time window (simplified implementation)"""
         # This is a simplified implementation - in production you might want to track failures with timestamps
         return 0
     
-    def _create_data_summary(self, window_data: List[DataPoint]) -> Dict[str, Any]:
+    def _create_data_summary(self, stats: WindowStats) -> Dict[str, Any]:
         """Create summary statistics for the data in the window"""
-        if not window_data:
-            return {}
-        
-        # Get the first data point to determine type
-        first_data = window_data[0].data
-        
-        if isinstance(first_data, SystemMetricsData):
-            return self._summarize_system_data(window_data)
-        elif isinstance(first_data, MemoryInsightsData):
-            return self._summarize_memory_data(window_data)
-        elif isinstance(first_data, GraphMetricsData):
-            return self._summarize_graph_data(window_data)
+        if self.series_type == "system_metrics":
+            return self._summarize_system_data(stats)
+        elif self.series_type == "memory_insights":
+            return self._summarize_memory_data(stats)
+        elif self.series_type == "graph_metrics":
+            return self._summarize_graph_data(stats)
         else:
             return {"type": "unknown"}
     
-    def _summarize_system_data(self, window_data: List[DataPoint]) -> Dict[str, Any]:
+    def _summarize_system_data(self, stats: WindowStats) -> Dict[str, Any]:
         """Summarize system metrics data"""
-        metrics: Dict[str, List[Union[int, float]]] = {
-            "active_nodes": [],
-            "active_edges": [],
-            "query_rate": [],
-            "cache_hit_rate": [],
-            "memory_usage": [],
-            "cpu_usage": [],
-            "response_time": []
-        }
-        
-        for dp in window_data:
-            data = dp.data
-            if isinstance(data, SystemMetricsData):
-                metrics["active_nodes"].append(data.active_nodes)
-                metrics["active_edges"].append(data.active_edges)
-                metrics["query_rate"].append(data.query_rate)
-                metrics["cache_hit_rate"].append(data.cache_hit_rate)
-                metrics["memory_usage"].append(data.memory_usage)
-                metrics["cpu_usage"].append(data.cpu_usage)
-                metrics["response_time"].append(data.response_time)
-        
-        # Only calculate stats if we have data
-        if not metrics["active_nodes"]:
-            return {"type": "system_metrics", "error": "no_data"}
-        
         return {
             "type": "system_metrics",
-            "avg_active_nodes": statistics.mean(metrics["active_nodes"]),
-            "avg_active_edges": statistics.mean(metrics["active_edges"]),
-            "avg_query_rate": statistics.mean(metrics["query_rate"]),
-            "avg_cache_hit_rate": statistics.mean(metrics["cache_hit_rate"]),
-            "avg_memory_usage": statistics.mean(metrics["memory_usage"]),
-            "avg_cpu_usage": statistics.mean(metrics["cpu_usage"]),
-            "avg_response_time": statistics.mean(metrics["response_time"]),
-            "max_memory_usage": max(metrics["memory_usage"]),
-            "max_cpu_usage": max(metrics["cpu_usage"]),
-            "max_response_time": max(metrics["response_time"])
+            "avg_active_nodes": stats.mean("active_nodes"),
+            "avg_active_edges": stats.mean("active_edges"),
+            "avg_query_rate": stats.mean("query_rate"),
+            "avg_cache_hit_rate": stats.mean("cache_hit_rate"),
+            "avg_memory_usage": stats.mean("memory_usage"),
+            "avg_cpu_usage": stats.mean("cpu_usage"),
+            "avg_response_time": stats.mean("response_time"),
+            "max_memory_usage": stats.max("memory_usage"),
+            "max_cpu_usage": stats.max("cpu_usage"),
+            "max_response_time": stats.max("response_time")
         }
     
-    def _summarize_memory_data(self, window_data: List[DataPoint]) -> Dict[str, Any]:
+    def _summarize_memory_data(self, stats: WindowStats) -> Dict[str, Any]:
         """Summarize memory insights data"""
-        metrics: Dict[str, List[Union[int, float]]] = {
-            "total_memories": [],
-            "memory_efficiency": [],
-            "memory_growth_rate": [],
-            "retrieval_speed": []
-        }
-        
-        for dp in window_data:
-            data = dp.data
-            if isinstance(data, MemoryInsightsData):
-                metrics["total_memories"].append(data.total_memories)
-                metrics["memory_efficiency"].append(data.memory_efficiency)
-                metrics["memory_growth_rate"].append(data.memory_growth_rate)
-                metrics["retrieval_speed"].append(data.retrieval_speed)
-        
-        # Only calculate stats if we have data
-        if not metrics["total_memories"]:
-            return {"type": "memory_insights", "error": "no_data"}
-        
         return {
             "type": "memory_insights",
-            "avg_total_memories": statistics.mean(metrics["total_memories"]),
-            "avg_memory_efficiency": statistics.mean(metrics["memory_efficiency"]),
-            "avg_memory_growth_rate": statistics.mean(metrics["memory_growth_rate"]),
-            "avg_retrieval_speed": statistics.mean(metrics["retrieval_speed"]),
-            "max_total_memories": max(metrics["total_memories"]),
-            "min_memory_efficiency": min(metrics["memory_efficiency"])
+            "avg_total_memories": stats.mean("total_memories"),
+            "avg_memory_efficiency": stats.mean("memory_efficiency"),
+            "avg_memory_growth_rate": stats.mean("memory_growth_rate"),
+            "avg_retrieval_speed": stats.mean("retrieval_speed"),
+            "max_total_memories": int(stats.max("total_memories")),
+            "min_memory_efficiency": stats.min("memory_efficiency")
         }
     
-    def _summarize_graph_data(self, window_data: List[DataPoint]) -> Dict[str, Any]:
+    def _summarize_graph_data(self, stats: WindowStats) -> Dict[str, Any]:
         """Summarize graph metrics data"""
-        metrics: Dict[str, List[Union[int, float]]] = {
-            "node_count": [],
-            "edge_count": [],
-            "density": [],
-            "clustering_coefficient": [],
-            "avg_centrality": []
-        }
-        
-        for dp in window_data:
-            data = dp.data
-            if isinstance(data, GraphMetricsData):
-                metrics["node_count"].append(data.node_count)
-                metrics["edge_count"].append(data.edge_count)
-                metrics["density"].append(data.density)
-                metrics["clustering_coefficient"].append(data.clustering_coefficient)
-                metrics["avg_centrality"].append(data.avg_centrality)
-        
-        # Only calculate stats if we have data
-        if not metrics["node_count"]:
-            return {"type": "graph_metrics", "error": "no_data"}
-        
         return {
             "type": "graph_metrics",
-            "avg_node_count": statistics.mean(metrics["node_count"]),
-            "avg_edge_count": statistics.mean(metrics["edge_count"]),
-            "avg_density": statistics.mean(metrics["density"]),
-            "avg_clustering_coefficient": statistics.mean(metrics["clustering_coefficient"]),
-            "avg_centrality": statistics.mean(metrics["avg_centrality"]),
-            "max_node_count": max(metrics["node_count"]),
-            "max_edge_count": max(metrics["edge_count"])
+            "avg_node_count": stats.mean("node_count"),
+            "avg_edge_count": stats.mean("edge_count"),
+            "avg_density": stats.mean("density"),
+            "avg_clustering_coefficient": stats.mean("clustering_coefficient"),
+            "avg_centrality": stats.mean("avg_centrality"),
+            "max_node_count": int(stats.max("node_count")),
+            "max_edge_count": int(stats.max("edge_count"))
         }
 
 
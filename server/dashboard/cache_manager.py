@@ -34,6 +34,13 @@ except ImportError:
         RedisCache = None
         Cache = None
 
+try:
+    import redis.asyncio as redis_async
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis_async = None
+
 try:
     from .enhanced_circuit_breaker import (
         EnhancedCircuitBreaker, CircuitBreakerConfig, CircuitState,
@@ -49,6 +56,15 @@ except ImportError:
     from models.analytics_models import SystemMetricsData, MemoryInsightsData, GraphMetricsData
     from models.error_models import AnalyticsError, ErrorSeverity, ErrorCategory
 
+try:
+    from ..core.bounded_cache import BoundedCache
+    from ..core.cache_index import GenerationNamespaces, InvertedIndex
+    from ..core.single_flight import CachedValue, Loader, RedisLease, SingleFlight
+except ImportError:
+    from server.core.bounded_cache import BoundedCache
+    from server.core.cache_index import GenerationNamespaces, InvertedIndex
+    from server.core.single_flight import CachedValue, Loader, RedisLease, SingleFlight
+
 
 class CacheStrategy(Enum):
     """Cache strategy patterns"""
@@ -98,6 +114,7 @@ class CacheConfig:
     
     # Memory cache settings
     l1_max_size: int = 1000
+    l1_max_bytes: int = 64 * 1024 * 1024  # estimated footprint bound for the fallback cache
     l1_ttl_seconds: int = 300  # 5 minutes
     
     # Redis cache settings (if enabled)
@@ -107,6 +124,11 @@ class CacheConfig:
     redis_port: int = 6379
     redis_db: int = 0
     
+    # Stampede protection for get_or_compute
+    stale_ttl_seconds: int = 60  # serve stale values this long past expiry while refreshing
+    early_refresh_beta: float = 1.0  # XFetch aggressiveness, 0 disables early refresh
+    lease_ttl_ms: int = 10000  # cross-process load lease (requires L2 Redis)
+    
     # Performance settings
     enable_compression: bool = True
     enable_serialization: bool = True
@@ -201,6 +223,13 @@ class CacheMetrics:
     cache_errors: int = 0
     circuit_breaker_trips: int = 0
     
+    # Stampede protection metrics
+    coalesced_waits: int = 0
+    stale_serves: int = 0
+    early_refreshes: int = 0
+    background_refreshes: int = 0
+    lease_waits: int = 0
+    
     # Memory usage
     memory_usage_bytes: int = 0
     entry_count: int = 0
@@ -371,53 +400,32 @@ class CacheInvalidator:
 
 
 class FallbackCache:
-    """Simple fallback cache when aiocache is not available"""
+    """Size-bounded W-TinyLFU cache used when aiocache is not available"""
     
-    def __init__(self, max_size: int = 1000) -> None:
-        self.cache: Dict[str, CacheEntry] = {}
+    def __init__(self, max_size: int = 1000, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.cache = BoundedCache(max_bytes=max_bytes, max_entries=max_size)
         self.max_size = max_size
     
     async def get(self, key: str) -> Optional[Any]:
         """Get value from fallback cache"""
-        if key in self.cache:
-            entry = self.cache[key]
-            if not entry.is_expired():
-                entry.touch()
-                return entry.data
-            else:
-                del self.cache[key]
-        return None
+        return self.cache.get(key)
     
     async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
-        """Set value in fallback cache"""
-        # Simple LRU eviction if max size reached
-        if len(self.cache) >= self.max_size and key not in self.cache:
-            # Remove oldest entry
-            oldest_key = min(self.cache.keys(), 
-                           key=lambda k: self.cache[k].last_accessed)
-            del self.cache[oldest_key]
-        
-        entry = CacheEntry(
-            key=key,
-            data=value,
-            created_at=datetime.now(),
-            last_accessed=datetime.now(),
-            ttl_seconds=ttl
-        )
-        self.cache[key] = entry
-        return True
+        """Set value in fallback cache; False if the value is too large to admit"""
+        return self.cache.set(key, value, ttl=ttl)
     
     async def delete(self, key: str) -> bool:
         """Delete key from fallback cache"""
-        if key in self.cache:
-            del self.cache[key]
-            return True
-        return False
+        return self.cache.delete(key)
     
     async def clear(self) -> bool:
         """Clear all cache entries"""
         self.cache.clear()
         return True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit, miss, eviction and size counters"""
+        return self.cache.get_stats()
 
 
 class CacheManager:
@@ -446,6 +454,10 @@ class CacheManager:
         # Entry metadata tracking
         self.entry_metadata: Dict[str, CacheEntry] = {}
         
+        # Tag/token index for invalidation and generation counters for scopes
+        self.key_index = InvertedIndex()
+        self.namespaces = GenerationNamespaces()
+        
         # Performance tracking
         self.operation_times: Dict[str, deque[float]] = {
             "get": deque(maxlen=100),
@@ -456,6 +468,12 @@ class CacheManager:
         # Locks for thread safety
         self._metadata_lock = asyncio.Lock()
         self._metrics_lock = asyncio.Lock()
+        
+        # Single-flight loads for get_or_compute
+        self._flight = SingleFlight(
+            self._read_entry, self._write_entry, beta=self.config.early_refresh_beta
+        )
+        self._compute_tags: Dict[str, Set[str]] = {}
     
     async def initialize(self) -> None:
         """Initialize cache backend instances"""
@@ -484,10 +502,24 @@ class CacheManager:
                     except Exception as e:
                         print(f"Redis cache initialization failed, using memory only: {e}")
                         self.config.enable_l2_redis = False
+                
+                # Share get_or_compute loads and namespace generations with other
+                # processes through Redis
+                if self.config.enable_l2_redis and REDIS_AVAILABLE:
+                    redis_client = redis_async.Redis(
+                        host=self.config.redis_host,
+                        port=self.config.redis_port,
+                        db=self.config.redis_db
+                    )
+                    self._flight.lease = RedisLease(redis_client, ttl_ms=self.config.lease_ttl_ms)
+                    self.namespaces.client = redis_client
             
             else:
                 # Use fallback cache
-                self.l1_cache = FallbackCache(max_size=self.config.l1_max_size)
+                self.l1_cache = FallbackCache(
+                    max_size=self.config.l1_max_size,
+                    max_bytes=self.config.l1_max_bytes
+                )
             
             # Initialize circuit breaker if enabled
             if self.config.enable_circuit_breaker:
@@ -519,9 +551,15 @@ class CacheManager:
             # Try circuit breaker protection if enabled
             if self.circuit_breaker:
                 async with self.circuit_breaker.protect():
-                    return await self._get_internal(key, default)
+                    value = await self._get_internal(key, default)
             else:
-                return await self._get_internal(key, default)
+                value = await self._get_internal(key, default)
+            
+            # Unwrap entries written by get_or_compute
+            entry = CachedValue.from_envelope(value)
+            if entry is not None:
+                return entry.value if entry.is_servable() else default
+            return value
                 
         except Exception as e:
             await self._record_cache_error(e)
@@ -641,6 +679,48 @@ class CacheManager:
         
         return success
     
+    async def get_or_compute(
+        self,
+        key: str,
+        loader: Loader,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+        tags: Optional[Set[str]] = None
+    ) -> Any:
+        """
+        Get a value, computing it with ``loader`` at most once per key.
+        
+        Concurrent misses wait on a single load (shared across processes via a
+        Redis lease when L2 is enabled). Values up to ``stale_ttl`` seconds past
+        ``ttl`` are returned immediately while one background refresh runs, and
+        fresh values are refreshed early at random as they approach expiry.
+        """
+        if ttl is None:
+            ttl = self.config.l1_ttl_seconds
+        if stale_ttl is None:
+            stale_ttl = self.config.stale_ttl_seconds
+        if tags:
+            self._compute_tags[key] = set(tags)
+        return await self._flight.get_or_compute(key, loader, ttl, stale_ttl)
+    
+    async def _read_entry(self, key: str) -> Optional[CachedValue]:
+        """Read a get_or_compute entry, ignoring values stored by plain ``set``"""
+        try:
+            if self.circuit_breaker:
+                async with self.circuit_breaker.protect():
+                    stored = await self._get_internal(key)
+            else:
+                stored = await self._get_internal(key)
+        except Exception as e:
+            await self._record_cache_error(e)
+            return None
+        
+        entry = CachedValue.from_envelope(stored)
+        return entry if entry is not None and entry.is_servable() else None
+    
+    async def _write_entry(self, key: str, entry: CachedValue, expire_seconds: int) -> None:
+        await self.set(key, entry.to_envelope(), ttl=expire_seconds, tags=self._compute_tags.get(key))
+    
     async def delete(self, key: str) -> bool:
         """Delete key from all cache levels"""
         start_time = time.time()
@@ -667,6 +747,7 @@ class CacheManager:
             # Remove metadata
             async with self._metadata_lock:
                 self.entry_metadata.pop(key, None)
+                self.key_index.remove(key)
             
             async with self._metrics_lock:
                 self.metrics.deletes += 1
@@ -705,6 +786,7 @@ class CacheManager:
             # Clear metadata
             async with self._metadata_lock:
                 self.entry_metadata.clear()
+                self.key_index.clear()
             
             return success
             
@@ -717,14 +799,19 @@ class CacheManager:
         return await self.delete(key)
     
     async def _invalidate_pattern(self, pattern: str) -> List[str]:
-        """Invalidate keys matching pattern (used by invalidator)"""
-        # For simplicity, this is a basic implementation
-        # In production, you'd want more sophisticated pattern matching
+        """
+        Invalidate keys matching pattern (used by invalidator).
+        
+        Plain patterns match as substrings, patterns containing ``*``/``?``
+        as globs; both are resolved through the key token index.
+        """
         invalidated = []
         
         async with self._metadata_lock:
-            keys_to_delete = [key for key in self.entry_metadata.keys() 
-                            if pattern in key]
+            if "*" in pattern or "?" in pattern:
+                keys_to_delete = self.key_index.match(pattern)
+            else:
+                keys_to_delete = self.key_index.keys_containing(pattern)
         
         for key in keys_to_delete:
             if await self.delete(key):
@@ -737,10 +824,7 @@ class CacheManager:
         invalidated = []
         
         async with self._metadata_lock:
-            keys_to_delete = [
-                key for key, entry in self.entry_metadata.items()
-                if tags.intersection(entry.tags)
-            ]
+            keys_to_delete = self.key_index.keys_for_tags(tags)
         
         for key in keys_to_delete:
             if await self.delete(key):
@@ -766,6 +850,24 @@ class CacheManager:
                 tags=tags or set()
             )
             self.entry_metadata[key] = entry
+            self.key_index.add(key, tags)
+    
+    async def namespaced_key(self, namespace: str, key: str) -> str:
+        """
+        Key under ``namespace``'s current generation; use it with get/set so
+        ``invalidate_namespace`` can drop the whole scope at once.
+        """
+        return await self.namespaces.scoped_key(namespace, key)
+    
+    async def invalidate_namespace(self, namespace: str) -> int:
+        """
+        Invalidate every key of a scope (e.g. a dashboard or user) in O(1) by
+        bumping its generation; orphaned keys age out through their TTLs.
+        """
+        generation = await self.namespaces.bump(namespace)
+        async with self._metrics_lock:
+            self.metrics.invalidations += 1
+        return generation
     
     async def _record_cache_error(self, error: Exception) -> None:
         """Record cache error for monitoring"""
@@ -783,6 +885,14 @@ class CacheManager:
             # Update entry count
             self.metrics.entry_count = len(self.entry_metadata)
             
+            # Stampede protection counters live on the single-flight group
+            flight_stats = self._flight.stats
+            self.metrics.coalesced_waits = flight_stats["coalesced_waits"]
+            self.metrics.stale_serves = flight_stats["stale_serves"]
+            self.metrics.early_refreshes = flight_stats["early_refreshes"]
+            self.metrics.background_refreshes = flight_stats["background_refreshes"]
+            self.metrics.lease_waits = flight_stats["lease_waits"]
+            
             return self.metrics
     
     async def get_cache_info(self) -> Dict[str, Any]:
@@ -805,12 +915,18 @@ class CacheManager:
                 "cache_errors": metrics.cache_errors,
                 "avg_get_time_ms": metrics.avg_get_time_ms,
                 "avg_set_time_ms": metrics.avg_set_time_ms,
-                "entry_count": metrics.entry_count
+                "entry_count": metrics.entry_count,
+                "coalesced_waits": metrics.coalesced_waits,
+                "stale_serves": metrics.stale_serves,
+                "early_refreshes": metrics.early_refreshes,
+                "background_refreshes": metrics.background_refreshes,
+                "lease_waits": metrics.lease_waits
             },
             "cache_levels": {
                 "l1_available": self.l1_cache is not None,
                 "l2_available": self.l2_cache is not None,
-                "aiocache_available": AIOCACHE_AVAILABLE
+                "aiocache_available": AIOCACHE_AVAILABLE,
+                "l1_stats": self.l1_cache.get_stats() if isinstance(self.l1_cache, FallbackCache) else None
             },
             "circuit_breaker": {
                 "enabled": self.circuit_breaker is not None,
@@ -830,6 +946,8 @@ class CacheManager:
             # Close connections if needed
             if self.l2_cache and hasattr(self.l2_cache, 'close'):
                 await self.l2_cache.close()
+            if self.namespaces.client:
+                await self.namespaces.client.aclose()
             
         except Exception as e:
             print(f"Cache manager shutdown error: {e}")
@@ -877,6 +995,18 @@ async def cache_set(key: str, value: Any, ttl: Optional[int] = None, tags: Optio
     return await manager.set(key, value, ttl, tags)
 
 
+async def cache_get_or_compute(
+    key: str,
+    loader: Loader,
+    ttl: Optional[int] = None,
+    stale_ttl: Optional[int] = None,
+    tags: Optional[Set[str]] = None
+) -> Any:
+    """Get or compute a value through the global cache manager"""
+    manager = await get_cache_manager()
+    return await manager.get_or_compute(key, loader, ttl, stale_ttl, tags)
+
+
 async def cache_delete(key: str) -> bool:
     """Delete key from global cache manager"""
     manager = await get_cache_manager()
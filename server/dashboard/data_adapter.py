@@ -43,6 +43,11 @@ except ImportError:
     )
     from models.sse_models import SSEEvent, SSEEventType, SSEFormatter
 
+try:
+    from ..core.bounded_cache import BoundedCache
+except ImportError:
+    from server.core.bounded_cache import BoundedCache
+
 
 class DataTransformationError(Exception):
     """Custom exception for data transformation errors"""
@@ -125,9 +130,13 @@ class DataAdapter:
     real-time dashboard streaming.
     """
     
-    def __init__(self, analytics_client: Optional[AnalyticsEngineClient] = None) -> None:
+    def __init__(
+        self,
+        analytics_client: Optional[AnalyticsEngineClient] = None,
+        cache_max_bytes: int = 16 * 1024 * 1024
+    ) -> None:
         self.analytics_client = analytics_client or get_analytics_client()
-        self.cache: Dict[str, CacheEntry] = {}
+        self.cache = BoundedCache(max_bytes=cache_max_bytes)
         self.performance_monitor = PerformanceMonitor()
         self.last_successful_data: Dict[str, Any] = {}
         self.circuit_breaker_failures = 0
@@ -142,9 +151,9 @@ class DataAdapter:
             
             # Check cache first
             cache_key = "system_metrics"
-            if self._is_cache_valid(cache_key):
+            cached_data = self.cache.get(cache_key)
+            if cached_data is not None:
                 self.performance_monitor.record_cache_hit()
-                cached_data = self.cache[cache_key].data
                 return self._create_sse_event(cached_data, SSEEventType.ANALYTICS)
             
             self.performance_monitor.record_cache_miss()
@@ -153,7 +162,7 @@ class DataAdapter:
             system_metrics = await self._get_validated_system_metrics()
             
             # Cache the result
-            self.cache[cache_key] = CacheEntry(system_metrics, self.cache_ttl)
+            self.cache.set(cache_key, system_metrics, ttl=self.cache_ttl)
             self.last_successful_data[cache_key] = system_metrics
             
             # Record performance
@@ -173,9 +182,9 @@ class DataAdapter:
             
             # Check cache first
             cache_key = "memory_insights"
-            if self._is_cache_valid(cache_key):
+            cached_data = self.cache.get(cache_key)
+            if cached_data is not None:
                 self.performance_monitor.record_cache_hit()
-                cached_data = self.cache[cache_key].data
                 return self._create_sse_event(cached_data, SSEEventType.MEMORY)
             
             self.performance_monitor.record_cache_miss()
@@ -184,7 +193,7 @@ class DataAdapter:
             memory_insights = await self._get_validated_memory_insights()
             
             # Cache the result
-            self.cache[cache_key] = CacheEntry(memory_insights, self.cache_ttl)
+            self.cache.set(cache_key, memory_insights, ttl=self.cache_ttl)
             self.last_successful_data[cache_key] = memory_insights
             
             # Record performance
@@ -204,9 +213,9 @@ class DataAdapter:
             
             # Check cache first
             cache_key = "graph_metrics"
-            if self._is_cache_valid(cache_key):
+            cached_data = self.cache.get(cache_key)
+            if cached_data is not None:
                 self.performance_monitor.record_cache_hit()
-                cached_data = self.cache[cache_key].data
                 return self._create_sse_event(cached_data, SSEEventType.GRAPH)
             
             self.performance_monitor.record_cache_miss()
@@ -215,7 +224,7 @@ class DataAdapter:
             graph_metrics = await self._get_validated_graph_metrics()
             
             # Cache the result
-            self.cache[cache_key] = CacheEntry(graph_metrics, self.cache_ttl)
+            self.cache.set(cache_key, graph_metrics, ttl=self.cache_ttl)
             self.last_successful_data[cache_key] = graph_metrics
             
             # Record performance
@@ -425,15 +434,7 @@ class DataAdapter:
     
     def _is_cache_valid(self, cache_key: str) -> bool:
         """Check if cache entry is valid and not expired"""
-        if cache_key not in self.cache:
-            return False
-        
-        entry = self.cache[cache_key]
-        if entry.is_expired():
-            del self.cache[cache_key]
-            return False
-        
-        return True
+        return cache_key in self.cache
     
     def _is_circuit_breaker_open(self) -> bool:
         """Check if circuit breaker is open"""
@@ -472,6 +473,7 @@ class DataAdapter:
                 "reset_time": self.circuit_breaker_reset_time
             },
             "cache_entries": len(self.cache),
+            "cache": self.cache.get_stats(),
             "total_transformations": self.performance_monitor.total_transformations
         }
     
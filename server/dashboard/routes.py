@@ -13,6 +13,7 @@ from sse_starlette.sse import EventSourceResponse
 from typing import Dict, Any, Optional
 
 from .sse_server import DashboardSSEManager
+from ..core.delta_encoding import DeltaOptions
 from ..auth_jwt import get_optional_current_user
 from ..models import User
 
@@ -71,6 +72,9 @@ async def stream_analytics(
     - Query rate and cache hit rate
     - Memory and CPU usage
     - Response time metrics
+    
+    Pass ``?delta=1`` for keyframe/delta frames and ``compress=deflate``
+    for deflated payloads.
     """
     connection_id = str(uuid.uuid4())
     manager = get_sse_manager()
@@ -80,7 +84,10 @@ async def stream_analytics(
         logger.info(f"Analytics stream started for connection {connection_id}")
         
         return EventSourceResponse(
-            manager.analytics_stream(),
+            manager.analytics_stream(
+                request.headers.get("last-event-id"), connection_id,
+                DeltaOptions.negotiate(request.query_params)
+            ),
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
@@ -107,6 +114,9 @@ async def stream_memory(
     - Memory growth rate
     - Average memory size
     - Memory efficiency metrics
+    
+    Pass ``?delta=1`` for keyframe/delta frames and ``compress=deflate``
+    for deflated payloads.
     """
     connection_id = str(uuid.uuid4())
     manager = get_sse_manager()
@@ -116,7 +126,10 @@ async def stream_memory(
         logger.info(f"Memory stream started for connection {connection_id}")
         
         return EventSourceResponse(
-            manager.memory_stream(),
+            manager.memory_stream(
+                request.headers.get("last-event-id"), connection_id,
+                DeltaOptions.negotiate(request.query_params)
+            ),
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
@@ -143,6 +156,9 @@ async def stream_graph_data(
     - Graph topology metrics
     - Centrality statistics
     - Connected components
+    
+    Pass ``?delta=1`` for keyframe/delta frames and ``compress=deflate``
+    for deflated payloads.
     """
     connection_id = str(uuid.uuid4())
     manager = get_sse_manager()
@@ -152,7 +168,10 @@ async def stream_graph_data(
         logger.info(f"Graph stream started for connection {connection_id}")
         
         return EventSourceResponse(
-            manager.graph_stream(),
+            manager.graph_stream(
+                request.headers.get("last-event-id"), connection_id,
+                DeltaOptions.negotiate(request.query_params)
+            ),
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
@@ -238,6 +257,7 @@ async def get_dashboard_config(
         },
         "features": {
             "real_time_streaming": True,
+            "delta_streaming": True,
             "authentication": True,
             "caching": True,
             "error_recovery": True
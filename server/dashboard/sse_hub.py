@@ -0,0 +1,338 @@
+"""
+SSE Broadcast Hub for Dashboard Streams
+
+One producer per stream type fetches and encodes each SSE frame once and
+fans the encoded bytes out to every subscriber, so the cost of a tick does
+not grow with the number of open dashboards.
+
+Features:
+- Lazy producer task: runs only while the stream has subscribers
+- Bounded per-subscriber queues with slow-consumer policies
+  (drop to the latest frame, or disconnect)
+- Sequential event IDs and a small replay ring for ``Last-Event-ID`` resume
+- Opt-in delta encoding: keyframe on connect and every N ticks, JSON-Patch
+  deltas in between, optionally deflated (base64 in the SSE ``data`` field)
+"""
+
+import asyncio
+import base64
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+try:
+    from ..core.delta_encoding import DeltaOptions, DeltaStream, DeltaUpdate
+except ImportError:
+    from server.core.delta_encoding import DeltaOptions, DeltaStream, DeltaUpdate
+
+logger = logging.getLogger(__name__)
+
+
+class SlowConsumerPolicy(str, Enum):
+    """What happens when a subscriber's queue is full"""
+    DROP_TO_LATEST = "drop_to_latest"  # discard queued frames, keep only the newest
+    DISCONNECT = "disconnect"          # close the subscription
+
+
+class SSEFrame:
+    """An encoded SSE frame and its sequence number"""
+
+    __slots__ = ("seq", "data")
+
+    def __init__(self, seq: int, data: bytes) -> None:
+        self.seq = seq
+        self.data = data
+
+
+class SSESubscription:
+    """A subscriber's bounded frame queue; iterate it to receive encoded frames"""
+
+    def __init__(self, hub: "SSEBroadcastHub", max_queue: int, policy: SlowConsumerPolicy,
+                 options: Optional[DeltaOptions] = None) -> None:
+        self.hub = hub
+        self.max_queue = max_queue
+        self.policy = policy
+        self.options = options or DeltaOptions()
+        # Sequence of the last delta-stream update queued; None forces a keyframe
+        self.delta_seq: Optional[int] = None
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.closed = False
+        self._frames: Deque[bytes] = deque()
+        self._wakeup = asyncio.Event()
+
+    def offer(self, frame: bytes) -> bool:
+        """Queue a frame without blocking; returns False once the subscription is closed"""
+        if self.closed:
+            return False
+        if len(self._frames) >= self.max_queue:
+            if self.policy == SlowConsumerPolicy.DISCONNECT:
+                self.close()
+                return False
+            self.frames_dropped += len(self._frames)
+            self._frames.clear()
+        self._frames.append(frame)
+        self._wakeup.set()
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+        self._wakeup.set()
+
+    @property
+    def queued(self) -> int:
+        return len(self._frames)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            while True:
+                if self._frames:
+                    self.frames_sent += 1
+                    yield self._frames.popleft()
+                elif self.closed:
+                    return
+                else:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+        finally:
+            self.hub.unsubscribe(self)
+
+
+class SSEBroadcastHub:
+    """
+    Fan-out hub for one SSE stream.
+
+    ``fetch`` returns a complete SSE event block (``event:``/``data:`` lines).
+    The producer task calls it every ``interval`` seconds while anyone is
+    subscribed, appends the hub's sequence number as the event ID (the last
+    ``id:`` field of an event wins) and offers the encoded frame to every
+    subscriber.
+
+    Subscribers that negotiated delta encoding instead get the event's JSON
+    ``data`` as a keyframe or delta envelope from one shared ``DeltaStream``;
+    a subscriber whose queue was dropped is resynchronised with a keyframe.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[], Awaitable[str]],
+        interval: float = 1.0,
+        error_interval: float = 5.0,
+        replay_size: int = 32,
+        max_queue: int = 8,
+        policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_TO_LATEST,
+        on_publish: Optional[Callable[[str], None]] = None,
+        keyframe_interval: int = 30,
+    ) -> None:
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.error_interval = error_interval
+        self.max_queue = max_queue
+        self.policy = policy
+        self.on_publish = on_publish
+
+        self._seq = 0
+        self._replay: Deque[SSEFrame] = deque(maxlen=replay_size)
+        self.delta_stream = DeltaStream(keyframe_interval=keyframe_interval)
+        self._delta_event = name
+        self._subscribers: Set[SSESubscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._stats: Dict[str, Any] = {
+            "frames_published": 0,
+            "fetch_errors": 0,
+            "slow_consumer_disconnects": 0,
+            "replayed_frames": 0,
+            "last_published": None,
+        }
+
+    def publish(self, event_text: str) -> SSEFrame:
+        """Encode an SSE event once, record it for replay and fan it out"""
+        self._seq += 1
+        body = event_text.rstrip("\n")
+        frame = SSEFrame(self._seq, f"{body}\nid: {self._seq}\n\n".encode("utf-8"))
+        self._replay.append(frame)
+        self._stats["frames_published"] += 1
+        self._stats["last_published"] = datetime.now()
+
+        update = None
+        if any(subscriber.options.enabled for subscriber in self._subscribers):
+            update = self._push_delta(body, frame.seq)
+        else:
+            self.delta_stream.reset()
+        rendered: Dict[Tuple[bool, bool], bytes] = {}
+
+        for subscriber in list(self._subscribers):
+            if update is not None and subscriber.options.enabled:
+                offered = self._offer_update(subscriber, update, len(frame.data), rendered)
+            else:
+                offered = subscriber.offer(frame.data)
+            if not offered:
+                self._stats["slow_consumer_disconnects"] += 1
+                self._subscribers.discard(subscriber)
+        if self.on_publish:
+            self.on_publish(self.name)
+        return frame
+
+    @staticmethod
+    def _parse_event(event_text: str) -> Optional[Tuple[str, Any]]:
+        """Event name and decoded JSON ``data`` of a state event (None for errors and non-JSON)"""
+        event, data_lines = "message", []
+        for line in event_text.split("\n"):
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[6:] if line.startswith("data: ") else line[5:])
+        if event == "error" or not data_lines:
+            return None
+        try:
+            return event, json.loads("\n".join(data_lines))
+        except ValueError:
+            return None
+
+    def _push_delta(self, event_text: str, seq: int) -> Optional[DeltaUpdate]:
+        parsed = self._parse_event(event_text)
+        if parsed is None:
+            return None
+        self._delta_event, document = parsed
+        return self.delta_stream.push(document, seq)
+
+    def _render(self, update: DeltaUpdate, delta: bool, deflated: bool,
+                rendered: Dict[Tuple[bool, bool], bytes]) -> bytes:
+        key = (delta, deflated)
+        if key not in rendered:
+            payload = update.payload(delta, deflated)
+            if isinstance(payload, bytes):
+                # SSE is text-only, so deflated payloads travel base64-encoded
+                payload = json.dumps({"encoding": "deflate", "data": base64.b64encode(payload).decode("ascii")})
+            rendered[key] = f"event: {self._delta_event}\ndata: {payload}\nid: {update.seq}\n\n".encode("utf-8")
+        return rendered[key]
+
+    def _offer_update(self, subscriber: SSESubscription, update: DeltaUpdate, full_bytes: int,
+                      rendered: Dict[Tuple[bool, bool], bytes]) -> bool:
+        if subscriber.queued >= subscriber.max_queue:
+            # The queue is about to be dropped, breaking the delta chain
+            subscriber.delta_seq = None
+        delta = subscriber.options.delta and update.is_delta_for(subscriber.delta_seq)
+        data = self._render(update, delta, subscriber.options.deflate, rendered)
+        if not subscriber.offer(data):
+            return False
+        subscriber.delta_seq = update.seq
+        self.delta_stream.record(full_bytes, data, delta)
+        return True
+
+    def subscribe(self, last_event_id: Optional[str] = None,
+                  options: Optional[DeltaOptions] = None) -> SSESubscription:
+        """
+        Register a subscriber, replaying frames newer than ``last_event_id``.
+
+        If the requested ID is older than the replay ring (or unknown) the
+        subscriber starts from the most recent frame instead, which is a
+        complete snapshot for these streams. Delta-encoded subscribers always
+        start from a keyframe of the most recent state.
+        """
+        options = options or DeltaOptions()
+        if options.enabled:
+            return self._subscribe_encoded(options)
+        backlog = []
+        if self._replay:
+            backlog = [self._replay[-1]]
+            try:
+                resume_from = int(last_event_id) if last_event_id else None
+            except ValueError:
+                resume_from = None
+            if resume_from is not None and resume_from >= self._replay[0].seq - 1:
+                backlog = [frame for frame in self._replay if frame.seq > resume_from]
+                self._stats["replayed_frames"] += len(backlog)
+
+        # The replayed backlog may exceed the live queue bound once
+        subscription = SSESubscription(self, max(self.max_queue, len(backlog)), self.policy)
+        for frame in backlog:
+            subscription.offer(frame.data)
+        subscription.max_queue = self.max_queue
+
+        if self._closed:
+            subscription.close()
+            return subscription
+
+        self._add_subscriber(subscription)
+        return subscription
+
+    def _subscribe_encoded(self, options: DeltaOptions) -> SSESubscription:
+        subscription = SSESubscription(self, self.max_queue, self.policy, options)
+        update = self.delta_stream.current
+        if update is None and self._replay:
+            update = self._push_delta(self._replay[-1].data.decode("utf-8"), self._replay[-1].seq)
+        if update is not None:
+            self._offer_update(subscription, update, len(self._replay[-1].data), {})
+
+        if self._closed:
+            subscription.close()
+            return subscription
+        self._add_subscriber(subscription)
+        return subscription
+
+    def _add_subscriber(self, subscription: SSESubscription) -> None:
+        self._subscribers.add(subscription)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._produce())
+
+    def unsubscribe(self, subscription: SSESubscription) -> None:
+        subscription.close()
+        self._subscribers.discard(subscription)
+
+    async def _produce(self) -> None:
+        """Fetch, encode and publish frames while there are subscribers"""
+        while self._subscribers and not self._closed:
+            try:
+                self.publish(await self.fetch())
+                delay = self.interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in {self.name} stream: {e}")
+                self._stats["fetch_errors"] += 1
+                error = json.dumps({"error": f"{self.name.capitalize()} stream error",
+                                    "timestamp": datetime.now().isoformat()})
+                self.publish(f"event: error\ndata: {error}\n\n")
+                delay = self.error_interval
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        """Stop the producer and end every subscription"""
+        self._closed = True
+        for subscriber in list(self._subscribers):
+            subscriber.close()
+        self._subscribers.clear()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reopen(self) -> None:
+        self._closed = False
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["last_published"] = stats["last_published"].isoformat() if stats["last_published"] else None
+        stats.update({
+            "subscribers": len(self._subscribers),
+            "last_event_id": self._seq,
+            "replay_size": len(self._replay),
+            "producer_running": self._task is not None and not self._task.done(),
+            "frames_dropped": sum(s.frames_dropped for s in self._subscribers),
+            "delta": self.delta_stream.get_stats(),
+        })
+        return stats
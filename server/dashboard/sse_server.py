@@ -16,9 +16,16 @@ from dataclasses import dataclass
 try:
     from .data_adapter import get_data_adapter, DataAdapter
     from .background_collector import get_background_collector, BackgroundDataCollector
+    from .sse_hub import SSEBroadcastHub, SlowConsumerPolicy
 except ImportError:
     from data_adapter import get_data_adapter, DataAdapter
     from background_collector import get_background_collector, BackgroundDataCollector
+    from sse_hub import SSEBroadcastHub, SlowConsumerPolicy
+
+try:
+    from ..core.delta_encoding import DeltaOptions
+except ImportError:
+    from server.core.delta_encoding import DeltaOptions
 
 logger = logging.getLogger(__name__)
 
@@ -40,10 +47,17 @@ class DashboardSSEManager:
     - Analytics data (1-second updates)
     - Memory insights (5-second updates) 
     - Graph metrics (2-second updates)
+    
+    Each stream has one SSEBroadcastHub: a single producer fetches and
+    encodes every frame once and fans it out to all connected clients.
+    Clients may opt into delta-encoded (and deflated) frames, with a
+    keyframe every ``keyframe_interval`` ticks.
     """
     
     def __init__(self, analytics_engine=None, data_adapter: Optional[DataAdapter] = None, 
-                 background_collector: Optional[BackgroundDataCollector] = None) -> None:
+                 background_collector: Optional[BackgroundDataCollector] = None,
+                 slow_consumer_policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_TO_LATEST,
+                 keyframe_interval: int = 30) -> None:
         self.analytics_engine = analytics_engine
         self.data_adapter = data_adapter or get_data_adapter()
         self.background_collector = background_collector or get_background_collector()
@@ -61,94 +75,86 @@ class DashboardSSEManager:
             "memory": None,
             "graph": None
         }
+        
+        # One broadcast hub per stream type: (fetch, interval, error interval)
+        stream_sources = {
+            "analytics": (self.data_adapter.get_analytics_sse_event, 1.0, 5.0),
+            "memory": (self.data_adapter.get_memory_sse_event, 5.0, 10.0),
+            "graph": (self.data_adapter.get_graph_sse_event, 2.0, 5.0),
+        }
+        self.hubs: Dict[str, SSEBroadcastHub] = {
+            name: SSEBroadcastHub(
+                name, fetch, interval=interval, error_interval=error_interval,
+                policy=slow_consumer_policy, on_publish=self._record_publish,
+                keyframe_interval=keyframe_interval
+            )
+            for name, (fetch, interval, error_interval) in stream_sources.items()
+        }
     
     async def start(self) -> None:
         """Start the SSE manager"""
         self._running = True
+        for hub in self.hubs.values():
+            hub.reopen()
         logger.info("Dashboard SSE Manager started")
     
     async def stop(self) -> None:
         """Stop the SSE manager"""
         self._running = False
+        for hub in self.hubs.values():
+            await hub.close()
         logger.info("Dashboard SSE Manager stopped")
     
-    async def analytics_stream(self) -> AsyncGenerator[str, None]:
+    def _record_publish(self, stream_name: str) -> None:
+        self._last_update[stream_name] = datetime.now()
+    
+    async def _subscribe(
+        self, stream_name: str, last_event_id: Optional[str], connection_id: Optional[str],
+        options: Optional[DeltaOptions] = None
+    ) -> AsyncGenerator[bytes, None]:
+        """Yield pre-encoded frames from a stream's hub until the client goes away"""
+        if not self._running:
+            return
+        subscription = self.hubs[stream_name].subscribe(last_event_id, options)
+        try:
+            async for frame in subscription:
+                if connection_id in self.connection_stats:
+                    self.connection_stats[connection_id]["messages_sent"] += 1
+                yield frame
+        finally:
+            self.hubs[stream_name].unsubscribe(subscription)
+            if connection_id is not None:
+                self.remove_connection(connection_id)
+    
+    def analytics_stream(
+        self, last_event_id: Optional[str] = None, connection_id: Optional[str] = None,
+        options: Optional[DeltaOptions] = None
+    ) -> AsyncGenerator[bytes, None]:
         """
         Stream analytics data to connected clients using DataAdapter
         Updates every 1 second with real-time analytics metrics
         """
-        logger.info("Starting analytics stream with DataAdapter")
-        
-        while self._running:
-            try:
-                # Get SSE-formatted analytics data from DataAdapter
-                sse_event = await self.data_adapter.get_analytics_sse_event()
-                
-                # Update cache and timestamp
-                self._last_update["analytics"] = datetime.now()
-                
-                yield sse_event
-                
-                await asyncio.sleep(1)  # 1-second updates
-                
-            except Exception as e:
-                logger.error(f"Error in analytics stream: {e}")
-                # Create error SSE event
-                error_event = f"event: error\ndata: {json.dumps({'error': 'Analytics stream error', 'timestamp': datetime.now().isoformat()})}\n\n"
-                yield error_event
-                await asyncio.sleep(5)  # Wait longer on error
+        return self._subscribe("analytics", last_event_id, connection_id, options)
     
-    async def memory_stream(self) -> AsyncGenerator[str, None]:
+    def memory_stream(
+        self, last_event_id: Optional[str] = None, connection_id: Optional[str] = None,
+        options: Optional[DeltaOptions] = None
+    ) -> AsyncGenerator[bytes, None]:
         """
         Stream memory insights using DataAdapter
         Updates every 5 seconds with memory system data
         """
-        logger.info("Starting memory stream with DataAdapter")
-        
-        while self._running:
-            try:
-                # Get SSE-formatted memory data from DataAdapter
-                sse_event = await self.data_adapter.get_memory_sse_event()
-                
-                # Update cache and timestamp
-                self._last_update["memory"] = datetime.now()
-                
-                yield sse_event
-                
-                await asyncio.sleep(5)  # 5-second updates
-                
-            except Exception as e:
-                logger.error(f"Error in memory stream: {e}")
-                # Create error SSE event
-                error_event = f"event: error\ndata: {json.dumps({'error': 'Memory stream error', 'timestamp': datetime.now().isoformat()})}\n\n"
-                yield error_event
-                await asyncio.sleep(10)  # Wait longer on error
+        return self._subscribe("memory", last_event_id, connection_id, options)
     
-    async def graph_stream(self) -> AsyncGenerator[str, None]:
+    def graph_stream(
+        self, last_event_id: Optional[str] = None, connection_id: Optional[str] = None,
+        options: Optional[DeltaOptions] = None
+    ) -> AsyncGenerator[bytes, None]:
         """
         Stream graph metrics using DataAdapter
         Updates every 2 seconds with graph analytics
         """
-        logger.info("Starting graph stream with DataAdapter")
-        
-        while self._running:
-            try:
-                # Get SSE-formatted graph data from DataAdapter
-                sse_event = await self.data_adapter.get_graph_sse_event()
-                
-                # Update cache and timestamp
-                self._last_update["graph"] = datetime.now()
-                
-                yield sse_event
-                
-                await asyncio.sleep(2)  # 2-second updates
-                
-            except Exception as e:
-                logger.error(f"Error in graph stream: {e}")
-                # Create error SSE event
-                error_event = f"event: error\ndata: {json.dumps({'error': 'Graph stream error', 'timestamp': datetime.now().isoformat()})}\n\n"
-                yield error_event
-                await asyncio.sleep(5)  # Wait longer on error
+        return self._subscribe("graph", last_event_id, connection_id, options)
     
     async def get_analytics_data(self) -> None:
         """DEPRECATED: Use DataAdapter instead"""
@@ -197,6 +203,7 @@ class DashboardSSEManager:
                 "graph": self._last_update["graph"].isoformat() if self._last_update["graph"] else None
             },
             "data_adapter_performance": adapter_stats,
+            "streams": {name: hub.get_stats() for name, hub in self.hubs.items()},
             "streams_running": self._running
         }
     
@@ -0,0 +1,169 @@
+"""
+Test Suite for the Alert Correlation Index
+
+Covers candidate generation for each correlation strategy against
+exhaustive scans, MinHash-LSH recall on near-duplicate alerts, index
+maintenance under sync/prune and the correlator's persistent index mode.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import List
+from uuid import uuid4
+
+import pytest
+
+from server.dashboard.alert_correlation_index import AlertCorrelationIndex
+from server.dashboard.alert_correlator import (
+    AlertCorrelator, CorrelationRule, CorrelationStrategy, MetricPatternCorrelator, SemanticCorrelator
+)
+from server.dashboard.models.alert_models import Alert, AlertCategory, AlertSeverity
+
+BASE_TIME = datetime(2025, 1, 1, 12, 0, 0)
+WORDS = [f"term{i}" for i in range(300)] + ["cpu", "memory", "disk", "latency", "timeout", "database"]
+
+
+def _alert(rng: random.Random, **overrides) -> Alert:
+    fields = dict(
+        rule_id=uuid4(),
+        rule_name="rule",
+        title=" ".join(rng.sample(WORDS, 4)),
+        description=" ".join(rng.sample(WORDS, 8)),
+        category=rng.choice(list(AlertCategory)),
+        severity=AlertSeverity.HIGH,
+        threshold_breached=80.0,
+        actual_value=90.0,
+        source_host=rng.choice(["web-01", "web-02", "db-01", None]),
+        source_component=rng.choice(["api", "database", None]),
+        tags={tag: "true" for tag in rng.sample(["prod", "eu", "critical", "batch"], rng.randint(0, 2))},
+        metric_values={m: float(rng.randint(-20, 20)) for m in rng.sample(["cpu", "mem", "latency"], rng.randint(0, 2))},
+        triggered_at=BASE_TIME + timedelta(seconds=rng.randint(0, 7200)),
+    )
+    fields.update(overrides)
+    return Alert(**fields)
+
+
+def _alerts(count: int, seed: int = 7) -> List[Alert]:
+    rng = random.Random(seed)
+    return [_alert(rng) for _ in range(count)]
+
+
+class TestCandidateGeneration:
+    """Test that exact candidate queries cover every alert a scan would match"""
+
+    def test_temporal_and_spatial_candidates_match_scans(self) -> None:
+        """Test time-bucket and inverted-index candidates against full scans"""
+        alerts = _alerts(400)
+        index = AlertCorrelationIndex(bucket_seconds=90)
+        index.sync(alerts)
+
+        for probe in alerts[:50]:
+            start = probe.triggered_at - timedelta(minutes=10)
+            expected = [a.id for a in alerts if start <= a.triggered_at <= probe.triggered_at and a.id != probe.id]
+            assert [f.alert.id for f in index.temporal_candidates(start, probe.triggered_at, exclude=probe.id)] == expected
+
+            expected = {
+                a.id for a in alerts if a.id != probe.id and (
+                    (probe.source_host and a.source_host == probe.source_host) or
+                    (probe.source_component and a.source_component == probe.source_component) or
+                    a.category == probe.category or set(a.tags) & set(probe.tags)
+                )
+            }
+            assert {f.alert.id for f in index.spatial_candidates(probe)} == expected
+
+    @pytest.mark.asyncio
+    async def test_metric_candidates_cover_threshold_matches(self) -> None:
+        """Test that metric range queries include every alert over the threshold"""
+        alerts = _alerts(400)
+        index = AlertCorrelationIndex()
+        index.sync(alerts)
+        correlator = MetricPatternCorrelator(CorrelationRule(strategy=CorrelationStrategy.METRIC_PATTERN))
+
+        for probe in [a for a in alerts if a.metric_values][:50]:
+            candidates = {
+                f.alert.id for f in index.metric_candidates(probe.metric_values, 0.8, exclude=probe.id)
+            }
+            for alert in alerts:
+                if alert.id == probe.id or not alert.metric_values:
+                    continue
+                score = await correlator._calculate_metric_correlation(probe.metric_values, alert.metric_values)
+                if score >= 0.8:
+                    assert alert.id in candidates
+
+    @pytest.mark.asyncio
+    async def test_semantic_lsh_finds_near_duplicates(self) -> None:
+        """Test that reworded alerts collide in LSH while unrelated ones are not scored"""
+        rng = random.Random(11)
+        alerts = _alerts(500)
+        storm = [
+            _alert(rng, title=f"High CPU usage on web-{i:02d}", description=f"CPU usage above 90% for 5 minutes on web-{i:02d}")
+            for i in range(20)
+        ]
+        index = AlertCorrelationIndex()
+        index.sync(alerts + storm)
+
+        probe = _alert(rng, title="High CPU usage on web-99", description="CPU usage above 90% for 5 minutes on web-99")
+        candidates = index.semantic_candidates(index.extract(probe))
+        assert {a.id for a in storm} <= {f.alert.id for f in candidates}
+        assert len(candidates) < 100
+
+        correlator = SemanticCorrelator(CorrelationRule(strategy=CorrelationStrategy.SEMANTIC))
+        result = await correlator.correlate(probe, [], index=index)
+        assert result is not None and {a.id for a in storm} <= result.alert_ids
+        assert correlator._text_similarity("Disk full!", "disk FULL") == pytest.approx(1.0)
+
+
+class TestIndexMaintenance:
+    """Test incremental sync, re-indexing and pruning"""
+
+    def test_sync_reindexes_changed_alerts_and_drops_missing(self) -> None:
+        """Test that sync only re-indexes new or changed alerts"""
+        alerts = _alerts(50)
+        index = AlertCorrelationIndex()
+        index.sync(alerts)
+        assert index.stats["indexed"] == 50
+
+        moved = alerts[0].copy(update={"source_host": "moved-host"})
+        index.sync([moved] + alerts[1:40])
+        assert index.stats["indexed"] == 51 and len(index) == 40
+        assert index.hosts("moved-host") == {moved.id}
+        assert moved.id not in index.hosts(alerts[0].source_host)
+
+        index.sync([])
+        stats = index.get_stats()
+        assert stats["alerts"] == 0 and stats["time_buckets"] == 0 and stats["lsh_buckets"] == 0 and stats["metrics"] == 0
+
+    def test_prune_drops_old_alerts(self) -> None:
+        """Test that pruning removes alerts triggered before the cutoff"""
+        alerts = _alerts(200)
+        index = AlertCorrelationIndex()
+        index.sync(alerts)
+        cutoff = BASE_TIME + timedelta(hours=1)
+        dropped = index.prune(cutoff)
+        assert dropped == sum(1 for a in alerts if a.triggered_at < cutoff)
+        assert all(f.alert.triggered_at >= cutoff for f in index.features.values())
+
+
+class TestCorrelatorIndexMode:
+    """Test AlertCorrelator with its persistent index"""
+
+    @pytest.mark.asyncio
+    async def test_alerts_accumulate_without_existing_list(self) -> None:
+        """Test that omitted existing_alerts correlates against previously seen alerts"""
+        correlator = AlertCorrelator()
+        rng = random.Random(3)
+        results = []
+        for i in range(5):
+            alert = _alert(
+                rng, title="Database connection timeout", description="Connection pool exhausted on db-01",
+                source_host="db-01", source_component="database", category=AlertCategory.AVAILABILITY,
+                triggered_at=BASE_TIME + timedelta(seconds=i)
+            )
+            results.append(await correlator.correlate_alert(alert))
+
+        assert results[0] is None
+        assert results[-1] is not None and results[-1].get_size() == 5
+        assert correlator.get_metrics()["index"]["alerts"] == 5
+
+        correlator.forget_alert(alert.id)
+        assert alert.id not in correlator.index
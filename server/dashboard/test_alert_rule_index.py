@@ -0,0 +1,143 @@
+"""
+Test Suite for the Alert Rule Index
+
+Covers compiled per-metric threshold evaluation, incremental met-rule
+tracking, snapshot vs pushed updates and rule replacement, plus the
+engine's push path.
+"""
+
+import random
+from datetime import timedelta
+from typing import Dict, List
+
+import pytest
+
+from server.dashboard.alert_engine import AlertEngine
+from server.dashboard.alert_rule_index import AlertRuleIndex, EQUALITY_TOLERANCE
+from server.dashboard.models.alert_models import (
+    AlertCategory, AlertRule, AlertSeverity, ComparisonOperator, MetricType, ThresholdCondition
+)
+
+
+def _rule(name: str, *conditions: ThresholdCondition) -> AlertRule:
+    return AlertRule(
+        name=name,
+        category=AlertCategory.PERFORMANCE,
+        severity=AlertSeverity.HIGH,
+        conditions=list(conditions),
+        evaluation_window=timedelta(minutes=5)
+    )
+
+
+def _condition(metric: MetricType, operator: ComparisonOperator, value: float) -> ThresholdCondition:
+    return ThresholdCondition(metric_type=metric, operator=operator, value=value)
+
+
+def _reference_met(rule: AlertRule, metrics: Dict[str, float]) -> bool:
+    """Straightforward per-rule evaluation the index must agree with"""
+    for condition in rule.conditions:
+        value = metrics.get(condition.metric_type.value)
+        if value is None:
+            return False
+        checks = {
+            ComparisonOperator.GREATER_THAN: value > condition.value,
+            ComparisonOperator.GREATER_EQUAL: value >= condition.value,
+            ComparisonOperator.LESS_THAN: value < condition.value,
+            ComparisonOperator.LESS_EQUAL: value <= condition.value,
+            ComparisonOperator.EQUAL: abs(value - condition.value) < EQUALITY_TOLERANCE,
+            ComparisonOperator.NOT_EQUAL: abs(value - condition.value) >= EQUALITY_TOLERANCE,
+        }
+        if not checks[condition.operator]:
+            return False
+    return True
+
+
+class TestAlertRuleIndex:
+    """Test incremental, vectorised rule evaluation"""
+
+    def test_matches_reference_evaluation(self) -> None:
+        """Test that met rules match per-rule evaluation over random updates"""
+        rng = random.Random(3)
+        metrics = [MetricType.CPU_USAGE, MetricType.MEMORY_USAGE, MetricType.CACHE_HIT_RATE]
+        operators = list(ComparisonOperator)
+        rules: List[AlertRule] = []
+        index = AlertRuleIndex()
+        for i in range(300):
+            conditions = [
+                _condition(rng.choice(metrics), rng.choice(operators), float(rng.randint(0, 10) * 10))
+                for _ in range(rng.randint(1, 3))
+            ]
+            rule = _rule(f"rule-{i}", *conditions)
+            rules.append(rule)
+            index.add(rule)
+
+        snapshot: Dict[str, float] = {}
+        for _ in range(200):
+            metric = rng.choice(metrics).value
+            if rng.random() < 0.1:
+                snapshot.pop(metric, None)
+                index.update(snapshot, complete=True)
+            else:
+                snapshot[metric] = float(rng.randint(0, 10) * 10)
+                index.update({metric: snapshot[metric]})
+            expected = {rule.id for rule in rules if _reference_met(rule, snapshot)}
+            assert index.met_rules == expected
+
+    def test_only_changed_metrics_are_evaluated(self) -> None:
+        """Test that unchanged values skip condition evaluation entirely"""
+        index = AlertRuleIndex()
+        for threshold in range(1000):
+            index.add(_rule(f"cpu-{threshold}", _condition(MetricType.CPU_USAGE, ComparisonOperator.GREATER_EQUAL, threshold / 10)))
+        index.add(_rule("cache", _condition(MetricType.CACHE_HIT_RATE, ComparisonOperator.LESS_THAN, 70.0)))
+
+        flipped = index.update({"cpu_usage": 50.0, "cache_hit_rate": 90.0}, complete=True)
+        assert len(flipped) == 501 and len(index.met_rules) == 501
+        evaluated = index.stats["conditions_evaluated"]
+
+        assert index.update({"cpu_usage": 50.0, "cache_hit_rate": 90.0}, complete=True) == set()
+        assert index.stats["conditions_evaluated"] == evaluated
+
+        index.update({"cache_hit_rate": 60.0})
+        assert index.stats["conditions_evaluated"] == evaluated + 1
+        assert index.relevant_metrics(next(iter(index.rules_for_metrics(["cache_hit_rate"])))) == {"cache_hit_rate": 60.0}
+
+    def test_rule_replacement_and_removal(self) -> None:
+        """Test that edited rules are recompiled against current values"""
+        index = AlertRuleIndex()
+        rule = _rule("mem", _condition(MetricType.MEMORY_USAGE, ComparisonOperator.GREATER_THAN, 90.0))
+        index.add(rule)
+        index.update({"memory_usage": 85.0})
+        assert rule.id not in index.met_rules
+
+        edited = rule.copy(update={"conditions": [_condition(MetricType.MEMORY_USAGE, ComparisonOperator.GREATER_THAN, 80.0)]})
+        index.add(edited)
+        assert rule.id in index.met_rules and len(index) == 1
+
+        index.remove(rule.id)
+        assert index.met_rules == set() and rule.id not in index
+        assert index.update({"memory_usage": 99.0}) == set()
+
+
+class TestAlertEnginePush:
+    """Test push-based evaluation in the alert engine"""
+
+    @pytest.mark.asyncio
+    async def test_unrelated_pushes_do_not_count_as_breaches(self) -> None:
+        """Test that pushing other metrics does not advance a met rule's breach count"""
+        engine = AlertEngine()
+        rule = _rule("cpu", _condition(MetricType.CPU_USAGE, ComparisonOperator.GREATER_THAN, 80.0))
+        rule.consecutive_breaches = 3
+        await engine.add_rule(rule)
+
+        await engine.push_metric("cpu_usage", 95.0)
+        for value in range(5):
+            await engine.push_metric("memory_usage", float(value))
+            await engine.push_metrics({"cache_hit_rate": 90.0, "error_rate": 0.1})
+
+        assert rule.id in engine.rule_index.met_rules
+        assert len(engine.generator.breach_tracking[rule.id]) == 1
+        assert engine.get_active_alerts() == []
+
+        await engine.push_metric("cpu_usage", 96.0)
+        await engine.push_metric("cpu_usage", 97.0)
+        assert len(engine.get_active_alerts()) == 1
@@ -0,0 +1,49 @@
+"""
+Test Suite for the Background Collector Data Buffers
+
+Covers DataBuffer aggregates served from the columnar time series and the
+bounded set of full payloads kept for recent-data queries.
+"""
+
+from datetime import datetime
+
+from server.dashboard.background_collector import DataBuffer
+from server.dashboard.models.analytics_models import AnalyticsStatus, GraphMetricsData
+
+
+def _graph_metrics(node_count: int) -> GraphMetricsData:
+    return GraphMetricsData(
+        node_count=node_count, edge_count=200, connected_components=1,
+        largest_component_size=100, diameter=5, density=0.1,
+        clustering_coefficient=0.3, avg_centrality=0.2, modularity=0.4,
+        timestamp=datetime.now().isoformat(), status=AnalyticsStatus.HEALTHY
+    )
+
+
+class TestDataBufferSeries:
+    """Test DataBuffer aggregates over the time series ring"""
+
+    def test_aggregates_match_recorded_points(self) -> None:
+        """Test that window aggregates cover every recorded point"""
+        buffer = DataBuffer(max_size=100, name="graph", recent_size=3)
+        for i in range(10):
+            buffer.add_data_point(_graph_metrics(100 + i), 0.1 * (i + 1))
+
+        aggregated = buffer.get_aggregated_data(window_minutes=5)
+        assert aggregated is not None
+        assert aggregated.count == 10
+        assert abs(aggregated.max_collection_time - 1.0) < 1e-9
+        assert abs(aggregated.data_summary["avg_node_count"] - 104.5) < 1e-9
+        assert aggregated.data_summary["max_node_count"] == 109
+        assert buffer.get_buffer_stats()["size"] == 10
+
+    def test_recent_payloads_are_bounded(self) -> None:
+        """Test that only the most recent full data points are retained"""
+        buffer = DataBuffer(max_size=100, name="graph", recent_size=3)
+        for i in range(10):
+            buffer.add_data_point(_graph_metrics(100 + i), 0.1)
+
+        assert [dp.data.node_count for dp in buffer.get_recent_data(10)] == [107, 108, 109]
+        assert len(buffer.get_data_since(buffer.data[0].timestamp)) == 3
+        assert buffer.get_data_since(datetime.max) == []
+        assert DataBuffer().get_aggregated_data() is None
@@ -19,7 +19,7 @@ from server.dashboard.cache_manager import (
     CacheOperation, InvalidationTrigger, CacheEntry, CacheMetrics,
     CacheWarmer, CacheInvalidator, FallbackCache,
     get_cache_manager, initialize_cache_manager, shutdown_cache_manager,
-    cache_get, cache_set, cache_delete, cache_clear,
+    cache_get, cache_set, cache_delete, cache_clear, cache_get_or_compute,
     AIOCACHE_AVAILABLE
 )
 from server.dashboard.enhanced_circuit_breaker import get_circuit_breaker_manager
@@ -397,6 +397,99 @@ class TestCacheManager:
         assert info["cache_levels"]["aiocache_available"] == AIOCACHE_AVAILABLE
 
 
+class TestGetOrCompute:
+    """Test single-flight loading and stale-while-revalidate"""
+    
+    @pytest_asyncio.fixture
+    async def cache_manager(self) -> AsyncGenerator[CacheManager, None]:
+        """Create cache manager with early refresh disabled for determinism"""
+        config = CacheConfig()
+        config.enable_l2_redis = False
+        config.enable_circuit_breaker = False
+        config.enable_cache_warming = False
+        config.early_refresh_beta = 0.0
+        manager = CacheManager(config)
+        await manager.initialize()
+        yield manager
+        await manager.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self, cache_manager) -> None:
+        """Test that a stampede of misses runs the loader once"""
+        calls = 0
+        
+        async def loader() -> dict:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"score": 42}
+        
+        results = await asyncio.gather(*[
+            cache_manager.get_or_compute("hot_key", loader, ttl=60) for _ in range(50)
+        ])
+        
+        assert calls == 1
+        assert all(result == {"score": 42} for result in results)
+        assert await cache_manager.get("hot_key") == {"score": 42}
+        metrics = await cache_manager.get_metrics()
+        assert metrics.coalesced_waits == 49
+    
+    @pytest.mark.asyncio
+    async def test_stale_value_served_during_refresh(self, cache_manager) -> None:
+        """Test that an expired value is served while one refresh runs"""
+        version = 0
+        
+        async def loader() -> int:
+            nonlocal version
+            version += 1
+            await asyncio.sleep(0.05)
+            return version
+        
+        assert await cache_manager.get_or_compute("stale_key", loader, ttl=0, stale_ttl=60) == 1
+        
+        # Past the fresh deadline: every caller gets the old value at once
+        results = await asyncio.gather(*[
+            cache_manager.get_or_compute("stale_key", loader, ttl=0, stale_ttl=60) for _ in range(10)
+        ])
+        assert results == [1] * 10
+        
+        await asyncio.sleep(0.1)
+        assert version == 2
+        assert await cache_manager.get("stale_key") == 2
+        info = await cache_manager.get_cache_info()
+        assert info["metrics"]["stale_serves"] == 10
+        assert info["metrics"]["background_refreshes"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_loader_error_reaches_every_waiter(self, cache_manager) -> None:
+        """Test that a failing load is not cached and raises for all waiters"""
+        async def loader() -> None:
+            await asyncio.sleep(0.01)
+            raise ValueError("backend down")
+        
+        results = await asyncio.gather(*[
+            cache_manager.get_or_compute("bad_key", loader, ttl=60) for _ in range(3)
+        ], return_exceptions=True)
+        
+        assert all(isinstance(result, ValueError) for result in results)
+        assert await cache_manager.get("bad_key") is None
+
+    @pytest.mark.asyncio
+    async def test_namespace_invalidation_and_tags(self, cache_manager) -> None:
+        """Test generation-scoped keys and tag invalidation through the index"""
+        key = await cache_manager.namespaced_key("dashboard:1", "widgets")
+        await cache_manager.set(key, {"count": 3})
+        await cache_manager.set("graph_summary", {"nodes": 10}, tags={"graph"})
+        assert await cache_manager.get(await cache_manager.namespaced_key("dashboard:1", "widgets")) == {"count": 3}
+
+        await cache_manager.invalidate_namespace("dashboard:1")
+        assert await cache_manager.get(await cache_manager.namespaced_key("dashboard:1", "widgets")) is None
+
+        assert await cache_manager._invalidate_tags({"graph"}) == ["graph_summary"]
+        assert await cache_manager.get("graph_summary") is None
+        assert "graph_summary" not in cache_manager.key_index
+
+
 class TestCacheWarmer:
     """Test cache warming functionality"""
     
@@ -0,0 +1,223 @@
+"""
+Test Suite for the SSE Broadcast Hub
+
+Covers single-producer fan-out, slow-consumer policies, Last-Event-ID
+replay, delta-encoded subscribers and the DashboardSSEManager streams
+built on the hubs.
+"""
+
+import asyncio
+import base64
+import json
+import zlib
+
+import pytest
+
+from server.core.delta_encoding import DeltaOptions, apply_patch
+from server.dashboard.sse_hub import SSEBroadcastHub, SlowConsumerPolicy
+
+
+class CountingSource:
+    """SSE event source that counts how often it is fetched"""
+    
+    def __init__(self, event: str = "analytics") -> None:
+        self.event = event
+        self.calls = 0
+    
+    async def __call__(self) -> str:
+        self.calls += 1
+        return f'event: {self.event}\nid: abc\ndata: {{"n": {self.calls}}}\n\n'
+
+
+async def _take(subscription, count: int):
+    frames = []
+    iterator = subscription.__aiter__()
+    try:
+        while len(frames) < count:
+            frames.append(await iterator.__anext__())
+    finally:
+        await iterator.aclose()
+    return frames
+
+
+class TestBroadcastHub:
+    """Test fan-out from a single producer"""
+    
+    @pytest.mark.asyncio
+    async def test_one_fetch_per_tick_for_many_subscribers(self) -> None:
+        """Test that every subscriber receives the same encoded frame"""
+        source = CountingSource()
+        hub = SSEBroadcastHub("analytics", source, interval=0.01)
+        subscriptions = [hub.subscribe() for _ in range(50)]
+        
+        results = await asyncio.gather(*(_take(s, 3) for s in subscriptions))
+        await hub.close()
+        
+        assert source.calls <= 4
+        assert all(frames == results[0] for frames in results)
+        assert results[0][0].endswith(b"\nid: 1\n\n")
+        assert all(isinstance(frame, bytes) for frame in results[0])
+    
+    @pytest.mark.asyncio
+    async def test_producer_stops_without_subscribers(self) -> None:
+        """Test that the producer task only runs while subscribed"""
+        hub = SSEBroadcastHub("graph", CountingSource(), interval=0.01)
+        subscription = hub.subscribe()
+        await _take(subscription, 1)
+        assert hub.subscriber_count == 0
+        await asyncio.sleep(0.05)
+        assert hub.get_stats()["producer_running"] is False
+    
+    @pytest.mark.asyncio
+    async def test_last_event_id_resume(self) -> None:
+        """Test replay of frames newer than Last-Event-ID"""
+        hub = SSEBroadcastHub("memory", CountingSource(), replay_size=4)
+        for n in range(1, 7):
+            hub.publish(f"event: memory\ndata: {n}\n\n")
+        
+        resumed = hub.subscribe(last_event_id="4")
+        assert resumed.queued == 2
+        stale = hub.subscribe(last_event_id="1")
+        assert stale.queued == 1  # older than the ring: latest frame only
+        await hub.close()
+
+
+class TestSlowConsumers:
+    """Test slow-consumer policies"""
+    
+    def test_drop_to_latest(self) -> None:
+        """Test that a full queue is replaced by the newest frame"""
+        hub = SSEBroadcastHub("analytics", CountingSource(), max_queue=3)
+        hub._closed = True  # no producer task
+        subscription = hub.subscribe()
+        hub._subscribers.add(subscription)
+        subscription.closed = False
+        for n in range(5):
+            hub.publish(f"data: {n}\n\n")
+        assert subscription.queued == 2
+        assert subscription.frames_dropped == 3
+    
+    def test_disconnect(self) -> None:
+        """Test that a slow subscriber is disconnected"""
+        hub = SSEBroadcastHub("analytics", CountingSource(), max_queue=2,
+                              policy=SlowConsumerPolicy.DISCONNECT)
+        hub._closed = True
+        subscription = hub.subscribe()
+        hub._subscribers.add(subscription)
+        subscription.closed = False
+        for n in range(3):
+            hub.publish(f"data: {n}\n\n")
+        assert subscription.closed
+        assert hub.subscriber_count == 0
+        assert hub.get_stats()["slow_consumer_disconnects"] == 1
+
+
+def _state_event(tick: int) -> str:
+    data = {"data": {"cpu_usage": tick, "nodes": [{"id": i, "degree": 3} for i in range(40)]},
+            "timestamp": f"2025-01-01T00:00:{tick:02d}", "event_type": "graph"}
+    return f"event: graph\nid: x\ndata: {json.dumps(data)}\n\n"
+
+
+def _decode(frame: bytes):
+    """Event name, SSE id and envelope of an encoded frame"""
+    fields = dict(line.split(": ", 1) for line in frame.decode().strip().split("\n"))
+    envelope = json.loads(fields["data"])
+    if envelope.get("encoding") == "deflate":
+        envelope = json.loads(zlib.decompress(base64.b64decode(envelope["data"])))
+    return fields["event"], int(fields["id"]), envelope
+
+
+class TestDeltaSubscribers:
+    """Test keyframe/delta frames for subscribers that opt in"""
+    
+    def _hub(self, **kwargs) -> SSEBroadcastHub:
+        hub = SSEBroadcastHub("graph", CountingSource(), **kwargs)
+        hub._closed = True  # no producer task; frames are published by hand
+        return hub
+    
+    def _subscribe(self, hub: SSEBroadcastHub, options: DeltaOptions):
+        subscription = hub.subscribe(options=options)
+        hub._subscribers.add(subscription)
+        subscription.closed = False
+        return subscription
+    
+    def test_keyframe_on_connect_then_deltas(self) -> None:
+        """Test that delta subscribers reconstruct every published document"""
+        hub = self._hub(keyframe_interval=4, max_queue=16)
+        hub.publish(_state_event(0))
+        plain = self._subscribe(hub, DeltaOptions())
+        delta = self._subscribe(hub, DeltaOptions(delta=True))
+        for tick in range(1, 7):
+            hub.publish(_state_event(tick))
+        
+        frames = list(delta._frames)
+        kinds = [_decode(frame)[2]["type"] for frame in frames]
+        assert kinds == ["keyframe", "delta", "delta", "delta", "keyframe", "delta", "delta"]
+        document = None
+        for tick, frame in enumerate(frames):
+            event, seq, envelope = _decode(frame)
+            assert event == "graph" and seq == envelope["seq"] == tick + 1
+            document = envelope["data"] if envelope["type"] == "keyframe" else apply_patch(document, envelope["ops"])
+            assert document == json.loads(_state_event(tick).split("data: ", 1)[1])
+        
+        assert sum(map(len, frames)) < sum(map(len, plain._frames))
+        assert hub.get_stats()["delta"]["bytes_saved"] > 0
+    
+    def test_dropped_queue_resyncs_with_keyframe(self) -> None:
+        """Test that a subscriber whose queue was dropped gets a keyframe"""
+        hub = self._hub(max_queue=2)
+        hub.publish(_state_event(0))
+        subscription = self._subscribe(hub, DeltaOptions(delta=True))
+        for tick in range(1, 3):
+            hub.publish(_state_event(tick))
+        assert subscription.frames_dropped == 2
+        (frame,) = subscription._frames
+        assert _decode(frame)[2]["type"] == "keyframe"
+    
+    def test_deflate_and_error_frames(self) -> None:
+        """Test deflated envelopes and pass-through of error events"""
+        hub = self._hub(max_queue=8)
+        hub.publish(_state_event(0))
+        subscription = self._subscribe(hub, DeltaOptions(delta=True, deflate=True))
+        hub.publish('event: error\ndata: {"error": "boom"}\n\n')
+        hub.publish(_state_event(1))
+        
+        keyframe, error, delta = subscription._frames
+        assert json.loads(keyframe.decode().split("data: ", 1)[1].split("\n")[0])["encoding"] == "deflate"
+        assert error.startswith(b"event: error")
+        assert _decode(delta)[2]["type"] == "delta"
+
+
+class TestDashboardSSEManagerStreams:
+    """Test DashboardSSEManager streams backed by hubs"""
+    
+    @pytest.mark.asyncio
+    async def test_streams_share_one_fetch(self) -> None:
+        """Test that concurrent clients share the adapter fetch"""
+        from server.dashboard.sse_server import DashboardSSEManager
+        
+        class Adapter:
+            def __init__(self) -> None:
+                self.get_analytics_sse_event = CountingSource("analytics")
+                self.get_memory_sse_event = CountingSource("memory")
+                self.get_graph_sse_event = CountingSource("graph")
+            
+            def get_performance_stats(self):
+                return {}
+        
+        adapter = Adapter()
+        manager = DashboardSSEManager(data_adapter=adapter, background_collector=object())
+        await manager.start()
+        for i in range(10):
+            manager.add_connection(f"c{i}")
+        streams = [manager.analytics_stream(None, f"c{i}") for i in range(10)]
+        firsts = await asyncio.gather(*(s.__anext__() for s in streams))
+        
+        assert adapter.get_analytics_sse_event.calls == 1
+        assert len(set(firsts)) == 1
+        assert manager.get_connection_stats()["streams"]["analytics"]["subscribers"] == 10
+        
+        for stream in streams:
+            await stream.aclose()
+        assert manager.get_connection_stats()["active_connections"] == 0
+        await manager.stop()
@@ -0,0 +1,264 @@
+"""
+Resident Embedding Service for GraphMemory-IDE
+
+Keeps a single SentenceTransformer model loaded for the lifetime of the
+process and serves query embeddings to request handlers:
+- The model is loaded once during application startup
+- Encoding runs on a dedicated worker thread, never on the event loop
+- Concurrent query texts arriving within a short window are coalesced
+  into a single ``encode()`` batch
+- Recently seen query texts are answered from an LRU cache
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from server.monitoring.metrics import get_metrics_collector
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+    SentenceTransformer = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EmbeddingServiceConfig:
+    """Embedding service configuration"""
+    model_name: str = "all-MiniLM-L6-v2"
+    batch_window_ms: float = 5.0
+    max_batch_size: int = 64
+    cache_size: int = 4096
+
+
+class EmbeddingCache:
+    """Bounded LRU cache of query text -> embedding"""
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> Optional[List[float]]:
+        embedding = self._entries.get(text)
+        if embedding is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(text)
+        self.hits += 1
+        return embedding
+
+    def put(self, text: str, embedding: List[float]) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[text] = embedding
+        self._entries.move_to_end(text)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class EmbeddingService:
+    """
+    Process-wide embedding service with cross-request micro-batching.
+
+    Callers ``await embed(text)``; the batcher task gathers every text queued
+    within ``batch_window_ms`` (up to ``max_batch_size``) and encodes them in
+    one call on the worker thread.
+    """
+
+    def __init__(self, config: Optional[EmbeddingServiceConfig] = None, model: Any = None) -> None:
+        self.config = config or EmbeddingServiceConfig()
+        self._model = model
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queue: "asyncio.Queue[Optional[Tuple[str, asyncio.Future]]]" = asyncio.Queue()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._batcher_task: Optional[asyncio.Task] = None
+        self._cache = EmbeddingCache(self.config.cache_size)
+        self._running = False
+        self._stats: Dict[str, Any] = {
+            "batches_encoded": 0,
+            "texts_encoded": 0,
+            "coalesced_requests": 0,
+            "last_batch_size": 0,
+            "last_encode_ms": 0.0,
+            "model_load_ms": 0.0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    async def start(self) -> None:
+        """Load the model on the worker thread and start the batcher"""
+        if self._running:
+            return
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-worker")
+
+        if self._model is None:
+            if not SENTENCE_TRANSFORMERS_AVAILABLE:
+                raise RuntimeError("sentence-transformers is not installed")
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            self._model = await loop.run_in_executor(
+                self._executor, SentenceTransformer, self.config.model_name
+            )
+            self._stats["model_load_ms"] = (time.perf_counter() - started) * 1000
+            logger.info(
+                f"Embedding model '{self.config.model_name}' loaded in {self._stats['model_load_ms']:.0f}ms"
+            )
+
+        self._running = True
+        self._batcher_task = asyncio.create_task(self._batch_loop())
+
+    async def stop(self) -> None:
+        """Finish queued work, stop the batcher and release the worker thread"""
+        if not self._running:
+            return
+        self._running = False
+
+        if self._batcher_task:
+            self._queue.put_nowait(None)
+            await self._batcher_task
+            self._batcher_task = None
+
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        logger.info("Embedding service stopped")
+
+    async def embed(self, text: str) -> List[float]:
+        """Return the embedding for ``text``, batching with concurrent callers"""
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+
+        if not self._running:
+            raise RuntimeError("Embedding service not running")
+
+        # Identical texts already waiting for a batch share one future
+        pending = self._inflight.get(text)
+        if pending is not None:
+            self._stats["coalesced_requests"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[text] = future
+        self._queue.put_nowait((text, future))
+        return await asyncio.shield(future)
+
+    async def _batch_loop(self) -> None:
+        """Collect queued texts for ``batch_window_ms`` and encode them together"""
+        window = self.config.batch_window_ms / 1000.0
+        stopping = False
+
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.perf_counter() + window
+
+            while len(batch) < self.config.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._encode_batch(batch)
+
+    async def _encode_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Encode one batch on the worker thread and resolve its futures"""
+        texts = [text for text, _ in batch]
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+
+        try:
+            vectors = await loop.run_in_executor(self._executor, self._encode, texts)
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(texts)} failed: {e}")
+            get_metrics_collector().record_error("embedding_error", "embedding_service")
+            for text, future in batch:
+                self._inflight.pop(text, None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        encode_ms = (time.perf_counter() - started) * 1000
+        self._stats["batches_encoded"] += 1
+        self._stats["texts_encoded"] += len(texts)
+        self._stats["last_batch_size"] = len(texts)
+        self._stats["last_encode_ms"] = encode_ms
+        get_metrics_collector().record_histogram("embedding_batch_encode", encode_ms / 1000)
+
+        for (text, future), vector in zip(batch, vectors):
+            self._cache.put(text, vector)
+            self._inflight.pop(text, None)
+            if not future.done():
+                future.set_result(vector)
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Run the model; executes on the worker thread"""
+        vectors = self._model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+        return [vector.tolist() if hasattr(vector, "tolist") else list(vector) for vector in vectors]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get service statistics"""
+        stats = self._stats.copy()
+        stats.update({
+            "running": self._running,
+            "model_name": self.config.model_name,
+            "queue_depth": self._queue.qsize(),
+            "cache_entries": len(self._cache),
+            "cache_hits": self._cache.hits,
+            "cache_misses": self._cache.misses,
+        })
+        return stats
+
+
+# Global embedding service instance
+_embedding_service: Optional[EmbeddingService] = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Get the global embedding service instance"""
+    if _embedding_service is None:
+        raise RuntimeError("Embedding service not initialized")
+    return _embedding_service
+
+
+async def initialize_embedding_service(config: Optional[EmbeddingServiceConfig] = None) -> EmbeddingService:
+    """Initialize and start the global embedding service"""
+    global _embedding_service
+    if _embedding_service is None:
+        _embedding_service = EmbeddingService(config)
+        await _embedding_service.start()
+    return _embedding_service
+
+
+async def shutdown_embedding_service() -> None:
+    """Shutdown the global embedding service"""
+    global _embedding_service
+    if _embedding_service is not None:
+        await _embedding_service.stop()
+        _embedding_service = None
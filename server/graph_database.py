@@ -13,21 +13,34 @@ import asyncio
 import logging
 import json
 import time
-from typing import Dict, List, Optional, Any, Union, Tuple
+from typing import Dict, List, Optional, Any, Union, Tuple, Callable, Awaitable, Deque
+from collections import deque
 from contextlib import contextmanager, asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 import threading
 from datetime import datetime, timezone
 
+import numpy as np
+
 try:
     import kuzu
 except ImportError:
     kuzu = None
     logging.warning("Kuzu not installed. Graph database features disabled.")
 
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    PYARROW_AVAILABLE = False
+
 from server.core.config import get_settings
-from server.monitoring.metrics import MetricsCollector
+from server.core.latency_histogram import LatencyHistogram
+from server.monitoring.metrics import MetricsCollector, get_metrics_collector
 
 logger = logging.getLogger(__name__)
 
@@ -53,7 +66,155 @@ class GraphQueryResult:
     execution_time: float
     error: Optional[str] = None
     row_count: int = 0
-    
+
+# Kuzu column types that map onto fixed-width NumPy dtypes when free of NULLs
+_NUMPY_DTYPES = {
+    "INT64": np.int64, "INT32": np.int32, "INT16": np.int16, "INT8": np.int8,
+    "UINT64": np.uint64, "UINT32": np.uint32, "UINT16": np.uint16, "UINT8": np.uint8,
+    "SERIAL": np.int64, "DOUBLE": np.float64, "FLOAT": np.float32, "BOOL": np.bool_,
+}
+
+@dataclass
+class ColumnarQueryResult:
+    """
+    Column-oriented query result.
+
+    Holds either a pyarrow Table (``arrow``) or one NumPy array per column
+    (``arrays``); the other form is derived on demand. Cells are never
+    materialised as per-row dicts unless :meth:`to_records` is called.
+    """
+    column_names: List[str]
+    row_count: int
+    execution_time: float = 0.0
+    success: bool = True
+    error: Optional[str] = None
+    arrow: Optional['pa.Table'] = None
+    arrays: Optional[Dict[str, np.ndarray]] = None
+
+    def column(self, name: str) -> np.ndarray:
+        """Return a column as a NumPy array (object dtype for strings/NULLs)"""
+        if self.arrays is None:
+            self.arrays = {}
+        array = self.arrays.get(name)
+        if array is None:
+            if self.arrow is None:
+                raise KeyError(name)
+            chunked = self.arrow.column(name)
+            array = chunked.to_numpy() if chunked.null_count == 0 else np.asarray(chunked.to_pylist(), dtype=object)
+            self.arrays[name] = array
+        return array
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.column(name)
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def scalar(self, default: Any = None) -> Any:
+        """First cell of the first column, for single-value aggregate queries"""
+        if not self.row_count or not self.column_names:
+            return default
+        value = self.column(self.column_names[0])[0]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def to_arrow(self) -> 'pa.Table':
+        """Return the result as a pyarrow Table"""
+        if self.arrow is None:
+            if not PYARROW_AVAILABLE:
+                raise RuntimeError("pyarrow is not installed")
+            self.arrow = pa.table({name: self.column(name) for name in self.column_names})
+        return self.arrow
+
+    def to_arrow_ipc(self) -> bytes:
+        """Serialise as an Arrow IPC stream"""
+        table = self.to_arrow()
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def to_compact_json(self) -> str:
+        """Serialise column-major: ``{"columns": [...], "data": [[col0...], ...]}``"""
+        if self.arrow is not None:
+            data = [self.arrow.column(name).to_pylist() for name in self.column_names]
+        else:
+            data = [self.column(name).tolist() for name in self.column_names]
+        return json.dumps(
+            {"columns": self.column_names, "data": data, "row_count": self.row_count},
+            separators=(",", ":"), default=str,
+        )
+
+    def to_pandas(self) -> Any:
+        """Return the result as a pandas DataFrame built directly from the columns"""
+        if self.arrow is not None:
+            return self.arrow.to_pandas()
+        import pandas as pd
+        return pd.DataFrame({name: self.column(name) for name in self.column_names}, columns=self.column_names)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Materialise row dicts, for callers that still need them"""
+        data = [self.column(name).tolist() for name in self.column_names]
+        return [dict(zip(self.column_names, row)) for row in zip(*data)]
+
+
+def _column_to_array(values: Tuple[Any, ...], kuzu_type: str) -> np.ndarray:
+    """Convert one column of cells to the tightest NumPy array available"""
+    dtype = _NUMPY_DTYPES.get(kuzu_type)
+    if dtype is not None and None not in values:
+        return np.asarray(values, dtype=dtype)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def fetch_columns(
+    connection: 'kuzu.Connection',
+    query: str,
+    parameters: Optional[Dict[str, Any]] = None,
+    backend: str = "auto",
+    chunk_size: Optional[int] = None,
+) -> ColumnarQueryResult:
+    """
+    Execute a query and collect the result column-wise.
+
+    ``backend`` is ``"arrow"`` (Kuzu's native Arrow export, requires pyarrow),
+    ``"numpy"`` (rows transposed into one array per column) or ``"auto"``.
+    """
+    if backend not in ("auto", "arrow", "numpy"):
+        raise ValueError(f"Unknown columnar backend: {backend}")
+    if backend == "arrow" and not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is not installed")
+
+    start_time = time.time()
+    result = connection.execute(query, parameters) if parameters else connection.execute(query)
+    column_names = result.get_column_names()
+
+    if backend != "numpy" and PYARROW_AVAILABLE:
+        table = result.get_as_arrow(chunk_size)
+        return ColumnarQueryResult(
+            column_names=column_names,
+            row_count=table.num_rows,
+            execution_time=time.time() - start_time,
+            arrow=table,
+        )
+
+    rows = result.get_all()
+    column_types = result.get_column_data_types()
+    if rows:
+        transposed = list(zip(*rows))
+    else:
+        transposed = [()] * len(column_names)
+    arrays = {
+        name: _column_to_array(values, kuzu_type)
+        for name, values, kuzu_type in zip(column_names, transposed, column_types)
+    }
+    return ColumnarQueryResult(
+        column_names=column_names,
+        row_count=len(rows),
+        execution_time=time.time() - start_time,
+        arrays=arrays,
+    )
+
 class GraphConnectionPool:
     """Thread-safe connection pool for Kuzu database"""
     
@@ -63,6 +224,7 @@ class GraphConnectionPool:
         self._connections: List['kuzu.Connection'] = []
         self._available_connections: List['kuzu.Connection'] = []
         self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
         self._metrics = MetricsCollector()
         self._initialize_pool()
     
@@ -84,16 +246,13 @@ class GraphConnectionPool:
     def get_connection(self) -> None:
         """Get connection from pool with automatic return"""
         connection = None
-        start_time = time.time()
         
         try:
-            # Wait for available connection
-            timeout = self.config.connection_timeout
-            while not self._available_connections and (time.time() - start_time) < timeout:
-                time.sleep(0.1)
-            
-            with self._lock:
-                if not self._available_connections:
+            # Block on the condition instead of polling; waiters are woken in arrival order
+            with self._available:
+                if not self._available.wait_for(
+                    lambda: self._available_connections, timeout=self.config.connection_timeout
+                ):
                     raise ConnectionError("No available graph connections in pool")
                 
                 connection = self._available_connections.pop()
@@ -103,8 +262,9 @@ class GraphConnectionPool:
             
         finally:
             if connection:
-                with self._lock:
+                with self._available:
                     self._available_connections.append(connection)
+                    self._available.notify()
                     self._metrics.increment('graph_connections_returned')
     
     def close_all(self) -> None:
@@ -120,6 +280,231 @@ class GraphConnectionPool:
             self._available_connections.clear()
             logger.info("Graph connection pool closed")
 
+class PoolTimeoutError(ConnectionError):
+    """Raised when no pooled connection becomes available within the acquire timeout"""
+
+
+class QueryTimeoutError(TimeoutError):
+    """Raised when a pooled query exceeds its timeout"""
+
+
+def run_on_connection(connection: Any, fn: Callable[..., Any], *args: Any) -> Awaitable[Any]:
+    """
+    Run ``fn(kuzu_connection, *args)`` without blocking the event loop.
+    
+    Accepts either an AsyncGraphConnectionPool (the call runs on a pooled
+    connection's dedicated thread) or a bare kuzu.Connection (the call runs
+    on the default executor).
+    """
+    if isinstance(connection, AsyncGraphConnectionPool):
+        return connection.run(fn, *args)
+    return asyncio.to_thread(fn, connection, *args)
+
+
+class PooledGraphConnection:
+    """A Kuzu connection bound to its own single-thread executor"""
+    
+    def __init__(self, connection: 'kuzu.Connection', index: int) -> None:
+        self.connection = connection
+        self.index = index
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"kuzu-conn-{index}")
+    
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """Run ``fn(connection, *args)`` on this connection's thread"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, fn, self.connection, *args)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            # Abort the running statement so the thread is released for the next caller
+            try:
+                self.connection.interrupt()
+            except Exception as e:
+                logger.warning(f"Failed to interrupt graph connection {self.index}: {e}")
+            raise QueryTimeoutError(f"Graph query exceeded {timeout}s")
+    
+    async def execute(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> List[List[Any]]:
+        """Execute a query and materialise its rows on the connection thread"""
+        return await self.run(_execute_rows, query, parameters, timeout=timeout)
+    
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        try:
+            self.connection.close()
+        except Exception as e:
+            logger.warning(f"Error closing graph connection {self.index}: {e}")
+
+
+def _execute_rows(connection: 'kuzu.Connection', query: str, parameters: Optional[Dict[str, Any]]) -> List[List[Any]]:
+    result = connection.execute(query, parameters or {})
+    rows = []
+    while result.has_next():
+        rows.append(result.get_next())
+    return rows
+
+
+class AsyncGraphConnectionPool:
+    """
+    Asyncio-native pool of Kuzu connections.
+    
+    Waiting coroutines queue as futures and a released connection is handed
+    directly to the oldest waiter, so acquisition is strictly FIFO and a
+    newcomer can never overtake a waiter that was already woken. Each
+    connection executes on its own thread, so queries on different
+    connections run in parallel without blocking the event loop.
+    """
+    
+    def __init__(
+        self,
+        database: 'kuzu.Database',
+        size: int = 4,
+        acquire_timeout: float = 5.0,
+        query_timeout: float = 60.0,
+        num_threads_per_connection: int = 2
+    ) -> None:
+        self.database = database
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.query_timeout = query_timeout
+        self.num_threads_per_connection = num_threads_per_connection
+        self._connections: List[PooledGraphConnection] = []
+        self._idle: Deque[PooledGraphConnection] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._connected = False
+        self._in_use = 0
+        self._stats: Dict[str, Any] = {
+            "acquires": 0,
+            "acquires_waited": 0,
+            "acquire_timeouts": 0,
+            "query_timeouts": 0,
+            "peak_waiters": 0,
+            "peak_in_use": 0,
+        }
+        self._wait_histogram = LatencyHistogram()
+        self._query_histogram = LatencyHistogram()
+    
+    async def connect(self) -> None:
+        """Open the pooled connections (idempotent)"""
+        if self._connected:
+            return
+        
+        for index in range(self.size):
+            conn = kuzu.Connection(self.database, num_threads=self.num_threads_per_connection)
+            if self.query_timeout:
+                conn.set_query_timeout(int(self.query_timeout * 1000))
+            pooled = PooledGraphConnection(conn, index)
+            self._connections.append(pooled)
+            self._idle.append(pooled)
+        
+        self._connected = True
+        logger.info(f"Async graph connection pool opened with {self.size} connections")
+    
+    @asynccontextmanager
+    async def acquire(self, timeout: Optional[float] = None):
+        """Borrow a connection, waiting FIFO behind earlier callers"""
+        if not self._connected:
+            await self.connect()
+        
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        waited = not self._idle or bool(self._waiters)
+        
+        if not waited:
+            connection = self._idle.popleft()
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self._stats["peak_waiters"] = max(self._stats["peak_waiters"], len(self._waiters))
+            try:
+                connection = await asyncio.wait_for(waiter, timeout)
+            except asyncio.TimeoutError:
+                self._stats["acquire_timeouts"] += 1
+                get_metrics_collector().record_error("pool_acquire_timeout", "graph_pool")
+                raise PoolTimeoutError(f"No graph connection available within {timeout}s")
+            except BaseException:
+                # Cancelled after a connection was handed over: pass it on
+                if waiter.done() and not waiter.cancelled():
+                    self._release(waiter.result())
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        
+        wait_ms = (time.perf_counter() - started) * 1000
+        self._stats["acquires"] += 1
+        if waited:
+            self._stats["acquires_waited"] += 1
+        self._wait_histogram.observe(wait_ms)
+        
+        self._in_use += 1
+        self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._in_use)
+        metrics_collector = get_metrics_collector()
+        metrics_collector.record_histogram("graph_pool_acquire_wait", wait_ms / 1000)
+        metrics_collector.database_connections_active.set(self._in_use)
+        
+        try:
+            yield connection
+        finally:
+            self._in_use -= 1
+            metrics_collector.database_connections_active.set(self._in_use)
+            self._release(connection)
+    
+    def _release(self, connection: PooledGraphConnection) -> None:
+        """Hand a connection to the oldest live waiter, or return it to idle"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(connection)
+                return
+        self._idle.append(connection)
+    
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """Run ``fn(kuzu_connection, *args)`` on a pooled connection"""
+        async with self.acquire() as connection:
+            started = time.perf_counter()
+            try:
+                return await connection.run(fn, *args, timeout=timeout or self.query_timeout)
+            except QueryTimeoutError:
+                self._stats["query_timeouts"] += 1
+                get_metrics_collector().record_error("query_timeout", "graph_pool")
+                raise
+            finally:
+                self._query_histogram.observe((time.perf_counter() - started) * 1000)
+    
+    async def execute(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> List[List[Any]]:
+        """Execute a query on a pooled connection and return its rows"""
+        return await self.run(_execute_rows, query, parameters, timeout=timeout)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Utilisation, saturation and latency statistics"""
+        acquires = self._stats["acquires"]
+        stats = self._stats.copy()
+        stats.update({
+            "size": self.size,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            "waiters": len(self._waiters),
+            "utilization": self._in_use / self.size if self.size else 0.0,
+            "saturation": self._stats["acquires_waited"] / acquires if acquires else 0.0,
+            "acquire_wait": self._wait_histogram.snapshot(),
+            "query_latency": self._query_histogram.snapshot()
+        })
+        return stats
+    
+    async def close(self) -> None:
+        """Close every pooled connection"""
+        for pooled in self._connections:
+            await asyncio.to_thread(pooled.close)
+        self._connections.clear()
+        self._idle.clear()
+        self._connected = False
+        logger.info("Async graph connection pool closed")
+
+
 class GraphSchemaManager:
     """Manages graph database schema and structure"""
     
@@ -322,6 +707,48 @@ class GraphQueryEngine:
                 error=error_msg
             )
     
+    def execute_query_columnar(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        backend: str = "auto",
+    ) -> ColumnarQueryResult:
+        """Execute a graph query and return column arrays instead of row dicts"""
+        start_time = time.time()
+        
+        try:
+            with self.connection_pool.get_connection() as conn:
+                if hasattr(conn, 'set_query_timeout'):
+                    conn.set_query_timeout(self.config.query_timeout * 1000)
+                
+                result = fetch_columns(conn, query, parameters, backend=backend)
+                result.execution_time = time.time() - start_time
+                
+                self._metrics.record_histogram('graph_query_duration', result.execution_time)
+                self._metrics.increment('graph_queries_executed')
+                
+                logger.debug(
+                    f"Columnar graph query executed in {result.execution_time:.3f}s, "
+                    f"returned {result.row_count} rows"
+                )
+                return result
+                
+        except Exception as e:
+            execution_time = time.time() - start_time
+            error_msg = str(e)
+            
+            logger.error(f"Columnar graph query failed after {execution_time:.3f}s: {error_msg}")
+            self._metrics.increment('graph_query_errors')
+            
+            return ColumnarQueryResult(
+                column_names=[],
+                row_count=0,
+                execution_time=execution_time,
+                success=False,
+                error=error_msg,
+                arrays={},
+            )
+    
     def _process_row(self, row: Any) -> Dict[str, Any]:
         """Process a single row from query results"""
         if isinstance(row, (list, tuple)):
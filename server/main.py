@@ -6,15 +6,16 @@ Integrates security middleware, monitoring, and comprehensive configuration mana
 import os
 import json
 import time
+import asyncio
 import logging
-from typing import Any, List, Optional, Dict
+from typing import Any, AsyncIterator, List, Optional, Dict
 from datetime import timedelta
 
 import kuzu
-from fastapi import FastAPI, HTTPException, Query, Body, Depends, status
+from fastapi import FastAPI, HTTPException, Query, Body, Depends, Request, Response, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
+from pydantic import BaseModel, ValidationError
 
 # Import configuration and middleware
 from server.core.config import get_settings, Settings
@@ -35,6 +36,43 @@ from server.auth_jwt import (
     get_optional_current_user
 )
 
+# Import async Kuzu connection pool
+from server.graph_database import AsyncGraphConnectionPool
+
+# Import batched telemetry ingestion
+from server.telemetry_batch import (
+    TelemetryBatchWriter,
+    TelemetryBatchConfig,
+    TelemetryBatchResult,
+    telemetry_event_to_row
+)
+
+# Import telemetry listing helpers
+from server.telemetry_query import (
+    InvalidCursorError,
+    NDJSON_MEDIA_TYPE,
+    build_telemetry_query,
+    fetch_page,
+    iter_ndjson
+)
+
+# Import resident embedding service
+from server.embedding_service import (
+    EmbeddingServiceConfig,
+    initialize_embedding_service,
+    shutdown_embedding_service,
+    get_embedding_service
+)
+
+# Import ANN vector index
+from server.vector_index import (
+    VectorIndexManager,
+    VectorIndexConfig,
+    benchmark_index,
+    validate_identifier,
+    sample_benchmark_queries
+)
+
 # Import routers
 from server.analytics_routes import router as analytics_router, initialize_analytics_engine, shutdown_analytics_engine
 
@@ -110,6 +148,13 @@ def setup_database(app: FastAPI, settings: Settings) -> None:
     try:
         app.state.kuzu_db = kuzu.Database(kuzu_db_path)  # type: ignore
         app.state.kuzu_conn = kuzu.Connection(app.state.kuzu_db)  # type: ignore
+        # Request paths share this pool; each connection runs on its own thread
+        app.state.kuzu_pool = AsyncGraphConnectionPool(
+            app.state.kuzu_db,
+            size=settings.database.KUZU_POOL_SIZE,
+            acquire_timeout=settings.database.KUZU_POOL_ACQUIRE_TIMEOUT,
+            query_timeout=settings.database.KUZU_QUERY_TIMEOUT
+        )
         logger.info(f"Kuzu database initialized at: {kuzu_db_path}")
     except Exception as e:
         logger.error(f"Failed to initialize Kuzu database: {e}")
@@ -152,8 +197,10 @@ def create_lifespan(settings: Settings):
         logger.info(f"Environment: {settings.ENVIRONMENT.value}")
 
         try:
+            await app.state.kuzu_pool.connect()
+
             await initialize_analytics_engine(
-                kuzu_conn=app.state.kuzu_conn,
+                kuzu_conn=app.state.kuzu_pool,
                 redis_url=settings.database.REDIS_URL
             )
             logger.info("Analytics engine initialized")
@@ -175,6 +222,48 @@ def create_lifespan(settings: Settings):
                 except Exception as e:
                     logger.error(f"Streaming analytics initialization failed: {e}")
 
+            app.state.telemetry_writer = TelemetryBatchWriter(
+                connection=app.state.kuzu_pool,
+                config=TelemetryBatchConfig(
+                    max_batch_size=settings.telemetry.BATCH_MAX_SIZE,
+                    max_linger_ms=settings.telemetry.BATCH_MAX_LINGER_MS,
+                    max_queue_size=settings.telemetry.BATCH_MAX_QUEUE_SIZE
+                ),
+                on_commit=stream_telemetry_batch
+            )
+            await app.state.telemetry_writer.start()
+
+            if settings.vector_index.ENABLED:
+                app.state.vector_indexes = VectorIndexManager(
+                    base_dir=settings.vector_index.INDEX_DIR,
+                    config=VectorIndexConfig(
+                        nprobe=settings.vector_index.NPROBE,
+                        min_train_size=settings.vector_index.MIN_TRAIN_SIZE,
+                        refresh_interval_seconds=settings.vector_index.REFRESH_INTERVAL_SECONDS
+                    )
+                )
+                app.state.vector_indexes.load_persisted()
+                for spec in settings.vector_index.PRELOAD:
+                    try:
+                        table, embedding_field, index_name = spec.split(":")
+                        await app.state.vector_indexes.get_or_build(
+                            app.state.kuzu_pool, table, embedding_field, index_name
+                        )
+                    except Exception as e:
+                        logger.warning(f"Failed to preload vector index '{spec}': {e}")
+                logger.info("Vector index manager initialized")
+
+            try:
+                await initialize_embedding_service(EmbeddingServiceConfig(
+                    model_name=settings.embedding.MODEL_NAME,
+                    batch_window_ms=settings.embedding.BATCH_WINDOW_MS,
+                    max_batch_size=settings.embedding.MAX_BATCH_SIZE,
+                    cache_size=settings.embedding.CACHE_SIZE
+                ))
+                logger.info("Embedding service initialized")
+            except Exception as e:
+                logger.error(f"Embedding service initialization failed: {e}")
+
             metrics_collector = get_metrics_collector()
             metrics_collector.record_graph_operation("server_startup")
             logger.info("Application startup complete")
@@ -188,6 +277,18 @@ def create_lifespan(settings: Settings):
         # --- Shutdown ---
         logger.info("Shutting down services...")
         try:
+            telemetry_writer = getattr(app.state, "telemetry_writer", None)
+            if telemetry_writer is not None:
+                await telemetry_writer.stop()
+                logger.info("Telemetry batch writer shutdown complete")
+
+            await shutdown_embedding_service()
+
+            vector_indexes = getattr(app.state, "vector_indexes", None)
+            if vector_indexes is not None:
+                await asyncio.to_thread(vector_indexes.save_all)
+                logger.info("Vector indexes persisted")
+
             if STREAMING_AVAILABLE and settings.ENABLE_STREAMING_ANALYTICS:
                 try:
                     await produce_system_metric_event(
@@ -204,6 +305,8 @@ def create_lifespan(settings: Settings):
             await shutdown_analytics_engine()
             logger.info("Analytics engine shutdown complete")
 
+            await app.state.kuzu_pool.close()
+
             metrics_collector = get_metrics_collector()
             metrics_collector.record_graph_operation("server_shutdown")
 
@@ -227,6 +330,15 @@ class TopKQueryRequest(BaseModel):
     filters: Optional[Dict[str, Any]] = None
 
 
+class TopKBenchmarkRequest(BaseModel):
+    table: str
+    embedding_field: str
+    index_name: str
+    k: int = 10
+    num_queries: int = 100
+    nprobe: Optional[int] = None
+
+
 def enforce_read_only() -> None:
     """Enforce read-only mode if enabled"""
     settings = get_settings()
@@ -297,9 +409,9 @@ async def ingest_telemetry(
             "timestamp": event.timestamp,
             "user_id": event.user_id,
             "session_id": event.session_id,
-            "data": str(event.data),  # Serialize dict to string for storage
+            "data": json.dumps(event.data, default=str),  # Stored as JSON text for listing/export
         }
-        app.state.kuzu_conn.execute(query, params)
+        await app.state.kuzu_pool.execute(query, params)
         
         processing_time = (time.time() - start_time) * 1000  # Convert to milliseconds
         
@@ -354,37 +466,146 @@ async def ingest_telemetry(
         )
 
 
-@app.get("/telemetry/list", summary="List all telemetry events", response_model=List[Dict[str, Any]])
-async def list_telemetry_events(
-    limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
-    current_user: Optional[User] = Depends(get_optional_current_user)
-) -> List[Dict[str, Any]]:
+async def stream_telemetry_batch(result: TelemetryBatchResult) -> None:
+    """Emit one aggregated stream event per committed telemetry batch"""
+    settings = get_settings()
+    if not (STREAMING_AVAILABLE and settings.ENABLE_STREAMING_ANALYTICS):
+        return
+    
+    await produce_system_metric_event(
+        metric_name="telemetry_batch_ingested",
+        metric_value=result.event_count,
+        metric_unit="events",
+        additional_data={
+            "batch_id": result.batch_id,
+            "request_count": result.request_count,
+            "latency_ms": result.latency_ms,
+            "queue_wait_ms": result.queue_wait_ms,
+            "event_type_counts": result.event_type_counts,
+            "user_count": result.user_count,
+            "session_count": result.session_count
+        }
+    )
+
+
+def parse_telemetry_batch(body: bytes, content_type: str) -> List[TelemetryEvent]:
     """
-    List all telemetry events with pagination.
+    Parse a batch request body into validated telemetry events.
+    
+    Accepts a JSON array (``application/json``) or newline-delimited JSON
+    (``application/x-ndjson``); raises HTTPException(422) on malformed input.
+    """
+    try:
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+            if isinstance(items, dict):
+                items = items.get("events", [])
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=422, detail=f"Malformed telemetry batch: {e}")
+    
+    if not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="Telemetry batch must be a JSON array or NDJSON")
+    
+    events = []
+    for index, item in enumerate(items):
+        try:
+            events.append(TelemetryEvent(**item))
+        except (ValidationError, TypeError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid telemetry event at index {index}: {e}")
+    return events
+
+
+@app.post("/telemetry/ingest/batch", summary="Ingest a batch of IDE telemetry events", response_model=Dict[str, Any])
+async def ingest_telemetry_batch(
+    request: Request,
+    current_user: Optional[User] = Depends(get_optional_current_user),
+    _: Any = Depends(enforce_read_only)
+) -> Dict[str, Any]:
+    """
+    Ingest many telemetry events in one request.
+    
+    The body is either a JSON array of events or NDJSON (one event per line,
+    ``Content-Type: application/x-ndjson``). Events from concurrent requests
+    are group-committed into bulk inserts, and one aggregated stream event is
+    produced per committed batch.
     
     Authentication: Optional (respects JWT_ENABLED setting)
     """
     start_time = time.time()
+    settings = get_settings()
+    
+    events = parse_telemetry_batch(await request.body(), request.headers.get("content-type", ""))
+    if not events:
+        raise HTTPException(status_code=422, detail="Telemetry batch is empty")
+    if len(events) > settings.telemetry.BATCH_MAX_REQUEST_EVENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Telemetry batch exceeds {settings.telemetry.BATCH_MAX_REQUEST_EVENTS} events"
+        )
     
     try:
-        query = (
-            "MATCH (e:TelemetryEvent) "
-            "RETURN e.event_type, e.timestamp, e.user_id, e.session_id, e.data "
-            f"SKIP {offset} LIMIT {limit}"
+        result = await app.state.telemetry_writer.submit([telemetry_event_to_row(e) for e in events])
+    except RuntimeError as e:
+        logger.warning(f"Telemetry batch rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to ingest telemetry batch: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to ingest telemetry batch: {str(e)}"
         )
-        result = app.state.kuzu_conn.execute(query)
+    
+    processing_time = (time.time() - start_time) * 1000
+    
+    return {
+        "status": "success",
+        "message": "Telemetry batch ingested successfully",
+        "accepted": len(events),
+        "batch_id": result.batch_id,
+        "batch_size": result.event_count,
+        "batch_latency_ms": result.latency_ms,
+        "processing_time_ms": processing_time
+    }
+
+
+async def _stream_telemetry_ndjson(query: str, params: Dict[str, Any]) -> AsyncIterator[bytes]:
+    """Pull NDJSON chunks on one pooled connection, held for the whole export"""
+    async with app.state.kuzu_pool.acquire() as conn:
+        chunks = iter_ndjson(conn.connection, query, params)
+        while True:
+            chunk = await conn.run(lambda _conn: next(chunks, None))
+            if chunk is None:
+                break
+            yield chunk
+
+
+async def _telemetry_listing(
+    filters: Dict[str, Any],
+    limit: Optional[int],
+    offset: int,
+    cursor: Optional[str],
+    format: str,
+    response: Response,
+    component: str
+) -> Any:
+    """Shared implementation of the telemetry list and query endpoints"""
+    start_time = time.time()
+    
+    try:
+        if format == "ndjson":
+            query, params = build_telemetry_query(filters, cursor=cursor, limit=limit, offset=offset)
+            return StreamingResponse(
+                _stream_telemetry_ndjson(query, params),
+                media_type=NDJSON_MEDIA_TYPE
+            )
         
-        events = []
-        while result.hasNext():
-            row = result.getNext()
-            events.append({
-                "event_type": row[0],
-                "timestamp": row[1],
-                "user_id": row[2],
-                "session_id": row[3],
-                "data": json.loads(row[4]) if row[4] else {}
-            })
+        page_size = limit or 100
+        query, params = build_telemetry_query(filters, cursor=cursor, limit=page_size + 1, offset=offset)
+        events, next_cursor = await app.state.kuzu_pool.run(fetch_page, query, params, page_size)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         # Record metrics
         processing_time = (time.time() - start_time) * 1000
@@ -393,10 +614,12 @@ async def list_telemetry_events(
         
         return events
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Failed to list telemetry events: {e}")
+        logger.error(f"Failed to read telemetry events: {e}")
         metrics_collector = get_metrics_collector()
-        metrics_collector.record_error("database_error", "telemetry_list")
+        metrics_collector.record_error("database_error", component)
         
         raise HTTPException(
             status_code=500,
@@ -404,75 +627,50 @@ async def list_telemetry_events(
         )
 
 
+@app.get("/telemetry/list", summary="List all telemetry events", response_model=List[Dict[str, Any]])
+async def list_telemetry_events(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Continuation token from X-Next-Cursor"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    current_user: Optional[User] = Depends(get_optional_current_user)
+) -> Any:
+    """
+    List telemetry events ordered by timestamp.
+    
+    Pages are keyset-paginated: pass the ``X-Next-Cursor`` header of one page
+    as ``cursor`` to fetch the next. ``offset`` is still accepted when no
+    cursor is given. With ``format=ndjson`` the result is streamed as
+    newline-delimited JSON; ``limit`` is then optional so full exports run in
+    constant memory.
+    
+    Authentication: Optional (respects JWT_ENABLED setting)
+    """
+    return await _telemetry_listing({}, limit, offset, cursor, format, response, "telemetry_list")
+
+
 @app.get("/telemetry/query", summary="Query telemetry events", response_model=List[Dict[str, Any]])
 async def query_telemetry_events(
+    response: Response,
     event_type: Optional[str] = Query(None),
     user_id: Optional[str] = Query(None),
     session_id: Optional[str] = Query(None),
-    limit: int = Query(100, ge=1, le=1000),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Continuation token from X-Next-Cursor"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     current_user: Optional[User] = Depends(get_optional_current_user)
-) -> List[Dict[str, Any]]:
+) -> Any:
     """
     Query telemetry events with filters.
     
+    Supports the same cursor pagination and NDJSON streaming as
+    ``/telemetry/list``.
+    
     Authentication: Optional (respects JWT_ENABLED setting)
     """
-    start_time = time.time()
-    
-    try:
-        # Build dynamic query based on filters
-        where_conditions = []
-        params = {}
-        
-        if event_type:
-            where_conditions.append("e.event_type = $event_type")
-            params["event_type"] = event_type
-        
-        if user_id:
-            where_conditions.append("e.user_id = $user_id")
-            params["user_id"] = user_id
-        
-        if session_id:
-            where_conditions.append("e.session_id = $session_id")
-            params["session_id"] = session_id
-        
-        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-        
-        query = (
-            f"MATCH (e:TelemetryEvent) WHERE {where_clause} "
-            "RETURN e.event_type, e.timestamp, e.user_id, e.session_id, e.data "
-            f"LIMIT {limit}"
-        )
-        
-        result = app.state.kuzu_conn.execute(query, params)
-        
-        events = []
-        while result.hasNext():
-            row = result.getNext()
-            events.append({
-                "event_type": row[0],
-                "timestamp": row[1],
-                "user_id": row[2],
-                "session_id": row[3],
-                "data": json.loads(row[4]) if row[4] else {}
-            })
-        
-        # Record metrics
-        processing_time = (time.time() - start_time) * 1000
-        metrics_collector = get_metrics_collector()
-        metrics_collector.record_database_query("MATCH", "TelemetryEvent", processing_time / 1000)
-        
-        return events
-        
-    except Exception as e:
-        logger.error(f"Failed to query telemetry events: {e}")
-        metrics_collector = get_metrics_collector()
-        metrics_collector.record_error("database_error", "telemetry_query")
-        
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to query telemetry events: {str(e)}"
-        )
+    filters = {"event_type": event_type, "user_id": user_id, "session_id": session_id}
+    return await _telemetry_listing(filters, limit, 0, cursor, format, response, "telemetry_query")
 
 
 @app.post("/tools/topk", summary="Top-K relevant node/snippet query", response_model=List[Dict[str, Any]])
@@ -489,38 +687,14 @@ async def topk_query(
     start_time = time.time()
     
     try:
-        # Initialize sentence transformer for embeddings
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        query_embedding = model.encode([req.query_text])[0].tolist()
-        
-        # Build Kuzu query for vector similarity search
-        query = f"""
-        MATCH (n:{req.table})
-        WHERE n.{req.embedding_field} IS NOT NULL
-        RETURN n, 
-               list_cosine_similarity(n.{req.embedding_field}, $query_embedding) AS similarity
-        ORDER BY similarity DESC
-        LIMIT $k
-        """
-        
-        params = {
-            "query_embedding": query_embedding,
-            "k": req.k
-        }
-        
-        result = app.state.kuzu_conn.execute(query, params)
+        # Embed via the resident model; concurrent queries share one encode() batch
+        query_embedding = await get_embedding_service().embed(req.query_text)
         
-        results = []
-        while result.hasNext():
-            row = result.getNext()
-            node_data = row[0]
-            similarity = row[1]
-            
-            results.append({
-                "node": node_data,
-                "similarity": similarity,
-                "query": req.query_text
-            })
+        vector_indexes: Optional[VectorIndexManager] = getattr(app.state, "vector_indexes", None)
+        if vector_indexes is not None:
+            results = await _topk_ann_search(vector_indexes, req, query_embedding)
+        else:
+            results = await _topk_exact_scan(req, query_embedding)
         
         # Record metrics
         processing_time = (time.time() - start_time) * 1000
@@ -529,6 +703,8 @@ async def topk_query(
         
         return results
         
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"Top-K query failed: {e}")
         metrics_collector = get_metrics_collector()
@@ -540,6 +716,96 @@ async def topk_query(
         )
 
 
+async def _topk_ann_search(
+    vector_indexes: VectorIndexManager,
+    req: TopKQueryRequest,
+    query_embedding: List[float]
+) -> List[Dict[str, Any]]:
+    """Top-K through the IVF-flat index, pre-filtered by req.filters"""
+    pool = app.state.kuzu_pool
+    try:
+        index = await vector_indexes.get_or_build(pool, req.table, req.embedding_field, req.index_name)
+    except LookupError:
+        return []
+    
+    allowed_ids = None
+    if req.filters:
+        allowed_ids = await pool.run(VectorIndexManager.resolve_filter_ids, req.table, req.filters)
+    
+    hits = await asyncio.to_thread(index.search, query_embedding, req.k, allowed_ids)
+    if not hits:
+        return []
+    
+    rows = await pool.execute(
+        f"MATCH (n:{req.table}) WHERE offset(ID(n)) IN $ids RETURN n, offset(ID(n))",
+        {"ids": [hit.node_offset for hit in hits]}
+    )
+    nodes = {row[1]: row[0] for row in rows}
+    
+    return [
+        {"node": nodes[hit.node_offset], "similarity": hit.similarity, "query": req.query_text}
+        for hit in hits
+        if hit.node_offset in nodes
+    ]
+
+
+async def _topk_exact_scan(req: TopKQueryRequest, query_embedding: List[float]) -> List[Dict[str, Any]]:
+    """Top-K by full cosine-similarity scan (used when the ANN index is disabled)"""
+    where_conditions = [f"n.{req.embedding_field} IS NOT NULL"]
+    params: Dict[str, Any] = {
+        "query_embedding": query_embedding,
+        "k": req.k
+    }
+    for i, (prop, value) in enumerate((req.filters or {}).items()):
+        where_conditions.append(f"n.{validate_identifier(prop)} = $f{i}")
+        params[f"f{i}"] = value
+    
+    # Build Kuzu query for vector similarity search
+    query = f"""
+    MATCH (n:{req.table})
+    WHERE {" AND ".join(where_conditions)}
+    RETURN n, 
+           list_cosine_similarity(n.{req.embedding_field}, $query_embedding) AS similarity
+    ORDER BY similarity DESC
+    LIMIT $k
+    """
+    
+    rows = await app.state.kuzu_pool.execute(query, params)
+    
+    return [
+        {"node": row[0], "similarity": row[1], "query": req.query_text}
+        for row in rows
+    ]
+
+
+@app.post("/tools/topk/benchmark", summary="Benchmark ANN index recall and latency", response_model=Dict[str, Any])
+async def topk_benchmark(
+    req: TopKBenchmarkRequest = Body(...),
+    current_user: Optional[User] = Depends(get_optional_current_user)
+) -> Dict[str, Any]:
+    """
+    Compare the ANN index against the exact scan for the given index key.
+    
+    Queries are perturbed copies of stored vectors; returns recall@k and
+    latency percentiles for both search paths.
+    """
+    vector_indexes: Optional[VectorIndexManager] = getattr(app.state, "vector_indexes", None)
+    if vector_indexes is None:
+        raise HTTPException(status_code=404, detail="Vector index is disabled")
+    
+    try:
+        index = await vector_indexes.get_or_build(
+            app.state.kuzu_pool, req.table, req.embedding_field, req.index_name
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    queries = sample_benchmark_queries(index, req.num_queries)
+    return await asyncio.to_thread(benchmark_index, index, queries, req.k, req.nprobe)
+
+
 # Additional utility endpoints for production monitoring
 @app.get("/api/v1/status", summary="Application status", response_model=Dict[str, Any])
 async def get_application_status() -> Dict[str, Any]:
@@ -562,6 +828,7 @@ async def get_application_status() -> Dict[str, Any]:
         "database": {
             "kuzu_path": settings.database.KUZU_DB_PATH,
             "read_only": settings.database.KUZU_READ_ONLY,
+            "pool": app.state.kuzu_pool.get_stats(),
         },
         "security": {
             "cors_enabled": bool(settings.get_cors_origins()),
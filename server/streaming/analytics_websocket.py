@@ -10,9 +10,10 @@ import json
 import logging
 import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple, Union
 from dataclasses import asdict
 import uuid
+from collections import deque
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query
 from fastapi.responses import JSONResponse
@@ -21,6 +22,7 @@ from pydantic import BaseModel
 from .dragonfly_config import get_dragonfly_stats, benchmark_dragonfly
 from .stream_producer import get_stream_producer
 from .feature_workers import get_worker_manager
+from ..core.delta_encoding import DeltaOptions, DeltaStream, deflate, payload_size
 
 # Local fallback for authentication dependency
 def get_optional_current_user():
@@ -43,21 +45,97 @@ class SubscriptionRequest(BaseModel):
     pattern_types: Optional[List[str]] = None
     update_interval: int = 1000  # milliseconds
 
+class ClientConnection:
+    """
+    One WebSocket client with its own bounded outbound queue
+
+    A dedicated writer task drains the queue, so a slow socket only ever
+    delays its own messages.
+    """
+    
+    def __init__(self, client_id: str, websocket: WebSocket, options: DeltaOptions, max_queue: int) -> None:
+        self.client_id = client_id
+        self.websocket = websocket
+        self.options = options
+        self.queue: "asyncio.Queue[Tuple[Union[str, bytes], int]]" = asyncio.Queue(max_queue)
+        self.event_types: Set[str] = set()
+        # Last delta sequence delivered per broadcast message type
+        self.delta_seqs: Dict[str, int] = {}
+        self.writer: Optional[asyncio.Task] = None
+        self.peak_queued = 0
+    
+    def offer(self, payload: Union[str, bytes], full_bytes: int) -> bool:
+        """Queue a payload without waiting; False if the queue is full"""
+        try:
+            self.queue.put_nowait((payload, full_bytes))
+        except asyncio.QueueFull:
+            return False
+        self.peak_queued = max(self.peak_queued, self.queue.qsize())
+        return True
+    
+    def close(self) -> int:
+        """Stop the writer and discard queued payloads, returning how many were dropped"""
+        if self.writer is not None and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+        dropped = 0
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            dropped += 1
+        return dropped
+
 class ConnectionManager:
-    """Manages WebSocket connections for real-time analytics"""
+    """
+    Manages WebSocket connections for real-time analytics
+    
+    Each connection has its own writer task and an outbound queue of at
+    most ``max_queue`` payloads. Broadcasts serialise a message once and
+    only enqueue it, so a stalled client cannot hold up the broadcast loop;
+    a client whose queue overflows or whose write takes longer than
+    ``send_timeout`` seconds is evicted as a slow consumer.
     
-    def __init__(self) -> None:
-        self.active_connections: Dict[str, WebSocket] = {}
+    Clients may negotiate delta encoding (``?delta=1`` or the
+    ``graphmemory.delta.v1`` subprotocol): broadcasts are then sent as a
+    keyframe envelope on first delivery and every ``keyframe_interval``
+    updates per message type, with JSON-Patch deltas in between.
+    ``compress=deflate`` (or the ``+deflate`` subprotocol) sends larger
+    payloads as zlib-deflated binary frames.
+    """
+    
+    def __init__(self, keyframe_interval: int = 30, max_queue: int = 64,
+                 send_timeout: float = 5.0) -> None:
+        self.connections: Dict[str, ClientConnection] = {}
         self.client_subscriptions: Dict[str, SubscriptionRequest] = {}
+        # event type -> subscribed client ids
+        self.event_subscribers: Dict[str, Set[str]] = {}
+        self.keyframe_interval = keyframe_interval
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        # One delta stream per broadcast message type, shared by all clients
+        self.delta_streams: Dict[str, DeltaStream] = {}
         self.connection_stats = {
             "total_connections": 0,
             "active_connections": 0,
             "messages_sent": 0,
             "messages_failed": 0,
+            "messages_dropped": 0,
+            "slow_consumers_evicted": 0,
+            "bytes_sent": 0,
+            "bytes_saved": 0,
         }
+        self._send_latencies: Deque[float] = deque(maxlen=1000)
+        self._closing: Set[asyncio.Task] = set()
         self._broadcast_task: Optional[asyncio.Task] = None
         self._running = False
     
+    @property
+    def active_connections(self) -> Dict[str, WebSocket]:
+        return {client_id: conn.websocket for client_id, conn in self.connections.items()}
+    
+    @property
+    def client_options(self) -> Dict[str, DeltaOptions]:
+        return {client_id: conn.options for client_id, conn in self.connections.items()}
+    
     async def start(self) -> None:
         """Start the connection manager"""
         if self._running:
@@ -69,39 +147,51 @@ class ConnectionManager:
         logger.info("WebSocket Connection Manager started")
     
     async def stop(self) -> None:
-        """Stop the connection manager"""
-        if not self._running:
-            return
-        
-        logger.info("Stopping WebSocket Connection Manager")
-        self._running = False
-        
-        if self._broadcast_task:
-            self._broadcast_task.cancel()
-            try:
-                await self._broadcast_task
-            except asyncio.CancelledError:
-                pass
+        """Stop the connection manager and close every connection"""
+        if self._running:
+            logger.info("Stopping WebSocket Connection Manager")
+            self._running = False
+            
+            if self._broadcast_task:
+                self._broadcast_task.cancel()
+                try:
+                    await self._broadcast_task
+                except asyncio.CancelledError:
+                    pass
         
         # Close all connections
-        for client_id, websocket in self.active_connections.items():
+        for client_id in list(self.connections):
+            connection = self._remove(client_id)
             try:
-                await websocket.close()
+                await asyncio.wait_for(connection.websocket.close(), self.send_timeout)
             except Exception as e:
                 logger.warning(f"Error closing connection {client_id}: {e}")
         
-        self.active_connections.clear()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
         self.client_subscriptions.clear()
+        self.event_subscribers.clear()
         logger.info("WebSocket Connection Manager stopped")
     
-    async def connect(self, websocket: WebSocket, client_id: str) -> None:
-        """Accept a new WebSocket connection"""
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
+    async def connect(self, websocket: WebSocket, client_id: str,
+                      options: Optional[DeltaOptions] = None) -> None:
+        """Accept a new WebSocket connection, negotiating its payload encoding"""
+        if options is None:
+            options = DeltaOptions.negotiate(
+                websocket.query_params, websocket.scope.get("subprotocols", [])
+            )
+        await websocket.accept(subprotocol=options.subprotocol)
+        stale = self.connections.get(client_id)
+        if stale is not None:
+            # A reconnect under the same id replaces the stale connection
+            self._evict(stale, "replaced by a reconnect", slow=False, code=1000)
+        connection = ClientConnection(client_id, websocket, options, self.max_queue)
+        connection.writer = asyncio.create_task(self._writer(connection))
+        self.connections[client_id] = connection
         self.connection_stats["total_connections"] += 1
-        self.connection_stats["active_connections"] = len(self.active_connections)
+        self.connection_stats["active_connections"] = len(self.connections)
         
-        logger.info(f"WebSocket connected: {client_id} (total: {len(self.active_connections)})")
+        logger.info(f"WebSocket connected: {client_id} (total: {len(self.connections)})")
         
         # Send welcome message
         welcome_msg = WebSocketMessage(
@@ -111,29 +201,82 @@ class ConnectionManager:
                 "server_time": datetime.utcnow().isoformat(),
                 "available_subscriptions": [
                     "features", "patterns", "stream_stats", "system_status"
-                ]
+                ],
+                "encoding": {
+                    "delta": options.delta,
+                    "deflate": options.deflate,
+                    "keyframe_interval": self.keyframe_interval
+                }
             },
             timestamp=datetime.utcnow().isoformat(),
             client_id=client_id
         )
         await self._send_to_client(client_id, welcome_msg)
     
-    async def disconnect(self, client_id: str) -> None:
-        """Handle WebSocket disconnection"""
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-        if client_id in self.client_subscriptions:
-            del self.client_subscriptions[client_id]
+    async def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None) -> None:
+        """
+        Handle WebSocket disconnection.
         
-        self.connection_stats["active_connections"] = len(self.active_connections)
-        logger.info(f"WebSocket disconnected: {client_id} (remaining: {len(self.active_connections)})")
+        With ``websocket`` given, the client is only removed while that
+        socket is still the registered one, so a handler whose connection
+        was replaced by a reconnect cannot drop the new connection.
+        """
+        connection = self.connections.get(client_id)
+        if connection is None or (websocket is not None and connection.websocket is not websocket):
+            return
+        if self._remove(client_id) is not None:
+            logger.info(f"WebSocket disconnected: {client_id} (remaining: {len(self.connections)})")
+    
+    def _remove(self, client_id: str) -> Optional[ClientConnection]:
+        """Drop a client's state, stop its writer and discard its queued payloads"""
+        connection = self.connections.pop(client_id, None)
+        if connection is None:
+            return None
+        self._unindex(connection)
+        self.client_subscriptions.pop(client_id, None)
+        self.connection_stats["messages_dropped"] += connection.close()
+        self.connection_stats["active_connections"] = len(self.connections)
+        return connection
+    
+    def _evict(self, connection: ClientConnection, reason: str, slow: bool = True,
+               code: int = 1008) -> None:
+        """Disconnect a slow or broken client and close its socket in the background"""
+        if self.connections.get(connection.client_id) is not connection:
+            return
+        logger.warning(f"Evicting WebSocket client {connection.client_id}: {reason}")
+        if slow:
+            self.connection_stats["slow_consumers_evicted"] += 1
+        self._remove(connection.client_id)
+        task = asyncio.create_task(self._close_socket(connection, code))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    async def _close_socket(self, connection: ClientConnection, code: int = 1008) -> None:
+        try:
+            await asyncio.wait_for(connection.websocket.close(code=code), self.send_timeout)
+        except Exception as e:
+            logger.debug(f"Error closing evicted connection {connection.client_id}: {e}")
+    
+    def _unindex(self, connection: ClientConnection) -> None:
+        for event_type in connection.event_types:
+            subscribers = self.event_subscribers.get(event_type)
+            if subscribers is not None:
+                subscribers.discard(connection.client_id)
+                if not subscribers:
+                    del self.event_subscribers[event_type]
+        connection.event_types = set()
     
     async def subscribe(self, client_id: str, subscription: SubscriptionRequest) -> bool:
         """Subscribe client to specific data streams"""
-        if client_id not in self.active_connections:
+        connection = self.connections.get(client_id)
+        if connection is None:
             return False
         
         self.client_subscriptions[client_id] = subscription
+        self._unindex(connection)
+        connection.event_types = set(subscription.event_types)
+        for event_type in connection.event_types:
+            self.event_subscribers.setdefault(event_type, set()).add(client_id)
         logger.info(f"Client {client_id} subscribed to: {subscription.event_types}")
         
         # Send subscription confirmation
@@ -151,39 +294,84 @@ class ConnectionManager:
         return True
     
     async def _send_to_client(self, client_id: str, message: WebSocketMessage) -> bool:
-        """Send message to a specific client"""
-        if client_id not in self.active_connections:
+        """Queue a message for a specific client"""
+        connection = self.connections.get(client_id)
+        if connection is None:
             return False
-        
-        try:
-            websocket = self.active_connections[client_id]
-            await websocket.send_text(message.json())
-            self.connection_stats["messages_sent"] += 1
+        text = message.json()
+        payload = deflate(text) if connection.options.deflate else text
+        return self._enqueue(connection, payload, len(text.encode("utf-8")))
+    
+    def _enqueue(self, connection: ClientConnection, payload: Union[str, bytes], full_bytes: int) -> bool:
+        """Queue an encoded payload for the client's writer, evicting it if the queue is full"""
+        if connection.offer(payload, full_bytes):
             return True
-        except Exception as e:
-            logger.error(f"Error sending message to {client_id}: {e}")
-            self.connection_stats["messages_failed"] += 1
-            await self.disconnect(client_id)
-            return False
+        self.connection_stats["messages_dropped"] += 1
+        self._evict(connection, f"outbound queue full ({self.max_queue} messages)")
+        return False
+    
+    async def _writer(self, connection: ClientConnection) -> None:
+        """Drain one client's queue: text frames for JSON, binary frames for deflated data"""
+        websocket = connection.websocket
+        while True:
+            payload, full_bytes = await connection.queue.get()
+            try:
+                started = time.perf_counter()
+                if isinstance(payload, bytes):
+                    await asyncio.wait_for(websocket.send_bytes(payload), self.send_timeout)
+                else:
+                    await asyncio.wait_for(websocket.send_text(payload), self.send_timeout)
+            except asyncio.TimeoutError:
+                self.connection_stats["messages_failed"] += 1
+                self._evict(connection, f"write exceeded {self.send_timeout}s")
+                return
+            except Exception as e:
+                logger.error(f"Error sending message to {connection.client_id}: {e}")
+                self.connection_stats["messages_failed"] += 1
+                self._evict(connection, "send failed", slow=False)
+                return
+            else:
+                self._send_latencies.append(time.perf_counter() - started)
+                sent = payload_size(payload)
+                self.connection_stats["messages_sent"] += 1
+                self.connection_stats["bytes_sent"] += sent
+                self.connection_stats["bytes_saved"] += full_bytes - sent
+            finally:
+                connection.queue.task_done()
+    
+    async def drain(self) -> None:
+        """Wait until every connection's queued messages have been written"""
+        await asyncio.gather(
+            *(connection.queue.join() for connection in list(self.connections.values()))
+        )
     
     async def broadcast(self, message: WebSocketMessage, event_type: str) -> None:
-        """Broadcast message to subscribed clients"""
-        if not self.active_connections:
+        """Queue a message for every client subscribed to ``event_type``"""
+        target_ids = self.event_subscribers.get(event_type)
+        if not target_ids:
             return
+        targets = [self.connections[client_id] for client_id in target_ids]
         
-        # Find clients subscribed to this event type
-        target_clients = []
-        for client_id, subscription in self.client_subscriptions.items():
-            if event_type in subscription.event_types:
-                target_clients.append(client_id)
-        
-        # Send to target clients
-        send_tasks = []
-        for client_id in target_clients:
-            send_tasks.append(self._send_to_client(client_id, message))
+        # Serialise once for every client, whatever encoding it negotiated
+        text = message.json()
+        full_bytes = len(text.encode("utf-8"))
+        update = None
+        if any(connection.options.enabled for connection in targets):
+            stream = self.delta_streams.get(message.type)
+            if stream is None:
+                stream = self.delta_streams[message.type] = DeltaStream(self.keyframe_interval, name=message.type)
+            update = stream.push(json.loads(text))
         
-        if send_tasks:
-            await asyncio.gather(*send_tasks, return_exceptions=True)
+        for connection in targets:
+            options = connection.options
+            if update is not None and options.enabled:
+                delta = options.delta and update.is_delta_for(connection.delta_seqs.get(message.type))
+                payload = update.payload(delta, options.deflate)
+                if self._enqueue(connection, payload, full_bytes):
+                    connection.delta_seqs[message.type] = update.seq
+                    update.stream.record(full_bytes, payload, delta)
+            else:
+                self._enqueue(connection, text, full_bytes)
     
     async def _broadcast_loop(self) -> None:
         """Main broadcasting loop"""
@@ -335,9 +523,25 @@ class ConnectionManager:
     
     def get_stats(self) -> Dict[str, Any]:
         """Get connection manager statistics"""
+        depths = [connection.queue.qsize() for connection in self.connections.values()]
+        latencies = sorted(self._send_latencies)
         return {
             **self.connection_stats,
             "subscribed_clients": len(self.client_subscriptions),
+            "queue_depth": {
+                "total": sum(depths),
+                "max": max(depths, default=0),
+                "peak": max((c.peak_queued for c in self.connections.values()), default=0),
+                "limit": self.max_queue,
+            },
+            "send_latency_ms": {
+                "samples": len(latencies),
+                "avg": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+                "p95": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+                "max": latencies[-1] * 1000 if latencies else 0.0,
+            },
+            "delta_clients": sum(1 for c in self.connections.values() if c.options.delta),
+            "delta_streams": {name: stream.get_stats() for name, stream in self.delta_streams.items()},
             "running": self._running
         }
 
@@ -386,7 +590,7 @@ def create_analytics_router() -> FastAPI:
         except Exception as e:
             logger.error(f"WebSocket error for client {client_id}: {e}")
         finally:
-            await connection_manager.disconnect(client_id)
+            await connection_manager.disconnect(client_id, websocket)
     
     @router.get("/api/analytics/features")
     async def get_features(
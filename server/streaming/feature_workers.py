@@ -9,15 +9,15 @@ import asyncio
 import json
 import logging
 import time
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple, Union
 from dataclasses import dataclass, field
 from collections import defaultdict, deque
-import statistics
 import numpy as np
 import redis
 
 from .dragonfly_config import get_dragonfly_client
+from .windowing import SessionWindow, SlidingWindow, WindowSnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -39,39 +39,6 @@ class PatternDetection:
     description: str
     data: Dict[str, Any] = field(default_factory=dict)
 
-class TimeWindow:
-    """Implements tumbling and sliding time windows"""
-    
-    def __init__(self, size_seconds: int, slide_seconds: Optional[int] = None) -> None:
-        self.size_seconds = size_seconds
-        self.slide_seconds = slide_seconds or size_seconds  # Default to tumbling window
-        self.events: deque = deque()
-        self._last_slide = time.time()
-    
-    def add_event(self, event: Dict[str, Any], timestamp: float) -> None:
-        """Add event to the window"""
-        self.events.append((timestamp, event))
-        self._cleanup_old_events()
-    
-    def _cleanup_old_events(self) -> None:
-        """Remove events outside the window"""
-        cutoff_time = time.time() - self.size_seconds
-        while self.events and self.events[0][0] < cutoff_time:
-            self.events.popleft()
-    
-    def get_events(self) -> List[Tuple[float, Dict[str, Any]]]:
-        """Get all events in the current window"""
-        self._cleanup_old_events()
-        return list(self.events)
-    
-    def should_slide(self) -> bool:
-        """Check if window should slide (for sliding windows)"""
-        return time.time() - self._last_slide >= self.slide_seconds
-    
-    def slide(self) -> None:
-        """Slide the window"""
-        self._last_slide = time.time()
-
 class MemoryOperationFeatureWorker:
     """Worker for computing memory operation features"""
     
@@ -83,16 +50,17 @@ class MemoryOperationFeatureWorker:
         self.client: Optional[redis.Redis] = None
         self.running = False
         
-        # Time windows for different aggregations
+        # Time windows for different aggregations (incremental, pane-based)
         self.windows = {
-            "1min": TimeWindow(60, 30),
-            "5min": TimeWindow(300, 150),
-            "15min": TimeWindow(900, 450),
-            "1hour": TimeWindow(3600, 1800)
+            "1min": SlidingWindow(60, 30, quantile_fields=("processing_time_ms",)),
+            "5min": SlidingWindow(300, 150, quantile_fields=("processing_time_ms",)),
+            "15min": SlidingWindow(900, 450, quantile_fields=("processing_time_ms",)),
+            "1hour": SlidingWindow(3600, 1800, quantile_fields=("processing_time_ms",))
         }
+        self.sessions = SessionWindow(gap_seconds=1800)
         
-        # Feature accumulators
-        self.features: Dict[str, List[WindowedFeature]] = defaultdict(list)
+        # Feature accumulators (last 100 values per feature)
+        self.features: Dict[str, Deque[WindowedFeature]] = defaultdict(lambda: deque(maxlen=100))
         self.operation_counts: defaultdict[str, int] = defaultdict(int)
         self.processing_times = deque(maxlen=1000)
         
@@ -177,18 +145,32 @@ class MemoryOperationFeatureWorker:
         try:
             # Parse timestamp
             timestamp = fields.get("timestamp", datetime.utcnow().isoformat())
-            ts = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
+            parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)  # producers emit naive UTC timestamps
+            ts = parsed.timestamp()
+            
+            operation_type = fields.get("operation_type", "unknown")
+            processing_time = float(fields.get("processing_time_ms", 0))
+            values = {
+                "entity_count": float(fields.get("entity_count", 0)),
+                "relation_count": float(fields.get("relation_count", 0)),
+            }
+            if processing_time > 0:
+                values["processing_time_ms"] = processing_time
             
             # Add to time windows
             for window in self.windows.values():
-                window.add_event(fields, ts)
+                window.add(ts, operation_type, values)
+            
+            session_key = fields.get("session_id") or fields.get("user_id")
+            if session_key:
+                self.sessions.add(ts, session_key)
             
             # Track operation counts
-            operation_type = fields.get("operation_type", "unknown")
             self.operation_counts[operation_type] += 1
             
             # Track processing times
-            processing_time = float(fields.get("processing_time_ms", 0))
             self.processing_times.append(processing_time)
             
             # Acknowledge message
@@ -197,123 +179,105 @@ class MemoryOperationFeatureWorker:
         except Exception as e:
             logger.error(f"Error processing message {message_id}: {e}")
     
-    async def _compute_windowed_features(self) -> None:
-        """Compute features over time windows"""
+    async def _compute_windowed_features(self, now: Optional[float] = None) -> None:
+        """
+        Emit features for every window whose slide interval has elapsed.
+        
+        Windows hold running aggregates, so this costs O(panes + operation
+        types) per window regardless of how many events the window covers.
+        """
+        now = time.time() if now is None else now
         current_time = datetime.utcnow().isoformat()
         
         for window_name, window in self.windows.items():
-            if window_name.startswith("sliding") and not window.should_slide():
+            window.advance(now)
+            if not window.should_emit(now):
                 continue
+            window.mark_emitted(now)
             
-            events = window.get_events()
-            if not events:
+            snapshot = window.snapshot()
+            if not snapshot.count:
                 continue
             
-            # Compute features for this window
-            features = []
-            
+            for feature in self._window_features(window_name, snapshot, current_time):
+                self.features[feature.feature_name].append(feature)
+        
+        self.sessions.advance(now)
+        self.features["session_activity"].append(WindowedFeature(
+            feature_name="session_activity",
+            window_size_seconds=int(self.sessions.gap_seconds),
+            timestamp=current_time,
+            value=self.sessions.snapshot(),
+            metadata={"window_type": "session"}
+        ))
+    
+    @staticmethod
+    def _window_features(window_name: str, snapshot: WindowSnapshot, current_time: str) -> List[WindowedFeature]:
+        """Build the feature set of one window from its snapshot"""
+        size = int(snapshot.size_seconds)
+        features = [
             # 1. Operation rate (operations per second)
-            if events:
-                duration = max(1.0, events[-1][0] - events[0][0])  # Avoid division by zero
-                operation_rate = len(events) / duration
-                features.append(WindowedFeature(
-                    feature_name=f"memory_operation_rate_{window_name}",
-                    window_size_seconds=window.size_seconds,
-                    timestamp=current_time,
-                    value=operation_rate,
-                    metadata={"unit": "operations_per_second"}
-                ))
-            
+            WindowedFeature(
+                feature_name=f"memory_operation_rate_{window_name}",
+                window_size_seconds=size,
+                timestamp=current_time,
+                value=snapshot.rate,
+                metadata={"unit": "operations_per_second"}
+            ),
             # 2. Operation type distribution
-            op_types = [
-                event_data.get("operation_type", "unknown") 
-                for _, event_data in events 
-                if isinstance(event_data, dict)
-            ]
-            op_distribution = {}
-            for op_type in set(op_types):
-                op_distribution[op_type] = op_types.count(op_type) / len(op_types)
-            
-            features.append(WindowedFeature(
+            WindowedFeature(
                 feature_name=f"operation_type_distribution_{window_name}",
-                window_size_seconds=window.size_seconds,
+                window_size_seconds=size,
                 timestamp=current_time,
-                value=op_distribution,
+                value=snapshot.distribution(),
                 metadata={"unit": "percentage"}
+            ),
+        ]
+        
+        # 3. Processing time statistics (median and tail from the quantile sketch)
+        processing = snapshot.stats.get("processing_time_ms")
+        if processing and processing.count:
+            features.append(WindowedFeature(
+                feature_name=f"processing_time_stats_{window_name}",
+                window_size_seconds=size,
+                timestamp=current_time,
+                value={
+                    "mean": processing.mean,
+                    "median": snapshot.quantile("processing_time_ms", 0.5),
+                    "p95": snapshot.quantile("processing_time_ms", 0.95),
+                    "p99": snapshot.quantile("processing_time_ms", 0.99),
+                    "min": processing.minimum,
+                    "max": processing.maximum,
+                    "std": processing.std
+                },
+                metadata={"sample_size": processing.count}
             ))
-            
-            # 3. Processing time statistics
-            processing_times = [
-                float(event_data.get("processing_time_ms", 0)) 
-                for _, event_data in events 
-                if isinstance(event_data, dict) and event_data.get("processing_time_ms", 0) > 0
-            ]
-            
-            if processing_times:
-                features.append(WindowedFeature(
-                    feature_name=f"processing_time_stats_{window_name}",
-                    window_size_seconds=window.size_seconds,
-                    timestamp=current_time,
-                    value={
-                        "mean": statistics.mean(processing_times),
-                        "median": statistics.median(processing_times),
-                        "min": min(processing_times),
-                        "max": max(processing_times),
-                        "std": statistics.stdev(processing_times) if len(processing_times) > 1 else 0
-                    },
-                    metadata={"sample_size": len(processing_times)}
-                ))
-            
-            # 4. Entity and relation counts
-            entity_counts = [
-                int(event_data.get("entity_count", 0)) 
-                for _, event_data in events
-            ]
-            relation_counts = [
-                int(event_data.get("relation_count", 0)) 
-                for _, event_data in events
-            ]
-            
-            if entity_counts:
-                features.append(WindowedFeature(
-                    feature_name=f"entity_creation_stats_{window_name}",
-                    window_size_seconds=window.size_seconds,
-                    timestamp=current_time,
-                    value={
-                        "total_entities": sum(entity_counts),
-                        "average_per_operation": sum(entity_counts) / len(entity_counts),
-                        "max_per_operation": max(entity_counts)
-                    }
-                ))
-            
-            if relation_counts:
+        
+        # 4. Entity and relation counts
+        for stat_name, feature_prefix, total_key in (
+            ("entity_count", "entity_creation_stats", "total_entities"),
+            ("relation_count", "relation_creation_stats", "total_relations"),
+        ):
+            counts = snapshot.stats.get(stat_name)
+            if counts and counts.count:
                 features.append(WindowedFeature(
-                    feature_name=f"relation_creation_stats_{window_name}",
-                    window_size_seconds=window.size_seconds,
+                    feature_name=f"{feature_prefix}_{window_name}",
+                    window_size_seconds=size,
                     timestamp=current_time,
                     value={
-                        "total_relations": sum(relation_counts),
-                        "average_per_operation": sum(relation_counts) / len(relation_counts),
-                        "max_per_operation": max(relation_counts)
+                        total_key: int(counts.total),
+                        "average_per_operation": counts.mean,
+                        "max_per_operation": int(counts.maximum)
                     }
                 ))
-            
-            # Store computed features
-            for feature in features:
-                self.features[feature.feature_name].append(feature)
-                # Keep only last 100 features per type
-                if len(self.features[feature.feature_name]) > 100:
-                    self.features[feature.feature_name].pop(0)
-            
-            # Slide window if needed
-            if window_name.startswith("sliding"):
-                window.slide()
+        
+        return features
     
     async def get_features(self, feature_names: Optional[List[str]] = None) -> Dict[str, List[WindowedFeature]]:
         """Get computed features"""
         if feature_names:
-            return {name: self.features[name] for name in feature_names if name in self.features}
-        return dict(self.features)
+            return {name: list(self.features[name]) for name in feature_names if name in self.features}
+        return {name: list(feature_list) for name, feature_list in self.features.items()}
     
     async def get_latest_features(self) -> Dict[str, WindowedFeature]:
         """Get the latest feature values"""
@@ -3,19 +3,29 @@ Stream Producer Service for GraphMemory-IDE Analytics Pipeline
 
 This module handles event collection from MCP operations and streams them
 to DragonflyDB for real-time processing and analytics.
+
+Events are encoded into flat stream fields when produced and held in a
+bounded buffer; a background flusher sends each batch as one
+non-transactional pipeline per stream, so ``produce_event`` never waits on
+network I/O (except under the ``block`` overflow policy).
 """
 
 import asyncio
 import json
 import logging
+import os
+import tempfile
 import time
+import typing
 import uuid
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
-from dataclasses import dataclass, asdict, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+from dataclasses import dataclass, asdict, field, fields
 from enum import Enum
 
 from .dragonfly_config import get_dragonfly_client
+from ..core.latency_histogram import LatencyHistogram
 
 logger = logging.getLogger(__name__)
 
@@ -92,23 +102,147 @@ class SystemMetricEvent(StreamEvent):
     def __post_init__(self) -> None:
         self.event_type = EventType.SYSTEM_METRIC
 
+_json_encode = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+def _encode_json(value: Any) -> Optional[str]:
+    """Nested payloads are JSON-encoded; empty ones are omitted"""
+    if not value:
+        return None
+    return _json_encode(value)
+
+def _encode_enum(value: Any) -> str:
+    return value.value if isinstance(value, Enum) else str(value)
+
+def _field_encoder(annotation: Any) -> Callable[[Any], Optional[str]]:
+    candidates = typing.get_args(annotation) if typing.get_origin(annotation) is Union else (annotation,)
+    for arg in candidates:
+        origin = typing.get_origin(arg) or arg
+        if origin in (dict, list):
+            return _encode_json
+        if isinstance(origin, type) and issubclass(origin, Enum):
+            return _encode_enum
+    return str
+
+# Per event class: (field name, encoder) pairs resolved once from the dataclass
+_FIELD_ENCODERS: Dict[type, Tuple[Tuple[str, Callable[[Any], Optional[str]]], ...]] = {}
+
+def encode_event(event: StreamEvent) -> Dict[str, str]:
+    """
+    Encode an event as flat stream fields.
+
+    Top-level field names are kept so consumers can read them directly;
+    enums are stored by value, ``data``/``metadata`` as compact JSON, and
+    ``None`` or empty values are left out.
+    """
+    encoders = _FIELD_ENCODERS.get(type(event))
+    if encoders is None:
+        encoders = tuple((f.name, _field_encoder(f.type)) for f in fields(event))
+        _FIELD_ENCODERS[type(event)] = encoders
+
+    encoded: Dict[str, str] = {}
+    for name, encoder in encoders:
+        value = getattr(event, name)
+        if value is not None:
+            text = encoder(value)
+            if text is not None:
+                encoded[name] = text
+    return encoded
+
+class OverflowPolicy(str, Enum):
+    """What produce_event does when the buffer is full"""
+    BLOCK = "block"              # wait for the flusher to make room
+    DROP_OLDEST = "drop_oldest"  # discard the oldest buffered events
+    SPILL = "spill"              # append to a local file, replayed once streams are reachable
+
+@dataclass
+class ProducerConfig:
+    """Stream producer buffering and flush settings"""
+    flush_batch_size: int = 1000
+    flush_interval: float = 1.0  # seconds
+    max_batch_size: int = 5000
+    max_buffer_events: int = 100_000
+    overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST
+    spill_path: Optional[str] = None
+    stream_maxlen: int = 10000
+
+    @classmethod
+    def from_env(cls) -> "ProducerConfig":
+        """Create configuration from environment variables"""
+        return cls(
+            flush_batch_size=int(os.environ.get("STREAM_PRODUCER_FLUSH_BATCH_SIZE", "1000")),
+            flush_interval=float(os.environ.get("STREAM_PRODUCER_FLUSH_INTERVAL", "1.0")),
+            max_batch_size=int(os.environ.get("STREAM_PRODUCER_MAX_BATCH_SIZE", "5000")),
+            max_buffer_events=int(os.environ.get("STREAM_PRODUCER_MAX_BUFFER_EVENTS", "100000")),
+            overflow_policy=OverflowPolicy(os.environ.get("STREAM_PRODUCER_OVERFLOW_POLICY", "drop_oldest")),
+            spill_path=os.environ.get("STREAM_PRODUCER_SPILL_PATH"),
+            stream_maxlen=int(os.environ.get("STREAM_PRODUCER_STREAM_MAXLEN", "10000")),
+        )
+
+# Flushes are sub-millisecond on a local stream, so start finer than the default
+FLUSH_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+class ThroughputMeter:
+    """Events per second over a sliding window of flush completions"""
+
+    def __init__(self, window_seconds: float = 10.0) -> None:
+        self.window_seconds = window_seconds
+        self._samples: Deque[Tuple[float, int]] = deque()
+        self._total = 0
+
+    def record(self, count: int) -> None:
+        now = time.monotonic()
+        self._samples.append((now, count))
+        self._total += count
+        self._trim(now)
+
+    def rate(self) -> float:
+        now = time.monotonic()
+        self._trim(now)
+        if not self._samples:
+            return 0.0
+        span = max(now - self._samples[0][0], 1.0)
+        return self._total / span
+
+    def _trim(self, now: float) -> None:
+        while self._samples and now - self._samples[0][0] > self.window_seconds:
+            self._total -= self._samples.popleft()[1]
+
+# A buffered event: (stream name, encoded fields)
+BufferedEvent = Tuple[str, Dict[str, str]]
+
 class StreamProducer:
     """
     Handles streaming events to DragonflyDB streams for real-time analytics
     """
     
-    def __init__(self, source_identifier: str = "mcp-server") -> None:
+    def __init__(
+        self,
+        source_identifier: str = "mcp-server",
+        config: Optional[ProducerConfig] = None,
+        client_factory: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> None:
         self.source = source_identifier
-        self._event_buffer: List[StreamEvent] = []
-        self._buffer_size = 100
-        self._flush_interval = 5.0  # seconds
+        self.config = config or ProducerConfig()
+        self._client_factory = client_factory or get_dragonfly_client
+        self._event_buffer: Deque[BufferedEvent] = deque()
+        self._buffer_size = self.config.flush_batch_size
+        self._flush_interval = self.config.flush_interval
         self._flush_task: Optional[asyncio.Task] = None
+        self._flush_wakeup = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._space_available.set()
         self._stats: Dict[str, Any] = {
             "events_produced": 0,
             "events_failed": 0,
+            "events_dropped": 0,
+            "events_spilled": 0,
+            "events_replayed": 0,
+            "flushes": 0,
             "last_flush": None,
             "buffer_overflows": 0,
         }
+        self._flush_latency = LatencyHistogram(FLUSH_BUCKETS_MS)
+        self._throughput = ThroughputMeter()
         self._streams = {
             EventType.MEMORY_OPERATION: "analytics:memory_operations",
             EventType.USER_INTERACTION: "analytics:user_interactions", 
@@ -117,12 +251,21 @@ class StreamProducer:
             EventType.TELEMETRY: "analytics:telemetry",
             EventType.ERROR: "analytics:errors",
         }
+        self._spill_path = self.config.spill_path or os.path.join(
+            tempfile.gettempdir(), f"graphmemory-stream-spill-{source_identifier}.ndjson"
+        )
+        self._spill_pending: List[str] = []
+        self._spill_task: Optional[asyncio.Task] = None
+        self._spill_lock = asyncio.Lock()
     
     async def start(self) -> None:
         """Start the stream producer"""
         logger.info("Starting stream producer service")
         self._flush_task = asyncio.create_task(self._periodic_flush())
-        logger.info(f"Stream producer started (buffer_size={self._buffer_size}, flush_interval={self._flush_interval}s)")
+        logger.info(
+            f"Stream producer started (buffer_size={self._buffer_size}, flush_interval={self._flush_interval}s, "
+            f"max_buffer_events={self.config.max_buffer_events}, overflow_policy={self.config.overflow_policy.value})"
+        )
     
     async def stop(self) -> None:
         """Stop the stream producer and flush remaining events"""
@@ -134,19 +277,43 @@ class StreamProducer:
                 await self._flush_task
             except asyncio.CancelledError:
                 pass
+            self._flush_task = None
         
         # Flush remaining events
-        await self._flush_buffer()
+        try:
+            await self._flush_buffer()
+        except Exception as e:
+            logger.error(f"Failed to flush events on shutdown: {e}")
+        if self._spill_task:
+            await self._spill_task
         logger.info("Stream producer stopped")
     
     async def produce_event(self, event: StreamEvent) -> None:
-        """Add event to buffer for streaming"""
-        self._event_buffer.append(event)
-        
-        # Flush immediately if buffer is full
-        if len(self._event_buffer) >= self._buffer_size:
+        """Encode an event and add it to the buffer for streaming"""
+        entry = (self._streams[event.event_type], encode_event(event))
+        capacity = self.config.max_buffer_events
+
+        if len(self._event_buffer) >= capacity:
             self._stats["buffer_overflows"] += 1
-            await self._flush_buffer()
+            policy = self.config.overflow_policy
+            if policy == OverflowPolicy.SPILL:
+                self._spill([entry])
+                return
+            if policy == OverflowPolicy.DROP_OLDEST:
+                self._event_buffer.popleft()
+                self._stats["events_dropped"] += 1
+            else:
+                while len(self._event_buffer) >= capacity:
+                    if self._flush_task is None:
+                        await self._flush_buffer()
+                        continue
+                    self._space_available.clear()
+                    self._flush_wakeup.set()
+                    await self._space_available.wait()
+
+        self._event_buffer.append(entry)
+        if len(self._event_buffer) >= self._buffer_size:
+            self._flush_wakeup.set()
     
     async def produce_memory_operation(
         self,
@@ -254,9 +421,9 @@ class StreamProducer:
     
     async def _periodic_flush(self) -> None:
         """
-        Periodically flushes buffered events to their respective streams, applying error handling with exponential backoff and a circuit breaker.
+        Flushes buffered events whenever the buffer reaches the flush batch size or the flush interval elapses, with exponential backoff and a circuit breaker on errors.
         
-        This coroutine runs in a loop, sleeping for the configured flush interval before attempting to flush the event buffer. On repeated flush failures, it increases the delay between attempts using exponential backoff with jitter, and after a threshold of consecutive errors, temporarily halts further attempts before retrying. Cancels cleanly when the task is stopped.
+        After a successful flush, events spilled to the local file are replayed. On repeated flush failures the delay between attempts grows exponentially with jitter, and after a threshold of consecutive errors further attempts are halted temporarily. Cancels cleanly when the task is stopped.
         """
         consecutive_errors = 0
         max_consecutive_errors = 10
@@ -265,8 +432,14 @@ class StreamProducer:
         
         while True:
             try:
-                await asyncio.sleep(self._flush_interval)
+                try:
+                    await asyncio.wait_for(self._flush_wakeup.wait(), timeout=self._flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_wakeup.clear()
                 await self._flush_buffer()
+                if len(self._event_buffer) < self._buffer_size:
+                    await self._replay_spill()
                 consecutive_errors = 0  # Reset error count on success
             except asyncio.CancelledError:
                 break
@@ -289,57 +462,141 @@ class StreamProducer:
         """
         Flushes all buffered events to their corresponding DragonflyDB streams.
         
-        Events are grouped by stream type and sent to DragonflyDB using the xadd command, maintaining a maximum of 10,000 events per stream. On successful flush, event production statistics are updated. If an error occurs during the flush, failed events are re-added to the buffer and failure statistics are incremented.
+        The buffer is drained in batches of at most ``max_batch_size`` events; each batch is sent as one non-transactional pipeline per stream, with the streams' pipelines in flight concurrently. Events rejected by the server are counted as failed; if a pipeline cannot be sent, its events are requeued (or spilled) and the error is re-raised so the flush loop backs off.
         """
-        if not self._event_buffer:
-            return
-        
-        events_to_flush = self._event_buffer.copy()
-        self._event_buffer.clear()
+        while self._event_buffer:
+            count = min(len(self._event_buffer), self.config.max_batch_size)
+            batch = [self._event_buffer.popleft() for _ in range(count)]
+            self._space_available.set()
+            await self._send_batch(batch)
+    
+    async def _send_batch(self, batch: List[BufferedEvent]) -> None:
+        """Send one batch, one pipeline per stream"""
+        groups: Dict[str, List[Dict[str, str]]] = {}
+        for stream_name, event_fields in batch:
+            groups.setdefault(stream_name, []).append(event_fields)
         
         try:
-            client = await get_dragonfly_client()
-            
-            # Group events by stream
-            streams_data: Dict[str, List[Dict[str, Any]]] = {}
-            for event in events_to_flush:
-                stream_name = self._streams[event.event_type]
-                if stream_name not in streams_data:
-                    streams_data[stream_name] = []
-                streams_data[stream_name].append(event.to_dict())
-            
-            # Send events to streams
-            for stream_name, events in streams_data.items():
-                for event_data in events:
-                    try:
-                        # Add to DragonflyDB stream
-                        stream_id = await client.xadd(
-                            stream_name,
-                            event_data,
-                            maxlen=10000  # Keep last 10k events per stream
-                        )
-                        
-                        self._stats["events_produced"] += 1
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to add event to stream {stream_name}: {e}")
-                        self._stats["events_failed"] += 1
-            
-            self._stats["last_flush"] = datetime.utcnow().isoformat()
-            logger.debug(f"Flushed {len(events_to_flush)} events to streams")
-            
-        except Exception as e:
-            logger.error(f"Failed to flush events to streams: {e}")
-            # Re-add events to buffer on failure
-            self._event_buffer.extend(events_to_flush)
-            self._stats["events_failed"] += len(events_to_flush)
+            client = await self._client_factory()
+        except Exception:
+            self._requeue(batch)
+            raise
+        
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._send_stream(client, stream_name, entries) for stream_name, entries in groups.items()),
+            return_exceptions=True
+        )
+        self._flush_latency.observe((time.perf_counter() - start) * 1000)
+        
+        failed: List[BufferedEvent] = []
+        error: Optional[BaseException] = None
+        delivered = 0
+        for (stream_name, entries), result in zip(groups.items(), results):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to send {len(entries)} events to stream {stream_name}: {result}")
+                failed.extend((stream_name, entry) for entry in entries)
+                error = result
+            else:
+                delivered += len(entries) - result
+                self._stats["events_failed"] += result
+        
+        self._stats["events_produced"] += delivered
+        self._stats["flushes"] += 1
+        self._stats["last_flush"] = datetime.utcnow().isoformat()
+        self._throughput.record(delivered)
+        logger.debug(f"Flushed {delivered} events to {len(groups)} streams")
+        
+        if failed:
+            self._requeue(failed)
+            raise error  # type: ignore[misc]
+    
+    async def _send_stream(self, client: Any, stream_name: str, entries: List[Dict[str, str]]) -> int:
+        """XADD entries to one stream in a single round trip; returns the number rejected"""
+        pipe = client.pipeline(transaction=False)
+        for entry in entries:
+            pipe.xadd(stream_name, entry, maxlen=self.config.stream_maxlen, approximate=True)
+        replies = await pipe.execute(raise_on_error=False)
+        return sum(1 for reply in replies if isinstance(reply, Exception))
+    
+    def _requeue(self, entries: List[BufferedEvent]) -> None:
+        """Put unsent events back at the front of the buffer, honouring the overflow policy"""
+        if self.config.overflow_policy == OverflowPolicy.SPILL:
+            self._spill(entries)
+            return
+        self._event_buffer.extendleft(reversed(entries))
+        if self.config.overflow_policy == OverflowPolicy.DROP_OLDEST:
+            while len(self._event_buffer) > self.config.max_buffer_events:
+                self._event_buffer.popleft()
+                self._stats["events_dropped"] += 1
+    
+    def _spill(self, entries: List[BufferedEvent]) -> None:
+        """Queue events for the append-only spill file; the write runs off the event loop"""
+        self._spill_pending.extend(json.dumps(entry, separators=(",", ":")) for entry in entries)
+        self._stats["events_spilled"] += len(entries)
+        if self._spill_task is None or self._spill_task.done():
+            self._spill_task = asyncio.create_task(self._write_spill())
+    
+    async def _write_spill(self) -> None:
+        async with self._spill_lock:
+            while self._spill_pending:
+                lines, self._spill_pending = self._spill_pending, []
+                try:
+                    await asyncio.to_thread(self._append_lines, self._spill_path, lines)
+                except Exception as e:
+                    logger.error(f"Failed to spill {len(lines)} events to {self._spill_path}: {e}")
+                    self._stats["events_failed"] += len(lines)
+    
+    @staticmethod
+    def _append_lines(path: str, lines: List[str]) -> None:
+        with open(path, "a", encoding="utf-8") as spill_file:
+            spill_file.write("\n".join(lines) + "\n")
+    
+    @staticmethod
+    def _take_file(path: str, replay_path: str) -> List[str]:
+        """Move the spill file aside (continuing an interrupted replay first) and read it"""
+        if not os.path.exists(replay_path):
+            if not os.path.exists(path):
+                return []
+            os.replace(path, replay_path)
+        with open(replay_path, encoding="utf-8") as replay_file:
+            return [line for line in replay_file.read().splitlines() if line]
+    
+    async def _replay_spill(self) -> None:
+        """Send events from the spill file, oldest first"""
+        replay_path = self._spill_path + ".replay"
+        if not os.path.exists(self._spill_path) and not os.path.exists(replay_path):
+            return
+        
+        async with self._spill_lock:
+            lines = await asyncio.to_thread(self._take_file, self._spill_path, replay_path)
+            step = self.config.max_batch_size
+            for offset in range(0, len(lines), step):
+                batch = [tuple(json.loads(line)) for line in lines[offset:offset + step]]
+                try:
+                    await self._send_batch(batch)  # type: ignore[arg-type]
+                except Exception:
+                    # _send_batch re-queued the failed part of this batch; keep the rest on disk
+                    remaining = lines[offset + step:]
+                    if remaining:
+                        await asyncio.to_thread(self._append_lines, self._spill_path, remaining)
+                    await asyncio.to_thread(os.remove, replay_path)
+                    raise
+                self._stats["events_replayed"] += len(batch)
+            await asyncio.to_thread(os.remove, replay_path)
     
     async def get_stats(self) -> Dict[str, Any]:
         """Get producer statistics"""
         stats = self._stats.copy()
         stats.update({
             "buffer_size": len(self._event_buffer),
-            "max_buffer_size": self._buffer_size,
+            "flush_batch_size": self._buffer_size,
+            "max_buffer_size": self.config.max_buffer_events,
+            "overflow_policy": self.config.overflow_policy.value,
+            "spill_path": self._spill_path,
+            "spill_pending": len(self._spill_pending),
+            "throughput_events_per_second": self._throughput.rate(),
+            "flush_latency": self._flush_latency.snapshot(),
             "configured_streams": list(self._streams.values()),
             "source": self.source,
         })
@@ -348,7 +605,7 @@ class StreamProducer:
     async def get_stream_info(self) -> Dict[str, Any]:
         """Get information about all streams"""
         try:
-            client = await get_dragonfly_client()
+            client = await self._client_factory()
             stream_info = {}
             
             for event_type, stream_name in self._streams.items():
@@ -391,7 +648,7 @@ async def get_stream_producer() -> StreamProducer:
 async def initialize_stream_producer(source_identifier: str = "mcp-server") -> None:
     """Initialize the global stream producer"""
     global _stream_producer
-    _stream_producer = StreamProducer(source_identifier)
+    _stream_producer = StreamProducer(source_identifier, ProducerConfig.from_env())
     await _stream_producer.start()
 
 async def shutdown_stream_producer() -> None:
@@ -0,0 +1,376 @@
+"""
+Incremental Windowed Aggregation for Streaming Feature Workers
+
+Windows keep running aggregates instead of raw events, so adding an event is
+O(1) and reading a window's statistics is independent of how many events it
+holds:
+- Sliding and tumbling windows split time into fixed panes; each pane holds
+  counts, sums, sums of squares, min/max, per-key counters and a quantile
+  sketch. Window totals are updated as events enter and panes expire
+  (counts, sums, key counters and sketch bins are subtractive), and only
+  min/max are merged across the live panes on read
+- Quantiles come from a log-bucketed sketch with bounded relative error that
+  can be merged and subtracted exactly
+- Session windows track per-key activity and close a session after an
+  inactivity gap
+"""
+
+import math
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Mapping, Optional
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch-style) for non-negative values.
+
+    Each value lands in bucket ``ceil(log_gamma(value))``, so any quantile is
+    answered within ``relative_accuracy`` of the true value. Bucket counts
+    add and subtract exactly, which lets sliding windows expire panes.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Counter = Counter()
+        self.zero_count = 0
+        self.count = 0
+
+    def bucket(self, value: float) -> Optional[int]:
+        """Bucket index of a value (None for the zero bucket)"""
+        return math.ceil(math.log(value) / self._log_gamma) if value > 0 else None
+
+    def add(self, value: float) -> None:
+        self.add_bucket(self.bucket(value))
+
+    def add_bucket(self, bucket: Optional[int]) -> None:
+        if bucket is None:
+            self.zero_count += 1
+        else:
+            self.bins[bucket] += 1
+        self.count += 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        self.bins.update(other.bins)
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def subtract(self, other: "QuantileSketch") -> None:
+        self.bins.subtract(other.bins)
+        for key in [k for k, n in self.bins.items() if n <= 0]:
+            del self.bins[key]
+        self.zero_count -= other.zero_count
+        self.count -= other.count
+
+    def quantile(self, q: float) -> float:
+        if self.count <= 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(k-1), gamma^k] in relative terms
+                return 2 * self._gamma ** key / (self._gamma + 1)
+        return 2 * self._gamma ** max(self.bins) / (self._gamma + 1)
+
+
+@dataclass
+class RunningStats:
+    """Count, sum, sum of squares and extrema of one numeric field"""
+    count: int = 0
+    total: float = 0.0
+    total_sq: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation"""
+        if self.count < 2:
+            return 0.0
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+@dataclass
+class Pane:
+    """Aggregates of the events whose timestamps fall in one pane"""
+    start: float
+    count: int = 0
+    first_ts: float = math.inf
+    last_ts: float = -math.inf
+    keys: Counter = field(default_factory=Counter)
+    stats: Dict[str, RunningStats] = field(default_factory=dict)
+    sketches: Dict[str, QuantileSketch] = field(default_factory=dict)
+
+
+@dataclass
+class WindowSnapshot:
+    """Point-in-time statistics of a window"""
+    size_seconds: float
+    count: int
+    first_ts: Optional[float]
+    last_ts: Optional[float]
+    keys: Dict[str, int]
+    stats: Dict[str, RunningStats]
+    sketches: Dict[str, QuantileSketch]
+
+    @property
+    def rate(self) -> float:
+        """Events per second between the first and last event (at least one second)"""
+        if not self.count or self.first_ts is None or self.last_ts is None:
+            return 0.0
+        return self.count / max(1.0, self.last_ts - self.first_ts)
+
+    def distribution(self) -> Dict[str, float]:
+        return {key: n / self.count for key, n in self.keys.items()} if self.count else {}
+
+    def quantile(self, name: str, q: float) -> float:
+        sketch = self.sketches.get(name)
+        return sketch.quantile(q) if sketch else 0.0
+
+
+class SlidingWindow:
+    """
+    Event-time sliding window built from fixed panes.
+
+    ``size_seconds`` is the window length and ``slide_seconds`` how often
+    results are emitted; a tumbling window is one whose slide equals its
+    size. Events are assigned to panes of ``pane_seconds`` (by default 1/60
+    of the window, or the whole window for tumbling windows) and a pane
+    expires once its start leaves the window, so the live span is between
+    ``size - pane`` and ``size`` seconds.
+    """
+
+    def __init__(
+        self,
+        size_seconds: float,
+        slide_seconds: Optional[float] = None,
+        pane_seconds: Optional[float] = None,
+        quantile_fields: tuple = (),
+        relative_accuracy: float = 0.01,
+    ) -> None:
+        self.size_seconds = size_seconds
+        self.slide_seconds = slide_seconds or size_seconds
+        if pane_seconds is None:
+            pane_seconds = size_seconds if self.slide_seconds >= size_seconds else size_seconds / 60
+        self.pane_seconds = pane_seconds
+        self.quantile_fields = frozenset(quantile_fields)
+        self.relative_accuracy = relative_accuracy
+
+        self._panes: Deque[Pane] = deque()
+        self._count = 0
+        self._keys: Counter = Counter()
+        self._totals: Dict[str, RunningStats] = {}
+        self._sketches: Dict[str, QuantileSketch] = {}
+        self._watermark = -math.inf
+        self._next_emit = -math.inf
+        self.late_events = 0
+
+    @property
+    def is_tumbling(self) -> bool:
+        return self.slide_seconds >= self.size_seconds
+
+    def _pane_start(self, timestamp: float) -> float:
+        return math.floor(timestamp / self.pane_seconds) * self.pane_seconds
+
+    def add(self, timestamp: float, key: Optional[str] = None, values: Optional[Mapping[str, float]] = None) -> None:
+        """Add one event; ``values`` maps numeric field names to this event's values"""
+        if timestamp > self._watermark:
+            self.advance(timestamp)
+        start = self._pane_start(timestamp)
+        if start <= self._watermark - self.size_seconds:
+            self.late_events += 1
+            return
+
+        if self._panes and self._panes[-1].start == start:
+            pane = self._panes[-1]
+        elif not self._panes or start > self._panes[-1].start:
+            pane = Pane(start)
+            self._panes.append(pane)
+        else:
+            # Out-of-order event for an earlier pane that is still live
+            index = next(i for i in range(len(self._panes) - 1, -1, -1) if self._panes[i].start <= start) \
+                if start >= self._panes[0].start else -1
+            if index >= 0 and self._panes[index].start == start:
+                pane = self._panes[index]
+            else:
+                pane = Pane(start)
+                self._panes.insert(index + 1, pane)
+
+        pane.count += 1
+        self._count += 1
+        pane.first_ts = min(pane.first_ts, timestamp)
+        pane.last_ts = max(pane.last_ts, timestamp)
+        if key is not None:
+            pane.keys[key] += 1
+            self._keys[key] += 1
+
+        for name, value in (values or {}).items():
+            stats = pane.stats.get(name)
+            if stats is None:
+                stats = pane.stats[name] = RunningStats()
+            stats.add(value)
+            totals = self._totals.get(name)
+            if totals is None:
+                totals = self._totals[name] = RunningStats()
+            totals.count += 1
+            totals.total += value
+            totals.total_sq += value * value
+
+            if name in self.quantile_fields:
+                window_sketch = self._sketches.get(name)
+                if window_sketch is None:
+                    window_sketch = self._sketches[name] = QuantileSketch(self.relative_accuracy)
+                sketch = pane.sketches.get(name)
+                if sketch is None:
+                    sketch = pane.sketches[name] = QuantileSketch(self.relative_accuracy)
+                bucket = window_sketch.bucket(value)
+                sketch.add_bucket(bucket)
+                window_sketch.add_bucket(bucket)
+
+    def advance(self, now: float) -> None:
+        """Move the window's clock forward and expire panes that left the window"""
+        if now > self._watermark:
+            self._watermark = now
+        cutoff = self._watermark - self.size_seconds
+        while self._panes and self._panes[0].start <= cutoff:
+            self._expire(self._panes.popleft())
+
+    def _expire(self, pane: Pane) -> None:
+        self._count -= pane.count
+        self._keys.subtract(pane.keys)
+        for key, n in pane.keys.items():
+            if self._keys[key] <= 0:
+                del self._keys[key]
+        for name, stats in pane.stats.items():
+            totals = self._totals[name]
+            totals.count -= stats.count
+            totals.total -= stats.total
+            totals.total_sq -= stats.total_sq
+            if totals.count <= 0:
+                del self._totals[name]
+        for name, sketch in pane.sketches.items():
+            self._sketches[name].subtract(sketch)
+
+    def should_emit(self, now: float) -> bool:
+        """True once per slide interval (aligned to slide boundaries)"""
+        return now >= self._next_emit
+
+    def mark_emitted(self, now: float) -> None:
+        self._next_emit = (math.floor(now / self.slide_seconds) + 1) * self.slide_seconds
+
+    def snapshot(self) -> WindowSnapshot:
+        """Current window statistics; cost is O(panes + keys), not O(events)"""
+        stats: Dict[str, RunningStats] = {}
+        for name, totals in self._totals.items():
+            minimum = min((p.stats[name].minimum for p in self._panes if name in p.stats), default=0.0)
+            maximum = max((p.stats[name].maximum for p in self._panes if name in p.stats), default=0.0)
+            stats[name] = RunningStats(totals.count, totals.total, totals.total_sq, minimum, maximum)
+        return WindowSnapshot(
+            size_seconds=self.size_seconds,
+            count=self._count,
+            first_ts=self._panes[0].first_ts if self._panes else None,
+            last_ts=self._panes[-1].last_ts if self._panes else None,
+            keys=dict(self._keys),
+            stats=stats,
+            sketches=self._sketches,
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class TumblingWindow(SlidingWindow):
+    """Non-overlapping windows: one pane per window"""
+
+    def __init__(self, size_seconds: float, **kwargs: Any) -> None:
+        super().__init__(size_seconds, size_seconds, pane_seconds=size_seconds, **kwargs)
+
+
+@dataclass
+class Session:
+    """Activity of one key between inactivity gaps"""
+    key: str
+    start: float
+    last: float
+    count: int = 0
+
+    @property
+    def duration(self) -> float:
+        return self.last - self.start
+
+
+class SessionWindow:
+    """
+    Per-key session windows closed after ``gap_seconds`` of inactivity.
+
+    Active sessions are kept in last-activity order, so expiring idle
+    sessions only looks at the sessions that actually close. Closed sessions
+    are folded into running statistics and the most recent ones kept.
+    """
+
+    def __init__(self, gap_seconds: float, max_closed: int = 1000) -> None:
+        self.gap_seconds = gap_seconds
+        self._active: "OrderedDict[str, Session]" = OrderedDict()
+        self.closed: Deque[Session] = deque(maxlen=max_closed)
+        self.closed_durations = RunningStats()
+        self.closed_event_counts = RunningStats()
+        self._watermark = -math.inf
+
+    def add(self, timestamp: float, key: str) -> None:
+        self.advance(timestamp)
+        session = self._active.get(key)
+        if session is None:
+            session = self._active[key] = Session(key, timestamp, timestamp)
+        else:
+            session.last = max(session.last, timestamp)
+            self._active.move_to_end(key)
+        session.count += 1
+
+    def advance(self, now: float) -> List[Session]:
+        """Close sessions idle for longer than the gap; returns them"""
+        if now > self._watermark:
+            self._watermark = now
+        closed = []
+        while self._active:
+            key, session = next(iter(self._active.items()))
+            if self._watermark - session.last <= self.gap_seconds:
+                break
+            del self._active[key]
+            self.closed.append(session)
+            self.closed_durations.add(session.duration)
+            self.closed_event_counts.add(session.count)
+            closed.append(session)
+        return closed
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "active_sessions": len(self._active),
+            "closed_sessions": self.closed_durations.count,
+            "average_duration_seconds": self.closed_durations.mean,
+            "max_duration_seconds": self.closed_durations.maximum if self.closed_durations.count else 0.0,
+            "average_events_per_session": self.closed_event_counts.mean,
+        }
@@ -0,0 +1,274 @@
+"""
+Batched Telemetry Ingestion for GraphMemory-IDE
+
+Provides a group-commit writer that coalesces telemetry events from many
+concurrent HTTP requests into a single bulk ``UNWIND ... CREATE`` statement
+against Kuzu:
+- Requests enqueue their events and await a per-request future
+- A single writer task drains the queue until ``max_batch_size`` events are
+  pending or ``max_linger_ms`` has elapsed since the first pending event
+- Each committed batch reports latency metrics and fires one callback so
+  callers can emit a single aggregated stream event per batch
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from server.graph_database import run_on_connection
+from server.monitoring.metrics import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_UNWIND_QUERY = (
+    "UNWIND $events AS ev "
+    "CREATE (e:TelemetryEvent {event_type: ev.event_type, timestamp: ev.timestamp, "
+    "user_id: ev.user_id, session_id: ev.session_id, data: ev.data})"
+)
+
+
+@dataclass
+class TelemetryBatchConfig:
+    """Group-commit tuning knobs"""
+    max_batch_size: int = 1000
+    max_linger_ms: float = 10.0
+    max_queue_size: int = 100_000
+
+
+@dataclass
+class TelemetryBatchResult:
+    """Outcome of one committed group batch"""
+    batch_id: int
+    event_count: int
+    request_count: int
+    latency_ms: float
+    queue_wait_ms: float
+    event_type_counts: Dict[str, int] = field(default_factory=dict)
+    user_count: int = 0
+    session_count: int = 0
+
+
+@dataclass
+class _PendingSubmission:
+    """Events submitted by one request, resolved once their batch commits"""
+    rows: List[Dict[str, Any]]
+    future: asyncio.Future
+    enqueued_at: float
+
+
+BatchCommitCallback = Callable[[TelemetryBatchResult], Awaitable[None]]
+
+
+def telemetry_event_to_row(event: Any) -> Dict[str, Any]:
+    """Convert a TelemetryEvent model (or plain dict) into an UNWIND parameter row"""
+    if hasattr(event, "dict"):
+        payload = event.dict()
+    else:
+        payload = dict(event)
+
+    event_type = payload.get("event_type")
+    if hasattr(event_type, "value"):
+        event_type = event_type.value
+
+    return {
+        "event_type": event_type,
+        "timestamp": payload.get("timestamp"),
+        "user_id": payload.get("user_id"),
+        "session_id": payload.get("session_id"),
+        "data": json.dumps(payload.get("data") or {}, default=str),
+    }
+
+
+class TelemetryBatchWriter:
+    """
+    Group-commit writer for TelemetryEvent nodes.
+
+    All writes go through one background task, so concurrent requests never
+    contend on the Kuzu connection and each commit amortises the statement
+    round trip over every event that arrived during the linger window.
+    """
+
+    def __init__(
+        self,
+        connection: Any,  # AsyncGraphConnectionPool or kuzu.Connection
+        config: Optional[TelemetryBatchConfig] = None,
+        on_commit: Optional[BatchCommitCallback] = None,
+    ) -> None:
+        self.connection = connection
+        self.config = config or TelemetryBatchConfig()
+        self.on_commit = on_commit
+
+        self._queue: "asyncio.Queue[Optional[_PendingSubmission]]" = asyncio.Queue()
+        self._queued_events = 0
+        self._writer_task: Optional[asyncio.Task] = None
+        self._running = False
+        self._batch_counter = 0
+        self._stats: Dict[str, Any] = {
+            "batches_committed": 0,
+            "batches_failed": 0,
+            "events_committed": 0,
+            "requests_committed": 0,
+            "last_batch_latency_ms": 0.0,
+            "max_batch_latency_ms": 0.0,
+            "last_batch_size": 0,
+        }
+
+    async def start(self) -> None:
+        """Start the background writer task"""
+        if self._running:
+            return
+        self._running = True
+        self._writer_task = asyncio.create_task(self._writer_loop())
+        logger.info(
+            f"Telemetry batch writer started (max_batch_size={self.config.max_batch_size}, "
+            f"max_linger_ms={self.config.max_linger_ms})"
+        )
+
+    async def stop(self) -> None:
+        """Stop the writer after committing everything already queued"""
+        if not self._running:
+            return
+        self._running = False
+
+        if self._writer_task:
+            # The sentinel is queued behind every pending submission, so the
+            # writer commits them all before exiting.
+            self._queue.put_nowait(None)
+            await self._writer_task
+            self._writer_task = None
+
+        logger.info("Telemetry batch writer stopped")
+
+    async def submit(self, rows: List[Dict[str, Any]]) -> TelemetryBatchResult:
+        """
+        Enqueue rows for the next group commit and wait until they are durable.
+
+        Raises:
+            RuntimeError: If the writer is not running or the queue is full.
+        """
+        if not self._running:
+            raise RuntimeError("Telemetry batch writer not running")
+        if not rows:
+            raise ValueError("No telemetry events supplied")
+        if self._queued_events + len(rows) > self.config.max_queue_size:
+            get_metrics_collector().record_error("telemetry_queue_full", "telemetry_batch")
+            raise RuntimeError("Telemetry ingest queue is full")
+
+        loop = asyncio.get_running_loop()
+        submission = _PendingSubmission(rows=rows, future=loop.create_future(), enqueued_at=time.perf_counter())
+        self._queued_events += len(rows)
+        self._queue.put_nowait(submission)
+        return await submission.future
+
+    async def _writer_loop(self) -> None:
+        """Collect submissions into batches bounded by size and linger time"""
+        linger = self.config.max_linger_ms / 1000.0
+        stopping = False
+
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            pending_events = len(first.rows)
+            deadline = time.perf_counter() + linger
+
+            while pending_events < self.config.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if nxt is None:
+                    stopping = True
+                    break
+                batch.append(nxt)
+                pending_events += len(nxt.rows)
+
+            try:
+                await self._commit(batch)
+            except Exception as e:
+                logger.error(f"Telemetry batch writer error: {e}")
+
+    async def _commit(self, batch: List[_PendingSubmission]) -> None:
+        """Write a batch in one statement and resolve every waiting request"""
+        if not batch:
+            return
+
+        rows = [row for submission in batch for row in submission.rows]
+        self._queued_events -= len(rows)
+        self._batch_counter += 1
+        batch_id = self._batch_counter
+
+        started = time.perf_counter()
+        queue_wait_ms = (started - min(s.enqueued_at for s in batch)) * 1000
+        metrics_collector = get_metrics_collector()
+
+        try:
+            await run_on_connection(self.connection, self._execute_bulk_insert, rows)
+        except Exception as e:
+            self._stats["batches_failed"] += 1
+            metrics_collector.record_error("database_error", "telemetry_batch")
+            logger.error(f"Telemetry batch {batch_id} ({len(rows)} events) failed: {e}")
+            for submission in batch:
+                if not submission.future.done():
+                    submission.future.set_exception(e)
+            return
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        event_types = Counter(str(row["event_type"]) for row in rows)
+        result = TelemetryBatchResult(
+            batch_id=batch_id,
+            event_count=len(rows),
+            request_count=len(batch),
+            latency_ms=latency_ms,
+            queue_wait_ms=queue_wait_ms,
+            event_type_counts=dict(event_types),
+            user_count=len({row["user_id"] for row in rows if row["user_id"]}),
+            session_count=len({row["session_id"] for row in rows if row["session_id"]}),
+        )
+
+        self._stats["batches_committed"] += 1
+        self._stats["events_committed"] += len(rows)
+        self._stats["requests_committed"] += len(batch)
+        self._stats["last_batch_latency_ms"] = latency_ms
+        self._stats["max_batch_latency_ms"] = max(self._stats["max_batch_latency_ms"], latency_ms)
+        self._stats["last_batch_size"] = len(rows)
+
+        metrics_collector.record_database_query("UNWIND_CREATE", "TelemetryEvent", latency_ms / 1000)
+        metrics_collector.record_histogram("telemetry_batch_commit", latency_ms / 1000)
+        metrics_collector.record_histogram("telemetry_batch_queue_wait", queue_wait_ms / 1000)
+        metrics_collector.increment("telemetry_events_ingested", len(rows))
+
+        for submission in batch:
+            if not submission.future.done():
+                submission.future.set_result(result)
+
+        if self.on_commit is not None:
+            try:
+                await self.on_commit(result)
+            except Exception as e:
+                logger.warning(f"Telemetry batch commit callback failed: {e}")
+
+    def _execute_bulk_insert(self, connection: Any, rows: List[Dict[str, Any]]) -> None:
+        """Issue bulk inserts in chunks of at most ``max_batch_size`` rows"""
+        step = max(1, self.config.max_batch_size)
+        for start in range(0, len(rows), step):
+            connection.execute(TELEMETRY_UNWIND_QUERY, {"events": rows[start:start + step]})
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get writer statistics"""
+        stats = self._stats.copy()
+        stats.update({
+            "running": self._running,
+            "queued_events": self._queued_events,
+            "max_batch_size": self.config.max_batch_size,
+            "max_linger_ms": self.config.max_linger_ms,
+        })
+        return stats
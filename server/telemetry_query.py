@@ -0,0 +1,143 @@
+"""
+Telemetry Listing Helpers for GraphMemory-IDE
+
+Keyset pagination and incremental NDJSON export for TelemetryEvent nodes:
+- Pages are ordered by ``(timestamp, internal offset)`` and continue from an
+  opaque cursor, so page N costs the same as page 1
+- NDJSON export pulls rows from the Kuzu result one at a time and writes the
+  stored ``data`` JSON through without decoding it, keeping memory constant
+  regardless of result size
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+TELEMETRY_RETURN_CLAUSE = (
+    "RETURN e.event_type, e.timestamp, e.user_id, e.session_id, e.data, offset(ID(e)) AS eid "
+    "ORDER BY e.timestamp, eid"
+)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a continuation token cannot be decoded"""
+
+
+def encode_cursor(timestamp: str, event_id: int) -> str:
+    """Encode the last row's sort key as an opaque continuation token"""
+    raw = json.dumps([timestamp, event_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode a continuation token produced by :func:`encode_cursor`"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, event_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(timestamp), int(event_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidCursorError(f"Invalid cursor: {e}")
+
+
+def build_telemetry_query(
+    filters: Optional[Dict[str, Any]] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build a keyset-paginated TelemetryEvent query.
+
+    ``filters`` maps TelemetryEvent properties to required values (None values
+    are ignored). ``offset`` is only honoured without a cursor, for clients
+    still using SKIP-based paging.
+    """
+    where_conditions: List[str] = []
+    params: Dict[str, Any] = {}
+
+    for prop, value in (filters or {}).items():
+        if value is not None:
+            where_conditions.append(f"e.{prop} = ${prop}")
+            params[prop] = value
+
+    if cursor:
+        after_timestamp, after_id = decode_cursor(cursor)
+        where_conditions.append(
+            "(e.timestamp > $after_ts OR (e.timestamp = $after_ts AND offset(ID(e)) > $after_id))"
+        )
+        params["after_ts"] = after_timestamp
+        params["after_id"] = after_id
+
+    query = "MATCH (e:TelemetryEvent) "
+    if where_conditions:
+        query += "WHERE " + " AND ".join(where_conditions) + " "
+    query += TELEMETRY_RETURN_CLAUSE
+    if offset and not cursor:
+        query += f" SKIP {int(offset)}"
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+    return query, params
+
+
+def row_to_event(row: List[Any]) -> Dict[str, Any]:
+    """Materialise a result row as an event dict (decoding ``data``)"""
+    return {
+        "event_type": row[0],
+        "timestamp": row[1],
+        "user_id": row[2],
+        "session_id": row[3],
+        "data": json.loads(row[4]) if row[4] else {},
+    }
+
+
+def fetch_page(connection: Any, query: str, params: Dict[str, Any], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Run a query built with ``limit + 1`` and return ``(events, next_cursor)``.
+
+    The extra row only signals that another page exists; it is not returned.
+    """
+    result = connection.execute(query, params)
+    events: List[Dict[str, Any]] = []
+    last_key: Optional[Tuple[str, int]] = None
+    has_more = False
+
+    while result.has_next():
+        row = result.get_next()
+        if len(events) == limit:
+            has_more = True
+            break
+        events.append(row_to_event(row))
+        last_key = (row[1], row[5])
+
+    next_cursor = encode_cursor(*last_key) if has_more and last_key else None
+    return events, next_cursor
+
+
+def iter_ndjson(connection: Any, query: str, params: Dict[str, Any], chunk_rows: int = 500) -> Iterator[bytes]:
+    """
+    Stream query results as NDJSON, ``chunk_rows`` lines per yielded chunk.
+
+    The stored ``data`` column is already JSON text, so it is spliced into the
+    line verbatim instead of being decoded and re-encoded.
+    """
+    result = connection.execute(query, params)
+    dumps = json.dumps
+    lines: List[str] = []
+
+    while result.has_next():
+        row = result.get_next()
+        lines.append(
+            '{"event_type":%s,"timestamp":%s,"user_id":%s,"session_id":%s,"data":%s,"cursor":%s}\n' % (
+                dumps(row[0]), dumps(row[1]), dumps(row[2]), dumps(row[3]),
+                row[4] or "{}", dumps(encode_cursor(row[1], row[5])),
+            )
+        )
+        if len(lines) >= chunk_rows:
+            yield "".join(lines).encode()
+            lines = []
+
+    if lines:
+        yield "".join(lines).encode()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Cache Codec Micro-Benchmark
+
+Compares cache payload codecs (serializer + compressor) on analytics
+result shapes: centrality and community responses as cached by the
+analytics engine, and a node embedding matrix.
+Run with: python server/tests/benchmark_cache_codecs.py
+"""
+
+import gzip
+import json
+import pickle
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from server.analytics.models import (
+    CentralityResponse, CentralityType, CommunityMetrics, CommunityResponse, NodeMetrics
+)
+from server.core.cache_codecs import COMPRESSORS, HEADER_SIZE, MAGIC, SERIALIZERS, CacheCodec
+
+
+def centrality_payload(nodes: int = 2000) -> Dict[str, Any]:
+    node_metrics = [
+        NodeMetrics(
+            node_id=f"memory_{i}",
+            centrality_scores={"pagerank": random.random(), "betweenness": random.random()},
+            local_clustering=random.random(),
+            degree=random.randint(1, 50),
+            neighbors=[f"memory_{random.randrange(nodes)}" for _ in range(8)],
+        )
+        for i in range(nodes)
+    ]
+    return CentralityResponse(
+        execution_time=0.42,
+        centrality_type=CentralityType.PAGERANK,
+        node_metrics=node_metrics,
+        top_nodes=[{"node_id": f"memory_{i}", "score": random.random()} for i in range(100)],
+        statistics={"mean": 0.1, "max": 0.9, "min": 0.0, "std": 0.05},
+    ).dict()
+
+
+def community_payload(communities: int = 300) -> Dict[str, Any]:
+    metrics = [
+        CommunityMetrics(
+            community_id=f"c{i}",
+            size=random.randint(5, 200),
+            density=random.random(),
+            modularity_contribution=random.random() / 10,
+            central_nodes=[f"memory_{random.randrange(10000)}" for _ in range(10)],
+            keywords=["graph", "memory", "retrieval"],
+        )
+        for i in range(communities)
+    ]
+    return CommunityResponse(
+        execution_time=1.3,
+        algorithm="louvain",
+        modularity=0.61,
+        num_communities=communities,
+        community_sizes=[m.size for m in metrics],
+        community_metrics=metrics,
+    ).dict()
+
+
+def embedding_payload(rows: int = 5000, dims: int = 384) -> np.ndarray:
+    return np.random.default_rng(0).standard_normal((rows, dims), dtype=np.float32)
+
+
+def _time(func: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def legacy_codecs() -> Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    """The pre-codec CacheManager formats (json or pickle, then gzip)"""
+    return {
+        "legacy json+gzip": (
+            lambda data: gzip.compress(json.dumps(data, default=str).encode()),
+            lambda body: json.loads(gzip.decompress(body)),
+        ),
+        "legacy pickle+gzip": (
+            lambda data: gzip.compress(pickle.dumps(data)),
+            lambda body: pickle.loads(gzip.decompress(body)),
+        ),
+    }
+
+
+def codec_matrix(data: Any) -> Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    """Every registered serializer/compressor pair that can encode ``data``"""
+    codecs = legacy_codecs()
+    names = ["ndarray"] if isinstance(data, np.ndarray) else [n for n in SERIALIZERS if n != "ndarray"]
+    for serializer_name in names:
+        serializer = SERIALIZERS[serializer_name]
+        for compressor in COMPRESSORS.values():
+            header = MAGIC + bytes((serializer.codec_id, compressor.codec_id))
+            codecs[f"{serializer.name}+{compressor.name}"] = (
+                lambda data, s=serializer, c=compressor, h=header: h + c.compress(s.dumps(data)),
+                lambda body, s=serializer, c=compressor: s.loads(c.decompress(body[HEADER_SIZE:])),
+            )
+    adaptive = CacheCodec()
+    codecs["CacheCodec(auto)"] = (adaptive.encode, adaptive.decode)
+    return codecs
+
+
+def run(repeat: int = 20) -> List[Dict[str, Any]]:
+    random.seed(0)
+    payloads = {
+        "centrality (2000 nodes)": centrality_payload(),
+        "community (300 communities)": community_payload(),
+        "embeddings (5000x384 f32)": embedding_payload(),
+    }
+    rows = []
+    for payload_name, data in payloads.items():
+        for codec_name, (encode, decode) in codec_matrix(data).items():
+            encoded = encode(data)
+            rows.append({
+                "payload": payload_name,
+                "codec": codec_name,
+                "bytes": len(encoded),
+                "encode_ms": _time(lambda: encode(data), repeat),
+                "decode_ms": _time(lambda: decode(encoded), repeat),
+            })
+    return rows
+
+
+def main() -> None:
+    print(f"Serializers: {', '.join(SERIALIZERS)} | Compressors: {', '.join(COMPRESSORS)}")
+    current = None
+    for row in run():
+        if row["payload"] != current:
+            current = row["payload"]
+            print(f"\n{current}")
+            print(f"  {'codec':<22} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+        print(f"  {row['codec']:<22} {row['bytes']:>10} {row['encode_ms']:>10.2f} {row['decode_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,543 @@
+"""
+Approximate Nearest-Neighbour Index for GraphMemory-IDE Top-K Search
+
+Provides an in-process IVF-flat vector index so ``/tools/topk`` no longer
+scans every node per query:
+- Float32, L2-normalised vectors grouped into inverted lists by k-means
+  centroid, persisted as ``.npy`` files and memory-mapped on load
+- Indexes keyed by ``(table, embedding_field, index_name)``
+- Built from Kuzu on startup or on first use, then kept current by pulling
+  nodes with a higher internal offset than the last sync plus explicit
+  upserts/removals from in-process writers
+- Pre-filtering through a set of allowed node offsets
+- Recall/latency benchmark against the exact scan
+"""
+
+import asyncio
+import json
+import logging
+import re
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from server.graph_database import run_on_connection
+
+logger = logging.getLogger(__name__)
+
+VectorIndexKey = Tuple[str, str, str]
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def validate_identifier(name: str) -> str:
+    """Reject table/property names that cannot be safely interpolated into Cypher"""
+    if not _IDENTIFIER_RE.match(name):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return name
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Return float32 row-normalised copies so dot product equals cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    if scores.size <= k:
+        return np.argsort(-scores)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part])]
+
+
+@dataclass
+class VectorIndexConfig:
+    """IVF-flat tuning parameters"""
+    nlist: Optional[int] = None          # Defaults to ~sqrt(N)
+    nprobe: int = 8
+    min_train_size: int = 1024           # Below this a single flat list is used
+    train_sample_size: int = 50_000
+    kmeans_iterations: int = 10
+    rebuild_delta_ratio: float = 0.2     # Rebuild once delta exceeds this fraction
+    refresh_interval_seconds: float = 5.0
+    seed: int = 42
+
+
+@dataclass
+class SearchHit:
+    """A single ANN result"""
+    node_offset: int
+    similarity: float
+
+
+class IVFFlatIndex:
+    """
+    Inverted-file index with exact (flat) scoring inside each probed list.
+
+    Vectors are stored sorted by list so each inverted list is a contiguous
+    slice ``vectors[list_offsets[i]:list_offsets[i + 1]]``. Inserts after the
+    last build go to an exact-scored delta buffer; removals are tombstoned
+    until the next rebuild.
+    """
+
+    def __init__(self, dim: int, config: Optional[VectorIndexConfig] = None) -> None:
+        self.dim = dim
+        self.config = config or VectorIndexConfig()
+        self.centroids = np.zeros((1, dim), dtype=np.float32)
+        self.list_offsets = np.zeros(2, dtype=np.int64)
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self._delta: Dict[int, np.ndarray] = {}
+        self._tombstones: set = set()
+        self._lock = threading.RLock()
+        self.max_synced_offset = -1
+        self.built_at = 0.0
+
+    @property
+    def size(self) -> int:
+        """Number of live vectors (base minus tombstoned, plus delta)"""
+        dead = 0
+        if self._tombstones:
+            dead = int(np.isin(self.ids, np.fromiter(self._tombstones, dtype=np.int64)).sum())
+        return int(self.ids.shape[0]) - dead + len(self._delta)
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    # ------------------------------------------------------------------ build
+
+    def build(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """(Re)build the index from scratch"""
+        ids_arr = np.asarray(ids, dtype=np.int64)
+        data = _normalize(vectors) if len(ids_arr) else np.zeros((0, self.dim), dtype=np.float32)
+
+        n = len(ids_arr)
+        if n < self.config.min_train_size:
+            centroids = _normalize(data.mean(axis=0)) if n else np.zeros((1, self.dim), dtype=np.float32)
+            assignments = np.zeros(n, dtype=np.int64)
+        else:
+            nlist = self.config.nlist or max(1, int(np.sqrt(n)))
+            centroids = self._train_kmeans(data, nlist)
+            assignments = self._assign(data, centroids)
+
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=centroids.shape[0])
+        offsets = np.zeros(centroids.shape[0] + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        with self._lock:
+            self.centroids = centroids.astype(np.float32)
+            self.list_offsets = offsets
+            self.vectors = np.ascontiguousarray(data[order])
+            self.ids = ids_arr[order]
+            self._delta = {}
+            self._tombstones = set()
+            if n:
+                self.max_synced_offset = max(self.max_synced_offset, int(ids_arr.max()))
+            self.built_at = time.time()
+
+    def _train_kmeans(self, data: np.ndarray, nlist: int) -> np.ndarray:
+        """Spherical k-means on a sample of the data"""
+        rng = np.random.default_rng(self.config.seed)
+        sample = data
+        if data.shape[0] > self.config.train_sample_size:
+            sample = data[rng.choice(data.shape[0], self.config.train_sample_size, replace=False)]
+
+        nlist = min(nlist, sample.shape[0])
+        centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+
+        for _ in range(self.config.kmeans_iterations):
+            assignments = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = np.bincount(assignments, minlength=nlist) == 0
+            # Re-seed empty lists from random samples so every list stays useful
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()), replace=False)]
+            centroids = _normalize(sums)
+
+        return centroids
+
+    @staticmethod
+    def _assign(data: np.ndarray, centroids: np.ndarray, chunk: int = 65_536) -> np.ndarray:
+        """Nearest centroid per row, chunked to bound the score matrix size"""
+        out = np.empty(data.shape[0], dtype=np.int64)
+        for start in range(0, data.shape[0], chunk):
+            out[start:start + chunk] = np.argmax(data[start:start + chunk] @ centroids.T, axis=1)
+        return out
+
+    # ---------------------------------------------------------------- updates
+
+    def upsert(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """Insert or replace vectors; existing entries are tombstoned"""
+        data = _normalize(vectors)
+        with self._lock:
+            for node_offset, vector in zip(ids, data):
+                node_offset = int(node_offset)
+                self._tombstones.add(node_offset)
+                self._delta[node_offset] = vector
+                self.max_synced_offset = max(self.max_synced_offset, node_offset)
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """Tombstone vectors; they are dropped on the next rebuild"""
+        removed = {int(i) for i in ids}
+        with self._lock:
+            self._tombstones |= removed
+            for node_offset in removed:
+                self._delta.pop(node_offset, None)
+
+    def needs_rebuild(self) -> bool:
+        base = max(1, int(self.ids.shape[0]))
+        return (len(self._delta) + len(self._tombstones)) / base > self.config.rebuild_delta_ratio
+
+    def compact(self) -> None:
+        """Fold the delta buffer and tombstones into a fresh build"""
+        ids, vectors = self.materialize()
+        self.build(ids, vectors)
+
+    def materialize(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Current live (ids, vectors), with the delta applied"""
+        with self._lock:
+            ids = self.ids
+            vectors = self.vectors
+            if self._tombstones:
+                keep = ~np.isin(ids, np.fromiter(self._tombstones, dtype=np.int64))
+                ids = ids[keep]
+                vectors = vectors[keep]
+            if self._delta:
+                ids = np.concatenate([ids, np.fromiter(self._delta.keys(), dtype=np.int64)])
+                vectors = np.vstack([vectors, np.stack(list(self._delta.values()))])
+            return np.asarray(ids), np.asarray(vectors, dtype=np.float32)
+
+    # ----------------------------------------------------------------- search
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int,
+        allowed_ids: Optional[np.ndarray] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[SearchHit]:
+        """Approximate top-k by cosine similarity, optionally pre-filtered"""
+        q = _normalize(np.asarray(query, dtype=np.float32))[0]
+        nprobe = min(nprobe or self.config.nprobe, self.nlist)
+
+        with self._lock:
+            probe = _top_k(self.centroids @ q, nprobe)
+            slices = [(int(self.list_offsets[c]), int(self.list_offsets[c + 1])) for c in probe]
+            cand_ids = np.concatenate([self.ids[s:e] for s, e in slices]) if slices else self.ids[:0]
+            cand_vecs = np.concatenate([self.vectors[s:e] for s, e in slices]) if slices else self.vectors[:0]
+            hits = self._score(q, cand_ids, cand_vecs, k, allowed_ids)
+
+            # A restrictive filter can leave the probed lists short; fall back to
+            # an exact scan over the filtered subset.
+            if allowed_ids is not None and len(hits) < k and nprobe < self.nlist:
+                hits = self._score(q, self.ids, self.vectors, k, allowed_ids)
+
+            if self._delta:
+                delta_hits = self._score(
+                    q, np.fromiter(self._delta.keys(), dtype=np.int64),
+                    np.stack(list(self._delta.values())), k, allowed_ids, apply_tombstones=False
+                )
+                hits = sorted(hits + delta_hits, key=lambda h: h.similarity, reverse=True)[:k]
+
+        return hits
+
+    def exact_search(self, query: Sequence[float], k: int, allowed_ids: Optional[np.ndarray] = None) -> List[SearchHit]:
+        """Brute-force top-k over all live vectors (ground truth for benchmarking)"""
+        q = _normalize(np.asarray(query, dtype=np.float32))[0]
+        ids, vectors = self.materialize()
+        return self._score(q, ids, vectors, k, allowed_ids, apply_tombstones=False)
+
+    def _score(
+        self,
+        q: np.ndarray,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        k: int,
+        allowed_ids: Optional[np.ndarray],
+        apply_tombstones: bool = True,
+    ) -> List[SearchHit]:
+        if ids.shape[0] == 0:
+            return []
+        mask = None
+        if allowed_ids is not None:
+            mask = np.isin(ids, allowed_ids)
+        if apply_tombstones and self._tombstones:
+            live = ~np.isin(ids, np.fromiter(self._tombstones, dtype=np.int64))
+            mask = live if mask is None else mask & live
+        if mask is not None:
+            ids = ids[mask]
+            vectors = vectors[mask]
+            if ids.shape[0] == 0:
+                return []
+        scores = vectors @ q
+        best = _top_k(scores, k)
+        return [SearchHit(node_offset=int(ids[i]), similarity=float(scores[i])) for i in best]
+
+    # ------------------------------------------------------------ persistence
+
+    def save(self, path: Path) -> None:
+        """Persist the index (delta folded in) and remap it from disk"""
+        if self._delta or self._tombstones:
+            self.compact()
+
+        tmp = path.with_name(path.name + ".tmp")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+
+        with self._lock:
+            np.save(tmp / "vectors.npy", self.vectors)
+            np.save(tmp / "ids.npy", self.ids)
+            np.save(tmp / "centroids.npy", self.centroids)
+            np.save(tmp / "list_offsets.npy", self.list_offsets)
+            (tmp / "meta.json").write_text(json.dumps({
+                "dim": self.dim,
+                "max_synced_offset": self.max_synced_offset,
+                "built_at": self.built_at,
+            }))
+
+            if path.exists():
+                shutil.rmtree(path)
+            tmp.rename(path)
+            self._map_arrays(path)
+
+    @classmethod
+    def load(cls, path: Path, config: Optional[VectorIndexConfig] = None) -> "IVFFlatIndex":
+        """Load a persisted index with vectors memory-mapped read-only"""
+        meta = json.loads((path / "meta.json").read_text())
+        index = cls(int(meta["dim"]), config)
+        index._map_arrays(path)
+        index.max_synced_offset = int(meta.get("max_synced_offset", -1))
+        index.built_at = float(meta.get("built_at", 0.0))
+        return index
+
+    def _map_arrays(self, path: Path) -> None:
+        self.vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        self.ids = np.load(path / "ids.npy")
+        self.centroids = np.load(path / "centroids.npy")
+        self.list_offsets = np.load(path / "list_offsets.npy")
+
+
+def sample_benchmark_queries(index: IVFFlatIndex, num_queries: int, noise: float = 0.05, seed: int = 0) -> np.ndarray:
+    """Perturbed copies of stored vectors, used as realistic benchmark queries"""
+    ids, vectors = index.materialize()
+    if vectors.shape[0] == 0:
+        return np.zeros((0, index.dim), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, vectors.shape[0], size=num_queries)]
+    return _normalize(picks + rng.normal(0.0, noise, size=picks.shape).astype(np.float32))
+
+
+def benchmark_index(
+    index: IVFFlatIndex,
+    queries: np.ndarray,
+    k: int = 10,
+    nprobe: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Compare ANN results against the exact scan: recall@k and latency percentiles"""
+    ann_latencies: List[float] = []
+    exact_latencies: List[float] = []
+    recalls: List[float] = []
+
+    for query in queries:
+        started = time.perf_counter()
+        exact = index.exact_search(query, k)
+        exact_latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        approx = index.search(query, k, nprobe=nprobe)
+        ann_latencies.append((time.perf_counter() - started) * 1000)
+
+        truth = {hit.node_offset for hit in exact}
+        if truth:
+            recalls.append(len(truth & {hit.node_offset for hit in approx}) / len(truth))
+
+    def _percentiles(values: List[float]) -> Dict[str, float]:
+        if not values:
+            return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+        arr = np.asarray(values)
+        return {
+            "p50_ms": float(np.percentile(arr, 50)),
+            "p95_ms": float(np.percentile(arr, 95)),
+            "p99_ms": float(np.percentile(arr, 99)),
+            "mean_ms": float(arr.mean()),
+        }
+
+    return {
+        "queries": int(len(queries)),
+        "k": k,
+        "nprobe": min(nprobe or index.config.nprobe, index.nlist),
+        "nlist": index.nlist,
+        "index_size": index.size,
+        "recall_at_k": float(np.mean(recalls)) if recalls else 0.0,
+        "ann": _percentiles(ann_latencies),
+        "exact": _percentiles(exact_latencies),
+    }
+
+
+class VectorIndexManager:
+    """
+    Registry of IVF-flat indexes keyed by ``(table, embedding_field, index_name)``.
+
+    ``connection`` arguments accept an AsyncGraphConnectionPool or a bare
+    kuzu.Connection; Kuzu access never runs on the event loop.
+    """
+
+    def __init__(self, base_dir: str, config: Optional[VectorIndexConfig] = None) -> None:
+        self.base_dir = Path(base_dir)
+        self.config = config or VectorIndexConfig()
+        self._indexes: Dict[VectorIndexKey, IVFFlatIndex] = {}
+        self._last_refresh: Dict[VectorIndexKey, float] = {}
+        self._build_locks: Dict[VectorIndexKey, asyncio.Lock] = {}
+
+    def _path(self, key: VectorIndexKey) -> Path:
+        return self.base_dir / "__".join(key)
+
+    def load_persisted(self) -> int:
+        """Memory-map every index persisted under ``base_dir``"""
+        if not self.base_dir.exists():
+            return 0
+        loaded = 0
+        for path in self.base_dir.iterdir():
+            parts = path.name.split("__")
+            if not path.is_dir() or len(parts) != 3 or not (path / "meta.json").exists():
+                continue
+            try:
+                self._indexes[tuple(parts)] = IVFFlatIndex.load(path, self.config)  # type: ignore[index]
+                loaded += 1
+            except Exception as e:
+                logger.warning(f"Failed to load vector index {path.name}: {e}")
+        logger.info(f"Loaded {loaded} persisted vector indexes from {self.base_dir}")
+        return loaded
+
+    def save_all(self) -> None:
+        """Persist every index"""
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        for key, index in self._indexes.items():
+            try:
+                index.save(self._path(key))
+            except Exception as e:
+                logger.warning(f"Failed to persist vector index {key}: {e}")
+
+    def get(self, key: VectorIndexKey) -> Optional[IVFFlatIndex]:
+        return self._indexes.get(key)
+
+    async def get_or_build(self, connection: Any, table: str, embedding_field: str, index_name: str) -> IVFFlatIndex:
+        """Return the index for ``key``, building it from Kuzu or syncing new nodes as needed"""
+        key: VectorIndexKey = (
+            validate_identifier(table), validate_identifier(embedding_field), validate_identifier(index_name)
+        )
+        lock = self._build_locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = await run_on_connection(connection, self._build_from_kuzu, key)
+                self._indexes[key] = index
+                self._last_refresh[key] = time.monotonic()
+            elif time.monotonic() - self._last_refresh.get(key, 0.0) >= self.config.refresh_interval_seconds:
+                await run_on_connection(connection, self._sync_new_nodes, key, index)
+                self._last_refresh[key] = time.monotonic()
+        return index
+
+    def _build_from_kuzu(self, connection: Any, key: VectorIndexKey) -> IVFFlatIndex:
+        table, field, _ = key
+        started = time.perf_counter()
+        ids, vectors = self._fetch_vectors(
+            connection,
+            f"MATCH (n:{table}) WHERE n.{field} IS NOT NULL RETURN offset(ID(n)), n.{field}",
+        )
+        if vectors.shape[0] == 0:
+            raise LookupError(f"No embeddings found in {table}.{field}")
+
+        index = IVFFlatIndex(vectors.shape[1], self.config)
+        index.build(ids, vectors)
+        logger.info(
+            f"Built vector index {key} with {index.size} vectors, {index.nlist} lists "
+            f"in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        return index
+
+    def _sync_new_nodes(self, connection: Any, key: VectorIndexKey, index: IVFFlatIndex) -> None:
+        """Pull nodes appended since the last sync (Kuzu offsets grow monotonically)"""
+        table, field, _ = key
+        ids, vectors = self._fetch_vectors(
+            connection,
+            f"MATCH (n:{table}) WHERE n.{field} IS NOT NULL AND offset(ID(n)) > $since "
+            f"RETURN offset(ID(n)), n.{field}",
+            {"since": index.max_synced_offset},
+        )
+        if len(ids):
+            index.upsert(ids, vectors)
+            logger.debug(f"Synced {len(ids)} new vectors into index {key}")
+        if index.needs_rebuild():
+            index.compact()
+
+    @staticmethod
+    def _fetch_vectors(connection: Any, query: str, params: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        result = connection.execute(query, params or {})
+        ids: List[int] = []
+        rows: List[Sequence[float]] = []
+        while result.has_next():
+            node_offset, embedding = result.get_next()
+            if embedding:
+                ids.append(int(node_offset))
+                rows.append(embedding)
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(ids, dtype=np.int64), np.asarray(rows, dtype=np.float32)
+
+    def notify_upsert(self, table: str, embedding_field: str, node_offset: int, embedding: Sequence[float]) -> None:
+        """Apply a node write to every index over ``table.embedding_field``"""
+        for (t, f, _), index in self._indexes.items():
+            if t == table and f == embedding_field:
+                index.upsert([node_offset], np.asarray([embedding], dtype=np.float32))
+
+    def notify_delete(self, table: str, node_offset: int) -> None:
+        """Remove a deleted node from every index over ``table``"""
+        for (t, _, _), index in self._indexes.items():
+            if t == table:
+                index.remove([node_offset])
+
+    @staticmethod
+    def resolve_filter_ids(connection: Any, table: str, filters: Dict[str, Any]) -> np.ndarray:
+        """Node offsets in ``table`` whose properties equal every filter value"""
+        conditions = []
+        params: Dict[str, Any] = {}
+        for i, (prop, value) in enumerate(filters.items()):
+            conditions.append(f"n.{validate_identifier(prop)} = $f{i}")
+            params[f"f{i}"] = value
+        where = " AND ".join(conditions) if conditions else "true"
+        result = connection.execute(
+            f"MATCH (n:{validate_identifier(table)}) WHERE {where} RETURN offset(ID(n))", params
+        )
+        ids: List[int] = []
+        while result.has_next():
+            ids.append(int(result.get_next()[0]))
+        return np.asarray(ids, dtype=np.int64)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "/".join(key): {
+                "size": index.size,
+                "nlist": index.nlist,
+                "dim": index.dim,
+                "delta": len(index._delta),
+                "tombstones": len(index._tombstones),
+                "built_at": index.built_at,
+            }
+            for key, index in self._indexes.items()
+        }
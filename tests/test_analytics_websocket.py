@@ -0,0 +1,138 @@
+"""
+Analytics WebSocket Tests
+=========================
+Validates per-client send queues in the analytics ConnectionManager: the
+event-type subscription index, isolation of stalled clients from the
+broadcast path, slow-consumer eviction, queue/latency metrics and
+reconnects under an existing client id.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from server.streaming.analytics_websocket import ConnectionManager, SubscriptionRequest, WebSocketMessage
+
+
+class FakeWebSocket:
+    def __init__(self, stall=False):
+        self.query_params = {}
+        self.scope = {"subprotocols": []}
+        self.stall = stall
+        self.sent = []
+        self.closed = None
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        if self.stall:
+            await asyncio.Event().wait()
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        await self.send_text(data)
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+def _message(tick):
+    return WebSocketMessage(type="features_update", data={"tick": tick}, timestamp=f"t{tick}")
+
+
+async def _connect(manager, client_id, event_types, **kwargs):
+    websocket = FakeWebSocket(**kwargs)
+    await manager.connect(websocket, client_id)
+    await manager.subscribe(client_id, SubscriptionRequest(event_types=event_types))
+    return websocket
+
+
+class TestSubscriptionIndex:
+    """Event type to client index maintenance."""
+
+    @pytest.mark.asyncio
+    async def test_broadcast_reaches_only_subscribers(self):
+        manager = ConnectionManager()
+        features = await _connect(manager, "features", ["features"])
+        patterns = await _connect(manager, "patterns", ["patterns", "system_status"])
+        assert manager.event_subscribers == {
+            "features": {"features"}, "patterns": {"patterns"}, "system_status": {"patterns"}
+        }
+
+        await manager.subscribe("patterns", SubscriptionRequest(event_types=["features"]))
+        assert manager.event_subscribers == {"features": {"features", "patterns"}}
+
+        await manager.broadcast(_message(1), "features")
+        await manager.broadcast(_message(2), "patterns")
+        await manager.drain()
+        assert json.loads(features.sent[-1])["data"] == {"tick": 1}
+        assert json.loads(patterns.sent[-1])["data"] == {"tick": 1}
+
+        await manager.disconnect("features")
+        assert manager.event_subscribers == {"features": {"patterns"}}
+        await manager.stop()
+
+
+class TestSlowConsumers:
+    """Stalled clients are isolated and evicted."""
+
+    @pytest.mark.asyncio
+    async def test_stalled_write_does_not_block_broadcast(self):
+        manager = ConnectionManager(send_timeout=0.05)
+        healthy = await _connect(manager, "healthy", ["features"])
+        stalled = await _connect(manager, "stalled", ["features"], stall=True)
+
+        for tick in range(3):
+            await asyncio.wait_for(manager.broadcast(_message(tick), "features"), 0.01)
+        await asyncio.wait_for(manager.connections["healthy"].queue.join(), 0.01)
+        assert [json.loads(text)["data"] for text in healthy.sent[2:]] == [{"tick": t} for t in range(3)]
+        assert "stalled" in manager.connections
+
+        await asyncio.sleep(0.1)
+        assert "stalled" not in manager.connections and stalled.closed == 1008
+        assert manager.event_subscribers == {"features": {"healthy"}}
+        stats = manager.get_stats()
+        assert stats["slow_consumers_evicted"] == 1 and stats["messages_dropped"] > 0
+        assert stats["send_latency_ms"]["samples"] == stats["messages_sent"] == 5
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_queue_overflow_evicts(self):
+        manager = ConnectionManager(max_queue=4, send_timeout=10)
+        await _connect(manager, "stalled", ["features"], stall=True)
+        connection = manager.connections["stalled"]
+        await asyncio.sleep(0)  # the writer takes the welcome message and stalls
+
+        for tick in range(3):
+            await manager.broadcast(_message(tick), "features")
+        assert manager.get_stats()["queue_depth"] == {"total": 4, "max": 4, "peak": 4, "limit": 4}
+
+        await manager.broadcast(_message(3), "features")
+        assert "stalled" not in manager.connections and connection.queue.empty()
+        assert manager.get_stats()["slow_consumers_evicted"] == 1
+        await manager.stop()
+
+
+class TestReconnect:
+    """A reconnect under the same client id replaces the old connection."""
+
+    @pytest.mark.asyncio
+    async def test_reconnect_closes_old_socket_and_survives_stale_disconnect(self):
+        manager = ConnectionManager()
+        old = await _connect(manager, "client", ["features"])
+        new = await _connect(manager, "client", ["patterns"])
+        await asyncio.sleep(0)
+        assert old.closed == 1000 and new.closed is None
+        assert manager.connections["client"].websocket is new
+        assert manager.event_subscribers == {"patterns": {"client"}}
+
+        # The replaced handler's cleanup must not remove the new connection
+        await manager.disconnect("client", old)
+        assert manager.connections["client"].websocket is new
+        assert manager.get_stats()["slow_consumers_evicted"] == 0
+
+        await manager.disconnect("client", new)
+        assert manager.connections == {} and manager.event_subscribers == {}
+        await manager.stop()
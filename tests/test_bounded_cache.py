@@ -0,0 +1,100 @@
+"""
+Bounded Cache Tests
+===================
+Validates the size-bounded W-TinyLFU cache shared by the dashboard and
+analytics caches: byte budgets, scan resistance, timer-wheel expiry and
+its counters.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from server.core.bounded_cache import BoundedCache, FrequencySketch, estimate_size
+
+
+class TestSizeEstimation:
+    """Byte estimates used for the memory bound."""
+
+    def test_buffers_and_containers(self):
+        array = np.zeros(10_000)
+        assert estimate_size(array) >= array.nbytes
+        assert estimate_size(b"x" * 5000) >= 5000
+        nested = {"top_nodes": [{"node_id": str(i), "score": 0.5} for i in range(1000)]}
+        small = {"top_nodes": [{"node_id": str(i), "score": 0.5} for i in range(10)]}
+        assert estimate_size(nested) > 50 * estimate_size(small)
+
+
+class TestBoundedCache:
+    """Admission, eviction and expiry."""
+
+    def test_byte_budget_is_enforced(self):
+        cache = BoundedCache(max_bytes=1_000_000)
+        for i in range(500):
+            cache.set(i, b"x" * 10_000)
+        assert cache.total_bytes <= 1_000_000
+        assert cache.get_stats()["evictions"] >= 400
+        assert cache.set("huge", b"x" * 2_000_000) is False
+        assert cache.get_stats()["rejections"] == 1
+
+    def test_scan_does_not_flush_hot_entries(self):
+        cache = BoundedCache(max_entries=1000, max_bytes=10**9)
+        hot = [f"hot{i}" for i in range(500)]
+        for _ in range(5):
+            for key in hot:
+                if cache.get(key) is None:
+                    cache.set(key, key)
+        for i in range(20_000):
+            cache.set(f"scan{i}", i)
+        assert sum(key in cache for key in hot) >= 475
+        assert len(cache) <= 1000
+
+    def test_lru_order_when_frequencies_tie(self):
+        cache = BoundedCache(max_entries=3)
+        for key in ("a", "b", "c"):
+            cache.set(key, key)
+        cache.get("a")
+        cache.set("d", "d")
+        assert [key for key in "abcd" if key in cache] == ["a", "c", "d"]
+
+    def test_overwrite_updates_size_and_value(self):
+        cache = BoundedCache(max_bytes=10**6)
+        cache.set("k", "v", size=100)
+        cache.set("k", "w", size=300)
+        assert cache["k"] == "w"
+        assert cache.total_bytes == 300 and len(cache) == 1
+        with pytest.raises(KeyError):
+            cache["missing"]
+
+    def test_timer_wheel_reaps_expired_entries(self, monkeypatch):
+        now = [1_000.0]
+        monkeypatch.setattr(time, "time", lambda: now[0])
+        cache = BoundedCache(default_ttl=10)
+        for i in range(100):
+            cache.set(i, i, ttl=5 if i % 2 else None)
+        cache.set("zero", 1, ttl=0)
+        assert cache.get("zero") is None
+
+        now[0] += 6
+        cache.get("other")
+        stats = cache.get_stats()
+        assert stats["entries"] == 50
+        assert stats["expirations"] == 51
+        now[0] += 5
+        assert cache.get(0) is None
+        assert len(cache) == 0
+
+
+class TestFrequencySketch:
+    """Count-min estimates with periodic aging."""
+
+    def test_counts_saturate_and_age(self):
+        sketch = FrequencySketch(64)
+        for _ in range(20):
+            sketch.increment("hot")
+        assert sketch.frequency("hot") == 15
+        assert sketch.frequency("cold") <= 1
+        for i in range(sketch.width * 10):
+            sketch.increment(i)
+        assert sketch.frequency("hot") <= 8
@@ -0,0 +1,70 @@
+"""
+Cache Codec Tests
+=================
+Validates header-tagged cache payloads: round trips per serializer, raw
+NumPy buffers, size-adaptive compression, legacy payload decoding and
+codec timing stats.
+"""
+
+import gzip
+import json
+
+import numpy as np
+import pytest
+
+from server.core.cache_codecs import HEADER_SIZE, SERIALIZERS, CacheCodec, CodecError, MAGIC
+
+
+RESULT = {
+    "analytics_type": "centrality",
+    "top_nodes": [{"node_id": f"memory_{i}", "score": i / 100} for i in range(200)],
+    "statistics": {"mean": 0.5, "max": 1.0},
+    "cache_hit": False,
+}
+
+
+class TestCacheCodec:
+    """Encoding, decoding and compressor selection."""
+
+    @pytest.mark.parametrize("serializer", [name for name in SERIALIZERS if name != "ndarray"])
+    def test_structured_round_trip(self, serializer):
+        codec = CacheCodec(serializer=serializer)
+        payload = codec.encode(RESULT)
+        assert payload.startswith(MAGIC)
+        assert codec.decode(payload) == RESULT
+
+    def test_ndarray_uses_raw_buffer(self):
+        codec = CacheCodec()
+        array = np.arange(12, dtype=np.float32).reshape(3, 4)
+        payload = codec.encode(array)
+        assert payload[3] == SERIALIZERS["ndarray"].codec_id
+        decoded = codec.decode(payload)
+        assert decoded.dtype == np.float32 and decoded.shape == (3, 4)
+        assert np.array_equal(decoded, array)
+
+    def test_compression_is_size_adaptive(self):
+        codec = CacheCodec(compress_min_bytes=1024, large_payload_bytes=64 * 1024)
+        small = codec.encode({"k": "v"})
+        assert small[4] == 0
+        repetitive = codec.encode(RESULT)
+        assert repetitive[4] != 0 and len(repetitive) < len(json.dumps(RESULT))
+        # Incompressible large bodies are not worth the CPU
+        dense = codec.encode(np.random.default_rng(0).standard_normal(50_000))
+        assert dense[4] == 0
+        assert not CacheCodec(compress=False).encode(RESULT)[4]
+
+    def test_legacy_payloads_and_unknown_codecs(self):
+        codec = CacheCodec(legacy_loads=lambda body: json.loads(gzip.decompress(body)))
+        assert codec.decode(gzip.compress(json.dumps(RESULT).encode())) == RESULT
+        assert CacheCodec().decode('{"a": 1}') == {"a": 1}
+        with pytest.raises(CodecError):
+            codec.decode(MAGIC + bytes((250, 0)) + b"{}")
+
+    def test_stats_record_timings_per_format(self):
+        codec = CacheCodec(serializer="json")
+        codec.decode(codec.encode(RESULT))
+        stats = codec.get_stats()
+        (name, entry), = stats.items()
+        assert name.startswith("json+")
+        assert entry["encodes"] == 1 and entry["decodes"] == 1
+        assert entry["encode_seconds"] > 0 and entry["bytes"] > HEADER_SIZE
@@ -0,0 +1,195 @@
+"""
+Cache Invalidation Index Tests
+==============================
+Validates the in-process token/tag index, the Redis tag/prefix sets and
+generation namespaces, and their use by AnalyticsCache and the analytics
+CacheManager.
+"""
+
+import fnmatch
+
+import pytest
+
+from server.analytics.cache import AnalyticsCache
+from server.core.cache_index import GenerationNamespaces, InvertedIndex, RedisTagIndex, key_prefixes
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        return [await getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """The subset of redis.asyncio used by the cache indexes"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.scans = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, name):
+        return self.data.get(name)
+
+    async def set(self, name, value, ex=None):
+        self.data[name] = value
+        self.ttls[name] = ex
+        return True
+
+    async def delete(self, *names):
+        return sum(self.data.pop(name, None) is not None for name in names)
+
+    async def incr(self, name):
+        self.data[name] = int(self.data.get(name, 0)) + 1
+        return self.data[name]
+
+    async def sadd(self, name, *members):
+        self.data.setdefault(name, set()).update(members)
+
+    async def srem(self, name, *members):
+        self.data.get(name, set()).difference_update(members)
+
+    async def scard(self, name):
+        return len(self.data.get(name, ()))
+
+    async def spop(self, name, count):
+        members = self.data.get(name, set())
+        popped = [members.pop() for _ in range(min(count, len(members)))]
+        if not members:
+            self.data.pop(name, None)
+        return popped
+
+    async def expire(self, name, seconds, nx=False, gt=False):
+        current = self.ttls.get(name)
+        if (nx and current is None) or (gt and current is not None and seconds > current):
+            self.ttls[name] = seconds
+
+    async def scan_iter(self, match=None, count=None):
+        self.scans += 1
+        for name in list(self.data):
+            if fnmatch.fnmatchcase(name, match):
+                yield name
+
+
+class TestInvertedIndex:
+    """Token and tag postings for the L1 tier."""
+
+    def test_substring_glob_and_tag_lookups(self):
+        index = InvertedIndex()
+        for key in ("system_metrics_1", "system_metrics_2", "graph_metrics_1", "memory:user:7", "xsystem_metricsy"):
+            index.add(key, {"graph"} if key.startswith("graph") else None)
+        assert index.keys_containing("system_metrics") == {"system_metrics_1", "system_metrics_2", "xsystem_metricsy"}
+        assert index.keys_containing("metr") == {"system_metrics_1", "system_metrics_2", "graph_metrics_1", "xsystem_metricsy"}
+        assert index.match("memory:*:7") == {"memory:user:7"}
+        assert index.keys_for_prefix("system_") == {"system_metrics_1", "system_metrics_2"}
+        assert index.keys_for_tags({"graph"}) == {"graph_metrics_1"}
+
+        index.remove("graph_metrics_1")
+        assert index.keys_for_tags({"graph"}) == set()
+        assert "graph_metrics_1" not in index.keys_containing("metrics")
+
+
+class TestRedisTagIndex:
+    """Redis sets maintained alongside each write."""
+
+    @pytest.mark.asyncio
+    async def test_tag_and_prefix_invalidation_touch_only_members(self):
+        client = FakeRedis()
+        index = RedisTagIndex(client, batch_size=2)
+        for i in range(5):
+            await index.set(f"analytics:centrality:{i}", "v", 60, tags={"graph"})
+        await index.set("analytics:community:0", "v", 600)
+        await index.set("analytics:user:1", "v", 60, tags={"user"})
+
+        assert client.ttls["idx:prefix:analytics"] == 600
+        assert await index.invalidate_tags({"graph"}) == 5
+        assert await index.invalidate_pattern("analytics:community:*") == 1
+        assert client.scans == 0
+        assert set(k for k in client.data if not k.startswith("idx:")) == {"analytics:user:1"}
+
+        # Non-prefix globs fall back to SCAN rather than KEYS
+        assert await index.invalidate_pattern("analytics:*:1") == 1
+        assert client.scans == 1
+        assert key_prefixes("a:b:c") == ["a", "a:b"]
+
+
+class TestGenerationNamespaces:
+    """O(1) scope invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_bump_changes_scoped_keys(self):
+        client = FakeRedis()
+        namespaces = GenerationNamespaces(client, cache_seconds=60)
+        other_process = GenerationNamespaces(client, cache_seconds=0)
+        before = await namespaces.scoped_key("dashboard:1", "data")
+        await namespaces.bump("dashboard:1")
+        assert await namespaces.scoped_key("dashboard:1", "data") != before
+        assert await other_process.current("dashboard:1") == 1
+
+
+class TestAnalyticsCacheInvalidation:
+    """AnalyticsCache invalidation without KEYS or full scans."""
+
+    @pytest.mark.asyncio
+    async def test_memory_mode_prefix_and_tags(self):
+        cache = AnalyticsCache()
+        await cache.set("centrality", {"k": 1}, {"r": 1}, tags={"graph"})
+        await cache.set("centrality", {"k": 2}, {"r": 2})
+        await cache.set("community", {"k": 1}, {"r": 3}, tags={"graph"})
+        assert await cache.invalidate_pattern("centrality") == 2
+        assert await cache.invalidate_tags({"graph"}) == 1
+        assert await cache.get("community", {"k": 1}) is None
+
+    @pytest.mark.asyncio
+    async def test_redis_mode_uses_indexes(self):
+        cache = AnalyticsCache()
+        cache.redis_client = FakeRedis()
+        cache._redis_index = RedisTagIndex(cache.redis_client)
+        cache._connected = True
+        await cache.set("centrality", {"k": 1}, {"r": 1}, tags={"graph"})
+        await cache.set("clustering", {"k": 1}, {"r": 2})
+        assert await cache.get("centrality", {"k": 1}) == {"r": 1}
+        assert await cache.invalidate_pattern("centrality") == 1
+        assert await cache.get("clustering", {"k": 1}) == {"r": 2}
+        assert await cache.clear_all()
+        assert await cache.get("clustering", {"k": 1}) is None
+        assert cache.redis_client.scans == 0
+
+
+class TestAnalyticsCacheManagerScopes:
+    """Dashboard and user scopes invalidated by generation bumps."""
+
+    @pytest.mark.asyncio
+    async def test_invalidate_dashboard_is_one_increment(self):
+        pytest.importorskip("asyncpg")
+        from server.analytics.cache_manager import CacheManager
+
+        client = FakeRedis()
+        manager = CacheManager(client, settings=None)
+        await manager.set_dashboard_config("d1", {"layout": "grid"})
+        await manager.set_dashboard_data("d1", {"points": [1, 2]})
+        await manager.set_dashboard_config("d2", {"layout": "list"})
+        assert await manager.get_dashboard_config("d1") == {"layout": "grid"}
+
+        await manager.invalidate_dashboard("d1")
+        assert await manager.get_dashboard_config("d1") is None
+        assert await manager.get_dashboard_data("d1") is None
+        assert await manager.get_dashboard_config("d2") == {"layout": "list"}
@@ -0,0 +1,131 @@
+"""
+Columnar Query Result Tests
+===========================
+Validates the Arrow and NumPy column paths of fetch_columns, their
+serialisation to Arrow IPC and compact JSON, and columnar consumers in the
+Kuzu analytics engine.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+kuzu = pytest.importorskip("kuzu")
+
+from server.graph_database import PYARROW_AVAILABLE, fetch_columns
+from server.analytics.kuzu_analytics import KuzuAnalyticsEngine
+
+
+@pytest.fixture
+def graph_conn(tmp_path):
+    db = kuzu.Database(str(tmp_path / "db"))
+    conn = kuzu.Connection(db)
+    conn.execute("CREATE NODE TABLE Entity(id STRING, score DOUBLE, rank INT64, PRIMARY KEY(id))")
+    conn.execute("CREATE REL TABLE LINKS(FROM Entity TO Entity)")
+    conn.execute(
+        "UNWIND range(0, 19) AS i CREATE (:Entity {id: 'e' + CAST(i AS STRING), score: i * 0.5, rank: i})"
+    )
+    conn.execute("MATCH (a:Entity), (b:Entity) WHERE a.rank = 0 AND b.rank > 0 CREATE (a)-[:LINKS]->(b)")
+    conn.execute("CREATE (:Entity {id: 'orphan'})")
+    return conn
+
+
+BACKENDS = ["numpy"] + (["arrow"] if PYARROW_AVAILABLE else [])
+
+
+class TestFetchColumns:
+    """Column extraction from Kuzu results."""
+
+    @pytest.mark.parametrize("backend", BACKENDS)
+    def test_numeric_columns_are_typed_arrays(self, graph_conn, backend):
+        result = fetch_columns(
+            graph_conn, "MATCH (e:Entity) WHERE e.rank IS NOT NULL RETURN e.rank AS rank, e.score AS score "
+            "ORDER BY rank", backend=backend,
+        )
+        assert result.row_count == 20
+        assert result["rank"].dtype == np.int64
+        assert result["score"].dtype == np.float64
+        assert result["score"].sum() == pytest.approx(95.0)
+
+    @pytest.mark.parametrize("backend", BACKENDS)
+    def test_nulls_fall_back_to_object_arrays(self, graph_conn, backend):
+        result = fetch_columns(graph_conn, "MATCH (e:Entity) RETURN e.id AS id, e.rank AS rank ORDER BY id",
+                               backend=backend)
+        ranks = result["rank"]
+        assert ranks.dtype == object
+        assert None in ranks.tolist()
+
+    def test_empty_result_keeps_columns(self, graph_conn):
+        result = fetch_columns(graph_conn, "MATCH (e:Entity) WHERE e.rank > 100 RETURN e.id AS id",
+                               backend="numpy")
+        assert result.column_names == ["id"]
+        assert result.row_count == 0
+        assert len(result["id"]) == 0
+        assert result.scalar("none") == "none"
+
+    def test_unknown_backend(self, graph_conn):
+        with pytest.raises(ValueError):
+            fetch_columns(graph_conn, "RETURN 1", backend="parquet")
+
+
+class TestSerialisation:
+    """Arrow IPC and compact JSON output."""
+
+    def test_compact_json_is_column_major(self, graph_conn):
+        result = fetch_columns(graph_conn, "MATCH (e:Entity) WHERE e.rank < 3 RETURN e.id AS id, e.rank AS rank "
+                               "ORDER BY rank", backend="numpy")
+        payload = json.loads(result.to_compact_json())
+        assert payload == {"columns": ["id", "rank"], "data": [["e0", "e1", "e2"], [0, 1, 2]], "row_count": 3}
+        assert result.to_records()[1] == {"id": "e1", "rank": 1}
+
+    @pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+    def test_arrow_ipc_round_trip(self, graph_conn):
+        import pyarrow as pa
+
+        result = fetch_columns(graph_conn, "MATCH (e:Entity) RETURN e.id AS id, e.rank AS rank", backend="numpy")
+        table = pa.ipc.open_stream(result.to_arrow_ipc()).read_all()
+        assert table.num_rows == 21
+        assert table.column_names == ["id", "rank"]
+
+
+class TestKuzuAnalyticsColumnar:
+    """Columnar consumers in KuzuAnalyticsEngine."""
+
+    @pytest.mark.asyncio
+    async def test_network_structure_degree_distribution(self, graph_conn):
+        engine = KuzuAnalyticsEngine(graph_conn)
+        structure = await engine._analyze_network_structure({})
+        hubs = structure["hub_analysis"]
+        assert structure["basic_metrics"]["node_count"] == 21
+        assert structure["basic_metrics"]["edge_count"] == 19
+        assert hubs["hub_count"] == 1
+        assert hubs["max_degree"] == 19
+        assert hubs["degree_distribution"]["isolated"] == 1
+
+    @pytest.mark.asyncio
+    async def test_entity_importance_records_and_statistics(self, graph_conn):
+        engine = KuzuAnalyticsEngine(graph_conn)
+        result = await engine.analyze_entity_importance("Entity")
+        assert result["entities"][0] == {"entity_id": "e0", "degree": 19}
+        assert result["entity_count"] == 21
+        assert result["score_statistics"]["max"] == 19.0
+
+
+class TestAnalyticsEngineColumnar:
+    """Topology columns consumed by AnalyticsEngine."""
+
+    @pytest.mark.asyncio
+    async def test_graph_columns_feed_metrics(self, graph_conn):
+        from server.analytics.engine import AnalyticsEngine
+
+        engine = AnalyticsEngine(graph_conn)
+        columns = await engine.get_graph_columns()
+        assert len(columns["node_ids"]) == 21
+        assert set(columns["sources"].tolist()) == {"e0"}
+
+        metrics = await engine.calculate_graph_metrics()
+        assert metrics.node_count == 21
+        assert metrics.edge_count == 19
+        assert metrics.connected_components == 2
+        assert metrics.largest_component_size == 20
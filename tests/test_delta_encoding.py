@@ -0,0 +1,177 @@
+"""
+Delta Encoding Tests
+====================
+Validates JSON-Patch diffs against their application, keyframe/delta
+envelopes and keyframe intervals, encoding negotiation, deflated payloads
+and the analytics WebSocket manager's delta broadcasts.
+"""
+
+import json
+import random
+import zlib
+
+import pytest
+
+from server.core.delta_encoding import (
+    DELTA_DEFLATE_SUBPROTOCOL,
+    DeltaOptions,
+    DeltaStream,
+    apply_patch,
+    json_diff,
+)
+from server.streaming.analytics_websocket import ConnectionManager, SubscriptionRequest, WebSocketMessage
+
+
+def _random_document(rng, depth=0):
+    kind = rng.random()
+    if depth > 2 or kind < 0.4:
+        return rng.choice([rng.randint(0, 5), rng.random(), "a/b~c", True, None, "x"])
+    if kind < 0.7:
+        return [_random_document(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    return {rng.choice(["cpu", "mem", "a/b", "t~1"]): _random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+
+
+def _metrics(tick):
+    features = {
+        f"memory_ops_{window}": {"window_size_seconds": window, "value": 120.0, "metadata": {"unit": "ops/s"}}
+        for window in (60, 300, 3600)
+    }
+    features["memory_ops_60"]["value"] = 100.0 + tick
+    return {
+        "data": {"cpu_usage": 40 + tick % 3, "memory_usage": 61.5, "active_nodes": 1200,
+                 "series": [1, 2, 3], "status": "healthy", "features": features},
+        "timestamp": f"2025-01-01T00:00:{tick:02d}",
+        "event_type": "analytics",
+    }
+
+
+class TestJsonDiff:
+    """Diff/patch round trips."""
+
+    def test_patch_reproduces_target(self):
+        rng = random.Random(4)
+        for _ in range(500):
+            old, new = _random_document(rng), _random_document(rng)
+            assert apply_patch(old, json_diff(old, new)) == new
+
+    def test_type_changes_are_not_equal(self):
+        assert json_diff({"a": 1}, {"a": True}) == [{"op": "replace", "path": "/a", "value": True}]
+        assert json_diff({"a": 1}, {"a": 1}) == []
+
+
+class TestDeltaStream:
+    """Keyframes, deltas and payload caching."""
+
+    def test_keyframe_interval_and_client_resync(self):
+        stream = DeltaStream(keyframe_interval=3)
+        updates = [stream.push(_metrics(tick)) for tick in range(7)]
+        assert [u.ops is None for u in updates] == [True, False, False, True, False, False, True]
+
+        document = None
+        client_seq = None
+        for update in updates:
+            envelope = json.loads(update.payload(update.is_delta_for(client_seq)))
+            if envelope["type"] == "delta":
+                assert envelope["base"] == client_seq
+                document = apply_patch(document, envelope["ops"])
+            else:
+                document = envelope["data"]
+            client_seq = envelope["seq"]
+            assert document == update.document
+
+        # A client that missed an update is sent the keyframe
+        assert not updates[2].is_delta_for(updates[0].seq)
+        assert json.loads(updates[2].payload(False))["type"] == "keyframe"
+
+    def test_delta_is_smaller_and_cached(self):
+        stream = DeltaStream(name="features_update")
+        stream.push(_metrics(0))
+        update = stream.push(_metrics(1))
+        delta, keyframe = update.payload(True), update.payload(False)
+        assert len(delta) < len(keyframe) and update.payload(True) is delta
+        assert json.loads(delta)["stream"] == "features_update"
+
+        stream.record(len(keyframe), delta, delta=True)
+        stats = stream.get_stats()
+        assert stats["deltas_sent"] == 1 and stats["bytes_saved"] == len(keyframe) - len(delta)
+
+    def test_deflated_payloads(self):
+        stream = DeltaStream(compress_min_bytes=64)
+        big = {"rows": [{"node": f"memory_{i}", "score": 0.5} for i in range(50)]}
+        payload = stream.push(big).payload(False, deflated=True)
+        assert isinstance(payload, bytes)
+        assert json.loads(zlib.decompress(payload))["data"] == big
+        assert isinstance(DeltaStream().push({"a": 1}).payload(False, deflated=True), str)
+
+    def test_negotiation(self):
+        assert not DeltaOptions.negotiate({}).enabled
+        assert DeltaOptions.negotiate({"delta": "true"}) == DeltaOptions(delta=True)
+        assert DeltaOptions.negotiate({"compress": "deflate"}) == DeltaOptions(deflate=True)
+        options = DeltaOptions.negotiate({}, ["chat", DELTA_DEFLATE_SUBPROTOCOL])
+        assert options.delta and options.deflate and options.subprotocol == DELTA_DEFLATE_SUBPROTOCOL
+
+
+class FakeWebSocket:
+    def __init__(self, query_params=None, subprotocols=()):
+        self.query_params = query_params or {}
+        self.scope = {"subprotocols": list(subprotocols)}
+        self.accepted_subprotocol = None
+        self.sent = []
+
+    async def accept(self, subprotocol=None):
+        self.accepted_subprotocol = subprotocol
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000):
+        self.closed = code
+
+
+class TestWebSocketDeltaBroadcast:
+    """ConnectionManager broadcasts per negotiated encoding."""
+
+    @pytest.mark.asyncio
+    async def test_delta_and_plain_clients(self):
+        manager = ConnectionManager(keyframe_interval=10)
+        plain, delta = FakeWebSocket(), FakeWebSocket({"delta": "1"})
+        await manager.connect(plain, "plain")
+        await manager.connect(delta, "delta")
+        for client_id in ("plain", "delta"):
+            await manager.subscribe(client_id, SubscriptionRequest(event_types=["features"]))
+        await manager.drain()
+        assert json.loads(delta.sent[0])["data"]["encoding"]["delta"] is True
+
+        messages = [
+            WebSocketMessage(type="features_update", data=_metrics(tick), timestamp=f"t{tick}")
+            for tick in range(4)
+        ]
+        for message in messages:
+            await manager.broadcast(message, "features")
+        await manager.drain()
+
+        assert [json.loads(text) for text in plain.sent[2:]] == [json.loads(m.json()) for m in messages]
+        envelopes = [json.loads(text) for text in delta.sent[2:]]
+        assert [e["type"] for e in envelopes] == ["keyframe", "delta", "delta", "delta"]
+        document = envelopes[0]["data"]
+        for envelope, message in zip(envelopes[1:], messages[1:]):
+            document = apply_patch(document, envelope["ops"])
+            assert document == json.loads(message.json())
+
+        stats = manager.get_stats()
+        assert stats["bytes_saved"] > 0 and stats["delta_clients"] == 1
+        assert stats["delta_streams"]["features_update"]["deltas_sent"] == 3
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_subprotocol_is_accepted(self):
+        manager = ConnectionManager()
+        websocket = FakeWebSocket(subprotocols=[DELTA_DEFLATE_SUBPROTOCOL])
+        await manager.connect(websocket, "client")
+        assert websocket.accepted_subprotocol == DELTA_DEFLATE_SUBPROTOCOL
+        assert manager.client_options["client"].deflate
+        await manager.disconnect("client")
+        assert "client" not in manager.client_options
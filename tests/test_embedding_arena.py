@@ -0,0 +1,57 @@
+"""
+Embedding Arena Tests
+=====================
+Validates slot allocation and reuse, block growth without invalidating
+views, batched writes and gathers across blocks, memory-mapped blocks and
+float16 history encoding.
+"""
+
+import numpy as np
+import pytest
+
+from server.core.embedding_arena import EmbeddingArena, decode_half, encode_half
+
+
+class TestEmbeddingArena:
+    """Slots, views and blocks."""
+
+    def test_free_slots_are_reused(self):
+        arena = EmbeddingArena(dim=4, block_rows=2)
+        slots = [arena.allocate(np.full(4, i)) for i in range(3)]
+        assert slots == [0, 1, 2] and arena.capacity == 4
+        arena.free(1)
+        assert arena.allocate(np.ones(4)) == 1
+        assert len(arena) == 3 and arena.get_stats()["slots_free"] == 1
+        with pytest.raises(ValueError):
+            arena.allocate(np.ones(3))
+
+    def test_views_survive_growth(self):
+        arena = EmbeddingArena(dim=3, block_rows=1)
+        first = arena.allocate([1, 2, 3])
+        view = arena.row(first)
+        for i in range(5):
+            arena.allocate([i, i, i])
+        arena.write(first, [7, 8, 9])
+        assert view.tolist() == [7, 8, 9] and view.dtype == np.float32
+        with pytest.raises(ValueError):
+            view[0] = 0
+
+    def test_batched_write_and_gather(self):
+        arena = EmbeddingArena(dim=8, block_rows=3)
+        slots = [arena.allocate() for _ in range(7)]
+        vectors = np.random.default_rng(1).normal(size=(7, 8))
+        arena.write_many(slots[::-1], vectors)
+        np.testing.assert_allclose(arena.gather(slots[::-1]), vectors.astype(np.float32))
+
+    def test_memory_mapped_blocks(self, tmp_path):
+        arena = EmbeddingArena(dim=4, block_rows=2, mmap_dir=str(tmp_path))
+        slot = arena.allocate([0.5, 1, 2, 3])
+        assert isinstance(arena._blocks[0], np.memmap) and len(list(tmp_path.iterdir())) == 1
+        assert arena.row(slot).tolist() == [0.5, 1, 2, 3]
+
+    def test_half_precision_history(self):
+        vector = np.random.default_rng(2).normal(size=384)
+        encoded = encode_half(vector)
+        assert encoded.nbytes == vector.nbytes // 4
+        np.testing.assert_allclose(decode_half(encoded), vector, rtol=1e-3, atol=1e-3)
+        assert encode_half(None) is None and decode_half(None) is None
@@ -0,0 +1,84 @@
+"""
+Embedding Service Tests
+=======================
+Validates cross-request micro-batching, in-flight de-duplication and the
+LRU cache of the resident embedding service using a fake model.
+"""
+
+import asyncio
+import threading
+from typing import List
+
+import pytest
+
+from server.embedding_service import EmbeddingCache, EmbeddingService, EmbeddingServiceConfig
+
+
+class FakeModel:
+    """Records encode() batches and the thread they ran on."""
+
+    def __init__(self) -> None:
+        self.batches: List[List[str]] = []
+        self.threads: List[str] = []
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.batches.append(list(texts))
+        self.threads.append(threading.current_thread().name)
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class TestEmbeddingCache:
+    """LRU behaviour of EmbeddingCache."""
+
+    def test_evicts_least_recently_used(self):
+        cache = EmbeddingCache(max_size=2)
+        cache.put("a", [1.0])
+        cache.put("b", [2.0])
+        assert cache.get("a") == [1.0]
+        cache.put("c", [3.0])
+        assert cache.get("b") is None
+        assert cache.get("a") == [1.0]
+        assert len(cache) == 2
+
+
+class TestEmbeddingService:
+    """Micro-batching behaviour of EmbeddingService."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_batch(self):
+        model = FakeModel()
+        service = EmbeddingService(EmbeddingServiceConfig(batch_window_ms=30), model=model)
+        await service.start()
+        texts = [f"query {i}" for i in range(10)]
+        vectors = await asyncio.gather(*(service.embed(t) for t in texts))
+        await service.stop()
+
+        assert len(model.batches) == 1
+        assert sorted(model.batches[0]) == sorted(texts)
+        assert vectors[0] == [float(len(texts[0])), 1.0]
+        assert model.threads[0].startswith("embedding-worker")
+
+    @pytest.mark.asyncio
+    async def test_duplicate_texts_encoded_once_and_cached(self):
+        model = FakeModel()
+        service = EmbeddingService(EmbeddingServiceConfig(batch_window_ms=20), model=model)
+        await service.start()
+        await asyncio.gather(*(service.embed("same") for _ in range(5)))
+        await service.embed("same")
+        stats = service.get_stats()
+        await service.stop()
+
+        assert model.batches == [["same"]]
+        assert stats["coalesced_requests"] == 4
+        assert stats["cache_hits"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_respected(self):
+        model = FakeModel()
+        service = EmbeddingService(EmbeddingServiceConfig(batch_window_ms=50, max_batch_size=4), model=model)
+        await service.start()
+        await asyncio.gather(*(service.embed(f"t{i}") for i in range(10)))
+        await service.stop()
+
+        assert all(len(batch) <= 4 for batch in model.batches)
+        assert sum(len(batch) for batch in model.batches) == 10
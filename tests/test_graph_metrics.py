@@ -0,0 +1,95 @@
+"""
+CSR Graph Metrics Tests
+=======================
+Validates array-based union-find components, triangle counting and
+clustering against NetworkX, and incremental metric updates across
+snapshot versions.
+"""
+
+import numpy as np
+import pytest
+
+nx = pytest.importorskip("networkx")
+
+from server.analytics import graph_metrics
+from server.analytics.graph_metrics import GraphMetricsEngine, count_triangles, union_edges
+from server.analytics.graph_snapshot import GraphSnapshot
+
+
+def _random_snapshot(nodes=300, edges=900, seed=3):
+    rng = np.random.default_rng(seed)
+    ids = np.array([f"n{i}" for i in range(nodes)], dtype=object)
+    src = ids[rng.integers(0, nodes, size=edges)]
+    dst = ids[rng.integers(0, nodes, size=edges)]
+    return GraphSnapshot.from_columns(ids, src, dst)
+
+
+class TestUnionFind:
+    """Array-based union-find."""
+
+    def test_long_chain_does_not_recurse(self):
+        n = 200_000
+        parent = np.arange(n, dtype=np.int64)
+        union_edges(parent, np.arange(n - 1), np.arange(1, n))
+        assert np.all(parent == 0)
+
+    def test_matches_networkx_components(self):
+        snapshot = _random_snapshot(edges=250)
+        metrics = GraphMetricsEngine().compute(snapshot)
+        graph = snapshot.to_networkx()
+        assert metrics.connected_components == nx.number_connected_components(graph)
+        assert metrics.largest_component_size == max(len(c) for c in nx.connected_components(graph))
+
+
+class TestTriangles:
+    """Triangle counts and clustering coefficients."""
+
+    def test_matches_networkx(self):
+        snapshot = _random_snapshot()
+        graph = snapshot.to_networkx()
+        indptr, indices = snapshot.undirected()
+        triangles = count_triangles(indptr, indices, snapshot.node_count)
+        expected = nx.triangles(graph)
+        assert triangles.tolist() == [expected[n] for n in snapshot.node_ids.tolist()]
+
+        metrics = GraphMetricsEngine().compute(snapshot)
+        assert metrics.average_clustering == pytest.approx(nx.average_clustering(graph))
+        assert metrics.transitivity == pytest.approx(nx.transitivity(graph))
+
+    def test_fallback_without_scipy(self, monkeypatch):
+        snapshot = _random_snapshot(nodes=80, edges=400)
+        indptr, indices = snapshot.undirected()
+        with_scipy = count_triangles(indptr, indices, snapshot.node_count)
+        monkeypatch.setattr(graph_metrics, "SCIPY_AVAILABLE", False)
+        assert count_triangles(indptr, indices, snapshot.node_count).tolist() == with_scipy.tolist()
+
+
+class TestIncrementalMetrics:
+    """Carrying metrics across snapshot versions."""
+
+    def test_additions_match_full_recomputation(self):
+        snapshot = GraphSnapshot.from_columns(["a", "b", "c", "d"], ["a", "b"], ["b", "c"])
+        engine = GraphMetricsEngine()
+        first = engine.compute(snapshot)
+        assert first.connected_components == 2
+        assert first.triangle_count == 0
+
+        # Closing a triangle with two new edges at once, plus a new vertex
+        updated = snapshot.with_additions(["e"], [("c", "a"), ("d", "a"), ("d", "c"), ("a", "b")])
+        incremental = engine.compute(updated)
+        full = GraphMetricsEngine().compute(GraphSnapshot.from_columns(
+            updated.node_ids, updated.node_ids[updated.sources], updated.node_ids[updated.targets]
+        ))
+
+        assert incremental.incremental is True
+        assert engine.get_stats()["incremental_updates"] == 1
+        for name in ("connected_components", "largest_component_size", "triangle_count",
+                     "average_clustering", "transitivity"):
+            assert getattr(incremental, name) == pytest.approx(getattr(full, name)), name
+        assert incremental.triangle_count == 2
+
+    def test_same_snapshot_is_cached(self):
+        snapshot = _random_snapshot(nodes=20, edges=30)
+        engine = GraphMetricsEngine()
+        assert engine.compute(snapshot) is engine.compute(snapshot)
+        assert engine.get_stats()["cache_hits"] == 1
@@ -0,0 +1,117 @@
+"""
+Async Graph Connection Pool Tests
+=================================
+Validates FIFO waiting, acquire/query timeouts, per-connection threads and
+pool statistics of AsyncGraphConnectionPool against an embedded Kuzu
+database.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+kuzu = pytest.importorskip("kuzu")
+
+from server.graph_database import (
+    AsyncGraphConnectionPool,
+    PoolTimeoutError,
+    QueryTimeoutError,
+    run_on_connection,
+)
+
+
+@pytest.fixture
+def database(tmp_path):
+    db = kuzu.Database(str(tmp_path / "db"))
+    conn = kuzu.Connection(db)
+    conn.execute("CREATE NODE TABLE Item(id INT64, PRIMARY KEY(id))")
+    conn.execute("UNWIND range(1, 50) AS i CREATE (:Item {id: i})")
+    return db
+
+
+class TestAsyncGraphConnectionPool:
+    """Behaviour of AsyncGraphConnectionPool."""
+
+    @pytest.mark.asyncio
+    async def test_execute_returns_rows(self, database):
+        pool = AsyncGraphConnectionPool(database, size=2)
+        rows = await pool.execute("MATCH (i:Item) RETURN count(i)")
+        assert rows == [[50]]
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_connections_run_on_distinct_threads_in_parallel(self, database):
+        pool = AsyncGraphConnectionPool(database, size=2)
+        threads = set()
+
+        def slow(_conn):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.2)
+
+        started = time.perf_counter()
+        await asyncio.gather(pool.run(slow), pool.run(slow))
+        elapsed = time.perf_counter() - started
+        await pool.close()
+
+        assert len(threads) == 2
+        assert elapsed < 0.35
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_served_fifo(self, database):
+        pool = AsyncGraphConnectionPool(database, size=1)
+        order = []
+
+        async def worker(n):
+            async with pool.acquire():
+                order.append(n)
+                await asyncio.sleep(0.01)
+
+        async with pool.acquire():
+            tasks = []
+            for n in range(5):
+                tasks.append(asyncio.create_task(worker(n)))
+                await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        await pool.close()
+
+        assert order == [0, 1, 2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_acquire_timeout(self, database):
+        pool = AsyncGraphConnectionPool(database, size=1, acquire_timeout=0.05)
+        async with pool.acquire():
+            with pytest.raises(PoolTimeoutError):
+                async with pool.acquire():
+                    pass
+        stats = pool.get_stats()
+        await pool.close()
+
+        assert stats["acquire_timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_query_timeout(self, database):
+        pool = AsyncGraphConnectionPool(database, size=1)
+        with pytest.raises(QueryTimeoutError):
+            await pool.run(lambda _conn: time.sleep(0.3), timeout=0.05)
+        assert pool.get_stats()["query_timeouts"] == 1
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_stats_report_saturation(self, database):
+        pool = AsyncGraphConnectionPool(database, size=1)
+        await asyncio.gather(*(pool.run(lambda _conn: time.sleep(0.01)) for _ in range(4)))
+        stats = pool.get_stats()
+        await pool.close()
+
+        assert stats["acquires"] == 4
+        assert stats["acquires_waited"] == 3
+        assert stats["peak_waiters"] >= 3
+        assert stats["acquire_wait"]["count"] == 4
+
+    @pytest.mark.asyncio
+    async def test_run_on_connection_accepts_bare_connection(self, database):
+        conn = kuzu.Connection(database)
+        result = await run_on_connection(conn, lambda c: c.execute("RETURN 1").get_next())
+        assert result == [1]
@@ -0,0 +1,152 @@
+"""
+Graph Snapshot Tests
+====================
+Validates CSR construction, NetworkX/SciPy export and the refresh policy of
+GraphSnapshotManager (incremental merges, invalidation and watermark
+checks), plus AnalyticsEngine consumers of the shared snapshot.
+"""
+
+import numpy as np
+import pytest
+
+from server.analytics.graph_snapshot import GraphSnapshot, GraphSnapshotConfig, GraphSnapshotManager
+
+
+def _columns(node_ids, edges):
+    return {
+        "node_ids": np.asarray(node_ids, dtype=object),
+        "sources": np.asarray([e[0] for e in edges], dtype=object),
+        "targets": np.asarray([e[1] for e in edges], dtype=object),
+    }
+
+
+class TestGraphSnapshot:
+    """CSR layout and exports of GraphSnapshot."""
+
+    def test_csr_layout(self):
+        snapshot = GraphSnapshot.from_columns(
+            ["c", "a", "b", "a"], ["a", "a", "b", "x"], ["b", "c", "c", "a"]
+        )
+        assert snapshot.node_ids.tolist() == ["a", "b", "c"]
+        assert snapshot.indptr.dtype == np.int32
+        assert snapshot.indptr.tolist() == [0, 2, 3, 3]
+        assert snapshot.edge_count == 3  # edge from unknown "x" is dropped
+        assert snapshot.degree().tolist() == [2, 2, 2]
+        assert sorted(snapshot.neighbors("c")) == ["a", "b"]
+
+    def test_arrays_are_read_only(self):
+        snapshot = GraphSnapshot.from_columns(["a", "b"], ["a"], ["b"])
+        with pytest.raises(ValueError):
+            snapshot.indices[0] = 1
+
+    def test_exports(self):
+        snapshot = GraphSnapshot.from_columns(["a", "b", "c"], ["a", "b", "b"], ["b", "a", "c"])
+        graph = snapshot.to_networkx()
+        assert graph is snapshot.to_networkx()
+        assert graph.number_of_edges() == 2
+        assert snapshot.to_networkx(directed=True).number_of_edges() == 3
+        matrix = snapshot.to_scipy(directed=False)
+        assert matrix.shape == (3, 3)
+        assert matrix.nnz == 4
+
+    def test_with_additions_bumps_version(self):
+        snapshot = GraphSnapshot.from_columns(["a", "b"], ["a"], ["b"])
+        updated = snapshot.with_additions(["c"], [("b", "c")])
+        assert updated.version == 2
+        assert updated.node_count == 3
+        assert updated.edge_count == 2
+        assert snapshot.node_count == 2
+
+
+class TestGraphSnapshotManager:
+    """Refresh policy of GraphSnapshotManager."""
+
+    @staticmethod
+    def _manager(graph, config=None):
+        calls = {"loads": 0}
+
+        async def loader():
+            calls["loads"] += 1
+            return _columns(graph["nodes"], graph["edges"])
+
+        async def probe():
+            return (len(graph["nodes"]), len(graph["edges"]))
+
+        config = config or GraphSnapshotConfig(watermark_check_interval=0)
+        return GraphSnapshotManager(loader, probe, config), calls
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_reused_while_watermark_unchanged(self):
+        graph = {"nodes": ["a", "b"], "edges": [("a", "b")]}
+        manager, calls = self._manager(graph)
+        first = await manager.get_snapshot()
+        assert await manager.get_snapshot() is first
+        assert calls["loads"] == 1
+
+    @pytest.mark.asyncio
+    async def test_change_events_merge_without_reload(self):
+        graph = {"nodes": ["a", "b"], "edges": [("a", "b")]}
+        manager, calls = self._manager(graph)
+        await manager.get_snapshot()
+
+        graph["nodes"].append("c")
+        graph["edges"].append(("b", "c"))
+        manager.apply_change_event({"operation_type": "create_relation", "data": {"nodes": ["c"], "edges": [["b", "c"]]}})
+        snapshot = await manager.get_snapshot()
+
+        assert calls["loads"] == 1
+        assert snapshot.version == 2
+        assert snapshot.edge_count == 2
+        assert manager.get_stats()["incremental_updates"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unreported_writes_trigger_reload(self):
+        graph = {"nodes": ["a", "b"], "edges": [("a", "b")]}
+        manager, calls = self._manager(graph)
+        await manager.get_snapshot()
+
+        graph["nodes"].append("d")
+        snapshot = await manager.get_snapshot()
+        assert calls["loads"] == 2
+        assert snapshot.node_count == 3
+
+    @pytest.mark.asyncio
+    async def test_deletions_invalidate(self):
+        graph = {"nodes": ["a", "b"], "edges": [("a", "b")]}
+        manager, calls = self._manager(graph, GraphSnapshotConfig(watermark_check_interval=3600))
+        await manager.get_snapshot()
+
+        graph["edges"].clear()
+        manager.apply_change_event({"operation_type": "delete_relation", "data": {}})
+        snapshot = await manager.get_snapshot()
+        assert calls["loads"] == 2
+        assert snapshot.edge_count == 0
+
+
+class TestAnalyticsEngineSnapshot:
+    """AnalyticsEngine consumers of the shared snapshot."""
+
+    @pytest.mark.asyncio
+    async def test_path_analysis_and_metrics_share_one_load(self, tmp_path):
+        kuzu = pytest.importorskip("kuzu")
+        from server.analytics.engine import AnalyticsEngine
+        from server.analytics.models import PathAnalysisRequest
+
+        db = kuzu.Database(str(tmp_path / "db"))
+        conn = kuzu.Connection(db)
+        conn.execute("CREATE NODE TABLE Entity(id STRING, PRIMARY KEY(id))")
+        conn.execute("CREATE REL TABLE LINKS(FROM Entity TO Entity)")
+        conn.execute("UNWIND ['a', 'b', 'c', 'd'] AS i CREATE (:Entity {id: i})")
+        for source, target in [("a", "b"), ("b", "c"), ("c", "d")]:
+            conn.execute(
+                "MATCH (s:Entity {id: $s}), (t:Entity {id: $t}) CREATE (s)-[:LINKS]->(t)", {"s": source, "t": target}
+            )
+
+        engine = AnalyticsEngine(conn, snapshot_config=GraphSnapshotConfig(watermark_check_interval=3600))
+        response = await engine.analyze_paths(
+            PathAnalysisRequest(source_nodes=["a"], target_nodes=["d"], max_depth=5)
+        )
+        assert response.paths_found == 1
+        assert response.paths[0]["path"] == ["a", "b", "c", "d"]
+        assert response.graph_metrics.connected_components == 1
+        assert engine.graph_snapshots.get_stats()["full_loads"] == 1
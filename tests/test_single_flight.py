@@ -0,0 +1,125 @@
+"""
+Single-Flight Cache Tests
+=========================
+Validates per-key load coalescing, the cross-process Redis lease, XFetch
+early refresh and AnalyticsCache.get_or_compute envelopes.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from server.analytics.cache import AnalyticsCache
+from server.core.single_flight import CachedValue, RedisLease, SingleFlight
+
+
+class FakeLeaseClient:
+    """The SET NX PX / compare-and-delete subset of redis.asyncio"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, name, value, nx=False, px=None):
+        if nx and name in self.values:
+            return None
+        self.values[name] = value
+        return True
+
+    async def eval(self, script, numkeys, name, token):
+        if self.values.get(name) == token:
+            del self.values[name]
+            return 1
+        return 0
+
+
+def _flight(store, lease=None):
+    async def read(key):
+        return store.get(key)
+
+    async def write(key, entry, expire_seconds):
+        store[key] = entry
+
+    return SingleFlight(read, write, lease=lease, lease_poll_interval=0.01, beta=0.0)
+
+
+class TestSingleFlight:
+    """One loader per key, in process and across processes."""
+
+    @pytest.mark.asyncio
+    async def test_processes_share_one_load_through_lease(self):
+        store, client = {}, FakeLeaseClient()
+        # Two groups with a shared store stand in for two worker processes
+        first = _flight(store, RedisLease(client, ttl_ms=2000))
+        second = _flight(store, RedisLease(client, ttl_ms=2000))
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "result"
+
+        results = await asyncio.gather(
+            *[first.get_or_compute("k", loader, ttl=60) for _ in range(5)],
+            *[second.get_or_compute("k", loader, ttl=60) for _ in range(5)],
+        )
+        assert results == ["result"] * 10
+        assert calls == 1
+        assert first.stats["coalesced_waits"] + second.stats["coalesced_waits"] == 8
+        assert first.stats["lease_waits"] + second.stats["lease_waits"] == 1
+        assert client.values == {}
+
+    @pytest.mark.asyncio
+    async def test_expired_stale_window_loads_synchronously(self):
+        store = {"k": CachedValue("old", fresh_until=0, stale_until=1)}
+        flight = _flight(store)
+
+        async def loader():
+            return "new"
+
+        assert await flight.get_or_compute("k", loader, ttl=60, stale_ttl=30) == "new"
+        assert flight.stats["stale_serves"] == 0
+        assert store["k"].stale_until - store["k"].fresh_until == pytest.approx(30)
+
+
+class TestEarlyRefresh:
+    """XFetch probabilistic early expiration."""
+
+    def test_probability_rises_towards_expiry(self):
+        now = time.time()
+        entry = CachedValue("v", fresh_until=now + 10, stale_until=now + 20, compute_time=1.0)
+        far = sum(entry.should_refresh_early(now, beta=1.0) for _ in range(2000))
+        near = sum(entry.should_refresh_early(now + 9.5, beta=1.0) for _ in range(2000))
+        # P(refresh) = exp(-remaining / (delta * beta))
+        assert far < 5
+        assert near / 2000 == pytest.approx(0.61, abs=0.05)
+        assert not CachedValue("v", now + 1, now + 2).should_refresh_early(now + 0.99)
+
+
+class TestAnalyticsCacheGetOrCompute:
+    """AnalyticsCache single-flight API in in-memory mode."""
+
+    @pytest.mark.asyncio
+    async def test_envelope_round_trip_and_invalidate(self):
+        cache = AnalyticsCache(default_ttl=60)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"top_nodes": [1, 2]}
+
+        params = {"centrality_type": "pagerank", "limit": 10}
+        results = await asyncio.gather(*[
+            cache.get_or_compute("centrality", params, loader) for _ in range(20)
+        ])
+        assert calls == 1 and all(r == {"top_nodes": [1, 2]} for r in results)
+        assert await cache.get("centrality", params) == {"top_nodes": [1, 2]}
+
+        await cache.invalidate("centrality", params)
+        await cache.get_or_compute("centrality", params, loader)
+        assert calls == 2
+        stats = (await cache.get_cache_stats())["single_flight"]
+        assert stats["coalesced_waits"] == 19
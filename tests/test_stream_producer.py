@@ -0,0 +1,194 @@
+"""
+Stream Producer Tests
+=====================
+Validates flat event encoding, pipelined per-stream flushes, the bounded
+buffer's overflow policies (block, drop-oldest, spill and replay) and
+producer throughput/latency statistics.
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from server.streaming.stream_producer import (
+    MemoryOperationEvent,
+    OperationType,
+    OverflowPolicy,
+    ProducerConfig,
+    StreamProducer,
+    encode_event,
+)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def xadd(self, name, fields, maxlen=None, approximate=True):
+        self.commands.append((name, fields))
+        return self
+
+    async def execute(self, raise_on_error=True):
+        if self.client.fail:
+            raise ConnectionError("stream unavailable")
+        await asyncio.sleep(0)
+        self.client.executed.append(len(self.commands))
+        for name, fields in self.commands:
+            self.client.streams.setdefault(name, []).append(fields)
+        return [f"{i}-0" for i in range(len(self.commands))]
+
+
+class FakeClient:
+    def __init__(self):
+        self.streams = {}
+        self.executed = []
+        self.fail = False
+        self.transactions = []
+
+    def pipeline(self, transaction=True):
+        self.transactions.append(transaction)
+        return FakePipeline(self)
+
+
+def _producer(client, **overrides):
+    async def factory():
+        return client
+    return StreamProducer("test", ProducerConfig(**overrides), client_factory=factory)
+
+
+async def _produce(producer, count):
+    for i in range(count):
+        await producer.produce_memory_operation(
+            OperationType.CREATE_ENTITY, entity_count=i, processing_time_ms=1.5
+        )
+
+
+class TestEventEncoding:
+    """Flat field encoding of stream events."""
+
+    def test_fields_are_flat_strings(self):
+        event = MemoryOperationEvent(
+            event_id="e1", event_type=None, timestamp="2025-01-01T00:00:00", source="test",
+            operation_type=OperationType.SEARCH_NODES, processing_time_ms=2.5,
+            data={"query": "x"},
+        )
+        fields = encode_event(event)
+        assert fields["event_type"] == "memory_operation"
+        assert fields["operation_type"] == "search_nodes"
+        assert float(fields["processing_time_ms"]) == 2.5
+        assert json.loads(fields["data"]) == {"query": "x"}
+        assert "user_id" not in fields and "metadata" not in fields
+        assert all(isinstance(value, str) for value in fields.values())
+
+    def test_equal_but_distinct_json_values_are_kept(self):
+        payloads = [{"success": 1}, {"success": True}, {"success": 1.0}, {"success": 0}, {"success": False}]
+        encoded = [
+            encode_event(MemoryOperationEvent(event_id=f"e{i}", event_type=None, timestamp="t",
+                                              source="test", data=data))["data"]
+            for i, data in enumerate(payloads)
+        ]
+        assert encoded == ['{"success":1}', '{"success":true}', '{"success":1.0}',
+                           '{"success":0}', '{"success":false}']
+
+
+class TestPipelinedFlush:
+    """Batching events into per-stream pipelines."""
+
+    @pytest.mark.asyncio
+    async def test_one_pipeline_per_stream(self):
+        client = FakeClient()
+        producer = _producer(client, flush_batch_size=10_000)
+        await _produce(producer, 250)
+        await producer.produce_system_metric("cpu", 0.5)
+        await producer._flush_buffer()
+
+        assert sorted(client.executed) == [1, 250]
+        assert client.transactions == [False, False]
+        assert len(client.streams["analytics:memory_operations"]) == 250
+        stats = await producer.get_stats()
+        assert stats["events_produced"] == 251
+        assert stats["flush_latency"]["count"] == 1
+        assert stats["throughput_events_per_second"] > 0
+
+    @pytest.mark.asyncio
+    async def test_background_flusher_drains_on_batch_size(self):
+        client = FakeClient()
+        producer = _producer(client, flush_batch_size=100, flush_interval=60)
+        await producer.start()
+        try:
+            await _produce(producer, 100)
+            for _ in range(50):
+                if client.executed:
+                    break
+                await asyncio.sleep(0.01)
+            assert client.executed == [100]
+        finally:
+            await producer.stop()
+
+
+class TestOverflowPolicies:
+    """Bounded buffer behaviour when producers outpace the flusher."""
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_newest_events(self):
+        client = FakeClient()
+        producer = _producer(client, flush_batch_size=1000, max_buffer_events=10,
+                             overflow_policy=OverflowPolicy.DROP_OLDEST)
+        await _produce(producer, 15)
+        assert (await producer.get_stats())["events_dropped"] == 5
+        await producer._flush_buffer()
+        counts = [int(f["entity_count"]) for f in client.streams["analytics:memory_operations"]]
+        assert counts == list(range(5, 15))
+
+    @pytest.mark.asyncio
+    async def test_block_waits_for_flusher(self):
+        client = FakeClient()
+        producer = _producer(client, flush_batch_size=1000, flush_interval=60, max_buffer_events=10,
+                             overflow_policy=OverflowPolicy.BLOCK)
+        await producer.start()
+        try:
+            await asyncio.wait_for(_produce(producer, 35), timeout=2)
+            await producer.stop()
+            assert len(client.streams["analytics:memory_operations"]) == 35
+            assert (await producer.get_stats())["events_dropped"] == 0
+        finally:
+            await producer.stop()
+
+    @pytest.mark.asyncio
+    async def test_spill_and_replay(self, tmp_path):
+        client = FakeClient()
+        client.fail = True
+        spill_path = str(tmp_path / "spill.ndjson")
+        producer = _producer(client, flush_batch_size=1000, max_buffer_events=5,
+                             overflow_policy=OverflowPolicy.SPILL, spill_path=spill_path)
+        await _produce(producer, 8)
+        with pytest.raises(ConnectionError):
+            await producer._flush_buffer()
+        await producer._spill_task
+
+        stats = await producer.get_stats()
+        assert stats["events_spilled"] == 8
+        assert stats["buffer_size"] == 0
+
+        client.fail = False
+        await producer._replay_spill()
+        counts = sorted(int(f["entity_count"]) for f in client.streams["analytics:memory_operations"])
+        assert counts == list(range(8))
+        assert (await producer.get_stats())["events_replayed"] == 8
+
+
+class TestProducePath:
+    """Cost of produce_event on the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_produce_does_not_await_network(self):
+        client = FakeClient()
+        producer = _producer(client, flush_batch_size=1_000_000, max_buffer_events=1_000_000)
+        start = time.perf_counter()
+        await _produce(producer, 20_000)
+        elapsed = time.perf_counter() - start
+        assert client.executed == []
+        assert 20_000 / elapsed > 20_000
@@ -0,0 +1,148 @@
+"""
+Streaming Window Aggregation Tests
+==================================
+Validates the incremental sliding/tumbling/session windows and quantile
+sketch used by the feature workers against brute-force recomputation, and
+the features emitted by MemoryOperationFeatureWorker.
+"""
+
+import random
+import statistics
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from server.streaming.windowing import QuantileSketch, SessionWindow, SlidingWindow, TumblingWindow
+
+
+class TestQuantileSketch:
+    """Relative-error quantiles that merge and subtract exactly."""
+
+    def test_quantiles_within_relative_accuracy(self):
+        rng = np.random.default_rng(7)
+        values = rng.lognormal(mean=3.0, sigma=1.0, size=20_000)
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(float(value))
+        for q in (0.5, 0.9, 0.99):
+            expected = float(np.quantile(values, q, method="lower"))
+            assert sketch.quantile(q) == pytest.approx(expected, rel=0.021)
+
+    def test_subtract_undoes_merge(self):
+        a, b = QuantileSketch(), QuantileSketch()
+        for value in (1.0, 2.0, 3.0):
+            a.add(value)
+        for value in (100.0, 200.0):
+            b.add(value)
+        a.merge(b)
+        a.subtract(b)
+        assert a.count == 3
+        assert a.quantile(1.0) == pytest.approx(3.0, rel=0.02)
+
+
+class TestSlidingWindow:
+    """Running aggregates kept in step with the live events."""
+
+    def test_matches_brute_force_as_panes_expire(self):
+        window = SlidingWindow(60, 30, quantile_fields=("latency",))
+        rng = random.Random(3)
+        events = []
+        ts = 1_000.0
+        for _ in range(3000):
+            ts += rng.uniform(0, 0.2)
+            latency = rng.uniform(1, 500)
+            key = rng.choice(["create", "search", "delete"])
+            events.append((ts, key, latency))
+            window.add(ts, key, {"latency": latency})
+
+        snapshot = window.snapshot()
+        live = [e for e in events if e[0] >= window._panes[0].start]
+        latencies = [e[2] for e in live]
+        assert snapshot.count == len(live)
+        assert snapshot.keys == {k: sum(1 for e in live if e[1] == k) for k in {e[1] for e in live}}
+        stats = snapshot.stats["latency"]
+        assert stats.mean == pytest.approx(statistics.mean(latencies))
+        assert stats.std == pytest.approx(statistics.stdev(latencies))
+        assert stats.minimum == min(latencies)
+        assert stats.maximum == max(latencies)
+        assert snapshot.quantile("latency", 0.5) == pytest.approx(statistics.median(latencies), rel=0.03)
+        assert ts - 60 <= live[0][0] <= ts - 59
+
+    def test_idle_window_expires_on_advance(self):
+        window = SlidingWindow(60, 30)
+        window.add(100.0, "a", {"x": 1.0})
+        window.advance(500.0)
+        assert window.snapshot().count == 0
+        assert window.snapshot().stats == {}
+
+    def test_out_of_order_and_late_events(self):
+        window = SlidingWindow(60, 30, pane_seconds=1)
+        window.add(100.5, "a")
+        window.add(110.5, "a")
+        window.add(105.5, "b")  # earlier pane that is still live
+        window.add(10.0, "c")   # already outside the window
+        assert window.snapshot().keys == {"a": 2, "b": 1}
+        assert [p.start for p in window._panes] == [100, 105, 110]
+        assert window.late_events == 1
+
+    def test_tumbling_window_resets_at_boundary(self):
+        window = TumblingWindow(10)
+        window.add(3.0, "a")
+        window.add(9.0, "a")
+        assert len(window) == 2
+        window.add(10.0, "b")
+        assert window.snapshot().keys == {"b": 1}
+
+
+class TestSessionWindow:
+    """Per-key sessions closed after an inactivity gap."""
+
+    def test_sessions_close_after_gap(self):
+        sessions = SessionWindow(gap_seconds=30)
+        sessions.add(0, "u1")
+        sessions.add(10, "u1")
+        sessions.add(20, "u2")
+        closed = sessions.advance(45)
+        assert [s.key for s in closed] == ["u1"]
+        assert closed[0].duration == 10
+        assert sessions.snapshot()["active_sessions"] == 1
+
+
+class TestMemoryOperationFeatures:
+    """Features emitted by MemoryOperationFeatureWorker."""
+
+    @pytest.mark.asyncio
+    async def test_windowed_features_from_stream_fields(self):
+        from server.streaming.feature_workers import MemoryOperationFeatureWorker
+
+        class Client:
+            async def xack(self, *args):
+                return 1
+
+        worker = MemoryOperationFeatureWorker()
+        base = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc).timestamp()
+        for i in range(100):
+            await worker._process_message(f"{i}-0", {
+                "timestamp": datetime.utcfromtimestamp(base + i * 0.5).isoformat(),
+                "operation_type": "create_entity" if i % 4 else "search_nodes",
+                "processing_time_ms": str(float(i + 1)),
+                "entity_count": "2",
+                "relation_count": "0",
+                "session_id": "s1",
+            }, Client())
+
+        await worker._compute_windowed_features(now=base + 50)
+        latest = await worker.get_latest_features()
+
+        assert latest["operation_type_distribution_1min"].value == {"create_entity": 0.75, "search_nodes": 0.25}
+        timing = latest["processing_time_stats_1min"].value
+        assert timing["mean"] == pytest.approx(50.5)
+        assert timing["median"] == pytest.approx(50.5, rel=0.03)
+        assert timing["max"] == 100.0
+        assert latest["entity_creation_stats_1hour"].value["total_entities"] == 200
+        assert latest["session_activity"].value["active_sessions"] == 1
+
+        # Sliding windows emit once per slide interval
+        await worker._compute_windowed_features(now=base + 51)
+        assert len((await worker.get_features(["memory_operation_rate_1min"]))["memory_operation_rate_1min"]) == 1
@@ -0,0 +1,109 @@
+"""
+Telemetry Group-Commit Writer Tests
+===================================
+Validates that concurrent submissions are coalesced into bulk UNWIND
+inserts, that size/linger bounds are respected, and that failures are
+propagated to every waiting request.
+"""
+
+import asyncio
+import json
+import threading
+from typing import Any, Dict, List
+
+import pytest
+
+from server.telemetry_batch import (
+    TELEMETRY_UNWIND_QUERY,
+    TelemetryBatchConfig,
+    TelemetryBatchResult,
+    TelemetryBatchWriter,
+    telemetry_event_to_row,
+)
+
+
+class RecordingConnection:
+    """Minimal stand-in for kuzu.Connection that records executed statements."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.calls: List[Dict[str, Any]] = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def execute(self, query: str, params: Dict[str, Any]) -> None:
+        if self.fail:
+            raise RuntimeError("disk full")
+        with self._lock:
+            self.calls.append({"query": query, "params": params})
+
+
+def _row(i: int) -> Dict[str, Any]:
+    return telemetry_event_to_row({
+        "event_type": "user_action",
+        "timestamp": "2025-06-01T12:00:00Z",
+        "user_id": f"user-{i % 3}",
+        "session_id": "sess-1",
+        "data": {"n": i},
+    })
+
+
+class TestTelemetryBatchWriter:
+    """Group-commit behaviour of TelemetryBatchWriter."""
+
+    def test_event_to_row_serialises_data_as_json(self):
+        row = _row(7)
+        assert json.loads(row["data"]) == {"n": 7}
+        assert row["event_type"] == "user_action"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_coalesced(self):
+        conn = RecordingConnection()
+        commits: List[TelemetryBatchResult] = []
+
+        async def on_commit(result: TelemetryBatchResult) -> None:
+            commits.append(result)
+
+        writer = TelemetryBatchWriter(conn, TelemetryBatchConfig(max_batch_size=1000, max_linger_ms=50), on_commit)
+        await writer.start()
+        results = await asyncio.gather(*(writer.submit([_row(i)]) for i in range(20)))
+        await writer.stop()
+
+        assert len(conn.calls) == 1
+        assert conn.calls[0]["query"] == TELEMETRY_UNWIND_QUERY
+        assert len(conn.calls[0]["params"]["events"]) == 20
+        assert {r.batch_id for r in results} == {1}
+        assert len(commits) == 1
+        assert commits[0].request_count == 20
+        assert commits[0].user_count == 3
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_splits_batches(self):
+        conn = RecordingConnection()
+        writer = TelemetryBatchWriter(conn, TelemetryBatchConfig(max_batch_size=5, max_linger_ms=50))
+        await writer.start()
+        await asyncio.gather(*(writer.submit([_row(i)]) for i in range(12)))
+        await writer.stop()
+
+        sizes = [len(call["params"]["events"]) for call in conn.calls]
+        assert sum(sizes) == 12
+        assert max(sizes) <= 5
+
+    @pytest.mark.asyncio
+    async def test_failure_propagates_to_all_waiters(self):
+        writer = TelemetryBatchWriter(RecordingConnection(fail=True), TelemetryBatchConfig(max_linger_ms=20))
+        await writer.start()
+        results = await asyncio.gather(
+            *(writer.submit([_row(i)]) for i in range(3)), return_exceptions=True
+        )
+        await writer.stop()
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert writer.get_stats()["batches_failed"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_submit_rejected_when_queue_full(self):
+        writer = TelemetryBatchWriter(RecordingConnection(), TelemetryBatchConfig(max_queue_size=2))
+        await writer.start()
+        with pytest.raises(RuntimeError):
+            await writer.submit([_row(i) for i in range(3)])
+        await writer.stop()
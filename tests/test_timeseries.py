@@ -0,0 +1,53 @@
+"""
+Time Series Ring Tests
+======================
+Validates the columnar ring buffer and rollups behind the dashboard
+DataBuffer: bisect windows across wrap-around and rollup-backed summaries
+against a brute-force reduce.
+"""
+
+import numpy as np
+import pytest
+
+from server.core.timeseries import TimeSeriesRing
+
+
+class TestTimeSeriesRing:
+    """Windows and summaries over the ring and its rollups."""
+
+    def test_window_across_wrap_around(self):
+        ring = TimeSeriesRing(("x",), capacity=100)
+        for t in range(250):
+            ring.append(1000.0 + t, [t])
+        assert len(ring) == 100
+        assert ring.first_timestamp() == 1150.0
+        timestamps, values = ring.window(1190.0, 1210.0)
+        assert timestamps.tolist() == [1190.0 + i for i in range(21)]
+        assert values[:, 0].tolist() == list(range(190, 211))
+        assert ring.count_since(0) == 100
+
+    def test_summaries_match_brute_force(self):
+        rng = np.random.default_rng(7)
+        times = 1_000_000.0 + np.cumsum(rng.uniform(0.2, 2.0, 5000))
+        values = rng.normal(size=(5000, 2))
+        ring = TimeSeriesRing(("a", "b"), capacity=6000)
+        for t, row in zip(times, values):
+            ring.append(t, row)
+
+        for window in (30, 400, 1800, 5000):
+            since = times[-1] - window
+            expected = values[times >= since]
+            stats = ring.summarize(since)
+            assert stats.count == len(expected)
+            assert stats.mean("a") == pytest.approx(expected[:, 0].mean())
+            assert stats.min("b") == expected[:, 1].min()
+            assert stats.max("a") == expected[:, 0].max()
+
+    def test_rollups_outlive_raw_retention(self):
+        ring = TimeSeriesRing(("x",), capacity=60)
+        for t in range(7200):
+            ring.append(t, [1.0])
+        assert len(ring) == 60
+        # Two hours summarised from 1m/5m buckets although only a minute is raw
+        assert ring.summarize(0).count == 7200
+        assert ring.nbytes < 100_000
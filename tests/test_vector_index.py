@@ -0,0 +1,118 @@
+"""
+ANN Vector Index Tests
+======================
+Validates the IVF-flat index against the exact scan: recall, pre-filtering,
+incremental upserts/removals and persistence with memory-mapped reload.
+"""
+
+import numpy as np
+import pytest
+
+from server.vector_index import (
+    IVFFlatIndex,
+    VectorIndexConfig,
+    VectorIndexManager,
+    benchmark_index,
+    sample_benchmark_queries,
+    validate_identifier,
+)
+
+
+def _clustered_vectors(n: int = 4000, dim: int = 32, clusters: int = 40, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=n)
+    vectors = centers[labels] + rng.normal(scale=0.3, size=(n, dim))
+    return np.arange(n, dtype=np.int64), vectors.astype(np.float32)
+
+
+@pytest.fixture
+def built_index() -> IVFFlatIndex:
+    ids, vectors = _clustered_vectors()
+    index = IVFFlatIndex(vectors.shape[1], VectorIndexConfig(nprobe=8, min_train_size=1000))
+    index.build(ids, vectors)
+    return index
+
+
+class TestIVFFlatIndex:
+    """Search quality and maintenance of IVFFlatIndex."""
+
+    def test_builds_multiple_lists(self, built_index):
+        assert built_index.nlist > 1
+        assert built_index.size == 4000
+        assert built_index.list_offsets[-1] == 4000
+
+    def test_recall_against_exact_scan(self, built_index):
+        queries = sample_benchmark_queries(built_index, 50)
+        report = benchmark_index(built_index, queries, k=10)
+        assert report["recall_at_k"] >= 0.9
+        assert report["queries"] == 50
+
+    def test_small_index_is_exact(self):
+        ids, vectors = _clustered_vectors(n=200)
+        index = IVFFlatIndex(vectors.shape[1])
+        index.build(ids, vectors)
+        query = vectors[3]
+        assert [h.node_offset for h in index.search(query, 5)] == [h.node_offset for h in index.exact_search(query, 5)]
+
+    def test_prefilter_restricts_results(self, built_index):
+        allowed = np.arange(0, 4000, 97, dtype=np.int64)
+        hits = built_index.search(np.ones(32), 10, allowed_ids=allowed)
+        assert len(hits) == 10
+        assert all(h.node_offset in set(allowed.tolist()) for h in hits)
+
+    def test_upsert_and_remove(self, built_index):
+        probe = np.full(32, 5.0, dtype=np.float32)
+        built_index.upsert([99999], probe.reshape(1, -1))
+        assert built_index.search(probe, 1)[0].node_offset == 99999
+        assert built_index.max_synced_offset == 99999
+
+        built_index.remove([99999])
+        assert all(h.node_offset != 99999 for h in built_index.search(probe, 5))
+
+        top = built_index.search(probe, 1)[0].node_offset
+        built_index.remove([top])
+        assert all(h.node_offset != top for h in built_index.search(probe, 5))
+
+    def test_save_and_mmap_reload(self, built_index, tmp_path):
+        query = np.ones(32)
+        before = [h.node_offset for h in built_index.search(query, 10)]
+        built_index.save(tmp_path / "Doc__emb__default")
+
+        loaded = IVFFlatIndex.load(tmp_path / "Doc__emb__default", built_index.config)
+        assert isinstance(loaded.vectors, np.memmap)
+        assert [h.node_offset for h in loaded.search(query, 10)] == before
+
+
+class TestVectorIndexManager:
+    """Kuzu integration of VectorIndexManager."""
+
+    def test_rejects_unsafe_identifiers(self):
+        with pytest.raises(ValueError):
+            validate_identifier("Doc) DETACH DELETE n //")
+
+    @pytest.mark.asyncio
+    async def test_build_sync_and_filter_from_kuzu(self, tmp_path):
+        kuzu = pytest.importorskip("kuzu")
+        db = kuzu.Database(str(tmp_path / "db"))
+        conn = kuzu.Connection(db)
+        conn.execute("CREATE NODE TABLE Doc(name STRING, kind STRING, emb FLOAT[3], PRIMARY KEY(name))")
+        for i, (kind, emb) in enumerate([("a", [1, 0, 0]), ("b", [0, 1, 0]), ("a", [0, 0, 1])]):
+            conn.execute("CREATE (:Doc {name: $n, kind: $k, emb: $e})", {"n": f"d{i}", "k": kind, "e": emb})
+
+        manager = VectorIndexManager(str(tmp_path / "indexes"), VectorIndexConfig(refresh_interval_seconds=0))
+        index = await manager.get_or_build(conn, "Doc", "emb", "default")
+        assert index.size == 3
+
+        conn.execute("CREATE (:Doc {name: 'd3', kind: 'b', emb: [0.9, 0.1, 0.0]})")
+        index = await manager.get_or_build(conn, "Doc", "emb", "default")
+        assert index.size == 4
+
+        allowed = VectorIndexManager.resolve_filter_ids(conn, "Doc", {"kind": "b"})
+        hits = index.search([1.0, 0.0, 0.0], 1, allowed_ids=allowed)
+        assert hits[0].node_offset == 3
+
+        manager.save_all()
+        reloaded = VectorIndexManager(str(tmp_path / "indexes"))
+        assert reloaded.load_persisted() == 1
+        assert reloaded.get(("Doc", "emb", "default")).size == 4